@@ -1,24 +1,66 @@
-from flask import Flask, request, jsonify, render_template, Response, redirect, url_for
+from flask import (
+    Flask, Blueprint, current_app, request, jsonify, render_template, Response, redirect, url_for,
+    stream_with_context, has_request_context,
+)
 from flask_cors import CORS
+import click
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import io
+import codecs
 import csv
+import gzip
+import json
+import multiprocessing
+import re
+import shutil
+import zlib
+import threading
+import tempfile
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import gamestore
+from assets import AssetManifest
+from compression import DEFAULT_LEVELS, choose_encoding, compress, compress_stream
+from group_commit import WriteCoordinator
+from leagues import ENVIRON_KEY as LEAGUE_ENVIRON_KEY, LeagueRouter, valid_league
+from seating import SeatingError, check_players, plan_stats, schedule_balanced, schedule_swiss
+from snapshot_format import SnapshotError, SnapshotReader, write_snapshot
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "games.db")
 
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+def current_db_path():
+    # 리그 요청이면 그 리그의 파일, 아니면 기본 DB (요청 밖에서는 항상 기본 DB)
+    league = request.environ.get(LEAGUE_ENVIRON_KEY) if has_request_context() else None
+    if league is None:
+        return current_app.config["DB_PATH"]
+    return league_db_path(league)
+
+
+def league_db_path(league):
+    return os.path.join(current_app.config["LEAGUES_DIR"], f"{league}.db")
+
+
+def get_db(db_path=None):
+    # 요청 밖(백그라운드 작업 등)에서는 db_path 를 직접 넘겨준다
+    conn = sqlite3.connect(db_path or current_db_path(), timeout=10)
     conn.row_factory = sqlite3.Row
+    conn.create_function("is_monthly_tournament", 1, is_monthly_tournament, deterministic=True)
     return conn
 
 
-def init_db():
-    conn = get_db()
+# ================== 스키마 마이그레이션 ==================
+# 적용된 마지막 단계 번호를 PRAGMA user_version 에 저장한다.
+# 스키마를 바꿀 때는 MIGRATIONS 끝에 새 단계를 추가만 하고, 이미 배포된 단계는 수정하지 않는다.
+# 각 단계는 SQL 문 리스트이거나 conn 을 받는 함수이며, 단계마다 짧은 트랜잭션 하나로 적용된다.
 
+def _m001_base_tables(conn):
     # 개인전 게임 기록 (4인 마작)
     conn.execute("""
         CREATE TABLE IF NOT EXISTS games (
@@ -98,31 +140,1242 @@ def init_db():
         )
     """)
 
-    conn.commit()
-    conn.close()
 
+# ---- 배포된 단계의 백필 계산 ----
+# 단계가 배포될 때의 계산을 그대로 얼려 둔 것. 앱 쪽 집계/순위 함수가 나중에 바뀌어도 오래된 DB 를 올릴 때
+# 그 단계가 처음 배포됐을 때와 같은 결과가 나오도록, 단계에서는 앱 함수 대신 이것만 쓴다. 고치지 않는다.
+
+_MIG_UMA = (50, 10, -10, -30)      # 5~6단계 당시의 기본 규칙
+_MIG_RETURN_SCORE = 30000
+_MIG_GAME_COLUMNS = """
+    created_at,
+    player1_name, player2_name, player3_name, player4_name,
+    player1_score, player2_score, player3_score, player4_score
+"""
+
+
+def _mig_games(conn):
+    """(source, archive_id, created_at, names, scores). 개인전 → 대회전 → 아카이브(아카이브 목록에 있는 것만), id 순."""
+    for source, table in (("games", "games"), ("tournament", "tournament_games")):
+        for g in conn.execute(f"SELECT {_MIG_GAME_COLUMNS} FROM {table} ORDER BY id ASC").fetchall():
+            yield source, 0, g[0], g[1:5], g[5:9]
+    for g in conn.execute(f"""
+        SELECT archive_id, {_MIG_GAME_COLUMNS} FROM archive_games
+        WHERE archive_id IN (SELECT id FROM archives)
+        ORDER BY archive_id ASC, id ASC
+    """).fetchall():
+        yield "archive", g[0], g[1], g[2:6], g[6:10]
+
+
+def _mig_seats(names, scores, uma=_MIG_UMA, return_score=_MIG_RETURN_SCORE):
+    """이름이 있는 자리마다 (이름, 점수, 순위, pt). 동점이면 앞 자리가 높은 순위."""
+    order = sorted(range(4), key=lambda i: scores[i], reverse=True)
+    ranks = [0, 0, 0, 0]
+    for pos, i in enumerate(order):
+        ranks[i] = pos + 1
+    for i in range(4):
+        name = (names[i] or "").strip()
+        if name:
+            yield name, scores[i], ranks[i], (scores[i] - return_score) / 1000.0 + uma[ranks[i] - 1]
+
+
+def _mig_totals(acc, key, score, rank, pt):
+    # acc[key] = [대국 수, 1~4등, 토비, 최고 점수, pt 합]
+    t = acc.get(key)
+    if t is None:
+        t = acc[key] = [0, 0, 0, 0, 0, 0, score, 0.0]
+    t[0] += 1
+    t[rank] += 1
+    t[5] += score < 0
+    t[6] = max(t[6], score)
+    t[7] += pt
+
+
+def _m005_player_aggregates(conn):
+    # 플레이어 × 출처(개인전/대회전/아카이브별) 누적 집계. 뱃지 규칙은 이 테이블만 보고 판정한다
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS player_aggregates (
+            player_name TEXT NOT NULL,
+            source TEXT NOT NULL,
+            archive_id INTEGER NOT NULL DEFAULT 0,
+            games INTEGER NOT NULL DEFAULT 0,
+            rank1 INTEGER NOT NULL DEFAULT 0,
+            rank2 INTEGER NOT NULL DEFAULT 0,
+            rank3 INTEGER NOT NULL DEFAULT 0,
+            rank4 INTEGER NOT NULL DEFAULT 0,
+            tobi INTEGER NOT NULL DEFAULT 0,
+            max_score INTEGER,
+            pt_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (player_name, source, archive_id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_player_aggregates_archive ON player_aggregates(archive_id)")
+
+    # 뱃지 코드별 자동 부여 조건(JSON 리스트, 모두 만족하면 부여)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS badge_rules (
+            badge_code INTEGER PRIMARY KEY,
+            conditions TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_player_badges_player ON player_badges(player_name, badge_code)"
+    )
+
+    # 기존 기록 전체로 집계를 한 번 채운다
+    acc = {}
+    for source, archive_id, _, names, scores in _mig_games(conn):
+        for name, score, rank, pt in _mig_seats(names, scores):
+            _mig_totals(acc, (name, source, archive_id), score, rank, pt)
+    conn.executemany("""
+        INSERT INTO player_aggregates (
+            player_name, source, archive_id,
+            games, rank1, rank2, rank3, rank4, tobi, max_score, pt_sum
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(*key, *t) for key, t in acc.items()])
+
+
+def _m006_period_stats(conn):
+    for table in ("games", "tournament_games", "archive_games"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_at ON {table}(created_at)")
+
+    # bucket: "month"("2025-03") | "week"("2025-W09", ISO 주). 출처/아카이브별로 나눠 두고 조회 때 합친다
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS player_period_stats (
+            bucket TEXT NOT NULL,
+            period TEXT NOT NULL,
+            player_name TEXT NOT NULL,
+            source TEXT NOT NULL,
+            archive_id INTEGER NOT NULL DEFAULT 0,
+            games INTEGER NOT NULL DEFAULT 0,
+            rank1 INTEGER NOT NULL DEFAULT 0,
+            rank2 INTEGER NOT NULL DEFAULT 0,
+            rank3 INTEGER NOT NULL DEFAULT 0,
+            rank4 INTEGER NOT NULL DEFAULT 0,
+            pt_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, period, player_name, source, archive_id)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_player_period_stats_player
+        ON player_period_stats(player_name, bucket, period)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_player_period_stats_archive ON player_period_stats(archive_id)")
+
+    # 기존 기록 전체로 한 번 채운다. 날짜로 읽을 수 없는 대국은 건너뛴다
+    acc = {}
+    for source, archive_id, created_at, names, scores in _mig_games(conn):
+        try:
+            d = datetime.fromisoformat(str(created_at or "").strip())
+        except ValueError:
+            continue
+        year, week, _ = d.isocalendar()
+        periods = (("month", d.strftime("%Y-%m")), ("week", f"{year}-W{week:02d}"))
+        for name, score, rank, pt in _mig_seats(names, scores):
+            for bucket, period in periods:
+                _mig_totals(acc, (bucket, period, name, source, archive_id), score, rank, pt)
+    conn.executemany("""
+        INSERT INTO player_period_stats (
+            bucket, period, player_name, source, archive_id,
+            games, rank1, rank2, rank3, rank4, pt_sum
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(*key, *t[:5], t[7]) for key, t in acc.items()])
+
+
+def _m007_scoring_profiles(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scoring_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            uma TEXT NOT NULL,
+            return_score INTEGER NOT NULL,
+            total_score INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+    # 1번은 이 단계 전까지 코드에 박혀 있던 규칙(값을 그대로 적어 둔다)
+    conn.execute("""
+        INSERT OR IGNORE INTO scoring_profiles (id, name, uma, return_score, total_score, created_at)
+        VALUES (1, '기본', '[50, 10, -10, -30]', 30000, 100000, ?)
+    """, (datetime.now().isoformat(timespec="minutes"),))
+
+    # 대상(source + archive_id)별 배정. 행이 없으면 1번
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS profile_assignments (
+            source TEXT NOT NULL,
+            archive_id INTEGER NOT NULL DEFAULT 0,
+            profile_id INTEGER NOT NULL,
+            PRIMARY KEY (source, archive_id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS profile_standings (
+            source TEXT NOT NULL,
+            archive_id INTEGER NOT NULL DEFAULT 0,
+            profile_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            games INTEGER NOT NULL DEFAULT 0,
+            rank1 INTEGER NOT NULL DEFAULT 0,
+            rank2 INTEGER NOT NULL DEFAULT 0,
+            rank3 INTEGER NOT NULL DEFAULT 0,
+            rank4 INTEGER NOT NULL DEFAULT 0,
+            tobi INTEGER NOT NULL DEFAULT 0,
+            max_score INTEGER,
+            pt_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (source, archive_id, profile_id, player_name)
+        )
+    """)
+    # status: computing(작업 대기/진행) | ready(캐시로 보관 중). 배정된 프로필은 행이 없어도 ready
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS profile_standings_state (
+            source TEXT NOT NULL,
+            archive_id INTEGER NOT NULL DEFAULT 0,
+            profile_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            job_id INTEGER,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (source, archive_id, profile_id)
+        )
+    """)
+
+    # 배정이 아직 없으므로 모든 대상이 1번 프로필
+    acc = {}
+    for source, archive_id, _, names, scores in _mig_games(conn):
+        for name, score, rank, pt in _mig_seats(names, scores):
+            _mig_totals(acc, (source, archive_id, 1, name), score, rank, pt)
+    conn.executemany("""
+        INSERT INTO profile_standings (
+            source, archive_id, profile_id, player_name,
+            games, rank1, rank2, rank3, rank4, tobi, max_score, pt_sum
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(*key, *t) for key, t in acc.items()])
+
+
+# 9단계 당시의 이름 키(name_keys). 검색 쪽 규칙이 바뀌면 새 단계에서 다시 채운다
+_MIG_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_MIG_JUNGSEONG = "ㅏ ㅐ ㅑ ㅒ ㅓ ㅔ ㅕ ㅖ ㅗ ㅗㅏ ㅗㅐ ㅗㅣ ㅛ ㅜ ㅜㅓ ㅜㅔ ㅜㅣ ㅠ ㅡ ㅡㅣ ㅣ".split()
+_MIG_JONGSEONG = [""] + (
+    "ㄱ ㄲ ㄱㅅ ㄴ ㄴㅈ ㄴㅎ ㄷ ㄹ ㄹㄱ ㄹㅁ ㄹㅂ ㄹㅅ ㄹㅌ ㄹㅍ ㄹㅎ ㅁ ㅂ ㅂㅅ ㅅ ㅆ ㅇ ㅈ ㅊ ㅋ ㅌ ㅍ ㅎ"
+).split()
+_MIG_COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+
+def _mig_name_keys(name):
+    norm, cho = [], []
+    for ch in name.strip().casefold():
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            lead, rest = divmod(code, 588)
+            vowel, tail = divmod(rest, 28)
+            norm.append(_MIG_CHOSEONG[lead] + _MIG_JUNGSEONG[vowel] + _MIG_JONGSEONG[tail])
+            cho.append(_MIG_CHOSEONG[lead])
+        else:
+            ch = _MIG_COMPOUND_JAMO.get(ch, ch)
+            norm.append(ch)
+            cho.append(ch)
+    return "".join(norm), "".join(cho)
+
+
+def _m009_player_names(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS player_names (
+            name TEXT PRIMARY KEY,
+            norm TEXT NOT NULL,
+            choseong TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_player_names_norm ON player_names(norm)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_player_names_choseong ON player_names(choseong)")
+
+    # 집계/뱃지에 있는 이름을 한 번 채운다
+    cur = conn.execute("""
+        SELECT player_name FROM player_aggregates
+        UNION
+        SELECT player_name FROM player_badges
+    """)
+    names = {(r[0] or "").strip() for r in cur.fetchall()}
+    conn.executemany(
+        "INSERT OR IGNORE INTO player_names (name, norm, choseong) VALUES (?, ?, ?)",
+        [(name, *_mig_name_keys(name)) for name in sorted(names) if name],
+    )
+
+
+def _mig_minute(value):
+    # 대국 시각 → 1970-01-01 부터의 분, 읽을 수 없으면 -1 (game_minute 를 얼려 둔 것)
+    if not isinstance(value, str):
+        return -1
+    if len(value) == 10:
+        value += "T00:00"
+    elif len(value) >= 16 and value[10] == " ":
+        value = value[:10] + "T" + value[11:16]
+    value = value[:16]
+    if len(value) != 16 or value[10] != "T":
+        return -1
+    try:
+        return int((datetime.fromisoformat(value) - datetime(1970, 1, 1)).total_seconds()) // 60
+    except ValueError:
+        return -1
+
+
+def _mig_minute_text(minute):
+    # 최근 대국 시각: 분 단위 ISO 문자열. 읽을 수 없거나 1970년 이전이면 ""
+    if minute < 0:
+        return ""
+    return (datetime(1970, 1, 1) + timedelta(minutes=minute)).isoformat(timespec="minutes")
+
+
+def _mig_archive_standings(conn, archive_id):
+    """10단계 당시의 아카이브 순위표 / 플레이어별 요약 계산(store_archive_standings 를 얼려 둔 것)."""
+    row = conn.execute("""
+        SELECT p.uma, p.return_score FROM profile_assignments a
+        JOIN scoring_profiles p ON p.id = a.profile_id
+        WHERE a.source = 'archive' AND a.archive_id = ?
+    """, (archive_id,)).fetchone()
+    if row is None:
+        row = conn.execute("SELECT uma, return_score FROM scoring_profiles WHERE id = 1").fetchone()
+    uma, return_score = json.loads(row[0]), row[1]
+
+    games = conn.execute(f"""
+        SELECT {_MIG_GAME_COLUMNS} FROM archive_games WHERE archive_id = ? ORDER BY id ASC
+    """, (archive_id,)).fetchall()
+    # 최근 대국은 시각 순(같은 분이면 id 순). 시각이 뒤섞여 들어온 아카이브도 순위표와 같은 순서로
+    minutes = [_mig_minute(g[0]) for g in games]
+    order = sorted(range(len(games)), key=minutes.__getitem__)
+    totals, pos_pt, recent, co = {}, {}, {}, {}
+    for i in order:
+        g = games[i]
+        seats = list(_mig_seats(g[1:5], g[5:9], uma, return_score))
+        for name, score, rank, pt in seats:
+            t = totals.get(name)
+            if t is None:
+                t = totals[name] = [0, 0, 0, 0, 0, 0, score, 0]
+            t[0] += 1
+            t[rank] += 1
+            t[5] += score < 0
+            t[6] = max(t[6], score)
+            t[7] += score
+            pos_pt[name] = pos_pt.get(name, 0.0) + max(pt, 0.0)
+            recent.setdefault(name, []).append([_mig_minute_text(minutes[i]), rank])
+            for other, _, other_rank, _ in seats:
+                if other != name:
+                    c = co.setdefault(name, {}).setdefault(other, [0, 0, 0])
+                    c[0] += 1
+                    c[1] += rank
+                    c[2] += other_rank
+
+    def pt_sum(t):
+        return (
+            (t[7] - t[0] * return_score) / 1000.0
+            + uma[0] * t[1] + uma[1] * t[2] + uma[2] * t[3] + uma[3] * t[4]
+        )
+
+    rows = sorted(((name, t, pt_sum(t)) for name, t in totals.items()), key=lambda r: (-r[2], -r[1][0], r[0]))
+    conn.execute("DELETE FROM archive_standings WHERE archive_id = ?", (archive_id,))
+    conn.execute("DELETE FROM archive_player_stats WHERE archive_id = ?", (archive_id,))
+    for position, (name, t, pt) in enumerate(rows, start=1):
+        conn.execute("""
+            INSERT INTO archive_standings (
+                archive_id, position, player_name,
+                games, rank1, rank2, rank3, rank4, tobi, max_score, score_sum, pt_sum, pos_pt_sum
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (archive_id, position, name, *t, pt, pos_pt[name]))
+        co_players = sorted(([other, *c] for other, c in co.get(name, {}).items()), key=lambda c: (-c[1], c[0]))
+        conn.execute("""
+            INSERT INTO archive_player_stats (archive_id, player_name, position, recent, co_players)
+            VALUES (?, ?, ?, ?, ?)
+        """, (archive_id, name, position, json.dumps(recent[name][-30:]), json.dumps(co_players, ensure_ascii=False)))
+
+    conn.execute(
+        "UPDATE archives SET game_count = ?, player_count = ? WHERE id = ?",
+        (len(games), len(rows), archive_id),
+    )
+
+
+def _m010_archive_standings(conn):
+    # 아카이브는 가져온 뒤 바뀌지 않으므로 최종 순위표와 플레이어별 요약을 그때 한 번 계산해 둔다
+    conn.execute("ALTER TABLE archives ADD COLUMN game_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE archives ADD COLUMN player_count INTEGER NOT NULL DEFAULT 0")
+    # pos_pt_sum: 판마다 음수 pt 를 0 으로 자른 합(시즌 점수의 월례 대회 환산용)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_standings (
+            archive_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            games INTEGER NOT NULL,
+            rank1 INTEGER NOT NULL,
+            rank2 INTEGER NOT NULL,
+            rank3 INTEGER NOT NULL,
+            rank4 INTEGER NOT NULL,
+            tobi INTEGER NOT NULL,
+            max_score INTEGER NOT NULL,
+            score_sum INTEGER NOT NULL,
+            pt_sum REAL NOT NULL,
+            pos_pt_sum REAL NOT NULL,
+            PRIMARY KEY (archive_id, position)
+        )
+    """)
+    # recent: 최근 30판 [[시각, 순위], ...], co_players: [[이름, 함께 친 수, 내 순위 합, 상대 순위 합], ...]
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_player_stats (
+            archive_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            recent TEXT NOT NULL,
+            co_players TEXT NOT NULL,
+            PRIMARY KEY (archive_id, player_name)
+        )
+    """)
+    for (archive_id,) in conn.execute("SELECT id FROM archives").fetchall():
+        _mig_archive_standings(conn, archive_id)
+
+
+MIGRATIONS = [
+    (1, "기본 테이블", _m001_base_tables),
+    (2, "아카이브 대국 archive_id 인덱스", [
+        "CREATE INDEX IF NOT EXISTS idx_archive_games_archive ON archive_games(archive_id)",
+    ]),
+    (3, "데이터 버전 스탬프(워커 간 캐시 무효화)", [
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        """,
+    ]),
+    # CSV 아카이브는 500행마다 커밋하므로 다 들어가기 전까지는 archives.importing 으로 목록/조회에서 숨긴다
+    (4, "백그라운드 작업(대용량 업로드)", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            params TEXT NOT NULL,
+            upload_path TEXT NOT NULL,
+            rows_parsed INTEGER NOT NULL DEFAULT 0,
+            rows_inserted INTEGER NOT NULL DEFAULT 0,
+            rows_updated INTEGER NOT NULL DEFAULT 0,
+            rows_skipped INTEGER NOT NULL DEFAULT 0,
+            errors TEXT NOT NULL DEFAULT '[]',
+            message TEXT,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            heartbeat_at REAL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)",
+        "ALTER TABLE archives ADD COLUMN importing INTEGER NOT NULL DEFAULT 0",
+    ]),
+    (5, "플레이어 누적 집계 + 뱃지 자동 부여 규칙", _m005_player_aggregates),
+    (6, "대국 시각 인덱스 + 월/주 단위 플레이어 집계", _m006_period_stats),
+    (7, "점수 규칙 프로필 + 프로필별 순위표", _m007_scoring_profiles),
+    (8, "대회 라운드 자리 배정", [
+        """
+        CREATE TABLE IF NOT EXISTS tournament_rounds (
+            round_no INTEGER PRIMARY KEY,
+            mode TEXT NOT NULL,
+            published_at TEXT NOT NULL
+        )
+        """,
+        # player1..4 = 동/남/서/북. 결과가 들어오면 game_id 로 연결
+        """
+        CREATE TABLE IF NOT EXISTS tournament_tables (
+            round_no INTEGER NOT NULL,
+            table_no INTEGER NOT NULL,
+            player1_name TEXT NOT NULL,
+            player2_name TEXT NOT NULL,
+            player3_name TEXT NOT NULL,
+            player4_name TEXT NOT NULL,
+            game_id INTEGER,
+            PRIMARY KEY (round_no, table_no)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tournament_tables_game ON tournament_tables(game_id)",
+    ]),
+    (9, "플레이어 이름 검색 인덱스(자모/초성)", _m009_player_names),
+    (10, "아카이브 최종 순위표 / 플레이어별 요약", _m010_archive_standings),
+    (11, "결과 입력 멱등 키(오프라인 재전송)", [
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            target TEXT NOT NULL,
+            key TEXT NOT NULL,
+            game_id INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (target, key)
+        )
+        """,
+    ]),
+    (12, "통산 기록용 아카이브 순위표 플레이어 인덱스", [
+        "CREATE INDEX IF NOT EXISTS idx_archive_standings_player ON archive_standings(player_name)",
+    ]),
+    # 플레이어 쪽은 5단계의 (player_name, badge_code) 인덱스가 있다
+    (13, "뱃지 코드별 부여 목록 인덱스", [
+        "CREATE INDEX IF NOT EXISTS idx_player_badges_code ON player_badges(badge_code)",
+    ]),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate_db(db_path):
+    """
+    db_path 의 스키마를 SCHEMA_VERSION 까지 올립니다.
+    최신이면 PRAGMA 한 번 읽고 끝나므로 워커가 뜰 때마다 호출해도 됩니다.
+    여러 프로세스가 동시에 호출해도 BEGIN IMMEDIATE 로 한 쪽만 각 단계를 적용합니다.
+    """
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return version
+
+        # WAL 이면 인덱스 생성 같은 단계가 도는 동안에도 읽기는 막히지 않는다
+        conn.execute("PRAGMA journal_mode=WAL")
+
+        for step, desc, action in MIGRATIONS:
+            if step <= version:
+                continue
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 락을 잡는 사이 다른 워커가 먼저 적용했을 수 있음
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= step:
+                    conn.execute("COMMIT")
+                    continue
+
+                if callable(action):
+                    action(conn)
+                else:
+                    for sql in action:
+                        conn.execute(sql)
+                conn.execute(f"PRAGMA user_version = {int(step)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            version = step
+            print(f"[MIGRATE] {step}: {desc}")
+
+        return version
+    finally:
+        conn.close()
+
+
+bp = Blueprint("madang", __name__, cli_group=None)
+
+
+def create_app(config=None):
+    """
+    앱 팩토리. import 만으로는 DB 를 열지 않고, 여기서 마이그레이션을 한 번 확인합니다.
+    gunicorn --preload "app:create_app()" 로 띄우면 마스터에서 한 번만 적용되고,
+    워커는 fork 후 DB 연결을 새로 엽니다(마이그레이션용 연결은 fork 전에 닫힘).
+    """
+    app = Flask(__name__, static_folder="static", template_folder="templates")
+    app.config["DB_PATH"] = DB_PATH
+    # 1 이면 GET 라우트가 메모리 스냅샷에서 읽는다(결승처럼 읽기만 몰릴 때)
+    app.config["READ_SNAPSHOT"] = os.environ.get("MADANG_READ_SNAPSHOT") == "1"
+    app.config["RESPONSE_CACHE_MAX_BYTES"] = 32 * 1024 * 1024
+    app.config["UPLOAD_DIR"] = os.path.join(BASE_DIR, "uploads")   # 작업 대기 중인 업로드 파일
+    # 0 이면 static/ 을 그대로 쓴다(파일을 고치면서 새로고침으로 바로 확인할 때)
+    app.config["ASSET_PIPELINE"] = os.environ.get("MADANG_ASSET_PIPELINE", "1") == "1"
+    # JSON / CSV 응답 압축. 이보다 작은 본문은 그대로 보낸다
+    app.config["COMPRESS_MIN_BYTES"] = 1024
+    app.config["COMPRESS_LEVELS"] = dict(DEFAULT_LEVELS)   # {"gzip": 1~9, "br": 0~11}
+    app.config["COMPRESS_MIMETYPES"] = ("application/json", "text/csv")
+    # 여러 리그(클럽) 호스팅: 설정하면 /l/<리그>/... 요청은 LEAGUES_DIR/<리그>.db 를 쓴다
+    app.config["LEAGUES_DIR"] = os.environ.get("MADANG_LEAGUES_DIR") or None
+    app.config["LEAGUE_HOSTS"] = {}                                         # {"호스트": "리그"}
+    app.config["LEAGUE_DOMAIN"] = os.environ.get("MADANG_LEAGUE_DOMAIN") or None   # 서브도메인 = 리그
+    app.config["LEAGUE_IDLE_SECONDS"] = 600            # 이만큼 요청이 없던 리그는 연결/캐시를 닫는다
+    app.config["LEAGUE_CACHE_MAX_BYTES"] = 4 * 1024 * 1024
+    # 결과 입력 그룹 커밋: 이 시간(초) 안에 들어온 쓰기를, 최대 이만큼 모아 한 번에 커밋.
+    # 요청이 동시에 도는 워커(gunicorn --threads, ASGI)에서만 모인다. sync 워커에서는 기다리지 않고 바로 커밋
+    app.config["WRITE_BATCH_WAIT"] = 0.005
+    app.config["WRITE_BATCH_MAX"] = 64
+    # ASGI 로 띄울 때(uvicorn asgi:app, asgi.py): 요청을 실행할 스레드 수와, 그 스레드를 기다릴 수 있는 요청 수.
+    # 넘치면 503. /api/live 연결은 스레드를 쓰지 않는다
+    app.config["ASGI_THREADS"] = 16
+    app.config["ASGI_MAX_PENDING"] = 256
+    app.config["LIVE_POLL_SECONDS"] = 1.0       # 리그마다 /api/versions 를 이 간격으로 확인해서 알림
+    app.config["LIVE_MAX_CONNECTIONS"] = 1000
+    if config:
+        app.config.update(config)
+
+    CORS(app)
+    app.register_blueprint(bp)
+    if app.config["ASSET_PIPELINE"]:
+        app.extensions["madang_assets"] = AssetManifest(app.static_folder)
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.after_request(compress_response)
+    if app.config["LEAGUES_DIR"]:
+        os.makedirs(app.config["LEAGUES_DIR"], exist_ok=True)
+        app.wsgi_app = LeagueRouter(
+            app.wsgi_app, hosts=app.config["LEAGUE_HOSTS"], domain=app.config["LEAGUE_DOMAIN"],
+        )
+
+    migrate_db(app.config["DB_PATH"])
+    return app
+
+
+# ================== DB 파일별 프로세스 상태 ==================
+# 워커 프로세스 안에서 DB 파일 하나에 딸린 상태(변경 감지 연결, 읽기 스냅샷)를 보관한다.
+
+class DbState:
+    def __init__(self, db_path, cache_max_bytes, write_batch_max=64, write_batch_wait=0.005):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._watch_conn = None
+        self._scope_versions = {}
+        self._scope_versions_at = None   # _scope_versions 를 읽었을 때의 data_version
+        self.snapshot = ReadSnapshot(db_path)
+        self.response_cache = ResponseCache(cache_max_bytes)
+        self.game_store = gamestore.GameStore()
+        self.badge_catalog = None   # ("badges" 버전, {코드: 뱃지}) — badge_catalog() 참고
+        self.jobs_resumed = False
+        self.schema_checked = False   # 리그 DB 마이그레이션 확인 — _open_league 참고
+        self.last_used = time.monotonic()
+        # 결과 입력 쓰기를 모아서 커밋(워커 프로세스마다 하나, DB 파일마다 하나)
+        self.writer = WriteCoordinator(
+            lambda: get_db(db_path), max_batch=write_batch_max, max_wait=write_batch_wait,
+            on_commit=lambda: _after_write(db_path),
+        )
+
+    def _watch(self):
+        if self._watch_conn is None:
+            self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._watch_conn
+
+    def data_version(self):
+        # 다른 연결(다른 워커 포함)이 커밋할 때마다 값이 바뀐다. 파일 I/O 없이 확인 가능
+        with self.lock:
+            return self._watch().execute("PRAGMA data_version").fetchone()[0]
+
+    def scope_versions(self, scopes):
+        """
+        data_versions 테이블의 scope 별 버전. 커밋이 없었으면 테이블을 다시 읽지 않는다.
+        바뀐 scope 가 있으면 그 scope 에 묶인 캐시 항목만 버린다.
+        """
+        with self.lock:
+            conn = self._watch()
+            dv = conn.execute("PRAGMA data_version").fetchone()[0]
+            if dv != self._scope_versions_at:
+                fresh = dict(conn.execute("SELECT scope, version FROM data_versions").fetchall())
+                changed = {
+                    k for k in set(fresh) | set(self._scope_versions)
+                    if fresh.get(k) != self._scope_versions.get(k)
+                }
+                self._scope_versions = fresh
+                self._scope_versions_at = dv
+                if changed:
+                    self.response_cache.drop_scopes(changed)
+            return tuple(self._scope_versions.get(k, 0) for k in scopes)
+
+    def close(self):
+        # 쉬는 리그를 내릴 때. 이 상태를 아직 들고 있는 요청이 있으면 연결은 필요할 때 다시 열린다
+        with self.lock:
+            if self._watch_conn is not None:
+                self._watch_conn.close()
+                self._watch_conn = None
+            self._scope_versions, self._scope_versions_at = {}, None
+        self.snapshot.close()
+        self.response_cache.clear()
+
+
+_DB_STATES = {}
+_DB_STATES_LOCK = threading.Lock()
+_DB_STATES_SWEEP_SECONDS = 60
+_db_states_swept_at = time.monotonic()
+
+
+def db_state(db_path=None):
+    db_path = db_path or current_db_path()
+    state = _DB_STATES.get(db_path)
+    if state is None:
+        with _DB_STATES_LOCK:
+            state = _DB_STATES.get(db_path)
+            if state is None:
+                # 리그 DB 는 수십 개가 뜰 수 있으므로 응답 캐시를 작게
+                main = db_path == current_app.config["DB_PATH"]
+                state = _DB_STATES[db_path] = DbState(
+                    db_path,
+                    current_app.config["RESPONSE_CACHE_MAX_BYTES" if main else "LEAGUE_CACHE_MAX_BYTES"],
+                    current_app.config["WRITE_BATCH_MAX"],
+                    current_app.config["WRITE_BATCH_WAIT"],
+                )
+    state.last_used = time.monotonic()
+    _evict_idle_states()
+    return state
+
+
+def _evict_idle_states():
+    """LEAGUE_IDLE_SECONDS 동안 쓰지 않은 리그 DB 의 상태(감시 연결, 스냅샷, 캐시)를 내린다. 기본 DB 는 그대로."""
+    global _db_states_swept_at
+    now = time.monotonic()
+    if now - _db_states_swept_at < _DB_STATES_SWEEP_SECONDS:
+        return
+    idle = current_app.config["LEAGUE_IDLE_SECONDS"]
+    with _DB_STATES_LOCK:
+        _db_states_swept_at = now
+        stale = [
+            path for path, st in _DB_STATES.items()
+            if path != current_app.config["DB_PATH"] and now - st.last_used > idle
+        ]
+        evicted = [_DB_STATES.pop(path) for path in stale]
+    for st in evicted:
+        st.close()
+
+
+# ================== 리그별 DB ==================
+# LEAGUES_DIR 을 설정하면 leagues.LeagueRouter 가 요청을 리그로 나누고, current_db_path() 가 리그 파일을 고른다.
+# 리그마다 파일이 따로라 락 / data_versions / 응답 캐시 / 컬럼 저장소 / 백그라운드 작업 줄이 모두 따로 돈다.
+# 리그 파일은 처음 요청이 올 때 마이그레이션을 확인하며, 없는 리그는 404 (flask create-league 로 만든다).
+# 확인했다는 표시는 그 리그의 DbState 에 둔다. 쉬는 리그의 상태를 내리면 표시도 함께 사라진다.
+
+_LEAGUE_OPEN_LOCK = threading.Lock()
+
+
+@bp.before_app_request
+def _open_league():
+    league = request.environ.get(LEAGUE_ENVIRON_KEY)
+    if league is None:
+        return None
+    if not current_app.config["LEAGUES_DIR"]:
+        return jsonify({"error": "leagues are not enabled"}), 404
+    path = league_db_path(league)
+    state = _DB_STATES.get(path)
+    if state is not None and state.schema_checked:
+        return None
+    with _LEAGUE_OPEN_LOCK:
+        # 없는 리그 이름으로는 DbState 를 만들지 않는다
+        if not os.path.exists(path):
+            return jsonify({"error": f"unknown league: {league}"}), 404
+        state = db_state(path)
+        if not state.schema_checked:
+            migrate_db(path)
+            state.schema_checked = True
+    return None
+
+
+@bp.cli.command("create-league")
+@click.argument("name")
+def create_league_command(name):
+    """LEAGUES_DIR 에 리그 DB 를 만들고 스키마를 최신으로 올립니다."""
+    if not current_app.config["LEAGUES_DIR"]:
+        raise click.ClickException("MADANG_LEAGUES_DIR 를 설정하세요.")
+    if not valid_league(name):
+        raise click.ClickException("리그 이름은 영소문자/숫자/-/_ 40자 이하입니다.")
+    path = league_db_path(name)
+    version = migrate_db(path)
+    click.echo(f"{name}: {path} (schema {version})")
+
+
+class ReadSnapshot:
+    """
+    디스크 DB 의 메모리 복사본(sqlite3 backup API). GET 라우트가 여기서 읽고, 쓰기는 계속 디스크로 간다.
+    세대마다 이름 붙은 공유 메모리 DB 를 새로 만들고 교체한다. 복사는 백그라운드 스레드 하나가 하고
+    (쓰기가 몰려도 밀린 만큼 한 번만), 요청 스레드는 복사를 기다리지 않는다.
+    스냅샷이 지금 data_version 보다 뒤처져 있으면 connect() 는 None — 그동안은 디스크에서 읽는다
+    (방금 쓴 클라이언트가 이전 세대를 읽지 않도록).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._state_lock = threading.Lock()   # 아래 네 값. 잡고 있는 동안은 짧은 일만
+        self._keeper = None     # 현재 세대 메모리 DB 를 살려두는 연결
+        self._uri = None
+        self._version = None
+        self._wanted = None     # 백그라운드 복사가 따라잡아야 할 data_version
+        self._copying = False
+        self._closed = False
+        self._generation = 0
+
+    def connect(self, version):
+        with self._state_lock:
+            if self._uri is not None and self._version == version:
+                # keeper 가 살아 있는 동안 연다(연 뒤에는 세대가 바뀌어도 이 연결이 메모리 DB 를 붙잡는다)
+                conn = sqlite3.connect(self._uri, uri=True)
+                conn.row_factory = sqlite3.Row
+                conn.create_function("is_monthly_tournament", 1, is_monthly_tournament, deterministic=True)
+                return conn
+        self.refresh_async(version)
+        return None
+
+    def refresh_async(self, version):
+        with self._state_lock:
+            if self._closed or (self._version == version and self._uri is not None):
+                return
+            self._wanted = version
+            if self._copying:
+                return   # 돌고 있는 복사가 끝나면 _wanted 를 보고 한 번 더
+            self._copying = True
+        threading.Thread(target=self._copy_loop, name="madang-snapshot", daemon=True).start()
+
+    def close(self):
+        with self._state_lock:
+            if self._keeper is not None:
+                self._keeper.close()
+            self._keeper, self._uri, self._version, self._wanted = None, None, None, None
+            self._closed = True
+
+    def _copy_loop(self):
+        while True:
+            with self._state_lock:
+                version = self._wanted
+                if self._closed or version is None or (version == self._version and self._uri is not None):
+                    self._copying = False
+                    return
+                self._generation += 1
+                uri = f"file:madang_snapshot_{id(self)}_{self._generation}?mode=memory&cache=shared"
+            try:
+                mem = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                disk = sqlite3.connect(self.db_path)
+                try:
+                    disk.backup(mem)
+                finally:
+                    disk.close()
+            except sqlite3.Error as e:
+                print(f"[SNAPSHOT] copy failed: {e!r}")
+                with self._state_lock:
+                    self._copying = False
+                return
+
+            with self._state_lock:
+                if self._closed:
+                    mem.close()
+                    self._copying = False
+                    return
+                old = self._keeper
+                self._keeper, self._uri, self._version = mem, uri, version
+                if self._wanted == version:
+                    self._wanted = None
+                if old is not None:
+                    # 이전 세대를 읽고 있는 연결이 모두 닫히면 메모리에서 사라진다
+                    old.close()
+
+
+class ResponseCache:
+    """
+    인코딩이 끝난 JSON 바이트를 (경로, 쿼리, 압축 방식) 별로 보관하는 LRU. 전체 바이트 수가 max_bytes 를 넘으면 오래된 것부터 버린다.
+    항목마다 의존하는 scope 와 그 버전을 같이 저장해 두고, 버전이 다르면 쓰지 않는다.
+    압축해서 넣은 항목은 Content-Encoding 도 같이 보관한다(작아서 압축하지 않았으면 None).
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()   # key -> (scopes, versions, body, content_encoding)
+        self._lock = threading.Lock()
+
+    def get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != versions:
+                return None
+            self._entries.move_to_end(key)
+            return entry[2], entry[3]
+
+    def put(self, key, scopes, versions, body, content_encoding=None):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (scopes, versions, body, content_encoding)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def drop_scopes(self, scopes):
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if not scopes.isdisjoint(e[0])]
+            for k in stale:
+                self._discard(k)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[2])
+
+
+def bump_data_versions(conn, *scopes):
+    # 쓰기와 같은 트랜잭션 안에서 호출해야 한다(커밋되면 모든 워커의 캐시가 그 scope 만 버림)
+    for scope in scopes:
+        conn.execute("""
+            INSERT INTO data_versions (scope, version) VALUES (?, 1)
+            ON CONFLICT(scope) DO UPDATE SET version = version + 1
+        """, (scope,))
+
+
+def cached_json(scopes, build):
+    """
+    build() 결과를 JSON 으로 인코딩해 캐시한다. 같은 요청이 다시 오면 SQL 도 직렬화도 건너뛴다.
+    scopes: 이 응답이 의존하는 데이터 범위(예: "games", "archive:3")
+    build() 가 None 이면(대상 없음) 캐시하지 않고 None 을 돌려준다. 404 는 호출한 쪽에서.
+    """
+    def build_bytes():
+        data = build()
+        return None if data is None else current_app.json.dumps(data).encode("utf-8")
+
+    return cached_response(scopes, build_bytes)
+
+
+def cached_response(scopes, build_bytes, mimetype="application/json"):
+    # build_bytes 가 이미 인코딩된 바이트를 돌려주는 경우(컬럼 포맷 등)
+    state = db_state()
+    # "*" 는 모든 응답이 의존하는 scope (DB 복원처럼 전부 바뀌는 경우에 올린다)
+    scopes = frozenset(scopes) | {"*"}
+    encoding = response_encoding(mimetype)
+    key = (request.path, request.query_string, encoding)
+    versions = state.scope_versions(sorted(scopes))
+
+    cached = state.response_cache.get(key, versions)
+    if cached is None:
+        body, applied = build_bytes(), None
+        if body is None:
+            return None
+        if encoding and len(body) >= current_app.config["COMPRESS_MIN_BYTES"]:
+            body, applied = compress(body, encoding, current_app.config["COMPRESS_LEVELS"][encoding]), encoding
+        state.response_cache.put(key, scopes, versions, body, applied)
+    else:
+        body, applied = cached
+
+    resp = Response(body, mimetype=mimetype)
+    if encoding:
+        resp.vary.add("Accept-Encoding")
+    if applied:
+        resp.headers["Content-Encoding"] = applied
+    return resp
+
+
+# ================== 응답 압축 ==================
+# JSON / CSV 응답을 Accept-Encoding 에 맞춰 gzip(또는 brotli)으로 보낸다.
+# cached_response 는 압축한 바이트를 캐시에 넣어 두고 그대로 보내며, 나머지 응답은 after_request 에서 압축한다.
+
+def response_encoding(mimetype):
+    """이 요청에 쓸 압축 방식. 압축 대상 형식이 아니거나 클라이언트가 받지 못하면 None."""
+    if mimetype.split(";")[0].strip() not in current_app.config["COMPRESS_MIMETYPES"]:
+        return None
+    return choose_encoding(request.accept_encodings)
+
+
+def compress_response(resp):
+    if (
+        resp.status_code < 200 or resp.status_code in (204, 304)
+        or "Content-Encoding" in resp.headers or resp.direct_passthrough
+        or resp.mimetype not in current_app.config["COMPRESS_MIMETYPES"]
+    ):
+        return resp
+
+    resp.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return resp
+    level = current_app.config["COMPRESS_LEVELS"][encoding]
+
+    if resp.is_streamed:
+        # 다 모으지 않고 조각마다 압축해서 흘려보낸다
+        resp.response = compress_stream(resp.response, encoding, level)
+        resp.headers.pop("Content-Length", None)
+    else:
+        body = resp.get_data()
+        if len(body) < current_app.config["COMPRESS_MIN_BYTES"]:
+            return resp
+        resp.set_data(compress(body, encoding, level))
+    resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
+# ================== 컬럼 포맷 응답 (?format=columnar) ==================
+# 행마다 키를 반복하는 대신 컬럼별 배열 하나씩 보낸다.
+#   strings: 문자열 사전(이름 등), 문자열 컬럼은 사전 인덱스 배열
+#   시간 컬럼: 모두 "YYYY-MM-DDTHH:MM" 이면 {"t0": 첫 값(분), "delta": [...]} , 아니면 문자열 배열 그대로
+# 디코딩은 script.js 의 decodeColumnar 참고.
+
+GAME_STRING_COLUMNS = ("player1_name", "player2_name", "player3_name", "player4_name")
+_EPOCH = datetime(1970, 1, 1)
+
+
+def wants_columnar():
+    return request.args.get("format") == "columnar"
+
+
+def _minutes_or_none(value):
+    if not isinstance(value, str) or len(value) != 16 or value[10] != "T":
+        return None
+    try:
+        return int((datetime.fromisoformat(value) - _EPOCH).total_seconds()) // 60
+    except ValueError:
+        return None
+
+
+def game_minute(value):
+    """
+    created_at → 1970-01-01 부터의 분(컬럼 저장소 / 기간 필터용). 읽을 수 없으면 -1.
+    "YYYY-MM-DD HH:MM[:SS]" 처럼 초나 공백 구분이 붙어도 분까지만 보고, 날짜만 있으면 그날 0시.
+    """
+    if not isinstance(value, str):
+        return -1
+    if len(value) == 10:
+        value += "T00:00"
+    elif len(value) >= 16 and value[10] == " ":
+        value = value[:10] + "T" + value[11:16]
+    minutes = _minutes_or_none(value[:16])
+    return -1 if minutes is None else minutes
+
+
+def _time_column_json(values):
+    minutes = [_minutes_or_none(v) for v in values]
+    if not minutes or None in minutes:
+        return json.dumps(list(values), ensure_ascii=False, separators=(",", ":"))
+    deltas = [b - a for a, b in zip(minutes, minutes[1:])]
+    return '{"t0":%d,"delta":[%s]}' % (minutes[0], ",".join(map(str, deltas)))
+
+
+def columnar_json(cur, strings=(), times=()):
+    """
+    커서 튜플에서 바로 컬럼 포맷 JSON 바이트를 만든다(행 dict 를 만들지 않음).
+    strings: 사전 인코딩할 컬럼, times: 델타 인코딩할 시간 컬럼, 나머지는 정수 컬럼.
+    """
+    names = [d[0] for d in cur.description]
+    rows = cur.fetchall()
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+
+    table = {}
+    parts = []
+    for name, values in zip(names, columns):
+        if name in strings:
+            idx = [table.setdefault(v or "", len(table)) for v in values]
+            body = ",".join(map(str, idx))
+            parts.append('"%s":[%s]' % (name, body))
+        elif name in times:
+            parts.append('"%s":%s' % (name, _time_column_json(values)))
+        elif all(type(v) is int for v in values):
+            parts.append('"%s":[%s]' % (name, ",".join(map(str, values))))
+        else:
+            parts.append('"%s":%s' % (name, json.dumps(list(values), ensure_ascii=False, separators=(",", ":"))))
+
+    out = '{"format":"columnar","rows":%d,"strings":%s,"columns":{%s}}' % (
+        len(rows), json.dumps(list(table), ensure_ascii=False, separators=(",", ":")), ",".join(parts),
+    )
+    return out.encode("utf-8")
+
+
+def columnar_query(sql, params=(), strings=GAME_STRING_COLUMNS, times=("created_at",)):
+    conn = get_read_db()
+    conn.row_factory = None   # Row 객체도 만들지 않는다
+    try:
+        return columnar_json(conn.execute(sql, params), strings, times)
+    finally:
+        conn.close()
+
+
+# ================== 대국 목록 페이지 (?limit=&before=) ==================
+# 대국 기록 표는 스크롤에 맞춰 한 페이지씩 받아 간다. offset 대신 마지막으로 받은 id 를 넘기는 키셋 방식이라
+# 몇 페이지째든 인덱스(PK)로 바로 찾아 들어간다. 둘 다 없으면 예전처럼 전체를 돌려준다.
+
+GAME_PAGE_MAX_LIMIT = 1000
+
+
+def game_page_args():
+    """(page, error). page 는 None(전체) 또는 {"before": id 또는 None, "limit": n}."""
+    if "limit" not in request.args and "before" not in request.args:
+        return None, None
+    limit = GAME_PAGE_MAX_LIMIT
+    if "limit" in request.args:
+        limit = request.args.get("limit", type=int)
+        if limit is None or limit < 1:
+            return None, "limit must be a positive integer"
+    before = None
+    if "before" in request.args:
+        before = request.args.get("before", type=int)
+        if before is None:
+            return None, "before must be an integer id"
+    return {"before": before, "limit": min(limit, GAME_PAGE_MAX_LIMIT)}, None
+
+
+def paged_games_sql(select, where=(), params=(), page=None, order="DESC"):
+    """
+    select 에 WHERE / ORDER BY 를 붙인다. 페이지 요청이면 before 보다 작은 id 를 최신부터 limit 개.
+    (전체 목록의 정렬(order)은 엔드포인트마다 다르지만 페이지는 항상 id 내림차순)
+    """
+    where, params = list(where), list(params)
+    if page is not None:
+        if page["before"] is not None:
+            where.append("id < ?")
+            params.append(page["before"])
+        order = "DESC"
+    sql = select
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY id {order}"
+    if page is not None:
+        sql += " LIMIT ?"
+        params.append(page["limit"])
+    return sql, params
+
+
+# ================== 결과 입력 쓰기 (그룹 커밋) ==================
+# 결과 입력 / 뱃지 부여 POST 는 각자 커밋하지 않고 DbState.writer 에 쓰기 함수를 넘긴다.
+# 같은 시점에 들어온 쓰기들이 한 트랜잭션에서 차례로 실행되고 한 번 커밋된다(group_commit.py 참고).
+
+class WriteRejected(Exception):
+    """쓰기 함수 안에서 입력을 거절(그 쓰기만 되돌리고 400)."""
+
+
+def run_write(fn):
+    """
+    fn(conn) → (응답 본문, 상태 코드). fn 은 커밋하지 않는다.
+    다른 워커가 쓰기 락을 오래 쥐고 있어 트랜잭션을 못 열면 503(클라이언트는 나중에 다시 보낸다).
+    """
+    try:
+        body, status = db_state().writer.submit(fn)
+    except WriteRejected as e:
+        return jsonify({"error": str(e)}), 400
+    except sqlite3.OperationalError as e:
+        if "locked" not in str(e):
+            raise
+        return jsonify({"error": "database is busy, try again"}), 503
+    return jsonify(body), status
+
+
+@bp.route("/api/admin/metrics/writes", methods=["GET"])
+def write_metrics_api():
+    """이 워커 프로세스의 그룹 커밋 상태(큐 길이, 배치 크기 분포, 평균 커밋 시간)."""
+    return jsonify({"pid": os.getpid(), **db_state().writer.metrics()})
+
+
+def get_read_db():
+    if current_app.config.get("READ_SNAPSHOT"):
+        state = db_state()
+        conn = state.snapshot.connect(state.data_version())
+        if conn is not None:
+            return conn
+    return get_db()
+
+
+def _after_write(db_path=None):
+    # 커밋 직후 호출: 이 워커의 스냅샷 복사를 바로 시작(다른 워커는 data_version 으로 알아챈다).
+    # 복사가 끝나기 전의 읽기는 디스크로 가므로 기다리지 않는다
+    if current_app.config.get("READ_SNAPSHOT"):
+        state = db_state(db_path)
+        state.snapshot.refresh_async(state.data_version())
+
+
+def __getattr__(name):
+    # 기존 실행 방식(gunicorn app:app)도 그대로 동작하도록, app 을 처음 찾을 때 만든다
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(name)
+
+
+# ================== 데이터 버전 / 멱등 키 (오프라인 클라이언트) ==================
+# script.js 는 받은 응답을 IndexedDB 에 두고 먼저 그린 뒤, /api/versions 의 scope 버전이 바뀐 것만 다시 받는다.
+# 오프라인 중 입력한 결과는 기기에 쌓아 두었다가 다시 보내므로, 같은 판이 두 번 들어가지 않게
+# 클라이언트가 만든 Idempotency-Key 헤더를 (대상, 키) → 만들어진 대국 id 로 기록해 둔다.
+# 기기에 쌓였던 입력은 입력한 시각(created_at, UTC 분)을 같이 보낸다. 키가 있는 요청에서만 받고,
+# 기기 시계가 크게 틀려 범위를 벗어나면 서버 시각으로 저장한다.
+
+SYNC_SCOPES = ("games", "tournament", "archives", "badges", "player_badges", "profiles")
+IDEMPOTENCY_KEY_MAX_LENGTH = 100
+CLIENT_CREATED_AT_MAX_AGE = timedelta(days=30)     # 오프라인으로 보관할 수 있는 기간
+CLIENT_CREATED_AT_MAX_AHEAD = timedelta(minutes=5)  # 기기 시계가 앞서 있어도 봐주는 만큼
+
+
+@bp.route("/api/versions", methods=["GET"])
+def data_versions_api():
+    """
+    ?scope=games&scope=archive:3 (없으면 SYNC_SCOPES). "*" 는 항상 포함되며, 바뀌면 전부 다시 받아야 한다.
+    ASGI 로 띄우면 같은 응답을 /api/live 이벤트 스트림으로도 받을 수 있다(asgi.py).
+    """
+    scopes = ["*", *(request.args.getlist("scope") or SYNC_SCOPES)]
+    resp = jsonify(dict(zip(scopes, db_state().scope_versions(scopes))))
+    resp.cache_control.no_store = True
+    return resp
+
+
+def idempotency_key():
+    """(키 또는 None, error)"""
+    key = request.headers.get("Idempotency-Key", "").strip()
+    if not key:
+        return None, None
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return None, "Idempotency-Key too long"
+    return key, None
+
+
+def client_created_at(data, key):
+    """(created_at 또는 None, error). None 이면 서버 시각으로 저장한다."""
+    value = data.get("created_at")
+    if key is None or value is None:
+        return None, None
+    minutes = _minutes_or_none(value)
+    if minutes is None:
+        return None, "created_at must be YYYY-MM-DDTHH:MM"
+    now = datetime.now()
+    at = _EPOCH + timedelta(minutes=minutes)
+    if not now - CLIENT_CREATED_AT_MAX_AGE <= at <= now + CLIENT_CREATED_AT_MAX_AHEAD:
+        return None, None
+    return value, None
+
+
+def replayed_game_id(conn, target, key):
+    # 같은 키로 이미 만든 대국이 있으면 그 id
+    if key is None:
+        return None
+    row = conn.execute(
+        "SELECT game_id FROM idempotency_keys WHERE target = ? AND key = ?", (target, key),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def remember_idempotency_key(conn, target, key, game_id, created_at):
+    # 대국 INSERT 와 같은 트랜잭션에서
+    if key is not None:
+        conn.execute(
+            "INSERT INTO idempotency_keys (target, key, game_id, created_at) VALUES (?, ?, ?, ?)",
+            (target, key, game_id, created_at),
+        )
 
-app = Flask(__name__, static_folder="static", template_folder="templates")
-CORS(app)
-init_db()
 
-# 마작 포인트 계산용 상수
-UMA_VALUES = [50, 10, -10, -30]   # 1등~4등 우마 (+오카 반영한 버전)
-RETURN_SCORE = 30000
+def replayed_response(game_id):
+    return {"id": game_id, "replayed": True}, 200
 
 
 # ================== 개인전 API ==================
 
-@app.route("/api/games", methods=["GET"])
+@bp.route("/api/games", methods=["GET"])
 def list_games():
-    conn = get_db()
-    cur = conn.execute("SELECT * FROM games ORDER BY id DESC")
-    rows = cur.fetchall()
-    conn.close()
-    return jsonify([dict(row) for row in rows])
+    page, error = game_page_args()
+    if error:
+        return jsonify({"error": error}), 400
+    sql, params = paged_games_sql("SELECT * FROM games", page=page)
+
+    if wants_columnar():
+        return cached_response(["games"], lambda: columnar_query(sql, params))
+
+    def build():
+        conn = get_read_db()
+        cur = conn.execute(sql, params)
+        rows = cur.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    return cached_json(["games"], build)
 
 
-@app.route("/api/games", methods=["POST"])
+@bp.route("/api/games", methods=["POST"])
 def create_game():
     data = request.get_json() or {}
 
@@ -148,34 +1401,52 @@ def create_game():
     except (ValueError, TypeError):
         return jsonify({"error": "scores must be integers"}), 400
 
-    # 네 명 점수 합 100000 체크
-    if s1 + s2 + s3 + s4 != 100000:
-        return jsonify({"error": "total score must be 100000"}), 400
-
-    created_at = datetime.now().isoformat(timespec="minutes")
-
-    conn = get_db()
-    cur = conn.execute("""
-        INSERT INTO games (
-            created_at,
-            player1_name, player2_name, player3_name, player4_name,
-            player1_score, player2_score, player3_score, player4_score
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (created_at, p1, p2, p3, p4, s1, s2, s3, s4))
-    conn.commit()
-    new_id = cur.lastrowid
-    conn.close()
+    key, error = idempotency_key()
+    if error:
+        return jsonify({"error": error}), 400
+    client_time, error = client_created_at(data, key)
+    if error:
+        return jsonify({"error": error}), 400
+
+    def write(conn):
+        # 쓰기 트랜잭션 안에서 확인하므로 같은 키가 동시에 와도(다른 워커여도) 한 번만 들어간다
+        replayed = replayed_game_id(conn, "games", key)
+        if replayed is not None:
+            return replayed_response(replayed)
+
+        # 네 명 점수 합 체크(개인전에 배정된 점수 규칙 기준)
+        total = assigned_profile(conn, "games")["total_score"]
+        if s1 + s2 + s3 + s4 != total:
+            raise WriteRejected(f"total score must be {total}")
+
+        created_at = client_time or datetime.now().isoformat(timespec="minutes")
+        cur = conn.execute("""
+            INSERT INTO games (
+                created_at,
+                player1_name, player2_name, player3_name, player4_name,
+                player1_score, player2_score, player3_score, player4_score
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (created_at, p1, p2, p3, p4, s1, s2, s3, s4))
+        remember_idempotency_key(conn, "games", key, cur.lastrowid, created_at)
+        awarded = record_game(conn, "games", created_at, [p1, p2, p3, p4], [s1, s2, s3, s4])
+        bump_data_versions(conn, "games", *(["player_badges"] if awarded else []))
+        return {"id": cur.lastrowid}, 201
 
-    return jsonify({"id": new_id}), 201
+    return run_write(write)
 
 
-@app.route("/api/games/<int:game_id>", methods=["DELETE"])
+@bp.route("/api/games/<int:game_id>", methods=["DELETE"])
 def delete_game(game_id):
     conn = get_db()
+    row = conn.execute("SELECT * FROM games WHERE id = ?", (game_id,)).fetchone()
     cur = conn.execute("DELETE FROM games WHERE id = ?", (game_id,))
+    if row:
+        rebuild_player_rollups(conn, "games", players=game_names(row))
+    bump_data_versions(conn, "games")
     conn.commit()
     deleted = cur.rowcount
     conn.close()
+    _after_write()
 
     if deleted == 0:
         return jsonify({"error": "not found"}), 404
@@ -184,9 +1455,10 @@ def delete_game(game_id):
 
 # ---- 개인전 CSV 내보내기 ----
 
-@app.route("/export", methods=["GET"])
+@bp.route("/export", methods=["GET"])
 def export_games():
-    conn = get_db()
+    conn = get_read_db()
+    profile = assigned_profile(conn, "games")
     cur = conn.execute("""
         SELECT
             id, created_at,
@@ -199,19 +1471,7 @@ def export_games():
     conn.close()
 
     def calc_pts(scores):
-        UMA = [50, 10, -10, -30]
-        RETURN_SCORE = 30000
-        order = sorted(range(4), key=lambda i: scores[i], reverse=True)
-
-        uma_for_player = [0, 0, 0, 0]
-        for rank, idx in enumerate(order):
-            uma_for_player[idx] = UMA[rank]
-
-        pts = []
-        for i in range(4):
-            base = (scores[i] - RETURN_SCORE) / 1000.0
-            pts.append(base + uma_for_player[i])
-        return pts
+        return [pt for _, pt in game_results(scores, profile)]
 
     output = io.StringIO()
     writer = csv.writer(output)
@@ -257,22 +1517,22 @@ def export_games():
 
 # ---- 개인전 CSV 업로드 ----
 
-@app.route("/import", methods=["GET", "POST"])
+@bp.route("/import", methods=["GET", "POST"])
 def import_games():
     if request.method == "GET":
-        return """
+        return f"""
         <!DOCTYPE html>
         <html lang="ko">
         <head>
           <meta charset="UTF-8">
           <title>개인전 CSV 업로드</title>
-          <link rel="stylesheet" href="/static/style.css">
+          <link rel="stylesheet" href="{asset_url("style.css")}">
         </head>
         <body>
           <div class="top-bar">
             <h1>개인전 CSV 업로드</h1>
             <div class="view-switch">
-              <a href="/" class="view-switch-btn">메인으로 돌아가기</a>
+              <a href="{request.script_root}/" class="view-switch-btn">메인으로 돌아가기</a>
             </div>
           </div>
           <div class="main-layout">
@@ -298,92 +1558,29 @@ def import_games():
     if not file:
         return "파일이 없습니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
-
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
-
-    import io as _io
-    sample = "\n".join(text.splitlines()[:5])
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
-
-    reader = csv.DictReader(_io.StringIO(text), dialect=dialect)
-
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
-
-    def pick_int(row, keys, default=0):
-        val = pick(row, keys, None)
-        if val is None or val == "":
-            return default
-        try:
-            return int(float(val))
-        except (ValueError, TypeError):
-            return default
-
-    conn = get_db()
-    inserted = 0
-
-    for row in reader:
-        created_at = pick(row, ["created_at", "시간"])
-        if not created_at:
-            created_at = datetime.now().isoformat(timespec="minutes")
-
-        p1_name = pick(row, ["player1_name", "P1 이름", "P1이름"])
-        p2_name = pick(row, ["player2_name", "P2 이름", "P2이름"])
-        p3_name = pick(row, ["player3_name", "P3 이름", "P3이름"])
-        p4_name = pick(row, ["player4_name", "P4 이름", "P4이름"])
-
-        s1 = pick_int(row, ["player1_score", "P1 점수", "P1점수"])
-        s2 = pick_int(row, ["player2_score", "P2 점수", "P2점수"])
-        s3 = pick_int(row, ["player3_score", "P3 점수", "P3점수"])
-        s4 = pick_int(row, ["player4_score", "P4 점수", "P4점수"])
-
-        if not (p1_name or p2_name or p3_name or p4_name):
-            continue
+    return enqueue_import_job("games", file)
 
-        conn.execute("""
-            INSERT INTO games (
-                created_at,
-                player1_name, player2_name, player3_name, player4_name,
-                player1_score, player2_score, player3_score, player4_score
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (created_at,
-              p1_name, p2_name, p3_name, p4_name,
-              s1, s2, s3, s4))
-        inserted += 1
+@bp.route("/api/tournament_games", methods=["GET"])
+def list_tournament_games():
+    page, error = game_page_args()
+    if error:
+        return jsonify({"error": error}), 400
+    sql, params = paged_games_sql("SELECT * FROM tournament_games", page=page)
 
-    conn.commit()
-    conn.close()
+    if wants_columnar():
+        return cached_response(["tournament"], lambda: columnar_query(sql, params))
 
-    print(f"[IMPORT] inserted rows: {inserted}")
-    return redirect(url_for("index_page"))
+    def build():
+        conn = get_read_db()
+        cur = conn.execute(sql, params)
+        rows = cur.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
 
-@app.route("/api/tournament_games", methods=["GET"])
-def list_tournament_games():
-    conn = get_db()
-    cur = conn.execute("SELECT * FROM tournament_games ORDER BY id DESC")
-    rows = cur.fetchall()
-    conn.close()
-    return jsonify([dict(row) for row in rows])
+    return cached_json(["tournament"], build)
 
 
-@app.route("/api/tournament_games", methods=["POST"])
+@bp.route("/api/tournament_games", methods=["POST"])
 def create_tournament_game():
     data = request.get_json() or {}
 
@@ -409,84 +1606,395 @@ def create_tournament_game():
     except (ValueError, TypeError):
         return jsonify({"error": "scores must be integers"}), 400
 
-    # ✅ 합 100000 서버에서도 체크
-    if (s1 + s2 + s3 + s4) != 100000:
-        return jsonify({"error": "total score must be 100000"}), 400
-
-    created_at = datetime.now().isoformat(timespec="minutes")
-
-    conn = get_db()
-    cur = conn.execute("""
-        INSERT INTO tournament_games (
-            created_at,
-            player1_name, player2_name, player3_name, player4_name,
-            player1_score, player2_score, player3_score, player4_score
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (created_at, p1, p2, p3, p4, s1, s2, s3, s4))
-    conn.commit()
-    new_id = cur.lastrowid
-    conn.close()
+    key, error = idempotency_key()
+    if error:
+        return jsonify({"error": error}), 400
+    client_time, error = client_created_at(data, key)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # 라운드가 끝나면 결과가 한꺼번에 들어오므로 그룹 커밋으로 모아서 저장
+    def write(conn):
+        # ✅ 다시 보낸 요청이면(오프라인 재전송) 처음 만든 대국 id 를 그대로 돌려준다
+        replayed = replayed_game_id(conn, "tournament", key)
+        if replayed is not None:
+            return replayed_response(replayed)
+
+        # ✅ 합계는 대회전에 배정된 점수 규칙 기준으로 서버에서도 체크
+        total = assigned_profile(conn, "tournament")["total_score"]
+        if (s1 + s2 + s3 + s4) != total:
+            raise WriteRejected(f"total score must be {total}")
+
+        # ✅ 진행 중인 라운드가 있으면 발표된 탁/자리와 같은지 확인
+        seated, error = match_published_table(conn, [p1, p2, p3, p4])
+        if error:
+            raise WriteRejected(error)
+
+        created_at = client_time or datetime.now().isoformat(timespec="minutes")
+        cur = conn.execute("""
+            INSERT INTO tournament_games (
+                created_at,
+                player1_name, player2_name, player3_name, player4_name,
+                player1_score, player2_score, player3_score, player4_score
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (created_at, p1, p2, p3, p4, s1, s2, s3, s4))
+        remember_idempotency_key(conn, "tournament", key, cur.lastrowid, created_at)
+        if seated:
+            conn.execute(
+                "UPDATE tournament_tables SET game_id = ? WHERE round_no = ? AND table_no = ?",
+                (cur.lastrowid, *seated),
+            )
+        awarded = record_game(conn, "tournament", created_at, [p1, p2, p3, p4], [s1, s2, s3, s4])
+        bump_data_versions(conn, "tournament", *(["player_badges"] if awarded else []))
+        return {"id": cur.lastrowid}, 201
 
-    return jsonify({"id": new_id}), 201
+    return run_write(write)
 
 
-@app.route("/api/tournament_games/<int:game_id>", methods=["DELETE"])
+@bp.route("/api/tournament_games/<int:game_id>", methods=["DELETE"])
 def delete_tournament_game(game_id):
     conn = get_db()
+    row = conn.execute("SELECT * FROM tournament_games WHERE id = ?", (game_id,)).fetchone()
     cur = conn.execute("DELETE FROM tournament_games WHERE id = ?", (game_id,))
+    if row:
+        rebuild_player_rollups(conn, "tournament", players=game_names(row))
+        # 발표된 탁의 결과였다면 다시 입력할 수 있게 연결을 푼다
+        conn.execute("UPDATE tournament_tables SET game_id = NULL WHERE game_id = ?", (game_id,))
+    bump_data_versions(conn, "tournament")
     conn.commit()
     deleted = cur.rowcount
     conn.close()
+    _after_write()
     if deleted == 0:
         return jsonify({"error": "not found"}), 404
     return jsonify({"ok": True})
 
 
-# ================== 뱃지 / 관리자 API ==================
+# ================== 대회 라운드 자리 배정 ==================
+# 참가자를 라운드별 4인 탁에 배정하고(seating.py), 발표한 라운드는 tournament_tables 에 남긴다.
+#   balanced  만남 중복 / 자리 쏠림 최소화. 여러 라운드를 미리 짤 수 있다
+#   swiss     대회전 순위표(배정된 점수 규칙 프로필) 순서대로 다음 한 라운드
+# 결과가 아직 없는 탁이 있는 동안에는 대회전 기록이 그 탁 중 하나와 자리까지 같아야 저장된다.
 
-@app.route("/api/badges", methods=["GET", "POST"])
-def badges_api():
-    if request.method == "POST":
-        data = request.get_json() or {}
-        try:
-            code = int(data.get("code", 0))
-        except (TypeError, ValueError):
-            return jsonify({"error": "code must be integer"}), 400
+SEATING_MODES = ("balanced", "swiss")
+SEATING_MAX_ROUNDS = 20
+SEATING_TIME_LIMIT = 0.5   # 초. 국소 탐색 시간 제한
 
-        name = str(data.get("name", "")).strip()
-        grade = str(data.get("grade", "")).strip()
-        description = str(data.get("description", "")).strip()
 
-        if not code or not name or not grade:
-            return jsonify({"error": "code, name, grade required"}), 400
+def published_tables(conn, round_no=None):
+    sql = "SELECT * FROM tournament_tables"
+    params = ()
+    if round_no is not None:
+        sql += " WHERE round_no = ?"
+        params = (round_no,)
+    return conn.execute(sql + " ORDER BY round_no, table_no", params).fetchall()
 
-        conn = get_db()
-        try:
-            cur = conn.execute(
+
+def match_published_table(conn, names):
+    """
+    결과가 없는 발표된 탁 중 names(자리 순서)와 같은 탁을 찾는다.
+    → ((round_no, table_no), None) / 진행 중인 라운드가 없으면 (None, None) / 안 맞으면 (None, 에러 메시지)
+    """
+    open_tables = conn.execute(
+        "SELECT * FROM tournament_tables WHERE game_id IS NULL ORDER BY round_no, table_no"
+    ).fetchall()
+    if not open_tables:
+        return None, None
+    for t in open_tables:
+        seats = game_names(t)
+        if seats == names:
+            return (t["round_no"], t["table_no"]), None
+        if sorted(seats) == sorted(names):
+            return None, (
+                f"seat order does not match round {t['round_no']} table {t['table_no']}: "
+                + ", ".join(seats)
+            )
+    return None, "players do not match any open table of the published round"
+
+
+def _last_round_players(conn):
+    row = conn.execute("SELECT MAX(round_no) AS r FROM tournament_rounds").fetchone()
+    if row["r"] is None:
+        return []
+    return [name for t in published_tables(conn, row["r"]) for name in game_names(t)]
+
+
+def swiss_order(conn, players):
+    """대회전 순위표 순서(pt 합, 1등 횟수). 아직 대국이 없는 사람은 0pt 로 넘겨준 순서대로."""
+    profile_id = assigned_profile_id(conn, "tournament")
+    standings = {
+        r["player_name"]: (r["pt_sum"], r["rank1"])
+        for r in conn.execute("""
+            SELECT player_name, pt_sum, rank1 FROM profile_standings
+            WHERE source = 'tournament' AND archive_id = 0 AND profile_id = ?
+        """, (profile_id,))
+    }
+    return sorted(players, key=lambda p: standings.get(p, (0.0, 0)), reverse=True)
+
+
+def build_schedule(conn, data):
+    """
+    요청 body 로 배정안을 만든다. players 를 생략하면 마지막으로 발표된 라운드의 참가자.
+    → (시작 라운드 번호, 모드, 라운드별 탁 목록, 통계). 잘못된 입력은 SeatingError.
+    """
+    mode = data.get("mode") or "balanced"
+    if mode not in SEATING_MODES:
+        raise SeatingError("mode must be balanced or swiss")
+    try:
+        rounds = int(data.get("rounds", 1))
+    except (ValueError, TypeError):
+        raise SeatingError("rounds must be an integer")
+    if not 1 <= rounds <= SEATING_MAX_ROUNDS:
+        raise SeatingError(f"rounds must be between 1 and {SEATING_MAX_ROUNDS}")
+    if mode == "swiss" and rounds != 1:
+        raise SeatingError("swiss pairing schedules one round at a time")
+
+    players = data.get("players")
+    if players is None:
+        players = _last_round_players(conn)
+    elif not isinstance(players, list):
+        raise SeatingError("players must be a list of names")
+    players = check_players(players)
+
+    history = [game_names(t) for t in published_tables(conn)]
+    seed = data.get("seed")
+    if mode == "swiss":
+        plan = [schedule_swiss(swiss_order(conn, players), history, seed=seed, time_limit=SEATING_TIME_LIMIT)]
+    else:
+        plan = schedule_balanced(players, rounds, history, seed=seed, time_limit=SEATING_TIME_LIMIT)
+
+    row = conn.execute("SELECT COALESCE(MAX(round_no), 0) AS r FROM tournament_rounds").fetchone()
+    return row["r"] + 1, mode, plan, plan_stats(plan, history)
+
+
+def _check_tables(tables):
+    if not isinstance(tables, list) or not tables:
+        raise SeatingError("tables must be a non-empty list")
+    if not all(isinstance(t, list) and len(t) == 4 for t in tables):
+        raise SeatingError("each table must list 4 players in seat order")
+    check_players([name for t in tables for name in t])
+    return [[str(name).strip() for name in t] for t in tables]
+
+
+@bp.route("/api/tournament/schedule", methods=["POST"])
+def tournament_schedule():
+    """
+    body: {"mode": "balanced"|"swiss", "rounds": R, "players": [...], "seed": 선택}
+    배정안 미리보기. 저장하지 않으며, 발표된 라운드의 만남/자리 기록을 이어서 고려한다.
+    """
+    data = request.get_json(silent=True) or {}
+    conn = get_db()
+    try:
+        start, mode, plan, stats = build_schedule(conn, data)
+    except SeatingError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        conn.close()
+
+    return jsonify({
+        "mode": mode,
+        "rounds": [
+            {"round": start + i, "tables": tables}
+            for i, tables in enumerate(plan)
+        ],
+        "stats": stats,
+    })
+
+
+@bp.route("/api/tournament/rounds", methods=["GET"])
+def tournament_rounds_api():
+    def build():
+        conn = get_read_db()
+        rounds = conn.execute("SELECT * FROM tournament_rounds ORDER BY round_no").fetchall()
+        tables = {}
+        for t in published_tables(conn):
+            tables.setdefault(t["round_no"], []).append({
+                "table": t["table_no"],
+                "players": game_names(t),
+                "game_id": t["game_id"],
+            })
+        conn.close()
+        return [
+            {
+                "round": r["round_no"],
+                "mode": r["mode"],
+                "published_at": r["published_at"],
+                "tables": tables.get(r["round_no"], []),
+            }
+            for r in rounds
+        ]
+
+    return cached_json(["tournament"], build)
+
+
+@bp.route("/api/tournament/rounds", methods=["POST"])
+def publish_tournament_round():
+    """
+    다음 라운드를 발표한다.
+      {"tables": [[동, 남, 서, 북], ...], "mode": 선택}  미리보기(또는 직접 짠) 탁을 그대로 발표
+      {"mode": ..., "players": ..., "seed": ...}  그 자리에서 한 라운드를 짜서 발표
+    """
+    data = request.get_json(silent=True) or {}
+    conn = get_db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if "tables" in data:
+            tables = _check_tables(data["tables"])
+            # 미리보기를 그대로 발표하면 그 방식, 직접 짠 탁이면 manual
+            mode = data.get("mode") if data.get("mode") in SEATING_MODES else "manual"
+        else:
+            _, mode, plan, _ = build_schedule(conn, {**data, "rounds": 1})
+            tables = plan[0]
+
+        row = conn.execute("SELECT COALESCE(MAX(round_no), 0) AS r FROM tournament_rounds").fetchone()
+        round_no = row["r"] + 1
+        conn.execute(
+            "INSERT INTO tournament_rounds (round_no, mode, published_at) VALUES (?, ?, ?)",
+            (round_no, mode, datetime.now().isoformat(timespec="minutes")),
+        )
+        conn.executemany("""
+            INSERT INTO tournament_tables (
+                round_no, table_no, player1_name, player2_name, player3_name, player4_name
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, [(round_no, k + 1, *t) for k, t in enumerate(tables)])
+        bump_data_versions(conn, "tournament")
+        conn.commit()
+    except SeatingError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 400
+    finally:
+        conn.close()
+    _after_write()
+
+    return jsonify({
+        "round": round_no,
+        "mode": mode,
+        "tables": [{"table": k + 1, "players": t} for k, t in enumerate(tables)],
+    }), 201
+
+
+@bp.route("/api/tournament/rounds/<int:round_no>", methods=["DELETE"])
+def delete_tournament_round(round_no):
+    """마지막 라운드만, 아직 결과가 하나도 없을 때 발표를 취소할 수 있다."""
+    conn = get_db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        last = conn.execute("SELECT MAX(round_no) AS r FROM tournament_rounds").fetchone()["r"]
+        if last is None or round_no != last:
+            exists = conn.execute(
+                "SELECT 1 FROM tournament_rounds WHERE round_no = ?", (round_no,)
+            ).fetchone()
+            if not exists:
+                return jsonify({"error": "round not found"}), 404
+            return jsonify({"error": "only the last round can be withdrawn"}), 409
+        played = conn.execute(
+            "SELECT COUNT(*) FROM tournament_tables WHERE round_no = ? AND game_id IS NOT NULL", (round_no,)
+        ).fetchone()[0]
+        if played:
+            return jsonify({"error": "round already has results"}), 409
+        conn.execute("DELETE FROM tournament_tables WHERE round_no = ?", (round_no,))
+        conn.execute("DELETE FROM tournament_rounds WHERE round_no = ?", (round_no,))
+        bump_data_versions(conn, "tournament")
+        conn.commit()
+    finally:
+        conn.close()
+    _after_write()
+    return jsonify({"ok": True})
+
+
+# ================== 뱃지 / 관리자 API ==================
+# 부여 목록은 player_badges 만 읽고, 뱃지 이름/등급/설명은 워커 메모리의 카탈로그(코드 → 뱃지)에서 채운다.
+# 카탈로그는 "badges" 버전이 바뀌면(뱃지 추가/삭제, CSV 업로드 — 다른 워커에서 한 것도) 다시 읽는다.
+
+def badge_catalog():
+    state = db_state()
+    version = state.scope_versions(["*", "badges"])
+    cached = state.badge_catalog
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    conn = get_read_db()
+    rows = conn.execute("SELECT code, name, grade, description FROM badges").fetchall()
+    conn.close()
+    catalog = {
+        r["code"]: {"name": r["name"] or "", "grade": r["grade"] or "", "description": r["description"] or ""}
+        for r in rows
+    }
+    state.badge_catalog = (version, catalog)
+    return catalog
+
+
+_UNKNOWN_BADGE = {"name": "", "grade": "", "description": ""}   # 뱃지가 지워진 부여 기록
+
+
+def player_badge_list(conn, name):
+    """한 사람의 부여 목록(부여 순). player_badges(player_name, ...) 인덱스로 찾는다."""
+    catalog = badge_catalog()
+    cur = conn.execute("""
+        SELECT id, player_name, badge_code, granted_at
+        FROM player_badges
+        WHERE player_name = ?
+        ORDER BY granted_at ASC, id ASC
+    """, (name,))
+    return [
+        {
+            "id": r["id"],
+            "player_name": r["player_name"],
+            "code": r["badge_code"],
+            **catalog.get(r["badge_code"], _UNKNOWN_BADGE),
+            "granted_at": r["granted_at"],
+        }
+        for r in cur.fetchall()
+    ]
+
+
+@bp.route("/api/badges", methods=["GET", "POST"])
+def badges_api():
+    if request.method == "POST":
+        data = request.get_json() or {}
+        try:
+            code = int(data.get("code", 0))
+        except (TypeError, ValueError):
+            return jsonify({"error": "code must be integer"}), 400
+
+        name = str(data.get("name", "")).strip()
+        grade = str(data.get("grade", "")).strip()
+        description = str(data.get("description", "")).strip()
+
+        if not code or not name or not grade:
+            return jsonify({"error": "code, name, grade required"}), 400
+
+        conn = get_db()
+        try:
+            cur = conn.execute(
                 "INSERT INTO badges (code, name, grade, description) VALUES (?, ?, ?, ?)",
                 (code, name, grade, description),
             )
+            bump_data_versions(conn, "badges")
             conn.commit()
             new_id = cur.lastrowid
         except sqlite3.IntegrityError:
             conn.close()
             return jsonify({"error": "badge code already exists"}), 400
         conn.close()
+        _after_write()
         return jsonify({"id": new_id}), 201
 
     # GET
-    conn = get_db()
-    cur = conn.execute("""
-        SELECT id, code, name, grade, description
-        FROM badges
-        ORDER BY code ASC
-    """)
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-    return jsonify(rows)
+    def build():
+        conn = get_read_db()
+        cur = conn.execute("""
+            SELECT id, code, name, grade, description
+            FROM badges
+            ORDER BY code ASC
+        """)
+        rows = [dict(r) for r in cur.fetchall()]
+        conn.close()
+        return rows
+
+    return cached_json(["badges"], build)
 
 
-@app.route("/api/badges/<int:badge_id>", methods=["DELETE"])
+@bp.route("/api/badges/<int:badge_id>", methods=["DELETE"])
 def delete_badge(badge_id):
     conn = get_db()
     cur = conn.execute("SELECT code FROM badges WHERE id = ?", (badge_id,))
@@ -498,31 +2006,47 @@ def delete_badge(badge_id):
     code = row["code"]
 
     conn.execute("DELETE FROM player_badges WHERE badge_code = ?", (code,))
+    conn.execute("DELETE FROM badge_rules WHERE badge_code = ?", (code,))
     cur = conn.execute("DELETE FROM badges WHERE id = ?", (badge_id,))
+    bump_data_versions(conn, "badges", "player_badges")
     conn.commit()
     deleted = cur.rowcount
     conn.close()
+    _after_write()
 
     if deleted == 0:
         return jsonify({"error": "badge not found"}), 404
     return jsonify({"ok": True})
 
-@app.route("/api/player_badges", methods=["GET", "POST"])
+@bp.route("/api/player_badges", methods=["GET", "POST"])
 def player_badges_api():
-    if request.method == "GET":
-        conn = get_db()
-        cur = conn.execute("""
+    if request.method == "GET" and wants_columnar():
+        # 컬럼 포맷에서는 code 중복 없이 badge_code 하나만 보낸다
+        return cached_response(["badges", "player_badges"], lambda: columnar_query(
+            """
             SELECT
                 pb.id,
                 pb.player_name,
                 pb.badge_code,
                 pb.granted_at,
-                b.name AS badge_name,
-                b.grade AS badge_grade,
-                b.description AS badge_description
+                b.name,
+                b.grade,
+                b.description
             FROM player_badges pb
             LEFT JOIN badges b ON pb.badge_code = b.code
             ORDER BY pb.id DESC
+            """,
+            strings=("player_name", "name", "grade", "description"),
+            times=("granted_at",),
+        ))
+
+    if request.method == "GET":
+        catalog = badge_catalog()
+        conn = get_read_db()
+        cur = conn.execute("""
+            SELECT id, player_name, badge_code, granted_at
+            FROM player_badges
+            ORDER BY id DESC
         """)
         rows = cur.fetchall()
         conn.close()
@@ -534,9 +2058,7 @@ def player_badges_api():
                 "badge_code": r["badge_code"],
                 "code": r["badge_code"],  # 프론트 편의용(옵션)
                 "granted_at": r["granted_at"],
-                "name": r["badge_name"] or "",
-                "grade": r["badge_grade"] or "",
-                "description": r["badge_description"] or "",
+                **catalog.get(r["badge_code"], _UNKNOWN_BADGE),
             }
             for r in rows
         ])
@@ -553,74 +2075,63 @@ def player_badges_api():
         return jsonify({"error": "player_name and badge_code required"}), 400
 
     granted_at = datetime.now().isoformat(timespec="minutes")
-    conn = get_db()
 
-    cur = conn.execute("SELECT 1 FROM badges WHERE code = ?", (badge_code,))
-    if not cur.fetchone():
-        conn.close()
-        return jsonify({"error": "badge not found"}), 400
+    def write(conn):
+        cur = conn.execute("SELECT 1 FROM badges WHERE code = ?", (badge_code,))
+        if not cur.fetchone():
+            raise WriteRejected("badge not found")
 
-    conn.execute("""
-        INSERT INTO player_badges (player_name, badge_code, granted_at)
-        VALUES (?, ?, ?)
-    """, (player_name, badge_code, granted_at))
-    conn.commit()
-    conn.close()
-    return jsonify({"ok": True}), 201
+        conn.execute("""
+            INSERT INTO player_badges (player_name, badge_code, granted_at)
+            VALUES (?, ?, ?)
+        """, (player_name, badge_code, granted_at))
+        remember_player_names(conn, [player_name])
+        bump_data_versions(conn, "player_badges")
+        return {"ok": True}, 201
+
+    return run_write(write)
 
 
 
-@app.route("/api/player_badges/by_player/<player_name>", methods=["GET"])
+@bp.route("/api/player_badges/by_player/<player_name>", methods=["GET"])
 def list_player_badges(player_name):
-    name = player_name.strip()
-    conn = get_db()
-    cur = conn.execute("""
-        SELECT
-            pb.id,
-            pb.player_name,
-            pb.badge_code AS code,
-            pb.granted_at,
-            b.name,
-            b.grade,
-            b.description
-        FROM player_badges pb
-        LEFT JOIN badges b ON pb.badge_code = b.code
-        WHERE pb.player_name = ?
-        ORDER BY pb.granted_at ASC, pb.id ASC
-    """, (name,))
-    rows = cur.fetchall()
+    conn = get_read_db()
+    result = player_badge_list(conn, player_name.strip())
     conn.close()
-
-    result = []
-    for r in rows:
-        result.append({
-            "id": r["id"],
-            "player_name": r["player_name"],
-            "code": r["code"],
-            "name": r["name"] or "",
-            "grade": r["grade"] or "",
-            "description": r["description"] or "",
-            "granted_at": r["granted_at"],
-        })
     return jsonify(result)
 
 
-@app.route("/api/player_badges/<int:assign_id>", methods=["DELETE"])
+@bp.route("/api/player_badges/players", methods=["GET"])
+def player_badge_holders():
+    """뱃지를 하나라도 가진 이름 전체(통계 화면의 플레이어 목록용). 이름 인덱스만 훑는다."""
+    def build():
+        conn = get_read_db()
+        cur = conn.execute("SELECT DISTINCT player_name FROM player_badges ORDER BY player_name ASC")
+        names = [r[0] for r in cur.fetchall()]
+        conn.close()
+        return names
+
+    return cached_json(["player_badges"], build)
+
+
+@bp.route("/api/player_badges/<int:assign_id>", methods=["DELETE"])
 def delete_player_badge(assign_id):
     conn = get_db()
     cur = conn.execute("DELETE FROM player_badges WHERE id = ?", (assign_id,))
+    bump_data_versions(conn, "player_badges")
     conn.commit()
     deleted = cur.rowcount
     conn.close()
+    _after_write()
     if deleted == 0:
         return jsonify({"error": "not found"}), 404
     return jsonify({"ok": True})
 
 # ================== 뱃지 CSV 내보내기/업로드 ==================
 
-@app.route("/export_badges", methods=["GET"])
+@bp.route("/export_badges", methods=["GET"])
 def export_badges():
-    conn = get_db()
+    conn = get_read_db()
     cur = conn.execute("""
         SELECT code, name, grade, description
         FROM badges
@@ -647,22 +2158,22 @@ def export_badges():
     )
 
 
-@app.route("/import_badges", methods=["GET", "POST"])
+@bp.route("/import_badges", methods=["GET", "POST"])
 def import_badges():
     if request.method == "GET":
-        return """
+        return f"""
         <!DOCTYPE html>
         <html lang="ko">
         <head>
           <meta charset="UTF-8">
           <title>뱃지 목록 CSV 업로드</title>
-          <link rel="stylesheet" href="/static/style.css">
+          <link rel="stylesheet" href="{asset_url("style.css")}">
         </head>
         <body>
           <div class="top-bar">
             <h1>뱃지 목록 CSV 업로드</h1>
             <div class="view-switch">
-              <a href="/" class="view-switch-btn">메인으로 돌아가기</a>
+              <a href="{request.script_root}/" class="view-switch-btn">메인으로 돌아가기</a>
             </div>
           </div>
           <div class="main-layout">
@@ -688,87 +2199,19 @@ def import_badges():
     if not file:
         return "파일이 없습니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
-
-    import io as _io
-    sample = "\n".join(text.splitlines()[:5])
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
-
-    reader = csv.DictReader(_io.StringIO(text), dialect=dialect)
-
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
-
-    conn = get_db()
-    inserted = 0
-    updated = 0
-
-    for row in reader:
-        try:
-            code = int(float(pick(row, ["code", "코드"], "0")))
-        except Exception:
-            code = 0
-
-        name = str(pick(row, ["name", "이름"], "")).strip()
-        grade = str(pick(row, ["grade", "등급"], "")).strip()
-        desc = str(pick(row, ["description", "설명"], "")).strip()
-
-        if not code or not name or not grade:
-            continue
-
-        # code 기준 업서트(있으면 update, 없으면 insert)
-        try:
-            conn.execute(
-                "INSERT INTO badges (code, name, grade, description) VALUES (?, ?, ?, ?)",
-                (code, name, grade, desc),
-            )
-            inserted += 1
-        except sqlite3.IntegrityError:
-            conn.execute(
-                "UPDATE badges SET name = ?, grade = ?, description = ? WHERE code = ?",
-                (name, grade, desc, code),
-            )
-            updated += 1
-
-    conn.commit()
-    conn.close()
-
-    print(f"[IMPORT_BADGES] inserted={inserted}, updated={updated}")
-    return redirect(url_for("index_page"))
+    return enqueue_import_job("badges", file)
 
 
 # ================== 플레이어 뱃지 부여 CSV 내보내기/업로드 ==================
 
-@app.route("/export_player_badges", methods=["GET"])
+@bp.route("/export_player_badges", methods=["GET"])
 def export_player_badges():
-    conn = get_db()
+    catalog = badge_catalog()
+    conn = get_read_db()
     cur = conn.execute("""
-        SELECT
-          pb.player_name,
-          pb.badge_code,
-          pb.granted_at,
-          b.name AS badge_name,
-          b.grade AS badge_grade,
-          b.description AS badge_description
-        FROM player_badges pb
-        LEFT JOIN badges b ON pb.badge_code = b.code
-        ORDER BY pb.id ASC
+        SELECT player_name, badge_code, granted_at
+        FROM player_badges
+        ORDER BY id ASC
     """)
     rows = cur.fetchall()
     conn.close()
@@ -781,13 +2224,14 @@ def export_player_badges():
     ])
 
     for r in rows:
+        badge = catalog.get(r["badge_code"], _UNKNOWN_BADGE)
         writer.writerow([
             r["player_name"],
             r["badge_code"],
             r["granted_at"],
-            r["badge_name"] or "",
-            r["badge_grade"] or "",
-            r["badge_description"] or "",
+            badge["name"],
+            badge["grade"],
+            badge["description"],
         ])
 
     csv_data = output.getvalue()
@@ -801,22 +2245,22 @@ def export_player_badges():
     )
 
 
-@app.route("/import_player_badges", methods=["GET", "POST"])
+@bp.route("/import_player_badges", methods=["GET", "POST"])
 def import_player_badges():
     if request.method == "GET":
-        return """
+        return f"""
         <!DOCTYPE html>
         <html lang="ko">
         <head>
           <meta charset="UTF-8">
           <title>플레이어 뱃지 부여 CSV 업로드</title>
-          <link rel="stylesheet" href="/static/style.css">
+          <link rel="stylesheet" href="{asset_url("style.css")}">
         </head>
         <body>
           <div class="top-bar">
             <h1>플레이어 뱃지 부여 CSV 업로드</h1>
             <div class="view-switch">
-              <a href="/" class="view-switch-btn">메인으로 돌아가기</a>
+              <a href="{request.script_root}/" class="view-switch-btn">메인으로 돌아가기</a>
             </div>
           </div>
           <div class="main-layout">
@@ -842,248 +2286,1916 @@ def import_player_badges():
     if not file:
         return "파일이 없습니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
+    return enqueue_import_job("player_badges", file)
 
-    import io as _io
-    sample = "\n".join(text.splitlines()[:5])
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
 
-    reader = csv.DictReader(_io.StringIO(text), dialect=dialect)
+# ================== 점수 규칙 프로필 ==================
+# 우마 / 반환점 / 점수 합을 프로필로 DB 에 두고 대상마다 하나씩 배정한다(배정이 없으면 1번 기본 프로필).
+#   대상: 개인전 "games", 대회전 "tournament", 아카이브 "archive:<id>" (캐시 scope 이름과 같다)
+# profile_standings 에 (대상, 프로필)별 순위표를 미리 계산해 두고 요청 때는 읽기만 한다.
+#   - 배정된 프로필의 순위표는 대국이 들어올 때 record_game 에서 같이 갱신
+#   - 배정이 풀린 프로필의 순위표는 캐시로 남겼다가, 대상 데이터가 바뀌면 버린다
+#   - 캐시가 없는 프로필로 배정을 바꾸면 백그라운드 작업(kind="standings")으로 다시 계산
+# 프로필은 만든 뒤 수정하지 않는다(규칙을 바꾸려면 새 프로필을 만들어 배정).
 
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
+DEFAULT_PROFILE_ID = 1
+STANDINGS_POOL_MIN_GAMES = 50000    # 대국이 이보다 많으면 프로세스 풀로 나눠 계산
+STANDINGS_CHUNK_GAMES = 20000
+STANDINGS_ATTEMPTS = 3              # 계산하는 사이 데이터가 바뀌면 다시(마지막은 쓰기 락을 잡고 계산)
 
-    conn = get_db()
-    inserted = 0
-    skipped = 0
 
-    for row in reader:
-        player_name = str(pick(row, ["player_name", "플레이어", "이름"], "")).strip()
+def parse_target(target):
+    """"games" / "tournament" / "archive:<id>" → (source, archive_id). 모르는 이름이면 None."""
+    if target in GAME_SOURCES:
+        return target, 0
+    if isinstance(target, str) and target.startswith("archive:"):
         try:
-            badge_code = int(float(pick(row, ["badge_code", "code", "뱃지코드", "뱃지 코드"], "0")))
-        except Exception:
-            badge_code = 0
+            return "archive", int(target[len("archive:"):])
+        except ValueError:
+            return None
+    return None
 
-        granted_at = str(pick(row, ["granted_at", "부여시각", "시간"], "")).strip()
-        if not granted_at:
-            granted_at = datetime.now().isoformat(timespec="minutes")
 
-        if not player_name or not badge_code:
-            skipped += 1
-            continue
+def target_name(source, archive_id=0):
+    return f"archive:{archive_id}" if source == "archive" else source
 
-        # 중복 방지(완전 동일 row면 skip)
-        cur = conn.execute("""
-            SELECT 1 FROM player_badges
-            WHERE player_name = ? AND badge_code = ? AND granted_at = ?
-            LIMIT 1
-        """, (player_name, badge_code, granted_at))
-        if cur.fetchone():
-            skipped += 1
-            continue
 
-        conn.execute("""
-            INSERT INTO player_badges (player_name, badge_code, granted_at)
-            VALUES (?, ?, ?)
-        """, (player_name, badge_code, granted_at))
-        inserted += 1
+def _profile_dict(row):
+    return {
+        "id": row[0],
+        "name": row[1],
+        "uma": json.loads(row[2]),
+        "return_score": row[3],
+        "total_score": row[4],
+    }
 
-    conn.commit()
-    conn.close()
 
-    print(f"[IMPORT_PLAYER_BADGES] inserted={inserted}, skipped={skipped}")
-    return redirect(url_for("index_page"))
+def load_profile(conn, profile_id):
+    row = conn.execute(
+        "SELECT id, name, uma, return_score, total_score FROM scoring_profiles WHERE id = ?",
+        (profile_id,),
+    ).fetchone()
+    return _profile_dict(row) if row else None
 
 
-# ================== 아카이브 API ==================
+def assigned_profile_id(conn, source, archive_id=0):
+    row = conn.execute(
+        "SELECT profile_id FROM profile_assignments WHERE source = ? AND archive_id = ?",
+        (source, archive_id),
+    ).fetchone()
+    return row[0] if row else DEFAULT_PROFILE_ID
 
-@app.route("/api/archives", methods=["GET"])
-def archives_api():
-    conn = get_db()
-    cur = conn.execute(
-        """
-        SELECT
-            a.id,
-            a.name,
-            a.created_at,
-            COUNT(ag.id) AS game_count
-        FROM archives a
-        LEFT JOIN archive_games ag ON ag.archive_id = a.id
-        GROUP BY a.id, a.name, a.created_at
-        ORDER BY a.id DESC
-        """
-    )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-    return jsonify(rows)
 
+def assigned_profile(conn, source, archive_id=0):
+    return load_profile(conn, assigned_profile_id(conn, source, archive_id))
 
-@app.route("/api/archives/<int:archive_id>/games", methods=["GET"])
-def archive_games_api(archive_id):
-    conn = get_db()
-    cur = conn.execute(
-        """
-        SELECT
-            id,
-            created_at,
-            player1_name, player2_name, player3_name, player4_name,
-            player1_score, player2_score, player3_score, player4_score
-        FROM archive_games
-        WHERE archive_id = ?
-        ORDER BY id ASC
-        """,
-        (archive_id,),
-    )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-    return jsonify(rows)
 
+def profile_rules(profile):
+    # 스냅샷 헤더처럼 규칙 값만 필요할 때
+    return {"uma": profile["uma"], "return_score": profile["return_score"], "total_score": profile["total_score"]}
 
-@app.route("/api/archives/<int:archive_id>", methods=["DELETE"])
-def delete_archive(archive_id):
-    conn = get_db()
-    conn.execute("DELETE FROM archive_games WHERE archive_id = ?", (archive_id,))
-    cur = conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
-    conn.commit()
-    deleted = cur.rowcount
-    conn.close()
-    if deleted == 0:
-        return jsonify({"error": "archive not found"}), 404
-    return jsonify({"ok": True})
 
-@app.route("/admin/archive_import", methods=["POST"])
-def admin_archive_import():
-    archive_name = (request.form.get("archive_name") or "").strip()
-    file = request.files.get("file")
+def profile_for_rules(conn, rules):
+    """같은 규칙의 프로필 id. 없으면 새로 만든다(스냅샷 가져오기용)."""
+    for row in conn.execute("SELECT id, name, uma, return_score, total_score FROM scoring_profiles"):
+        if profile_rules(_profile_dict(row)) == rules:
+            return row[0]
+    name = f"가져온 규칙 {'/'.join(map(str, rules['uma']))} · {rules['return_score']}"
+    if conn.execute("SELECT 1 FROM scoring_profiles WHERE name = ?", (name,)).fetchone():
+        name += f" ({uuid.uuid4().hex[:6]})"
+    cur = conn.execute("""
+        INSERT INTO scoring_profiles (name, uma, return_score, total_score, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (name, json.dumps(rules["uma"]), rules["return_score"], rules["total_score"],
+          datetime.now().isoformat(timespec="minutes")))
+    return cur.lastrowid
+
+
+def _add_profile_standings(conn, source, archive_id, created_at, names, scores, only=None):
+    profile = assigned_profile(conn, source, archive_id)
+    conn.executemany("""
+        INSERT INTO profile_standings (
+            source, archive_id, profile_id, player_name,
+            games, rank1, rank2, rank3, rank4, tobi, max_score, pt_sum
+        ) VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(source, archive_id, profile_id, player_name) DO UPDATE SET
+            games = games + 1,
+            rank1 = rank1 + excluded.rank1,
+            rank2 = rank2 + excluded.rank2,
+            rank3 = rank3 + excluded.rank3,
+            rank4 = rank4 + excluded.rank4,
+            tobi = tobi + excluded.tobi,
+            max_score = MAX(max_score, excluded.max_score),
+            pt_sum = pt_sum + excluded.pt_sum
+    """, [
+        (source, archive_id, profile["id"], name, *rest)
+        for name, _, _, *rest in _aggregate_rows(source, archive_id, names, scores, only, profile)
+    ])
 
-    if not archive_name:
-        return "아카이브 이름이 필요합니다.", 400
-    if not file:
-        return "CSV 파일이 필요합니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
+def invalidate_profile_caches(conn, source=None, archive_id=None):
+    """
+    대상 데이터가 바뀌었을 때: 배정되지 않은 프로필의 순위표 캐시를 버린다.
+    그런 캐시는 항상 profile_standings_state 에 행이 있으므로 그 행만 보고 (대상, 프로필) 단위로 지운다.
+    대국을 넣을 때마다 불리므로, 캐시가 없으면(대부분) 상태 표 키 조회 한 번으로 끝난다.
+    """
+    where, params = "1", []
+    if source is not None:
+        where, params = "source = ?", [source]
+    if archive_id is not None:
+        where += " AND archive_id = ?"
+        params.append(archive_id)
+    cached = conn.execute(
+        f"SELECT source, archive_id, profile_id FROM profile_standings_state WHERE {where}", params
+    ).fetchall()
+    for src, aid, profile_id in cached:
+        if profile_id == assigned_profile_id(conn, src, aid):
             continue
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
+        for table in ("profile_standings", "profile_standings_state"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE source = ? AND archive_id = ? AND profile_id = ?",
+                (src, aid, profile_id),
+            )
 
-    # CSV 파싱
-    sample = "\n".join(text.splitlines()[:5])
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
 
-    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+def standings_status(conn, source, archive_id, profile_id):
+    """(상태, job_id). 상태는 ready | computing | missing."""
+    row = conn.execute("""
+        SELECT s.status, s.job_id, j.status
+        FROM profile_standings_state s
+        LEFT JOIN jobs j ON j.id = s.job_id
+        WHERE s.source = ? AND s.archive_id = ? AND s.profile_id = ?
+    """, (source, archive_id, profile_id)).fetchone()
+    if row and row[0] == "computing":
+        # 작업이 실패/취소됐으면 다시 맡겨야 한다
+        return ("computing", row[1]) if row[2] in ("queued", "running") else ("missing", None)
+    if row and row[0] == "ready":
+        return "ready", None
+    # 배정된 프로필은 record_game 이 계속 채우므로 따로 표시가 없으면 완전한 상태
+    if profile_id == assigned_profile_id(conn, source, archive_id):
+        return "ready", None
+    return "missing", None
+
+
+def _set_standings_state(conn, source, archive_id, profile_id, status, job_id=None):
+    conn.execute("""
+        INSERT INTO profile_standings_state (source, archive_id, profile_id, status, job_id, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(source, archive_id, profile_id) DO UPDATE SET
+            status = excluded.status, job_id = excluded.job_id, updated_at = excluded.updated_at
+    """, (source, archive_id, profile_id, status, job_id, datetime.now().isoformat(timespec="seconds")))
 
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
 
-    def pick_int(row, keys, default=0):
-        val = pick(row, keys, None)
-        if val is None or val == "":
-            return default
-        try:
-            return int(float(val))
-        except (ValueError, TypeError):
-            return default
+def enqueue_standings_job(conn, source, archive_id, profile_id):
+    """순위표 재계산 작업을 남긴다. 커밋한 뒤 submit_job(job_id) 은 호출하는 쪽에서."""
+    now = datetime.now().isoformat(timespec="seconds")
+    params = {"source": source, "archive_id": archive_id, "profile_id": profile_id}
+    cur = conn.execute("""
+        INSERT INTO jobs (kind, status, params, upload_path, created_at, updated_at)
+        VALUES ('standings', 'queued', ?, '', ?, ?)
+    """, (json.dumps(params), now, now))
+    _set_standings_state(conn, source, archive_id, profile_id, "computing", cur.lastrowid)
+    return cur.lastrowid
+
+
+def _standings_partial(args):
+    # 프로세스 풀에서도 돌 수 있게 모듈 최상위 함수로 두고 순수 데이터만 주고받는다
+    games, profile = args
+    acc = {}
+    for g in games:
+        for name, _, _, r1, r2, r3, r4, tobi, score, pt in _aggregate_rows(None, 0, g[:4], g[4:], None, profile):
+            a = acc.get(name)
+            if a is None:
+                acc[name] = [1, r1, r2, r3, r4, tobi, score, pt]
+            else:
+                a[0] += 1
+                a[1] += r1
+                a[2] += r2
+                a[3] += r3
+                a[4] += r4
+                a[5] += tobi
+                a[6] = max(a[6], score)
+                a[7] += pt
+    return acc
+
+
+def compute_standings(games, profile):
+    """games: [(이름 4개, 점수 4개)] → {이름: [games, rank1..4, tobi, max_score, pt_sum]}"""
+    if len(games) < STANDINGS_POOL_MIN_GAMES:
+        return _standings_partial((games, profile))
+
+    chunks = [
+        (games[i:i + STANDINGS_CHUNK_GAMES], profile)
+        for i in range(0, len(games), STANDINGS_CHUNK_GAMES)
+    ]
+    # 작업 스레드가 도는 워커 프로세스에서 fork 하지 않도록 spawn
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(len(chunks), os.cpu_count() or 1), mp_context=ctx) as pool:
+        merged = {}
+        for part in pool.map(_standings_partial, chunks):
+            for name, a in part.items():
+                b = merged.get(name)
+                if b is None:
+                    merged[name] = a
+                else:
+                    for i in (0, 1, 2, 3, 4, 5, 7):
+                        b[i] += a[i]
+                    b[6] = max(b[6], a[6])
+        return merged
+
+
+def _scope_version(conn, scope):
+    row = conn.execute("SELECT version FROM data_versions WHERE scope = ?", (scope,)).fetchone()
+    return row[0] if row else 0
+
+
+def _run_standings_job(conn, job_id, row):
+    params = json.loads(row["params"])
+    source, archive_id, profile_id = params["source"], params["archive_id"], params["profile_id"]
+    profile = load_profile(conn, profile_id)
+    if profile is None:
+        raise JobFailed("프로필이 삭제되었습니다.")
+
+    table = GAME_SOURCES.get(source, "archive_games")
+    where, args = ("WHERE archive_id = ?", (archive_id,)) if source == "archive" else ("", ())
+    scope = target_name(source, archive_id)
+
+    for attempt in range(STANDINGS_ATTEMPTS):
+        locked = attempt == STANDINGS_ATTEMPTS - 1
+        # 대국 목록과 그 시점의 scope 버전을 한 읽기 트랜잭션에서
+        conn.execute("BEGIN IMMEDIATE" if locked else "BEGIN")
+        version = _scope_version(conn, scope)
+        games = [tuple(g) for g in conn.execute(f"""
+            SELECT
+                player1_name, player2_name, player3_name, player4_name,
+                player1_score, player2_score, player3_score, player4_score
+            FROM {table} {where}
+            ORDER BY id ASC
+        """, args)]
+        if not locked:
+            conn.commit()
 
-    conn = get_db()
-    created_at = datetime.now().isoformat(timespec="minutes")
+        standings = compute_standings(games, profile)
 
-    # archives 테이블에 먼저 등록
-    cur = conn.execute(
-        "INSERT INTO archives (name, created_at) VALUES (?, ?)",
-        (archive_name, created_at),
-    )
-    archive_id = cur.lastrowid
-
-    inserted = 0
-    for row in reader:
-        # 시간
-        game_time = pick(row, ["created_at", "시간"])
-        if not game_time:
-            game_time = created_at
-
-        # 이름
-        p1_name = pick(row, ["player1_name", "P1 이름", "P1이름"])
-        p2_name = pick(row, ["player2_name", "P2 이름", "P2이름"])
-        p3_name = pick(row, ["player3_name", "P3 이름", "P3이름"])
-        p4_name = pick(row, ["player4_name", "P4 이름", "P4이름"])
-
-        # 점수
-        s1 = pick_int(row, ["player1_score", "P1 점수", "P1점수"])
-        s2 = pick_int(row, ["player2_score", "P2 점수", "P2점수"])
-        s3 = pick_int(row, ["player3_score", "P3 점수", "P3점수"])
-        s4 = pick_int(row, ["player4_score", "P4 점수", "P4점수"])
-
-        # 네 명 이름이 다 비어 있으면 스킵
-        if not (p1_name or p2_name or p3_name or p4_name):
-            continue
+        if not locked:
+            conn.execute("BEGIN IMMEDIATE")
+            if _scope_version(conn, scope) != version:
+                conn.rollback()   # 계산하는 사이 대국이 바뀜
+                continue
 
         conn.execute(
-            """
-            INSERT INTO archive_games (
-                archive_id,
-                created_at,
-                player1_name, player2_name, player3_name, player4_name,
-                player1_score, player2_score, player3_score, player4_score
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                archive_id,
-                game_time,
-                p1_name, p2_name, p3_name, p4_name,
-                s1, s2, s3, s4,
-            ),
+            "DELETE FROM profile_standings WHERE source = ? AND archive_id = ? AND profile_id = ?",
+            (source, archive_id, profile_id),
         )
-        inserted += 1
-
-    if inserted == 0:
-        # 유효 데이터가 하나도 없으면 아카이브도 되돌리기
-        conn.execute("DELETE FROM archive_games WHERE archive_id = ?", (archive_id,))
-        conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
+        conn.executemany("""
+            INSERT INTO profile_standings (
+                source, archive_id, profile_id, player_name,
+                games, rank1, rank2, rank3, rank4, tobi, max_score, pt_sum
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(source, archive_id, profile_id, name, *a) for name, a in standings.items()])
+        _set_standings_state(conn, source, archive_id, profile_id, "ready", job_id)
+        conn.execute("""
+            UPDATE jobs SET status = 'done', rows_parsed = ?, heartbeat_at = ?, updated_at = ?
+            WHERE id = ?
+        """, (len(games), time.time(), datetime.now().isoformat(timespec="seconds"), job_id))
+        bump_data_versions(conn, "profiles")
         conn.commit()
-        conn.close()
-        return "CSV에서 읽을 수 있는 대국 기록이 없습니다.", 400
+        print(f"[JOB {job_id}] standings {scope} profile {profile_id}: {len(standings)} players")
+        return
 
+
+def _parse_profile(data):
+    name = str(data.get("name", "")).strip()
+    if not name:
+        raise ValueError("name required")
+    uma = data.get("uma")
+    if not isinstance(uma, list) or len(uma) != 4:
+        raise ValueError("uma must be a list of 4 integers")
+    try:
+        uma = [int(u) for u in uma]
+        return_score = int(data.get("return_score"))
+        total_score = int(data.get("total_score"))
+    except (TypeError, ValueError):
+        raise ValueError("uma, return_score, total_score must be integers")
+    if total_score <= 0:
+        raise ValueError("total_score must be positive")
+    return name, uma, return_score, total_score
+
+
+@bp.route("/api/scoring_profiles", methods=["GET", "POST"])
+def scoring_profiles_api():
+    if request.method == "POST":
+        try:
+            name, uma, return_score, total_score = _parse_profile(request.get_json() or {})
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        conn = get_db()
+        try:
+            cur = conn.execute("""
+                INSERT INTO scoring_profiles (name, uma, return_score, total_score, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (name, json.dumps(uma), return_score, total_score, datetime.now().isoformat(timespec="minutes")))
+            bump_data_versions(conn, "profiles")
+            conn.commit()
+            new_id = cur.lastrowid
+        except sqlite3.IntegrityError:
+            conn.close()
+            return jsonify({"error": "profile name already exists"}), 400
+        conn.close()
+        _after_write()
+        return jsonify({"id": new_id}), 201
+
+    def build():
+        conn = get_read_db()
+        profiles = [
+            _profile_dict(r) for r in conn.execute(
+                "SELECT id, name, uma, return_score, total_score FROM scoring_profiles ORDER BY id ASC"
+            )
+        ]
+        targets = {}
+        for r in conn.execute("SELECT source, archive_id, profile_id FROM profile_assignments"):
+            targets.setdefault(r["profile_id"], []).append(target_name(r["source"], r["archive_id"]))
+        conn.close()
+        for p in profiles:
+            p["targets"] = sorted(targets.get(p["id"], []))
+        return profiles
+
+    return cached_json(["profiles"], build)
+
+
+@bp.route("/api/scoring_profiles/assigned", methods=["GET"])
+def assigned_profiles_api():
+    # 화면에서 pt 를 계산할 때 쓰는 대상별 규칙. 배정이 없는 아카이브는 "default" 를 쓴다
+    def build():
+        conn = get_read_db()
+        default = load_profile(conn, DEFAULT_PROFILE_ID)
+        out = {"default": default, "games": default, "tournament": default}
+        for r in conn.execute("SELECT source, archive_id, profile_id FROM profile_assignments"):
+            out[target_name(r["source"], r["archive_id"])] = load_profile(conn, r["profile_id"])
+        conn.close()
+        return out
+
+    return cached_json(["profiles"], build)
+
+
+@bp.route("/api/scoring_profiles/<int:profile_id>", methods=["DELETE"])
+def delete_scoring_profile(profile_id):
+    if profile_id == DEFAULT_PROFILE_ID:
+        return jsonify({"error": "default profile cannot be deleted"}), 400
+
+    conn = get_db()
+    if conn.execute("SELECT 1 FROM profile_assignments WHERE profile_id = ?", (profile_id,)).fetchone():
+        conn.close()
+        return jsonify({"error": "profile is assigned"}), 400
+    cur = conn.execute("DELETE FROM scoring_profiles WHERE id = ?", (profile_id,))
+    conn.execute("DELETE FROM profile_standings WHERE profile_id = ?", (profile_id,))
+    conn.execute("DELETE FROM profile_standings_state WHERE profile_id = ?", (profile_id,))
+    bump_data_versions(conn, "profiles")
+    conn.commit()
+    deleted = cur.rowcount
+    conn.close()
+    _after_write()
+    if deleted == 0:
+        return jsonify({"error": "profile not found"}), 404
+    return jsonify({"ok": True})
+
+
+def _target_exists(conn, source, archive_id):
+    if source != "archive":
+        return True
+    return conn.execute(
+        "SELECT 1 FROM archives WHERE id = ? AND importing = 0", (archive_id,)
+    ).fetchone() is not None
+
+
+@bp.route("/api/scoring_profiles/<int:profile_id>/assign", methods=["POST"])
+def assign_scoring_profile(profile_id):
+    """
+    대상의 점수 규칙을 바꾼다. 그 프로필 순위표가 캐시에 있으면 바로 반영(200),
+    없으면 다시 계산하는 작업을 맡기고 202 + job_id.
+    """
+    data = request.get_json() or {}
+    parsed = parse_target(data.get("target"))
+    if parsed is None:
+        return jsonify({"error": "target must be games, tournament or archive:<id>"}), 400
+    source, archive_id = parsed
+
+    conn = get_db()
+    try:
+        if not _target_exists(conn, source, archive_id):
+            return jsonify({"error": "archive not found"}), 404
+        if load_profile(conn, profile_id) is None:
+            return jsonify({"error": "profile not found"}), 404
+
+        current = assigned_profile_id(conn, source, archive_id)
+        status, job_id = standings_status(conn, source, archive_id, profile_id)
+        new_job = status == "missing"
+        if current == profile_id and not new_job:
+            if job_id:
+                return jsonify({"status": "computing", "job_id": job_id}), 202
+            return jsonify({"status": "ready"})
+
+        if current != profile_id:
+            if standings_status(conn, source, archive_id, current)[0] == "ready":
+                # 지금까지 배정돼 있던 순위표는 완전하므로 캐시로 남긴다
+                _set_standings_state(conn, source, archive_id, current, "ready")
+            conn.execute("""
+                INSERT INTO profile_assignments (source, archive_id, profile_id) VALUES (?, ?, ?)
+                ON CONFLICT(source, archive_id) DO UPDATE SET profile_id = excluded.profile_id
+            """, (source, archive_id, profile_id))
+            if source == "archive":
+                # 저장해 둔 아카이브 순위표도 새 규칙으로(아카이브 하나라 바로 계산)
+                store_archive_standings(conn, archive_id)
+                bump_data_versions(conn, "archives", target_name(source, archive_id))
+            bump_data_versions(conn, "profiles")
+        # 같은 프로필을 다시 배정해도 계산 작업이 실패해 순위표가 비어 있으면 다시 맡긴다
+        if new_job:
+            job_id = enqueue_standings_job(conn, source, archive_id, profile_id)
+        conn.commit()
+    finally:
+        conn.close()
+
+    _after_write()
+    if new_job:
+        submit_job(job_id)
+    if job_id:
+        return jsonify({"status": "computing", "job_id": job_id}), 202
+    return jsonify({"status": "ready"})
+
+
+@bp.route("/api/standings", methods=["GET"])
+def standings_api():
+    """
+    ?target=games|tournament|archive:<id>&profile=<id>(생략하면 배정된 프로필)
+    미리 계산된 순위표를 읽기만 한다. 아직 없으면 202 + pending(계산 중이면 job_id).
+    계산은 배정(/assign)이나 POST /api/standings 가 맡긴다. 읽기 요청은 작업을 만들지 않는다.
+    """
+    parsed = parse_target(request.args.get("target", "games"))
+    if parsed is None:
+        return jsonify({"error": "target must be games, tournament or archive:<id>"}), 400
+    source, archive_id = parsed
+
+    conn = get_read_db()
+    try:
+        if not _target_exists(conn, source, archive_id):
+            return jsonify({"error": "archive not found"}), 404
+        profile_id = request.args.get("profile", type=int) or assigned_profile_id(conn, source, archive_id)
+        profile = load_profile(conn, profile_id)
+        if profile is None:
+            return jsonify({"error": "profile not found"}), 404
+        status, job_id = standings_status(conn, source, archive_id, profile_id)
+    finally:
+        conn.close()
+
+    if status != "ready":
+        return jsonify({"status": "pending", "job_id": job_id}), 202
+
+    def build():
+        conn = get_read_db()
+        cur = conn.execute("""
+            SELECT player_name, games, rank1, rank2, rank3, rank4, tobi, max_score, pt_sum
+            FROM profile_standings
+            WHERE source = ? AND archive_id = ? AND profile_id = ?
+            ORDER BY pt_sum DESC, games DESC, player_name ASC
+        """, (source, archive_id, profile_id))
+        rows = cur.fetchall()
+        conn.close()
+        return {
+            "target": target_name(source, archive_id),
+            "profile": profile,
+            "standings": [
+                {
+                    "position": i + 1,
+                    "player_name": r["player_name"],
+                    "games": r["games"],
+                    "pt_sum": round(r["pt_sum"], 1),
+                    "rank_counts": [r["rank1"], r["rank2"], r["rank3"], r["rank4"]],
+                    "avg_rank": (r["rank1"] + 2 * r["rank2"] + 3 * r["rank3"] + 4 * r["rank4"]) / r["games"],
+                    "tobi": r["tobi"],
+                    "max_score": r["max_score"],
+                }
+                for i, r in enumerate(rows)
+            ],
+        }
+
+    return cached_json([target_name(source, archive_id), "profiles"], build)
+
+
+@bp.route("/api/standings", methods=["POST"])
+def request_standings_api():
+    """
+    {"target": ..., "profile": <id>} 순위표 계산을 맡긴다(배정하지 않은 프로필로 미리 볼 때).
+    이미 있으면 200, 맡겼거나 계산 중이면 202 + job_id.
+    """
+    data = request.get_json() or {}
+    parsed = parse_target(data.get("target"))
+    if parsed is None:
+        return jsonify({"error": "target must be games, tournament or archive:<id>"}), 400
+    source, archive_id = parsed
+    profile_id = data.get("profile")
+    if isinstance(profile_id, bool) or not isinstance(profile_id, int):
+        return jsonify({"error": "profile must be an id"}), 400
+
+    conn = get_db()
+    try:
+        if not _target_exists(conn, source, archive_id):
+            return jsonify({"error": "archive not found"}), 404
+        if load_profile(conn, profile_id) is None:
+            return jsonify({"error": "profile not found"}), 404
+        status, job_id = standings_status(conn, source, archive_id, profile_id)
+        new_job = status == "missing"
+        if new_job:
+            job_id = enqueue_standings_job(conn, source, archive_id, profile_id)
+            conn.commit()
+    finally:
+        conn.close()
+
+    if new_job:
+        submit_job(job_id)
+    if status == "ready":
+        return jsonify({"status": "ready"})
+    return jsonify({"status": "computing", "job_id": job_id}), 202
+
+
+# ================== 분석용 컬럼 저장소 ==================
+# 출처별 대국을 gamestore.GameColumns(array 컬럼)로 들고 있다가 그 위에서 바로 집계한다.
+# profile_standings 와 달리 어느 프로필이든, 기간(from/to)을 잘라서든 작업 없이 바로 계산된다.
+# 처음 조회할 때 한 번 읽고, 그 뒤로는 scope 버전이 바뀐 조회에서 id 가 더 큰 대국만 덧붙인다
+# (다른 워커의 쓰기도 같은 방식으로 따라간다). 대국이 지워졌으면 그 출처만 다시 읽는다.
+
+def append_new_games(conn, cols, source, archive_id):
+    """cols 의 마지막 대국보다 id 가 큰 대국을 덧붙인다. 그 사이 대국이 지워졌으면 False."""
+    table = GAME_SOURCES.get(source, "archive_games")
+    where, args = ("AND archive_id = ?", (archive_id,)) if source == "archive" else ("", ())
+    last_id = cols.game_id[-1] if len(cols) else 0
+
+    kept = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE id <= ? {where}", (last_id, *args)).fetchone()[0]
+    if kept != len(cols):
+        return False
+    cur = conn.execute(f"""
+        SELECT
+            id, created_at,
+            player1_name, player2_name, player3_name, player4_name,
+            player1_score, player2_score, player3_score, player4_score
+        FROM {table}
+        WHERE id > ? {where}
+        ORDER BY id ASC
+    """, (last_id, *args))
+    for g in cur:
+        g = tuple(g)
+        scores = g[6:10]
+        cols.append(g[0], game_minute(g[1]), g[2:6], scores, game_ranks(scores))
+    return True
+
+
+def _read_game_columns(cols, source, archive_id):
+    conn = get_read_db()
+    conn.row_factory = None
+    try:
+        conn.execute("BEGIN")   # 개수 확인과 새 대국 읽기를 같은 시점에서
+        return append_new_games(conn, cols, source, archive_id)
+    finally:
+        conn.close()
+
+
+def scan_games(source, archive_id, fn):
+    """출처 하나의 컬럼 저장소를 최신으로 맞춘 뒤 fn(cols) 결과를 돌려준다."""
+    scope = target_name(source, archive_id)
+    store = db_state().game_store
+    version = db_state().scope_versions(["*", scope])
+    with store.lock:
+        cols = store.columns(scope, version, lambda c: _read_game_columns(c, source, archive_id))
+        return fn(cols)
+
+
+def _minute_range():
+    # from / to 는 "2025-03-15" 나 "2025-03-15T18:00". 날짜만 쓴 to 는 그날 끝까지 포함
+    start = end = None
+    value = (request.args.get("from") or "").strip()
+    if value:
+        start = game_minute(value)
+        if start < 0:
+            raise ValueError("from must be YYYY-MM-DD or YYYY-MM-DDTHH:MM")
+    value = (request.args.get("to") or "").strip()
+    if value:
+        end = game_minute(value)
+        if end < 0:
+            raise ValueError("to must be YYYY-MM-DD or YYYY-MM-DDTHH:MM")
+        end += 24 * 60 if len(value) == 10 else 1
+    return start, end
+
+
+def _analytics_args():
+    """((source, archive_id, profile, start, end), None) 또는 (None, 에러 응답)."""
+    parsed = parse_target(request.args.get("target", "games"))
+    if parsed is None:
+        return None, (jsonify({"error": "target must be games, tournament or archive:<id>"}), 400)
+    source, archive_id = parsed
+    try:
+        start, end = _minute_range()
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+
+    conn = get_read_db()
+    try:
+        if not _target_exists(conn, source, archive_id):
+            return None, (jsonify({"error": "archive not found"}), 404)
+        profile_id = request.args.get("profile", type=int) or assigned_profile_id(conn, source, archive_id)
+        profile = load_profile(conn, profile_id)
+    finally:
+        conn.close()
+    if profile is None:
+        return None, (jsonify({"error": "profile not found"}), 404)
+    return (source, archive_id, profile, start, end), None
+
+
+def _stats_json(t):
+    return {
+        "games": t[gamestore.GAMES],
+        "rank_counts": t[1:5],
+        "avg_rank": (t[1] + 2 * t[2] + 3 * t[3] + 4 * t[4]) / t[gamestore.GAMES],
+        "tobi": t[gamestore.TOBI],
+        "max_score": t[gamestore.MAX_SCORE],
+        "avg_score": t[gamestore.SCORE_SUM] / t[gamestore.GAMES],
+    }
+
+
+@bp.route("/api/analytics/standings", methods=["GET"])
+def analytics_standings():
+    """
+    ?target=games|tournament|archive:<id>&profile=<id>&from=&to=
+    컬럼 저장소에서 바로 계산한 순위표. 프로필을 바꾸거나 기간을 잘라도 작업 없이 응답한다.
+    """
+    args, error = _analytics_args()
+    if error:
+        return error
+    source, archive_id, profile, start, end = args
+
+    def build():
+        rows = scan_games(source, archive_id, lambda cols: gamestore.standings(cols, profile, start, end))
+        return {
+            "target": target_name(source, archive_id),
+            "profile": profile,
+            "standings": [
+                {"position": i + 1, "player_name": name, "pt_sum": round(pt, 1), **_stats_json(t)}
+                for i, (name, t, pt) in enumerate(rows)
+            ],
+        }
+
+    return cached_json([target_name(source, archive_id), "profiles"], build)
+
+
+@bp.route("/api/analytics/players/<player_name>", methods=["GET"])
+def analytics_player(player_name):
+    """
+    ?target=&profile=&from=&to=&recent=20
+    한 사람의 누적 기록, 최근 대국 순위, 함께 친 상대별 요약(대국 수 / 내 평균 순위 / 상대 평균 순위).
+    """
+    args, error = _analytics_args()
+    if error:
+        return error
+    source, archive_id, profile, start, end = args
+    name = player_name.strip()
+    recent = max(0, request.args.get("recent", 20, type=int))
+
+    def build():
+        # 있는지 확인도 같은 스캔에서(캐시에 맞으면 저장소를 건드리지 않는다)
+        found, detail = scan_games(
+            source, archive_id,
+            lambda cols: (cols.player(name) is not None,
+                          gamestore.player_detail(cols, name, profile, start, end, recent)),
+        )
+        if not found:
+            return None
+        if detail is None:
+            # 그 기간에는 대국이 없음
+            return {"target": target_name(source, archive_id), "player_name": name, "games": 0,
+                    "recent": [], "co_players": []}
+        return {
+            "target": target_name(source, archive_id),
+            "player_name": name,
+            "pt_sum": round(detail["pt_sum"], 1),
+            **_stats_json(detail["totals"]),
+            "recent": [{"game_id": gid, "rank": r} for gid, r in detail["recent"]],
+            "co_players": sorted(
+                (
+                    {"player_name": other, "games": c[0], "avg_rank": c[1] / c[0], "their_avg_rank": c[2] / c[0]}
+                    for other, c in detail["co_players"].items()
+                ),
+                key=lambda c: (-c["games"], c["player_name"]),
+            ),
+        }
+
+    resp = cached_json([target_name(source, archive_id), "profiles"], build)
+    if resp is None:
+        return jsonify({"error": "player not found"}), 404
+    return resp
+
+
+# ================== 플레이어 누적 집계 / 뱃지 자동 부여 ==================
+# player_aggregates(누적) / player_period_stats(월·주 단위) 는 대국이 들어올 때 그 판의 네 명만 갱신한다
+# (삭제 때는 그 네 명만 원본에서 다시 계산).
+# badge_rules 의 조건은 이 집계 위에서 규칙마다 SQL 한 번으로 판정하고, 이미 가진 뱃지는 다시 주지 않는다.
+#   조건 예: {"metric": "rank1", "min": 10}                          1등 10회
+#            {"metric": "tobi", "min": 1}                            토비 1회
+#            {"metric": "max_score", "min": 60000}                   한 판 60000점 이상
+#            {"metric": "archives", "min": 3, "source": "monthly"}   먼슬리 대회 3회 참가
+#            {"metric": "games", "min": 100}                         100 반장
+#   source: all(기본) | games | tournament | archive | monthly, 한 규칙의 조건은 모두 만족해야 한다
+
+GAME_SOURCES = {"games": "games", "tournament": "tournament_games"}   # source → 테이블 (아카이브는 archive_games)
+
+BADGE_RULE_METRICS = ("games", "rank1", "rank2", "rank3", "rank4", "tobi", "max_score", "pt_sum", "archives")
+BADGE_RULE_SOURCES = {
+    "all": "1",
+    "games": "a.source = 'games'",
+    "tournament": "a.source = 'tournament'",
+    "archive": "a.source = 'archive'",
+    "monthly": "a.source = 'archive' AND is_monthly_tournament(ar.name)",
+}
+
+_MONTHLY_TOURNAMENT_RE = re.compile(r"(?:20)?(\d{2})\s*[-년]?\s*(\d{1,2})\s*월")
+
+
+def is_monthly_tournament(name):
+    # script.js 의 parseMonthlyTournamentArchive 와 같은 기준 ("대회" + "25년 3월" 같은 표기)
+    s = (name or "").strip()
+    return int("대회" in s and _MONTHLY_TOURNAMENT_RE.search(s) is not None)
+
+
+def game_ranks(scores):
+    """자리별 순위. 동점이면 앞 자리가 높은 순위(script.js 와 같음)."""
+    order = sorted(range(4), key=lambda i: scores[i], reverse=True)
+    ranks = [0, 0, 0, 0]
+    for pos, i in enumerate(order):
+        ranks[i] = pos + 1
+    return ranks
+
+
+def game_results(scores, profile):
+    """자리별 (순위, pt). 점수 규칙은 profile(scoring_profiles 행)."""
+    uma, return_score = profile["uma"], profile["return_score"]
+    return [(r, (scores[i] - return_score) / 1000.0 + uma[r - 1]) for i, r in enumerate(game_ranks(scores))]
+
+
+def _aggregate_rows(source, archive_id, names, scores, only, profile):
+    for name, score, (rank, pt) in zip(names, scores, game_results(scores, profile)):
+        name = (name or "").strip()
+        if not name or (only is not None and name not in only):
+            continue
+        yield (
+            name, source, archive_id,
+            int(rank == 1), int(rank == 2), int(rank == 3), int(rank == 4),
+            int(score < 0), score, pt,
+        )
+
+
+def _add_aggregates(conn, source, archive_id, created_at, names, scores, only=None):
+    # 누적 집계의 pt 는 배정과 상관없이 기본 프로필 기준(뱃지 규칙이 같은 기준으로 비교하도록)
+    profile = load_profile(conn, DEFAULT_PROFILE_ID)
+    conn.executemany("""
+        INSERT INTO player_aggregates (
+            player_name, source, archive_id,
+            games, rank1, rank2, rank3, rank4, tobi, max_score, pt_sum
+        ) VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(player_name, source, archive_id) DO UPDATE SET
+            games = games + 1,
+            rank1 = rank1 + excluded.rank1,
+            rank2 = rank2 + excluded.rank2,
+            rank3 = rank3 + excluded.rank3,
+            rank4 = rank4 + excluded.rank4,
+            tobi = tobi + excluded.tobi,
+            max_score = MAX(max_score, excluded.max_score),
+            pt_sum = pt_sum + excluded.pt_sum
+    """, _aggregate_rows(source, archive_id, names, scores, only, profile))
+
+
+PERIOD_BUCKETS = ("month", "week")
+
+
+def period_keys(created_at):
+    """created_at → {"month": "2025-03", "week": "2025-W09"}(ISO 주). 날짜로 읽을 수 없으면 None."""
+    try:
+        d = datetime.fromisoformat(str(created_at or "").strip())
+    except ValueError:
+        return None
+    year, week, _ = d.isocalendar()
+    return {"month": d.strftime("%Y-%m"), "week": f"{year}-W{week:02d}"}
+
+
+def _add_period_stats(conn, source, archive_id, created_at, names, scores, only=None):
+    keys = period_keys(created_at)
+    if keys is None:
+        return
+    profile = load_profile(conn, DEFAULT_PROFILE_ID)
+    conn.executemany("""
+        INSERT INTO player_period_stats (
+            bucket, period, player_name, source, archive_id,
+            games, rank1, rank2, rank3, rank4, pt_sum
+        ) VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+        ON CONFLICT(bucket, period, player_name, source, archive_id) DO UPDATE SET
+            games = games + 1,
+            rank1 = rank1 + excluded.rank1,
+            rank2 = rank2 + excluded.rank2,
+            rank3 = rank3 + excluded.rank3,
+            rank4 = rank4 + excluded.rank4,
+            pt_sum = pt_sum + excluded.pt_sum
+    """, [
+        (bucket, period, name, source, archive_id, r1, r2, r3, r4, pt)
+        for name, _, _, r1, r2, r3, r4, _, _, pt in _aggregate_rows(source, archive_id, names, scores, only, profile)
+        for bucket, period in keys.items()
+    ])
+
+
+ROLLUP_TABLES = {
+    "player_aggregates": _add_aggregates,
+    "player_period_stats": _add_period_stats,
+    "profile_standings": _add_profile_standings,
+}
+
+
+def game_names(row):
+    return [(row[f"player{i}_name"] or "").strip() for i in range(1, 5)]
+
+
+def record_game(conn, source, created_at, names, scores, archive_id=0, award=True):
+    """
+    대국 한 판을 집계(누적 + 월/주 단위)에 더하고, award 면 그 네 명만 뱃지 규칙을 확인한다.
+    새로 부여한 뱃지 수를 돌려준다. 대국 INSERT 와 같은 트랜잭션 안에서 호출.
+    """
+    invalidate_profile_caches(conn, source, archive_id)
+    for add in ROLLUP_TABLES.values():
+        add(conn, source, archive_id, created_at, names, scores)
+    remember_player_names(conn, names)
+    if not award:
+        return 0
+    players = [n.strip() for n in names if n and n.strip()]
+    return award_badges(conn, players, granted_at=created_at)
+
+
+def _rebuild_rollup(conn, rollup, source=None, archive_id=None, players=None):
+    targets = [(src, table, 0) for src, table in GAME_SOURCES.items() if source in (None, src)]
+    if source in (None, "archive"):
+        if archive_id is None:
+            ids = [r[0] for r in conn.execute("SELECT id FROM archives")]
+        else:
+            ids = [archive_id]
+        targets += [("archive", "archive_games", aid) for aid in ids]
+
+    add = ROLLUP_TABLES[rollup]
+    only = set(players) if players is not None else None
+    for src, table, aid in targets:
+        sql = f"DELETE FROM {rollup} WHERE source = ? AND archive_id = ?"
+        params = [src, aid]
+        if only is not None:
+            sql += f" AND player_name IN ({','.join('?' * len(only))})"
+            params += sorted(only)
+        conn.execute(sql, params)
+
+        where = "WHERE archive_id = ?" if src == "archive" else ""
+        cur = conn.execute(f"""
+            SELECT
+                created_at,
+                player1_name, player2_name, player3_name, player4_name,
+                player1_score, player2_score, player3_score, player4_score
+            FROM {table} {where}
+            ORDER BY id ASC
+        """, (aid,) if where else ())
+        for g in cur.fetchall():
+            g = tuple(g)
+            add(conn, src, aid, g[0], g[1:5], g[5:], only)
+
+
+def rebuild_player_aggregates(conn, source=None, archive_id=None, players=None):
+    """
+    원본 대국 테이블에서 누적 집계를 다시 만든다.
+    source / archive_id / players 로 범위를 좁히고, 모두 None 이면 전체(마이그레이션 백필).
+    """
+    _rebuild_rollup(conn, "player_aggregates", source, archive_id, players)
+
+
+def rebuild_period_stats(conn, source=None, archive_id=None, players=None):
+    _rebuild_rollup(conn, "player_period_stats", source, archive_id, players)
+
+
+def rebuild_player_rollups(conn, source=None, archive_id=None, players=None):
+    # 최고 점수처럼 빼서 되돌릴 수 없는 값이 있으므로 대국 삭제 때는 영향받은 플레이어만 다시 계산
+    invalidate_profile_caches(conn, source, archive_id)
+    for rollup in ROLLUP_TABLES:
+        _rebuild_rollup(conn, rollup, source, archive_id, players)
+    if players is None:
+        sync_player_names(conn)
+
+
+def drop_player_rollups(conn, source, archive_id=0):
+    # 시즌 리셋 / 아카이브 삭제처럼 출처 하나가 통째로 사라질 때
+    for rollup in ROLLUP_TABLES:
+        conn.execute(f"DELETE FROM {rollup} WHERE source = ? AND archive_id = ?", (source, archive_id))
+    conn.execute(
+        "DELETE FROM profile_standings_state WHERE source = ? AND archive_id = ?", (source, archive_id)
+    )
+
+
+def archive_players(conn, archive_id):
+    cur = conn.execute(
+        "SELECT player_name FROM player_aggregates WHERE source = 'archive' AND archive_id = ?",
+        (archive_id,),
+    )
+    return [r[0] for r in cur.fetchall()]
+
+
+def parse_badge_conditions(raw):
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("conditions must be a non-empty list")
+    conditions = []
+    for c in raw:
+        if not isinstance(c, dict):
+            raise ValueError("each condition must be an object")
+        metric = c.get("metric")
+        source = c.get("source") or "all"
+        minimum = c.get("min")
+        if metric not in BADGE_RULE_METRICS:
+            raise ValueError(f"unknown metric: {metric}")
+        if source not in BADGE_RULE_SOURCES:
+            raise ValueError(f"unknown source: {source}")
+        if isinstance(minimum, bool) or not isinstance(minimum, (int, float)):
+            raise ValueError("min must be a number")
+        conditions.append({"metric": metric, "min": minimum, "source": source})
+    return conditions
+
+
+def _rule_having(conditions):
+    # metric/source 는 parse_badge_conditions 에서 화이트리스트로 걸렀으므로 그대로 SQL 에 넣는다
+    parts, params = [], []
+    for c in conditions:
+        f = BADGE_RULE_SOURCES[c["source"]]
+        metric = c["metric"]
+        if metric == "archives":
+            expr = f"COUNT(DISTINCT CASE WHEN a.source = 'archive' AND {f} THEN a.archive_id END)"
+        elif metric == "max_score":
+            expr = f"MAX(CASE WHEN {f} THEN a.max_score END)"
+        else:
+            expr = f"COALESCE(SUM(CASE WHEN {f} THEN a.{metric} END), 0)"
+        parts.append(f"{expr} >= ?")
+        params.append(c["min"])
+    return " AND ".join(parts), params
+
+
+def award_badges(conn, players=None, badge_code=None, granted_at=None):
+    """
+    규칙을 만족하지만 아직 그 뱃지가 없는 플레이어에게 부여하고, 부여한 수를 돌려준다.
+    players 가 None 이면 전체 기록을 한 번에 판정(백필), 아니면 그 플레이어들만 본다.
+    이미 가진 뱃지는 건너뛰므로 몇 번을 불러도 결과는 같다.
+    """
+    if players is not None:
+        players = sorted(set(players))
+        if not players:
+            return 0
+
+    sql = "SELECT badge_code, conditions FROM badge_rules"
+    params = ()
+    if badge_code is not None:
+        sql += " WHERE badge_code = ?"
+        params = (badge_code,)
+    rules = conn.execute(sql, params).fetchall()
+    if not rules:
+        return 0
+
+    granted_at = granted_at or datetime.now().isoformat(timespec="minutes")
+    where = ""
+    if players is not None:
+        where = f"WHERE a.player_name IN ({','.join('?' * len(players))})"
+
+    granted = 0
+    for code, conditions in rules:
+        having, having_params = _rule_having(json.loads(conditions))
+        cur = conn.execute(f"""
+            INSERT INTO player_badges (player_name, badge_code, granted_at)
+            SELECT q.player_name, ?, ?
+            FROM (
+                SELECT a.player_name
+                FROM player_aggregates a
+                LEFT JOIN archives ar ON a.source = 'archive' AND ar.id = a.archive_id
+                {where}
+                GROUP BY a.player_name
+                HAVING {having}
+            ) q
+            WHERE NOT EXISTS (
+                SELECT 1 FROM player_badges pb
+                WHERE pb.player_name = q.player_name AND pb.badge_code = ?
+            )
+        """, (code, granted_at, *(players or ()), *having_params, code))
+        granted += cur.rowcount
+    return granted
+
+
+@bp.route("/api/badge_rules", methods=["GET", "POST"])
+def badge_rules_api():
+    if request.method == "GET":
+        conn = get_read_db()
+        cur = conn.execute("""
+            SELECT r.badge_code, r.conditions, r.updated_at, b.name, b.grade
+            FROM badge_rules r
+            LEFT JOIN badges b ON b.code = r.badge_code
+            ORDER BY r.badge_code ASC
+        """)
+        rows = cur.fetchall()
+        conn.close()
+        return jsonify([
+            {
+                "badge_code": r["badge_code"],
+                "conditions": json.loads(r["conditions"]),
+                "updated_at": r["updated_at"],
+                "name": r["name"] or "",
+                "grade": r["grade"] or "",
+            }
+            for r in rows
+        ])
+
+    # POST: 뱃지 코드별 규칙 등록/교체 (기존 기록에 적용하려면 /api/admin/badge_rules/backfill)
+    data = request.get_json() or {}
+    try:
+        badge_code = int(data.get("badge_code", 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "badge_code must be integer"}), 400
+    try:
+        conditions = parse_badge_conditions(data.get("conditions"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db()
+    if not conn.execute("SELECT 1 FROM badges WHERE code = ?", (badge_code,)).fetchone():
+        conn.close()
+        return jsonify({"error": "badge not found"}), 400
+
+    conn.execute("""
+        INSERT INTO badge_rules (badge_code, conditions, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(badge_code) DO UPDATE SET conditions = excluded.conditions, updated_at = excluded.updated_at
+    """, (badge_code, json.dumps(conditions), datetime.now().isoformat(timespec="minutes")))
+    conn.commit()
+    conn.close()
+    _after_write()
+    return jsonify({"ok": True, "conditions": conditions}), 201
+
+
+@bp.route("/api/badge_rules/<int:badge_code>", methods=["DELETE"])
+def delete_badge_rule(badge_code):
+    # 규칙만 지운다(이미 부여된 뱃지는 그대로)
+    conn = get_db()
+    cur = conn.execute("DELETE FROM badge_rules WHERE badge_code = ?", (badge_code,))
+    conn.commit()
+    deleted = cur.rowcount
+    conn.close()
+    _after_write()
+    if deleted == 0:
+        return jsonify({"error": "rule not found"}), 404
+    return jsonify({"ok": True})
+
+
+def backfill_badges(conn, badge_code=None, rebuild=False):
+    if rebuild:
+        rebuild_player_rollups(conn)
+    granted = award_badges(conn, badge_code=badge_code)
+    if granted:
+        bump_data_versions(conn, "player_badges")
+    return granted
+
+
+@bp.route("/api/admin/badge_rules/backfill", methods=["POST"])
+def backfill_badges_api():
+    """전체 기록으로 규칙을 한 번에 판정합니다. ?code= 로 한 뱃지만, ?rebuild=1 이면 집계부터 다시."""
+    conn = get_db()
+    try:
+        granted = backfill_badges(
+            conn, request.args.get("code", type=int), request.args.get("rebuild") == "1",
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    _after_write()
+    return jsonify({"granted": granted})
+
+
+@bp.cli.command("badges-backfill")
+@click.option("--code", "badge_code", type=int, default=None, help="이 뱃지 규칙만 판정")
+@click.option("--rebuild", is_flag=True, help="집계를 원본 대국에서 다시 만든 뒤 판정")
+def badges_backfill_command(badge_code, rebuild):
+    """뱃지 자동 부여 규칙을 지금까지의 전체 기록에 적용합니다."""
+    conn = get_db()
+    try:
+        granted = backfill_badges(conn, badge_code, rebuild)
+        conn.commit()
+    finally:
+        conn.close()
+    click.echo(f"granted {granted} badges")
+
+
+# ---- 기간별 집계 조회 (player_period_stats 만 읽는다) ----
+
+def _period_filters(bucket):
+    # from / to 는 기간 키("2025-03", "2025-W09")나 날짜("2025-03-15") 둘 다 받는다
+    sql, params = "", []
+    for arg, op in (("from", ">="), ("to", "<=")):
+        value = (request.args.get(arg) or "").strip()
+        if not value:
+            continue
+        keys = period_keys(value)
+        sql += f" AND period {op} ?"
+        params.append(keys[bucket] if keys else value)
+
+    source = request.args.get("source")
+    if source in ("games", "tournament", "archive"):
+        sql += " AND source = ?"
+        params.append(source)
+    return sql, params
+
+
+@bp.route("/api/players/<player_name>/timeline", methods=["GET"])
+def player_timeline(player_name):
+    bucket = request.args.get("bucket", "month")
+    if bucket not in PERIOD_BUCKETS:
+        return jsonify({"error": "bucket must be month or week"}), 400
+    name = player_name.strip()
+
+    def build():
+        where, params = _period_filters(bucket)
+        conn = get_read_db()
+        cur = conn.execute(f"""
+            SELECT
+                period,
+                SUM(games) AS games,
+                SUM(pt_sum) AS pt_sum,
+                SUM(rank1) AS rank1, SUM(rank2) AS rank2, SUM(rank3) AS rank3, SUM(rank4) AS rank4
+            FROM player_period_stats
+            WHERE player_name = ? AND bucket = ? {where}
+            GROUP BY period
+            ORDER BY period ASC
+        """, (name, bucket, *params))
+        rows = cur.fetchall()
+        conn.close()
+        return {
+            "player_name": name,
+            "bucket": bucket,
+            "periods": [
+                {
+                    "period": r["period"],
+                    "games": r["games"],
+                    "pt_sum": round(r["pt_sum"], 1),
+                    "rank_counts": [r["rank1"], r["rank2"], r["rank3"], r["rank4"]],
+                    "avg_rank": (r["rank1"] + 2 * r["rank2"] + 3 * r["rank3"] + 4 * r["rank4"]) / r["games"],
+                }
+                for r in rows
+            ],
+        }
+
+    return cached_json(["games", "tournament", "archives"], build)
+
+
+@bp.route("/api/activity", methods=["GET"])
+def league_activity():
+    """
+    기간별 리그 전체 활동량과 그 기간의 최고 pt 플레이어(이달의 플레이어).
+    ?bucket=month|week&from=&to=&source=&min_games=4
+    """
+    bucket = request.args.get("bucket", "month")
+    if bucket not in PERIOD_BUCKETS:
+        return jsonify({"error": "bucket must be month or week"}), 400
+    min_games = request.args.get("min_games", 4, type=int)
+
+    def build():
+        where, params = _period_filters(bucket)
+        conn = get_read_db()
+        # 한 판에 1등은 한 명뿐이므로 SUM(rank1) 이 그 기간의 대국 수
+        totals = conn.execute(f"""
+            SELECT
+                period,
+                SUM(rank1) AS games,
+                SUM(games) AS player_games,
+                COUNT(DISTINCT player_name) AS players
+            FROM player_period_stats
+            WHERE bucket = ? {where}
+            GROUP BY period
+            ORDER BY period ASC
+        """, (bucket, *params)).fetchall()
+        tops = conn.execute(f"""
+            SELECT period, player_name, games, pt_sum FROM (
+                SELECT
+                    period, player_name, games, pt_sum,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY period ORDER BY pt_sum DESC, games DESC, player_name ASC
+                    ) AS pos
+                FROM (
+                    SELECT period, player_name, SUM(games) AS games, SUM(pt_sum) AS pt_sum
+                    FROM player_period_stats
+                    WHERE bucket = ? {where}
+                    GROUP BY period, player_name
+                    HAVING SUM(games) >= ?
+                )
+            )
+            WHERE pos = 1
+        """, (bucket, *params, min_games)).fetchall()
+        conn.close()
+
+        top_by_period = {
+            r["period"]: {"player_name": r["player_name"], "games": r["games"], "pt_sum": round(r["pt_sum"], 1)}
+            for r in tops
+        }
+        return {
+            "bucket": bucket,
+            "periods": [
+                {
+                    "period": r["period"],
+                    "games": r["games"],
+                    "player_games": r["player_games"],
+                    "players": r["players"],
+                    "top": top_by_period.get(r["period"]),
+                }
+                for r in totals
+            ],
+        }
+
+    return cached_json(["games", "tournament", "archives"], build)
+
+
+# ================== 플레이어 이름 검색 ==================
+# player_names 에 이름마다 정규화한 두 가지 키를 인덱스와 함께 두고 접두어 범위 검색을 한다.
+#   norm      한글을 자모로 풀어 쓴 이름("김민수" → "ㄱㅣㅁㅁㅣㄴㅅㅜ"). 겹받침/겹모음도 풀어서
+#             입력 중인 글자("김미", "김민")가 "김민수"/"김미나" 모두의 접두어가 되게 한다
+#   choseong  초성만 모은 이름("ㄱㅁㅅ")
+# 영문 등은 casefold 만 한다. 결과는 최근 활동(주 단위 집계의 마지막 주) → 대국 수 순.
+# 이름은 대국/뱃지가 들어올 때 추가만 하고, 조회 때 대국도 뱃지도 없는 이름은 걸러 낸다.
+
+PLAYER_SEARCH_LIMIT = 10
+PLAYER_SEARCH_MAX_LIMIT = 500
+
+_HANGUL_BASE = 0xAC00
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = [
+    "ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ",
+    "ㅗㅣ", "ㅛ", "ㅜ", "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ",
+]
+_JONGSEONG = [
+    "", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ",
+    "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+]
+# 검색어에 낱자로 들어온 겹받침/겹모음도 같은 방식으로 푼다
+_COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+
+def name_keys(name):
+    """이름 → (norm, choseong)."""
+    norm = []
+    cho = []
+    for ch in (name or "").strip().casefold():
+        code = ord(ch) - _HANGUL_BASE
+        if 0 <= code < 11172:
+            lead, rest = divmod(code, 588)
+            vowel, tail = divmod(rest, 28)
+            norm.append(_CHOSEONG[lead] + _JUNGSEONG[vowel] + _JONGSEONG[tail])
+            cho.append(_CHOSEONG[lead])
+        else:
+            ch = _COMPOUND_JAMO.get(ch, ch)
+            norm.append(ch)
+            cho.append(ch)
+    return "".join(norm), "".join(cho)
+
+
+def remember_player_names(conn, names):
+    rows = []
+    for name in names:
+        name = (name or "").strip()
+        if name:
+            rows.append((name, *name_keys(name)))
+    conn.executemany("INSERT OR IGNORE INTO player_names (name, norm, choseong) VALUES (?, ?, ?)", rows)
+
+
+def sync_player_names(conn):
+    """집계/뱃지에는 있는데 player_names 에 없는 이름을 채운다(백필, 스냅샷 가져오기 등 대량 적재 뒤)."""
+    cur = conn.execute("""
+        SELECT player_name FROM player_aggregates
+        UNION
+        SELECT player_name FROM player_badges
+        EXCEPT
+        SELECT name FROM player_names
+    """)
+    remember_player_names(conn, [r[0] for r in cur.fetchall()])
+
+
+@bp.route("/api/players/search", methods=["GET"])
+def player_search():
+    """
+    ?q=검색어&limit=10. 자모 단위 접두어("김미" → 김민수, 김미나) 또는 초성 접두어("ㄱㅁ")로 찾는다.
+    q 가 비어 있으면 최근 활동 순 전체.
+    """
+    q = request.args.get("q", "")
+    limit = request.args.get("limit", PLAYER_SEARCH_LIMIT, type=int)
+    if limit is None or limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    limit = min(limit, PLAYER_SEARCH_MAX_LIMIT)
+
+    norm, cho = name_keys(q)
+    where = "n.norm >= ? AND n.norm < ?"
+    params = [norm, norm + "\U0010ffff"]
+    # 완성된 글자가 하나라도 있으면 초성 검색은 하지 않는다("김"이 "강"까지 찾지 않게)
+    if norm == cho:
+        where = f"({where}) OR (n.choseong >= ? AND n.choseong < ?)"
+        params += [cho, cho + "\U0010ffff"]
+
+    def build():
+        conn = get_read_db()
+        cur = conn.execute(f"""
+            SELECT * FROM (
+                SELECT
+                    n.name,
+                    COALESCE((SELECT SUM(a.games) FROM player_aggregates a
+                              WHERE a.player_name = n.name), 0) AS games,
+                    (SELECT MAX(p.period) FROM player_period_stats p
+                     WHERE p.player_name = n.name AND p.bucket = 'week') AS last_week,
+                    (SELECT COUNT(*) FROM player_badges b WHERE b.player_name = n.name) AS badges
+                FROM player_names n
+                WHERE {where}
+            )
+            WHERE games > 0 OR badges > 0
+            ORDER BY last_week IS NULL, last_week DESC, games DESC, name ASC
+            LIMIT ?
+        """, (*params, limit))
+        rows = cur.fetchall()
+        conn.close()
+        return [
+            {"name": r["name"], "games": r["games"], "last_week": r["last_week"], "badges": r["badges"]}
+            for r in rows
+        ]
+
+    return cached_json(["games", "tournament", "archives", "player_badges"], build)
+
+
+# ================== 아카이브 API ==================
+# 아카이브는 가져온 뒤 바뀌지 않으므로 순위표 / 플레이어별 요약(archive_standings, archive_player_stats)과
+# 대국 수 / 참가자 수(archives)를 가져올 때 한 번 계산해 둔다. 점수 규칙 배정이 바뀔 때만 다시 계산.
+
+ARCHIVE_RECENT_GAMES = 30
+
+
+def store_archive_standings(conn, archive_id):
+    """아카이브 하나의 순위표와 플레이어별 요약을 다시 계산해 저장한다. 커밋은 호출하는 쪽에서."""
+    cols = gamestore.GameColumns(gamestore.NameTable())
+    append_new_games(conn, cols, "archive", archive_id)
+    profile = assigned_profile(conn, "archive", archive_id)
+    rows = gamestore.standings(cols, profile)
+    uma, return_score = profile["uma"], profile["return_score"]
+
+    drop_archive_standings(conn, archive_id)
+    for position, (name, t, pt) in enumerate(rows, start=1):
+        p = cols.player(name)
+        pos_pt = sum(max((s - return_score) / 1000.0 + uma[r - 1], 0.0) for s, r in zip(p.score, p.rank))
+        conn.execute("""
+            INSERT INTO archive_standings (
+                archive_id, position, player_name,
+                games, rank1, rank2, rank3, rank4, tobi, max_score, score_sum, pt_sum, pos_pt_sum
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (archive_id, position, name, *t, pt, pos_pt))
+
+        detail = gamestore.player_detail(cols, name, profile, recent=ARCHIVE_RECENT_GAMES)
+        recent = [
+            [gamestore.from_minute(p.minute[i]), p.rank[i]]
+            for i in range(max(0, len(p.seat) - ARCHIVE_RECENT_GAMES), len(p.seat))
+        ]
+        co_players = sorted(
+            ([other, *c] for other, c in detail["co_players"].items()),
+            key=lambda c: (-c[1], c[0]),
+        )
+        conn.execute("""
+            INSERT INTO archive_player_stats (archive_id, player_name, position, recent, co_players)
+            VALUES (?, ?, ?, ?, ?)
+        """, (archive_id, name, position, json.dumps(recent), json.dumps(co_players, ensure_ascii=False)))
+
+    conn.execute(
+        "UPDATE archives SET game_count = ?, player_count = ? WHERE id = ?",
+        (len(cols), len(rows), archive_id),
+    )
+
+
+def drop_archive_standings(conn, archive_id):
+    conn.execute("DELETE FROM archive_standings WHERE archive_id = ?", (archive_id,))
+    conn.execute("DELETE FROM archive_player_stats WHERE archive_id = ?", (archive_id,))
+
+
+def _archive_standing_json(r):
+    return {
+        "position": r["position"],
+        "player_name": r["player_name"],
+        "games": r["games"],
+        "pt_sum": round(r["pt_sum"], 1),
+        "pos_pt_sum": round(r["pos_pt_sum"], 1),
+        "rank_counts": [r["rank1"], r["rank2"], r["rank3"], r["rank4"]],
+        "avg_rank": (r["rank1"] + 2 * r["rank2"] + 3 * r["rank3"] + 4 * r["rank4"]) / r["games"],
+        "tobi": r["tobi"],
+        "max_score": r["max_score"],
+        "avg_score": r["score_sum"] / r["games"],
+    }
+
+
+@bp.route("/api/archives", methods=["GET"])
+def archives_api():
+    def build():
+        conn = get_read_db()
+        cur = conn.execute(
+            """
+            SELECT
+                a.id,
+                a.name,
+                a.created_at,
+                a.game_count,
+                a.player_count,
+                s.player_name AS winner,
+                s.pt_sum AS winner_pt
+            FROM archives a
+            LEFT JOIN archive_standings s ON s.archive_id = a.id AND s.position = 1
+            WHERE a.importing = 0
+            ORDER BY a.id DESC
+            """
+        )
+        rows = [dict(r) for r in cur.fetchall()]
+        conn.close()
+        for r in rows:
+            if r["winner_pt"] is not None:
+                r["winner_pt"] = round(r["winner_pt"], 1)
+        return rows
+
+    return cached_json(["archives"], build)
+
+
+@bp.route("/api/archives/<int:archive_id>/standings", methods=["GET"])
+def archive_standings_api(archive_id):
+    conn = get_read_db()
+    exists = _target_exists(conn, "archive", archive_id)
+    conn.close()
+    if not exists:
+        return jsonify({"error": "archive not found"}), 404
+
+    def build():
+        conn = get_read_db()
+        profile = assigned_profile(conn, "archive", archive_id)
+        rows = conn.execute(
+            "SELECT * FROM archive_standings WHERE archive_id = ? ORDER BY position ASC", (archive_id,)
+        ).fetchall()
+        conn.close()
+        return {
+            "archive_id": archive_id,
+            "profile": profile,
+            "standings": [_archive_standing_json(r) for r in rows],
+        }
+
+    return cached_json([f"archive:{archive_id}", "profiles"], build)
+
+
+@bp.route("/api/archives/<int:archive_id>/players/<player_name>", methods=["GET"])
+def archive_player_api(archive_id, player_name):
+    name = player_name.strip()
+    conn = get_read_db()
+    exists = _target_exists(conn, "archive", archive_id) and conn.execute(
+        "SELECT 1 FROM archive_player_stats WHERE archive_id = ? AND player_name = ?", (archive_id, name)
+    ).fetchone()
+    conn.close()
+    if not exists:
+        return jsonify({"error": "player not found"}), 404
+
+    def build():
+        conn = get_read_db()
+        row = conn.execute("""
+            SELECT s.*, p.recent, p.co_players
+            FROM archive_player_stats p
+            JOIN archive_standings s ON s.archive_id = p.archive_id AND s.position = p.position
+            WHERE p.archive_id = ? AND p.player_name = ?
+        """, (archive_id, name)).fetchone()
+        conn.close()
+        return {
+            "archive_id": archive_id,
+            **_archive_standing_json(row),
+            "recent": [{"created_at": t, "rank": r} for t, r in json.loads(row["recent"])],
+            "co_players": [
+                {"player_name": other, "games": n, "avg_rank": mine / n, "their_avg_rank": theirs / n}
+                for other, n, mine, theirs in json.loads(row["co_players"])
+            ],
+        }
+
+    return cached_json([f"archive:{archive_id}", "profiles"], build)
+
+
+# ================== 통산(커리어) 기록 ==================
+# 시즌을 넘는 기록은 대국을 다시 훑지 않고 출처별 부분 집계를 합쳐서 만든다.
+#   아카이브: archive_standings(가져올 때 배정된 프로필로 한 번 계산해 둔 행) — 한 사람당 아카이브 수만큼 읽기
+#   현재 시즌(개인전 / 대회전): 컬럼 저장소의 이름별 누적 집계 + 배정된 프로필의 pt
+# 집계는 gamestore 집계 리스트(대국 수, 1~4등 횟수, 토비, 최고 점수, 점수 합)로 맞추고 pt 합은 따로 더한다.
+
+CAREER_LIVE_SOURCES = ("games", "tournament")
+
+
+def merge_totals(into, t):
+    """gamestore 집계 리스트 t 를 into 에 더한다(최고 점수만 max). into 가 None 이면 복사본."""
+    if into is None:
+        return list(t)
+    for i, v in enumerate(t):
+        into[i] = max(into[i], v) if i == gamestore.MAX_SCORE else into[i] + v
+    return into
+
+
+def _archive_totals(r):
+    return [r["games"], r["rank1"], r["rank2"], r["rank3"], r["rank4"], r["tobi"], r["max_score"], r["score_sum"]]
+
+
+def _live_profiles():
+    conn = get_read_db()
+    try:
+        return {source: assigned_profile(conn, source) for source in CAREER_LIVE_SOURCES}
+    finally:
+        conn.close()
+
+
+def player_career_stats(name):
+    """name 의 통산 기록과 시즌(출처)별 기록. 아카이브 쪽은 archive_standings 인덱스 한 번."""
+    seasons = []
+    for source, profile in _live_profiles().items():
+        def live(cols):
+            p = cols.player(name)
+            return None if p is None else (list(p.totals), gamestore.pt_sum(p.totals, profile))
+
+        found = scan_games(source, 0, live)
+        if found is not None:
+            seasons.append(({"target": source}, *found))
+
+    conn = get_read_db()
+    rows = conn.execute("""
+        SELECT s.*, a.name AS archive_name, a.created_at AS archive_created_at
+        FROM archive_standings s
+        JOIN archives a ON a.id = s.archive_id
+        WHERE s.player_name = ?
+        ORDER BY s.archive_id DESC
+    """, (name,)).fetchall()
+    conn.close()
+    for r in rows:
+        seasons.append(({
+            "target": target_name("archive", r["archive_id"]),
+            "archive_id": r["archive_id"],
+            "name": r["archive_name"],
+            "created_at": r["archive_created_at"],
+            "position": r["position"],
+        }, _archive_totals(r), r["pt_sum"]))
+
+    if not seasons:
+        # 뱃지만 있는 사람, 아카이브 순위표를 다시 계산하는 중인 경우 등
+        return {"player_name": name, "games": 0, "archives": 0, "seasons": []}
+    totals, pt = None, 0.0
+    for _, t, season_pt in seasons:
+        totals = merge_totals(totals, t)
+        pt += season_pt
+    return {
+        "player_name": name,
+        "pt_sum": round(pt, 1),
+        **_stats_json(totals),
+        "archives": len(rows),
+        "seasons": [
+            {**info, "pt_sum": round(season_pt, 1), **_stats_json(t)} for info, t, season_pt in seasons
+        ],
+    }
+
+
+@bp.route("/api/players/<player_name>/career", methods=["GET"])
+def player_career(player_name):
+    """현재 시즌과 모든 아카이브를 합친 통산 기록과, 시즌(출처)별 기록."""
+    name = player_name.strip()
+    conn = get_read_db()
+    exists = conn.execute("SELECT 1 FROM player_aggregates WHERE player_name = ? LIMIT 1", (name,)).fetchone()
+    conn.close()
+    if not exists:
+        return jsonify({"error": "player not found"}), 404
+
+    return cached_json(["games", "tournament", "archives", "profiles"], lambda: player_career_stats(name))
+
+
+@bp.route("/api/players/<player_name>/profile", methods=["GET"])
+def player_profile(player_name):
+    """
+    선수 화면을 한 번에: 통산 기록(/career 와 같은 내용) + 보유 뱃지(/api/player_badges/by_player 와 같은 내용).
+    DB 는 이름 인덱스 두 번(archive_standings, player_badges)만 읽고 나머지는 메모리에서 채운다.
+    대국도 뱃지도 없는 이름은 404(/career 는 대국이 없으면 404, 뱃지만 있으면 여기서 career 가 0판).
+    """
+    name = player_name.strip()
+    conn = get_read_db()
+    exists = conn.execute("""
+        SELECT 1 FROM player_aggregates WHERE player_name = ?
+        UNION ALL
+        SELECT 1 FROM player_badges WHERE player_name = ?
+        LIMIT 1
+    """, (name, name)).fetchone()
+    conn.close()
+    if not exists:
+        return jsonify({"error": "player not found"}), 404
+
+    def build():
+        conn = get_read_db()
+        badges = player_badge_list(conn, name)
+        conn.close()
+        return {"player_name": name, "career": player_career_stats(name), "badges": badges}
+
+    return cached_json(["games", "tournament", "archives", "profiles", "badges", "player_badges"], build)
+
+
+@bp.route("/api/career/standings", methods=["GET"])
+def career_standings():
+    """
+    ?min_games=0
+    현재 시즌과 모든 아카이브를 합친 통산 순위표(pt 합 내림차순).
+    """
+    min_games = request.args.get("min_games", 0, type=int)
+
+    def build():
+        merged = {}   # 이름 → [집계, pt 합, 아카이브 수]
+
+        conn = get_read_db()
+        rows = conn.execute("""
+            SELECT
+                player_name,
+                SUM(games) AS games,
+                SUM(rank1) AS rank1, SUM(rank2) AS rank2, SUM(rank3) AS rank3, SUM(rank4) AS rank4,
+                SUM(tobi) AS tobi,
+                MAX(max_score) AS max_score,
+                SUM(score_sum) AS score_sum,
+                SUM(pt_sum) AS pt_sum,
+                COUNT(*) AS archives
+            FROM archive_standings
+            GROUP BY player_name
+        """).fetchall()
+        conn.close()
+        for r in rows:
+            merged[r["player_name"]] = [_archive_totals(r), r["pt_sum"], r["archives"]]
+
+        for source, profile in _live_profiles().items():
+            def live(cols):
+                # 집계 리스트는 컬럼 저장소의 것이므로 잠금 안에서 합친다
+                for name, t, pt in gamestore.standings(cols, profile):
+                    entry = merged.get(name)
+                    if entry is None:
+                        merged[name] = [list(t), pt, 0]
+                    else:
+                        merge_totals(entry[0], t)
+                        entry[1] += pt
+
+            scan_games(source, 0, live)
+
+        standings = sorted(
+            ((name, t, pt, archives) for name, (t, pt, archives) in merged.items() if t[gamestore.GAMES] >= min_games),
+            key=lambda r: (-r[2], -r[1][gamestore.GAMES], r[0]),
+        )
+        return {
+            "min_games": min_games,
+            "standings": [
+                {"position": i + 1, "player_name": name, "pt_sum": round(pt, 1), **_stats_json(t),
+                 "archives": archives}
+                for i, (name, t, pt, archives) in enumerate(standings)
+            ],
+        }
+
+    return cached_json(["games", "tournament", "archives", "profiles"], build)
+
+
+@bp.route("/api/archives/<int:archive_id>/games", methods=["GET"])
+def archive_games_api(archive_id):
+    page, error = game_page_args()
+    if error:
+        return jsonify({"error": error}), 400
+    sql, params = paged_games_sql(
+        """
+        SELECT
+            id,
+            created_at,
+            player1_name, player2_name, player3_name, player4_name,
+            player1_score, player2_score, player3_score, player4_score
+        FROM archive_games
+        """,
+        ["archive_id = ?"], [archive_id], page, order="ASC",
+    )
+
+    if wants_columnar():
+        return cached_response([f"archive:{archive_id}"], lambda: columnar_query(sql, params))
+
+    def build():
+        conn = get_read_db()
+        cur = conn.execute(sql, params)
+        rows = [dict(r) for r in cur.fetchall()]
+        conn.close()
+        return rows
+
+    return cached_json([f"archive:{archive_id}"], build)
+
+
+@bp.route("/api/archives/<int:archive_id>", methods=["DELETE"])
+def delete_archive(archive_id):
+    conn = get_db()
+    conn.execute("DELETE FROM archive_games WHERE archive_id = ?", (archive_id,))
+    drop_player_rollups(conn, "archive", archive_id)
+    drop_archive_standings(conn, archive_id)
+    conn.execute("DELETE FROM profile_assignments WHERE source = 'archive' AND archive_id = ?", (archive_id,))
+    cur = conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
+    bump_data_versions(conn, "archives", f"archive:{archive_id}")
     conn.commit()
+    deleted = cur.rowcount
     conn.close()
+    _after_write()
+    db_state().game_store.drop(f"archive:{archive_id}")
+    if deleted == 0:
+        return jsonify({"error": "archive not found"}), 404
+    return jsonify({"ok": True})
+
+@bp.route("/admin/archive_import", methods=["POST"])
+def admin_archive_import():
+    archive_name = (request.form.get("archive_name") or "").strip()
+    file = request.files.get("file")
+
+    if not archive_name:
+        return "아카이브 이름이 필요합니다.", 400
+    if not file:
+        return "CSV 파일이 필요합니다.", 400
+
+    return enqueue_import_job("archive", file, {"archive_name": archive_name})
+
+# ================== 아카이브 바이너리 스냅샷 (.mjsnap) ==================
+# 포맷은 snapshot_format.py 참고. 아카이브 여러 개(시즌 단위)를 한 파일로 옮길 때 쓴다.
+
+def write_archives_snapshot(conn, fp, archive_ids=None):
+    if archive_ids:
+        marks = ",".join("?" * len(archive_ids))
+        archives = conn.execute(
+            f"SELECT id, name, created_at FROM archives WHERE id IN ({marks}) AND importing = 0 ORDER BY id ASC",
+            list(archive_ids),
+        ).fetchall()
+    else:
+        archives = conn.execute(
+            "SELECT id, name, created_at FROM archives WHERE importing = 0 ORDER BY id ASC"
+        ).fetchall()
+
+    def games_of(archive_id):
+        return conn.execute("""
+            SELECT
+                created_at,
+                player1_name, player2_name, player3_name, player4_name,
+                player1_score, player2_score, player3_score, player4_score
+            FROM archive_games
+            WHERE archive_id = ?
+            ORDER BY id ASC
+        """, (archive_id,))
+
+    # 스냅샷 헤더에는 규칙이 하나뿐이므로 같은 프로필의 아카이브끼리만 묶을 수 있다
+    profile_ids = {assigned_profile_id(conn, "archive", a["id"]) for a in archives}
+    if len(profile_ids) > 1:
+        raise SnapshotError("archives use different scoring profiles; export them separately")
+    profile = load_profile(conn, profile_ids.pop() if profile_ids else DEFAULT_PROFILE_ID)
+
+    write_snapshot(fp, profile_rules(profile), [
+        {"name": a["name"], "created_at": a["created_at"], "games": games_of(a["id"])}
+        for a in archives
+    ])
+    return len(archives)
+
+
+def import_archives_snapshot(conn, path):
+    """
+    스냅샷 파일의 아카이브들을 새 아카이브로 추가합니다. 커밋은 호출하는 쪽에서.
+    스냅샷의 점수 규칙과 같은 프로필을 찾아(없으면 만들어) 배정합니다.
+    """
+    imported = []
+    with SnapshotReader(path) as snap:
+        profile_id = profile_for_rules(conn, snap.rules)
+
+        for i, a in enumerate(snap.archives):
+            cur = conn.execute(
+                "INSERT INTO archives (name, created_at) VALUES (?, ?)",
+                (a["name"], a["created_at"]),
+            )
+            archive_id = cur.lastrowid
+            if profile_id != DEFAULT_PROFILE_ID:
+                conn.execute(
+                    "INSERT INTO profile_assignments (source, archive_id, profile_id) VALUES ('archive', ?, ?)",
+                    (archive_id, profile_id),
+                )
+            conn.executemany("""
+                INSERT INTO archive_games (
+                    archive_id,
+                    created_at,
+                    player1_name, player2_name, player3_name, player4_name,
+                    player1_score, player2_score, player3_score, player4_score
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, ((archive_id, *g) for g in snap.games(i)))
+            rebuild_player_rollups(conn, "archive", archive_id)
+            award_badges(conn, archive_players(conn, archive_id))
+            store_archive_standings(conn, archive_id)
+            bump_data_versions(conn, f"archive:{archive_id}")
+            imported.append({"id": archive_id, "name": a["name"], "game_count": a["game_count"]})
+
+    bump_data_versions(conn, "archives", "player_badges", "profiles")
+    return imported
+
+
+def _snapshot_response(archive_ids, filename):
+    conn = get_read_db()
+    try:
+        buf = io.BytesIO()
+        count = write_archives_snapshot(conn, buf, archive_ids)
+    except SnapshotError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        conn.close()
+    if archive_ids and count == 0:
+        return jsonify({"error": "archive not found"}), 404
+    return Response(
+        buf.getvalue(),
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@bp.route("/api/archives/<int:archive_id>/snapshot", methods=["GET"])
+def export_archive_snapshot(archive_id):
+    return _snapshot_response([archive_id], f"archive_{archive_id}.mjsnap")
+
+
+@bp.route("/api/admin/snapshot", methods=["GET"])
+def export_snapshot():
+    # ?archive=1&archive=2 로 고르거나, 없으면 전체 아카이브
+    archive_ids = request.args.getlist("archive", type=int)
+    return _snapshot_response(archive_ids, "madang_archives.mjsnap")
+
+
+@bp.route("/api/admin/snapshot_import", methods=["POST"])
+def import_snapshot():
+    file = request.files.get("file")
+    if not file:
+        return jsonify({"error": "file required"}), 400
+
+    # mmap 으로 읽기 위해 임시 파일로 저장
+    with tempfile.NamedTemporaryFile(suffix=".mjsnap") as tmp:
+        file.save(tmp)
+        tmp.flush()
+        conn = get_db()
+        try:
+            imported = import_archives_snapshot(conn, tmp.name)
+            conn.commit()
+        except SnapshotError as e:
+            conn.rollback()
+            return jsonify({"error": str(e)}), 400
+        finally:
+            conn.close()
+
+    _after_write()
+    return jsonify({"archives": imported}), 201
+
+
+@bp.cli.command("snapshot-export")
+@click.argument("path")
+@click.option("--archive", "archive_ids", type=int, multiple=True, help="내보낼 아카이브 id (생략하면 전체)")
+def snapshot_export_command(path, archive_ids):
+    """아카이브를 .mjsnap 파일로 내보냅니다."""
+    conn = get_db()
+    try:
+        with open(path, "wb") as fp:
+            count = write_archives_snapshot(conn, fp, archive_ids)
+    except SnapshotError as e:
+        os.remove(path)
+        raise click.ClickException(str(e))
+    finally:
+        conn.close()
+    click.echo(f"exported {count} archives -> {path}")
+
+
+@bp.cli.command("snapshot-import")
+@click.argument("path")
+def snapshot_import_command(path):
+    """.mjsnap 파일의 아카이브를 추가합니다."""
+    conn = get_db()
+    try:
+        imported = import_archives_snapshot(conn, path)
+        conn.commit()
+    except SnapshotError as e:
+        conn.rollback()
+        raise click.ClickException(str(e))
+    finally:
+        conn.close()
+    for a in imported:
+        click.echo(f"#{a['id']} {a['name']} ({a['game_count']} games)")
 
-    # 다시 메인 화면으로
-    return redirect(url_for("index_page"))
 
 # ---- 대회전 CSV 내보내기 ----
 
-@app.route("/export_tournament", methods=["GET"])
+@bp.route("/export_tournament", methods=["GET"])
 def export_tournament_games():
-    conn = get_db()
+    conn = get_read_db()
+    profile = assigned_profile(conn, "tournament")
     cur = conn.execute("""
         SELECT
             id, created_at,
@@ -1096,19 +4208,7 @@ def export_tournament_games():
     conn.close()
 
     def calc_pts(scores):
-        UMA = [50, 10, -10, -30]
-        RETURN_SCORE = 30000
-        order = sorted(range(4), key=lambda i: scores[i], reverse=True)
-
-        uma_for_player = [0, 0, 0, 0]
-        for rank, idx in enumerate(order):
-            uma_for_player[idx] = UMA[rank]
-
-        pts = []
-        for i in range(4):
-            base = (scores[i] - RETURN_SCORE) / 1000.0
-            pts.append(base + uma_for_player[i])
-        return pts
+        return [pt for _, pt in game_results(scores, profile)]
 
     output = io.StringIO()
     writer = csv.writer(output)
@@ -1155,22 +4255,22 @@ def export_tournament_games():
 
 # ---- 대회전 CSV 업로드 ----
 
-@app.route("/import_tournament", methods=["GET", "POST"])
+@bp.route("/import_tournament", methods=["GET", "POST"])
 def import_tournament_games():
     if request.method == "GET":
-        return """
+        return f"""
         <!DOCTYPE html>
         <html lang="ko">
         <head>
           <meta charset="UTF-8">
           <title>대회전 CSV 업로드</title>
-          <link rel="stylesheet" href="/static/style.css">
+          <link rel="stylesheet" href="{asset_url("style.css")}">
         </head>
         <body>
           <div class="top-bar">
             <h1>대회전 CSV 업로드</h1>
             <div class="view-switch">
-              <a href="/" class="view-switch-btn">메인으로 돌아가기</a>
+              <a href="{request.script_root}/" class="view-switch-btn">메인으로 돌아가기</a>
             </div>
           </div>
           <div class="main-layout">
@@ -1196,85 +4296,749 @@ def import_tournament_games():
     if not file:
         return "파일이 없습니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
+    return enqueue_import_job("tournament", file)
+
+# ================== 백그라운드 작업 (CSV 업로드) ==================
+# 업로드 파일은 UPLOAD_DIR 에 저장하고 jobs 테이블에 작업을 남긴 뒤 바로 응답한다.
+# 작업은 JOB_BATCH_ROWS 행마다 (데이터 + 진행 상황) 을 한 트랜잭션으로 커밋하므로,
+# 프로세스가 죽어도 rows_parsed 다음 행부터 이어서 할 수 있다.
+#   status: queued → running → done | failed | cancelled
+
+JOB_BATCH_ROWS = 500
+JOB_STALE_SECONDS = 120     # running 인데 heartbeat 가 이만큼 끊기면 죽은 작업으로 보고 다시 잡는다
+JOB_MAX_ERRORS = 100
+JOB_WORKERS = 2
+
+_JOB_EXECUTOR = None
+_JOB_EXECUTOR_LOCK = threading.Lock()
+# DB 파일 → 대기 중인 job id. 한 DB(리그)의 작업은 한 번에 하나씩 돌아서, 큰 업로드가 몰린 리그가
+# JOB_WORKERS 를 다 차지해 다른 리그의 작업을 막지 않는다
+_JOB_LANES = {}
+
+
+class JobFailed(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _pick(row, keys, default=""):
+    for k in keys:
+        if k in row and row[k] not in (None, ""):
+            return row[k]
+    return default
+
+
+def _pick_int(row, keys, default=0):
+    val = _pick(row, keys, None)
+    if val is None or val == "":
+        return default
+    try:
+        return int(float(val))
+    except (ValueError, TypeError):
+        return default
+
+
+def _pick_game(row, default_time):
+    created_at = _pick(row, ["created_at", "시간"]) or default_time
+    names = [
+        _pick(row, [f"player{i}_name", f"P{i} 이름", f"P{i}이름"]) for i in range(1, 5)
+    ]
+    scores = [
+        _pick_int(row, [f"player{i}_score", f"P{i} 점수", f"P{i}점수"]) for i in range(1, 5)
+    ]
+    return created_at, names, scores
+
+
+ENCODING_SAMPLE_BYTES = 1024 * 1024
+SNIFF_SAMPLE_CHARS = 8 * 1024
+CSV_ENCODINGS = ("utf-8-sig", "cp949")   # utf-8-sig 는 BOM 없는 utf-8 도 읽는다
+
+
+def detect_csv_encoding(f):
+    """
+    앞부분(ENCODING_SAMPLE_BYTES)이 디코딩되는 첫 후보. 파일 전체를 미리 읽지는 않고,
+    그 뒤에서 맞지 않는 바이트가 나오면 open_csv_rows 가 읽다가 작업을 실패시킨다.
+    """
+    prefix = f.read(ENCODING_SAMPLE_BYTES)
+    whole = len(prefix) < ENCODING_SAMPLE_BYTES
+    for enc in CSV_ENCODINGS:
         try:
-            text = raw.decode(enc)
-            break
+            # 앞부분만 읽었으면 끝에서 잘린 멀티바이트 문자는 봐준다
+            codecs.getincrementaldecoder(enc)().decode(prefix, final=whole)
+            return enc
         except UnicodeDecodeError:
             continue
+    return None
 
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
 
-    import io as _io
-    sample = "\n".join(text.splitlines()[:5])
+def open_csv_rows(path):
+    """
+    업로드 파일을 (줄 번호, 행 dict) 로 하나씩 돌려준다. 파일 전체를 메모리에 올리지 않는다.
+    인코딩을 모르거나 읽는 중에 그 인코딩으로 읽을 수 없는 바이트가 나오면 JobFailed.
+    """
+    with open(path, "rb") as raw:
+        encoding = detect_csv_encoding(raw)
+        if encoding is None:
+            raise JobFailed("알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.")
+        raw.seek(0)
+
+        text = io.TextIOWrapper(raw, encoding=encoding, newline="")
+        sample = "\n".join(text.read(SNIFF_SAMPLE_CHARS).splitlines()[:5])
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;")
+        except Exception:
+            dialect = csv.excel
+        text.seek(0)
+
+        reader = csv.DictReader(text, dialect=dialect)
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except UnicodeDecodeError:
+            raise JobFailed(
+                f"{reader.line_num + 1}번째 줄 근처에 {encoding} 로 읽을 수 없는 글자가 있습니다. "
+                "파일 전체를 UTF-8 또는 CP949 한 가지로 저장해주세요."
+            ) from None
+
+
+# ---- 작업 종류별 행 처리: (conn, row, params) → "inserted" | "updated" | "skipped" ----
+
+def _import_game_row(source):
+    table = GAME_SOURCES[source]
+
+    def handle(conn, row, params):
+        created_at, names, scores = _pick_game(row, datetime.now().isoformat(timespec="minutes"))
+        if not any(names):
+            return "skipped"
+        conn.execute(f"""
+            INSERT INTO {table} (
+                created_at,
+                player1_name, player2_name, player3_name, player4_name,
+                player1_score, player2_score, player3_score, player4_score
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (created_at, *names, *scores))
+        record_game(conn, source, created_at, names, scores)
+        return "inserted"
+    return handle
+
+
+def _import_badge_row(conn, row, params):
     try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
+        code = int(float(_pick(row, ["code", "코드"], "0")))
     except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
+        code = 0
 
-    reader = csv.DictReader(_io.StringIO(text), dialect=dialect)
+    name = str(_pick(row, ["name", "이름"], "")).strip()
+    grade = str(_pick(row, ["grade", "등급"], "")).strip()
+    desc = str(_pick(row, ["description", "설명"], "")).strip()
+
+    if not code or not name or not grade:
+        return "skipped"
+
+    # code 기준 업서트(있으면 update, 없으면 insert)
+    try:
+        conn.execute(
+            "INSERT INTO badges (code, name, grade, description) VALUES (?, ?, ?, ?)",
+            (code, name, grade, desc),
+        )
+        return "inserted"
+    except sqlite3.IntegrityError:
+        conn.execute(
+            "UPDATE badges SET name = ?, grade = ?, description = ? WHERE code = ?",
+            (name, grade, desc, code),
+        )
+        return "updated"
+
+
+def _import_player_badge_row(conn, row, params):
+    player_name = str(_pick(row, ["player_name", "플레이어", "이름"], "")).strip()
+    try:
+        badge_code = int(float(_pick(row, ["badge_code", "code", "뱃지코드", "뱃지 코드"], "0")))
+    except Exception:
+        badge_code = 0
+
+    granted_at = str(_pick(row, ["granted_at", "부여시각", "시간"], "")).strip()
+    if not granted_at:
+        granted_at = datetime.now().isoformat(timespec="minutes")
+
+    if not player_name or not badge_code:
+        return "skipped"
+
+    # 중복 방지(완전 동일 row면 skip)
+    cur = conn.execute("""
+        SELECT 1 FROM player_badges
+        WHERE player_name = ? AND badge_code = ? AND granted_at = ?
+        LIMIT 1
+    """, (player_name, badge_code, granted_at))
+    if cur.fetchone():
+        return "skipped"
+
+    conn.execute("""
+        INSERT INTO player_badges (player_name, badge_code, granted_at)
+        VALUES (?, ?, ?)
+    """, (player_name, badge_code, granted_at))
+    remember_player_names(conn, [player_name])
+    return "inserted"
+
+
+def _import_archive_row(conn, row, params):
+    if "archive_id" not in params:
+        # 첫 배치에서 archives 에 등록(같은 트랜잭션으로 params 에도 기록되어 재개 시 재사용).
+        # 끝날 때까지 importing = 1 이라 목록/조회에는 보이지 않는다
+        params["archive_created_at"] = datetime.now().isoformat(timespec="minutes")
+        cur = conn.execute(
+            "INSERT INTO archives (name, created_at, importing) VALUES (?, ?, 1)",
+            (params["archive_name"], params["archive_created_at"]),
+        )
+        params["archive_id"] = cur.lastrowid
+
+    game_time, names, scores = _pick_game(row, params["archive_created_at"])
+    # 네 명 이름이 다 비어 있으면 스킵
+    if not any(names):
+        return "skipped"
+
+    conn.execute(
+        """
+        INSERT INTO archive_games (
+            archive_id,
+            created_at,
+            player1_name, player2_name, player3_name, player4_name,
+            player1_score, player2_score, player3_score, player4_score
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (params["archive_id"], game_time, *names, *scores),
+    )
+    # 뱃지는 아카이브가 다 들어간 뒤 _finish_archive 에서 한 번에 판정
+    record_game(conn, "archive", game_time, names, scores, archive_id=params["archive_id"], award=False)
+    return "inserted"
+
+
+def _drop_partial_archive(conn, params):
+    archive_id = params.get("archive_id")
+    if archive_id:
+        conn.execute("DELETE FROM archive_games WHERE archive_id = ?", (archive_id,))
+        drop_player_rollups(conn, "archive", archive_id)
+        drop_archive_standings(conn, archive_id)
+        conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
+        bump_data_versions(conn, "archives", f"archive:{archive_id}")
 
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
 
-    def pick_int(row, keys, default=0):
-        val = pick(row, keys, None)
-        if val is None or val == "":
-            return default
+def _finish_archive(conn, params, job):
+    if job["rows_inserted"] == 0:
+        # 유효 데이터가 하나도 없으면 아카이브도 되돌리기
+        _drop_partial_archive(conn, params)
+        return "CSV에서 읽을 수 있는 대국 기록이 없습니다."
+    award_badges(conn, archive_players(conn, params["archive_id"]))
+    store_archive_standings(conn, params["archive_id"])
+    conn.execute("UPDATE archives SET importing = 0 WHERE id = ?", (params["archive_id"],))
+    return None
+
+
+def _archive_scopes(params):
+    if "archive_id" not in params:
+        return []
+    return ["archives", f"archive:{params['archive_id']}", "player_badges"]
+
+
+# kind → (행 처리, 커밋 때 올릴 scope, 끝났을 때 처리(실패 메시지 반환), 취소됐을 때 처리)
+JOB_KINDS = {
+    "games": (_import_game_row("games"), lambda p: ["games", "player_badges"], None, None),
+    "tournament": (_import_game_row("tournament"), lambda p: ["tournament", "player_badges"], None, None),
+    "badges": (_import_badge_row, lambda p: ["badges"], None, None),
+    "player_badges": (_import_player_badge_row, lambda p: ["player_badges"], None, None),
+    # 아카이브는 한 번에 다 들어가거나 아예 없어야 하므로 취소 시 부분 데이터를 지운다
+    "archive": (_import_archive_row, _archive_scopes, _finish_archive, _drop_partial_archive),
+}
+
+# CSV 가 아닌 작업: kind → (conn, job_id, jobs 행) 을 받아 끝까지 처리(상태 기록 포함)
+JOB_TASKS = {
+    "standings": _run_standings_job,
+}
+
+
+def _job_executor():
+    global _JOB_EXECUTOR
+    with _JOB_EXECUTOR_LOCK:
+        if _JOB_EXECUTOR is None:
+            _JOB_EXECUTOR = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="madang-job")
+        return _JOB_EXECUTOR
+
+
+def submit_job(job_id):
+    app = current_app._get_current_object()
+    db_path = current_db_path()
+    with _JOB_EXECUTOR_LOCK:
+        lane = _JOB_LANES.get(db_path)
+        if lane is not None:
+            lane.append(job_id)   # 이 DB 의 작업이 이미 돌고 있으면 그 뒤에
+            return
+        _JOB_LANES[db_path] = deque([job_id])
+    _job_executor().submit(_drain_job_lane, app, db_path)
+
+
+def _drain_job_lane(app, db_path):
+    while True:
+        with _JOB_EXECUTOR_LOCK:
+            lane = _JOB_LANES[db_path]
+            if not lane:
+                del _JOB_LANES[db_path]
+                return
+            job_id = lane.popleft()
         try:
-            return int(float(val))
-        except (ValueError, TypeError):
-            return default
+            run_job(app, db_path, job_id)
+        except Exception as e:
+            print(f"[JOB {job_id}] could not run: {e!r}")
+
 
+def enqueue_import_job(kind, file, params=None):
+    upload_dir = current_app.config["UPLOAD_DIR"]
+    os.makedirs(upload_dir, exist_ok=True)
+    upload_path = os.path.join(upload_dir, f"{kind}_{uuid.uuid4().hex}.csv")
+    file.save(upload_path)
+
+    now = datetime.now().isoformat(timespec="seconds")
     conn = get_db()
-    inserted = 0
+    cur = conn.execute("""
+        INSERT INTO jobs (kind, status, params, upload_path, created_at, updated_at)
+        VALUES (?, 'queued', ?, ?, ?, ?)
+    """, (kind, json.dumps(params or {}, ensure_ascii=False), upload_path, now, now))
+    conn.commit()
+    job_id = cur.lastrowid
+    conn.close()
 
-    for row in reader:
-        created_at = pick(row, ["created_at", "시간"])
-        if not created_at:
-            created_at = datetime.now().isoformat(timespec="minutes")
+    submit_job(job_id)
 
-        p1_name = pick(row, ["player1_name", "P1 이름", "P1이름"])
-        p2_name = pick(row, ["player2_name", "P2 이름", "P2이름"])
-        p3_name = pick(row, ["player3_name", "P3 이름", "P3이름"])
-        p4_name = pick(row, ["player4_name", "P4 이름", "P4이름"])
+    # fetch 로 부른 경우 job id 만, 폼 제출이면 진행 화면으로
+    if request.accept_mimetypes.best_match(["application/json", "text/html"]) == "application/json":
+        return jsonify({"job_id": job_id}), 202
+    return redirect(url_for("madang.job_page", job_id=job_id))
 
-        s1 = pick_int(row, ["player1_score", "P1 점수", "P1점수"])
-        s2 = pick_int(row, ["player2_score", "P2 점수", "P2점수"])
-        s3 = pick_int(row, ["player3_score", "P3 점수", "P3점수"])
-        s4 = pick_int(row, ["player4_score", "P4 점수", "P4점수"])
 
-        if not (p1_name or p2_name or p3_name or p4_name):
-            continue
+def _claim_job(conn, job_id):
+    now = time.time()
+    cur = conn.execute("""
+        UPDATE jobs SET status = 'running', heartbeat_at = ?
+        WHERE id = ?
+          AND (status = 'queued' OR (status = 'running' AND heartbeat_at < ?))
+    """, (now, job_id, now - JOB_STALE_SECONDS))
+    conn.commit()
+    return cur.rowcount == 1
 
-        conn.execute("""
-            INSERT INTO tournament_games (
-                created_at,
-                player1_name, player2_name, player3_name, player4_name,
-                player1_score, player2_score, player3_score, player4_score
+
+def _save_progress(conn, job_id, job, params, errors, status=None, message=None):
+    conn.execute("""
+        UPDATE jobs SET
+            params = ?, rows_parsed = ?, rows_inserted = ?, rows_updated = ?, rows_skipped = ?,
+            errors = ?, heartbeat_at = ?, updated_at = ?,
+            status = COALESCE(?, status), message = COALESCE(?, message)
+        WHERE id = ?
+    """, (
+        json.dumps(params, ensure_ascii=False),
+        job["rows_parsed"], job["rows_inserted"], job["rows_updated"], job["rows_skipped"],
+        json.dumps(errors, ensure_ascii=False), time.time(),
+        datetime.now().isoformat(timespec="seconds"), status, message, job_id,
+    ))
+
+
+def run_job(app, db_path, job_id):
+    with app.app_context():
+        conn = get_db(db_path)
+        try:
+            if not _claim_job(conn, job_id):
+                return   # 다른 워커가 이미 처리 중이거나 끝남
+            _run_claimed_job(conn, job_id)
+        except Exception as e:
+            conn.rollback()
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', message = ?, updated_at = ? WHERE id = ?",
+                (f"{type(e).__name__}: {e}", datetime.now().isoformat(timespec="seconds"), job_id),
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (created_at,
-              p1_name, p2_name, p3_name, p4_name,
-              s1, s2, s3, s4))
-        inserted += 1
+            conn.commit()
+            print(f"[JOB {job_id}] crashed: {e!r}")
+        finally:
+            conn.close()
+        _after_write(db_path)
+
+
+def _run_claimed_job(conn, job_id):
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row["kind"] in JOB_TASKS:
+        try:
+            JOB_TASKS[row["kind"]](conn, job_id, row)
+        except JobFailed as e:
+            conn.rollback()
+            _save_progress(conn, job_id, row, json.loads(row["params"]), [], "failed", str(e))
+            conn.commit()
+        return
+
+    handle, scopes_of, finish, on_cancel = JOB_KINDS[row["kind"]]
+    params = json.loads(row["params"])
+    errors = json.loads(row["errors"])
+    job = {k: row[k] for k in ("rows_parsed", "rows_inserted", "rows_updated", "rows_skipped")}
+    already_done = row["rows_parsed"]
+    committed = (dict(job), dict(params), list(errors))   # 마지막 커밋 시점(롤백하면 여기로)
+
+    def commit_batch(status=None, message=None):
+        nonlocal committed
+        bump_data_versions(conn, *scopes_of(params))
+        _save_progress(conn, job_id, job, params, errors, status, message)
+        conn.commit()
+        committed = (dict(job), dict(params), list(errors))
+
+    def rollback_batch():
+        conn.rollback()
+        job.update(committed[0])
+        params.clear()
+        params.update(committed[1])
+        errors[:] = committed[2]
+
+    def cancel_requested():
+        return conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+    try:
+        pending = 0
+        for index, (line_no, csv_row) in enumerate(open_csv_rows(row["upload_path"])):
+            if index < already_done:
+                continue   # 재개: 이미 커밋된 행
+
+            if not conn.in_transaction:
+                # SAVEPOINT 로 시작한 트랜잭션은 RELEASE 때 바로 커밋되므로 배치 트랜잭션을 먼저 연다
+                conn.execute("BEGIN")
+            conn.execute("SAVEPOINT job_row")
+            try:
+                result = handle(conn, csv_row, params)
+                conn.execute("RELEASE job_row")
+            except (sqlite3.Error, ValueError, TypeError) as e:
+                conn.execute("ROLLBACK TO job_row")
+                conn.execute("RELEASE job_row")
+                result = "skipped"
+                if len(errors) < JOB_MAX_ERRORS:
+                    errors.append({"line": line_no, "error": str(e)})
+
+            job["rows_parsed"] += 1
+            job[f"rows_{result}"] += 1
+            pending += 1
+
+            if pending >= JOB_BATCH_ROWS:
+                commit_batch()
+                pending = 0
+                if cancel_requested():
+                    raise JobCancelled()
+
+        message = finish(conn, params, job) if finish else None
+        commit_batch(status="failed" if message else "done", message=message)
+        _remove_upload(row["upload_path"])
+        print(f"[JOB {job_id}] {row['kind']} {'failed' if message else 'done'}: {job}")
+
+    except JobCancelled:
+        if on_cancel:
+            on_cancel(conn, params)
+        commit_batch(status="cancelled", message="취소됨")
+        _remove_upload(row["upload_path"])
+
+    except JobFailed as e:
+        # 업로드 파일은 남겨 두어 /api/jobs/<id>/resume 으로 이어서 할 수 있게 한다
+        rollback_batch()
+        commit_batch(status="failed", message=str(e))
+
+
+def _remove_upload(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def resume_pending_jobs():
+    """queued 이거나 heartbeat 가 끊긴 running 작업을 다시 맡긴다(재시작 후 첫 요청 때 한 번)."""
+    conn = get_db()
+    try:
+        rows = conn.execute("""
+            SELECT id FROM jobs
+            WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?)
+        """, (time.time() - JOB_STALE_SECONDS,)).fetchall()
+    finally:
+        conn.close()
+    for r in rows:
+        submit_job(r["id"])
+
+
+@bp.before_app_request
+def _resume_jobs_once():
+    state = db_state()
+    if state.jobs_resumed:
+        return
+    with state.lock:
+        if state.jobs_resumed:
+            return
+        state.jobs_resumed = True
+    resume_pending_jobs()
+
+
+def _job_dict(row):
+    d = dict(row)
+    d["params"] = json.loads(d["params"])
+    d["errors"] = json.loads(d["errors"])
+    d.pop("upload_path", None)
+    heartbeat_at = d.pop("heartbeat_at") or 0
+    d["stale"] = d["status"] == "running" and heartbeat_at < time.time() - JOB_STALE_SECONDS
+    return d
 
+
+@bp.route("/api/jobs/<int:job_id>", methods=["GET"])
+def job_status(job_id):
+    conn = get_db()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    if not row:
+        return jsonify({"error": "job not found"}), 404
+
+    job = _job_dict(row)
+    if job["stale"]:
+        # 맡았던 워커가 죽은 작업: 이 워커가 이어서 한다
+        submit_job(job_id)
+    return jsonify(job)
+
+
+@bp.route("/api/jobs/<int:job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    conn = get_db()
+    conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+    # 아직 시작 안 한 작업은 바로 취소
+    cur = conn.execute(
+        "UPDATE jobs SET status = 'cancelled', message = '취소됨' WHERE id = ? AND status = 'queued'",
+        (job_id,),
+    )
+    conn.commit()
+    row = conn.execute("SELECT status, upload_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    if not row:
+        return jsonify({"error": "job not found"}), 404
+    if cur.rowcount:
+        _remove_upload(row["upload_path"])
+    return jsonify({"ok": True, "status": row["status"]})
+
+
+@bp.route("/api/jobs/<int:job_id>/resume", methods=["POST"])
+def resume_job(job_id):
+    # 실패한 작업을 이어서(커밋된 행 다음부터) 다시 돌린다
+    conn = get_db()
+    row = conn.execute("SELECT status, upload_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if not row:
+        conn.close()
+        return jsonify({"error": "job not found"}), 404
+    if row["status"] != "failed" or not os.path.exists(row["upload_path"]):
+        conn.close()
+        return jsonify({"error": "only failed jobs with their upload can be resumed"}), 400
+    conn.execute(
+        "UPDATE jobs SET status = 'queued', message = NULL, cancel_requested = 0 WHERE id = ?",
+        (job_id,),
+    )
     conn.commit()
     conn.close()
+    submit_job(job_id)
+    return jsonify({"ok": True}), 202
+
+
+@bp.route("/jobs/<int:job_id>")
+def job_page(job_id):
+    return f"""
+    <!DOCTYPE html>
+    <html lang="ko">
+    <head>
+      <meta charset="UTF-8">
+      <title>업로드 처리 중</title>
+      <link rel="stylesheet" href="{asset_url("style.css")}">
+    </head>
+    <body>
+      <div class="top-bar">
+        <h1>업로드 처리 #{job_id}</h1>
+        <div class="view-switch">
+          <a href="{request.script_root}/" class="view-switch-btn">메인으로 돌아가기</a>
+        </div>
+      </div>
+      <div class="main-layout">
+        <div class="left-panel">
+          <section class="games-panel">
+            <h2 id="job-status">확인 중...</h2>
+            <p class="hint-text" id="job-counts"></p>
+            <p class="hint-text" id="job-message"></p>
+            <p><button id="job-cancel">취소</button></p>
+            <ul id="job-errors" class="hint-text"></ul>
+          </section>
+        </div>
+      </div>
+      <script>
+        const LABELS = {{ queued: "대기 중", running: "처리 중", done: "완료", failed: "실패", cancelled: "취소됨" }};
+        async function poll() {{
+          const res = await fetch("{request.script_root}/api/jobs/{job_id}");
+          const j = await res.json();
+          document.getElementById("job-status").textContent = LABELS[j.status] || j.status;
+          document.getElementById("job-counts").textContent =
+            `읽은 행 ${{j.rows_parsed}} / 추가 ${{j.rows_inserted}} / 수정 ${{j.rows_updated}} / 건너뜀 ${{j.rows_skipped}}`;
+          document.getElementById("job-message").textContent = j.message || "";
+          // 오류 문구에는 CSV 값이 들어 있으므로 HTML 로 넣지 않는다
+          document.getElementById("job-errors").replaceChildren(...(j.errors || []).map((e) => {{
+            const li = document.createElement("li");
+            li.textContent = `${{e.line}}번째 줄: ${{e.error}}`;
+            return li;
+          }}));
+          const finished = ["done", "failed", "cancelled"].includes(j.status);
+          document.getElementById("job-cancel").style.display = finished ? "none" : "";
+          if (!finished) setTimeout(poll, 1000);
+        }}
+        document.getElementById("job-cancel").addEventListener("click", async () => {{
+          await fetch("{request.script_root}/api/jobs/{job_id}/cancel", {{ method: "POST" }});
+        }});
+        poll();
+      </script>
+    </body>
+    </html>
+    """
+
+
+# ================== 백업 / 복원 ==================
+
+BACKUP_CHUNK_SIZE = 64 * 1024
+REQUIRED_TABLES = ("games", "tournament_games", "badges", "player_badges", "archives", "archive_games")
+
+
+@bp.route("/api/admin/backup", methods=["GET"])
+def backup_db():
+    """
+    온라인 backup() 으로 일관된 스냅샷을 임시 파일에 뜬 뒤 gzip 으로 스트리밍합니다.
+    WAL 모드라 읽기 트랜잭션 하나로 한 번에 복사해도 그동안 쓰기는 막히지 않습니다.
+    (페이지를 나눠 복사하면 사이사이 쉬는 데다, 다른 연결이 쓸 때마다 처음부터 다시 복사한다)
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    def discard():
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    try:
+        src = get_db()
+        dst = sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+    except Exception:
+        discard()
+        raise
+
+    def generate():
+        gz = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits=31 → gzip 헤더
+        try:
+            with open(tmp_path, "rb") as f:
+                while True:
+                    chunk = f.read(BACKUP_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out = gz.compress(chunk)
+                    if out:
+                        yield out
+            yield gz.flush()
+        finally:
+            discard()
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M")
+    resp = Response(
+        stream_with_context(generate()),
+        mimetype="application/gzip",
+        headers={"Content-Disposition": f"attachment; filename=madang_backup_{stamp}.db.gz"},
+    )
+    # 본문을 읽기 전에 연결이 끊겨도 임시 파일은 지운다
+    resp.call_on_close(discard)
+    return resp
+
+
+def _validate_backup(path):
+    conn = sqlite3.connect(path)
+    try:
+        if conn.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+            return "integrity check failed"
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [t for t in REQUIRED_TABLES if t not in tables]
+        if missing:
+            return "missing tables: " + ", ".join(missing)
+        if conn.execute("PRAGMA user_version").fetchone()[0] > SCHEMA_VERSION:
+            return "backup is newer than this server"
+    except sqlite3.DatabaseError as e:
+        return f"not a sqlite database ({e})"
+    finally:
+        conn.close()
+    return None
+
+
+@bp.route("/api/admin/restore", methods=["POST"])
+def restore_db():
+    """
+    /api/admin/backup 파일(gzip 또는 원본 .db)로 전체 DB 를 되돌립니다.
+    검증·마이그레이션을 임시 파일에서 끝낸 뒤 backup() 한 번(한 트랜잭션)으로 교체하므로
+    다른 워커의 연결도 그대로 새 내용을 보게 됩니다.
+    """
+    file = request.files.get("file")
+    if not file:
+        return jsonify({"error": "file required"}), 400
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        head = file.stream.read(2)
+        file.stream.seek(0)
+        with open(tmp_path, "wb") as out:
+            src = gzip.GzipFile(fileobj=file.stream) if head == b"\x1f\x8b" else file.stream
+            try:
+                shutil.copyfileobj(src, out, BACKUP_CHUNK_SIZE)
+            except (OSError, EOFError) as e:
+                return jsonify({"error": f"broken gzip ({e})"}), 400
+
+        error = _validate_backup(tmp_path)
+        if error:
+            return jsonify({"error": error}), 400
+        migrate_db(tmp_path)
+
+        live = get_db()
+        restored = sqlite3.connect(tmp_path)
+        try:
+            before = dict(live.execute("SELECT scope, version FROM data_versions").fetchall())
+            restored_star = restored.execute(
+                "SELECT version FROM data_versions WHERE scope = '*'"
+            ).fetchone()
+            restored.backup(live)   # pages=-1: 한 번에 → 원자적 교체
+
+            # 복원된 DB 의 버전 번호가 우연히 캐시와 같을 수 있으므로 "*" 를 양쪽보다 크게 올린다
+            star = max(before.get("*", 0), restored_star[0] if restored_star else 0) + 1
+            live.execute(
+                "INSERT OR REPLACE INTO data_versions (scope, version) VALUES ('*', ?)", (star,)
+            )
+            live.commit()
+        except sqlite3.Error as e:
+            return jsonify({"error": f"restore failed ({e})"}), 400
+        finally:
+            restored.close()
+            live.close()
+    finally:
+        os.remove(tmp_path)
+
+    db_state().response_cache.clear()
+    _after_write()
+    return jsonify({"ok": True})
 
-    print(f"[IMPORT_TOURNAMENT] inserted rows: {inserted}")
-    return redirect(url_for("index_page"))
 
 # ================== 개인전 기록 초기화(시즌 리셋) ==================
 
-@app.route("/api/admin/reset_games", methods=["POST"])
+@bp.route("/api/admin/reset_games", methods=["POST"])
 def reset_games():
     """
     모든 개인전 대국 기록을 삭제하고 ID도 다시 1부터 시작하도록 초기화합니다.
@@ -1284,6 +5048,7 @@ def reset_games():
     try:
         # games 테이블 전체 삭제
         conn.execute("DELETE FROM games")
+        drop_player_rollups(conn, "games")
 
         # SQLite AUTOINCREMENT 리셋 (선택사항이지만, 시즌별로 ID 깔끔하게 보이게 하려고)
         try:
@@ -1292,20 +5057,51 @@ def reset_games():
             # sqlite_sequence가 없는 경우도 있으니 무시
             pass
 
+        bump_data_versions(conn, "games")
         conn.commit()
     finally:
         conn.close()
+    _after_write()
 
     return jsonify({"ok": True})
 
+# ================== 정적 파일(해시 이름) ==================
+# 페이지는 asset_url() 로 해시 붙은 주소를 넣는다. 파이프라인이 꺼져 있으면 /static/ 주소 그대로.
+
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def asset_url(name):
+    manifest = current_app.extensions.get("madang_assets")
+    url_name = manifest.url_name(name) if manifest else None
+    if url_name is None:
+        return url_for("static", filename=name)
+    return url_for("madang.hashed_asset", filename=url_name)
+
+
+@bp.route("/assets/<filename>")
+def hashed_asset(filename):
+    manifest = current_app.extensions.get("madang_assets")
+    asset = manifest.by_url.get(filename) if manifest else None
+    if asset is None:
+        return "not found", 404
+
+    body, encoding = asset.variant(lambda e: request.accept_encodings[e] > 0)
+    resp = Response(body, mimetype=asset.mimetype)
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = ASSET_CACHE_CONTROL
+    resp.set_etag(asset.etag)
+    return resp.make_conditional(request)
+
+
 # ================== 기본 페이지 ==================
 
-@app.route("/")
+@bp.route("/")
 def index_page():
     return render_template("index.html")
 
 
 if __name__ == "__main__":
-    if not os.path.exists(DB_PATH):
-        init_db()
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
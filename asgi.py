@@ -0,0 +1,402 @@
+# ASGI 진입점
+#
+#   uvicorn asgi:app            (또는 uvicorn --factory asgi:create_asgi_app)
+#
+# Flask 앱(app.py)은 그대로 두고 그 앞에 붙는 다리다. 라우트는 모두 WSGI 쪽 그대로이며,
+#  - 요청은 크기가 정해진 스레드 풀에서 실행한다(ASGI_THREADS). 풀이 다 차고 기다리는 요청도
+#    ASGI_MAX_PENDING 개를 넘으면 더 받지 않고 503 + Retry-After 로 돌려보낸다(큐가 끝없이 길어지지 않게).
+#  - 응답 본문(CSV 내보내기 등)은 스레드에서 만들어지는 대로 작은 큐를 거쳐 이벤트 루프가 보낸다.
+#    받는 쪽이 느리면 큐가 차서 만드는 쪽이 기다리고, 연결이 끊기면 만드는 쪽도 멈춘다.
+#  - /api/live 만 이벤트 루프에서 직접 처리한다(Server-Sent Events). 연결을 열어 둔 화면이 수백 개여도
+#    스레드를 쓰지 않고, 리그마다 폴러 하나가 /api/versions 를 확인해 바뀌면 모두에게 알린다.
+#    WSGI(gunicorn)로 띄우면 /api/live 는 404 이고, 화면은 예전처럼 주기적으로 확인한다.
+
+import asyncio
+import io
+import sys
+import tempfile
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+LIVE_PATH = "/api/live"
+VERSIONS_PATH = "/api/versions"
+BODY_SPOOL_BYTES = 1024 * 1024   # 요청 본문이 이보다 크면 임시 파일로
+STREAM_QUEUE_CHUNKS = 8          # 응답 본문을 스레드 → 루프로 넘기는 큐 크기
+
+
+class _ClientGone(Exception):
+    pass
+
+
+class _Response:
+    """스레드에서 실행 중인 WSGI 응답 하나. 본문 조각은 queue 로 넘어온다."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(STREAM_QUEUE_CHUNKS)
+        self.closed = False   # 클라이언트가 끊음(루프에서만 바꾼다)
+        self.status = None
+        self.headers = None
+        self.started = False
+
+    def put(self, item):
+        # 스레드 쪽. 큐가 차 있으면 루프가 보내서 자리가 날 때까지 기다린다
+        asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop).result()
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info and self.started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        self.status = int(status.split(" ", 1)[0])
+        self.headers = headers
+        return self.write
+
+    def write(self, data):
+        if self.closed:
+            raise _ClientGone()
+        if data:
+            self._start()
+            self.put(bytes(data))
+
+    def _start(self):
+        # 헤더는 본문 첫 조각(또는 응답 끝)에서 보낸다
+        if not self.started:
+            self.started = True
+            self.put(("start", self.status, self.headers))
+
+
+class _LiveChannel:
+    """같은 리그·같은 scope 를 보는 /api/live 연결들. 폴러 하나를 같이 쓴다."""
+
+    def __init__(self, environ):
+        self.environ = environ
+        self.listeners = set()   # asyncio.Queue(1): 늦게 읽는 연결은 최신 버전 하나만 받는다
+        self.body = None
+        self.task = None
+
+
+class AsgiBridge:
+    def __init__(self, wsgi_app, threads=16, max_pending=256, live_poll=1.0,
+                 live_keepalive=15.0, live_max_connections=1000):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.max_pending = max_pending
+        self.live_poll = live_poll
+        self.live_keepalive = live_keepalive
+        self.live_max_connections = live_max_connections
+
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="madang-asgi")
+        self._in_flight = 0          # 스레드에서 실행 중이거나 자리를 기다리는 요청 수(루프에서만 바꾼다)
+        self._live = {}              # (호스트, prefix, query) → _LiveChannel
+        self._live_connections = 0
+        self._closing = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            if self._closing is None:
+                self._closing = asyncio.Event()
+            if scope["path"].endswith(LIVE_PATH) and scope["method"] == "GET":
+                await self._live_stream(scope, receive, send)
+            else:
+                await self._http(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1000})
+
+    # ================== 수명 ==================
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._closing = asyncio.Event()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # 열린 /api/live 연결을 먼저 끝내고(폴러도 같이 멈춘다) 스레드 풀을 닫는다
+                self._closing.set()
+                tasks = [ch.task for ch in self._live.values() if ch.task]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ================== WSGI 요청 ==================
+
+    def _environ(self, scope, body, path=None):
+        root = scope.get("root_path", "")
+        path = scope["path"] if path is None else path
+        if root and path.startswith(root):
+            path = path[len(root):]
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client")
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            # WSGI 는 경로를 latin-1 로 디코드한 문자열로 받는다
+            "SCRIPT_NAME": root.encode("utf-8").decode("latin-1"),
+            "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": client[0] if client else "",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            "wsgi.input_terminated": True,   # Content-Length 없이 와도 본문을 끝까지 읽게
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for raw_name, raw_value in scope.get("headers", []):
+            name = raw_name.decode("latin-1").upper().replace("-", "_")
+            value = raw_value.decode("latin-1")
+            if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                name = "HTTP_" + name
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+        return environ
+
+    async def _read_body(self, receive):
+        """요청 본문. 다 받기 전에 끊기면 None"""
+        body = tempfile.SpooledTemporaryFile(max_size=BODY_SPOOL_BYTES)
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                return None
+            body.write(message.get("body", b""))
+            if not message.get("more_body"):
+                body.seek(0)
+                return body
+
+    async def _http(self, scope, receive, send):
+        if self._in_flight >= self.threads + self.max_pending:
+            await _send_simple(send, 503, b'{"error": "server busy, try again"}',
+                               [(b"retry-after", b"1")])
+            return
+        self._in_flight += 1
+        try:
+            body = await self._read_body(receive)
+            if body is None:
+                return
+            await self._run(self._environ(scope, body), receive, send)
+        finally:
+            self._in_flight -= 1
+
+    async def _run(self, environ, receive, send):
+        loop = asyncio.get_running_loop()
+        response = _Response(loop)
+        worker = loop.run_in_executor(self._executor, self._call_wsgi, environ, response)
+        watcher = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            while True:
+                getter = asyncio.ensure_future(response.queue.get())
+                await asyncio.wait({getter, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    # 클라이언트가 끊었다: 스레드가 다음 조각에서 멈추도록 하고 남은 것은 버린다
+                    getter.cancel()
+                    response.closed = True
+                    break
+                item = getter.result()
+                if item is None:
+                    await send({"type": "http.response.body", "body": b""})
+                    break
+                if isinstance(item, tuple):
+                    _, status, headers = item
+                    await send({
+                        "type": "http.response.start",
+                        "status": status,
+                        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+                    })
+                else:
+                    await send({"type": "http.response.body", "body": item, "more_body": True})
+        finally:
+            watcher.cancel()
+            response.closed = True   # 보내다가 끊긴 경우에도 스레드가 나머지를 만들지 않게
+            while not worker.done():
+                # 스레드가 큐에 넣으려고 기다리고 있을 수 있으니 비워 준다
+                try:
+                    response.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.01)
+            body = environ["wsgi.input"]
+            body.close()
+
+    def _call_wsgi(self, environ, response):
+        result = None
+        try:
+            result = self.wsgi_app(environ, response.start_response)
+            for chunk in result:
+                if response.closed:
+                    break
+                if chunk:
+                    response._start()
+                    response.put(chunk)
+            if not response.closed:
+                response._start()
+        except _ClientGone:
+            pass
+        except Exception:
+            traceback.print_exc()
+            if not response.started:
+                response.status, response.headers = 500, [("Content-Type", "application/json")]
+                response._start()
+                response.put(b'{"error": "internal server error"}')
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+            if not response.closed:
+                response.put(None)
+
+    def _fetch(self, environ):
+        """스레드에서: 작은 GET 응답을 통째로 (상태, 본문)"""
+        collected = {}
+
+        def start_response(status, headers, exc_info=None):
+            collected["status"] = int(status.split(" ", 1)[0])
+            return lambda data: None
+
+        # 미들웨어(LeagueRouter)가 environ 을 고치므로 매번 새로
+        result = self.wsgi_app(dict(environ, **{"wsgi.input": io.BytesIO()}), start_response)
+        try:
+            body = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return collected["status"], body
+
+    # ================== /api/live (Server-Sent Events) ==================
+    # 이벤트 "versions" 의 data 는 /api/versions 응답 그대로다. 화면은 받으면 바뀐 것만 다시 받는다.
+
+    async def _live_stream(self, scope, receive, send):
+        if self._live_connections >= self.live_max_connections:
+            await _send_simple(send, 503, b'{"error": "too many live connections"}', [(b"retry-after", b"5")])
+            return
+        prefix = scope["path"][: -len(LIVE_PATH)]
+        query = scope.get("query_string", b"")
+        host = dict(scope.get("headers", [])).get(b"host", b"")
+        key = (host, prefix, query)
+
+        channel = self._live.get(key)
+        if channel is None:
+            environ = self._environ(
+                {**scope, "headers": [(b"host", host)] if host else []}, None, path=prefix + VERSIONS_PATH,
+            )
+            status, body = await self._poll(environ)
+            if status != 200:
+                # 없는 리그 등: /api/versions 가 돌려준 대로
+                await _send_simple(send, status, body)
+                return
+            channel = self._live.get(key)   # 기다리는 동안 다른 연결이 먼저 만들었을 수 있다
+            if channel is None:
+                channel = self._live[key] = _LiveChannel(environ)
+                channel.body = body
+                channel.task = asyncio.ensure_future(self._poll_channel(key, channel))
+
+        listener = asyncio.Queue(1)
+        listener.put_nowait(channel.body)
+        channel.listeners.add(listener)
+        self._live_connections += 1
+        watcher = asyncio.ensure_future(_wait_disconnect(receive))
+        closing = asyncio.ensure_future(self._closing.wait())
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-store"),
+                    (b"x-accel-buffering", b"no"),   # nginx 가 모아서 보내지 않게
+                ],
+            })
+            while True:
+                getter = asyncio.ensure_future(listener.get())
+                done, _ = await asyncio.wait(
+                    {getter, watcher, closing}, timeout=self.live_keepalive,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if getter in done:
+                    chunk = b"event: versions\ndata: " + getter.result() + b"\n\n"
+                elif done:
+                    getter.cancel()
+                    break
+                else:
+                    getter.cancel()
+                    chunk = b": keepalive\n\n"   # 프록시가 연결을 닫지 않게
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not watcher.done():
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+            closing.cancel()
+            channel.listeners.discard(listener)
+            self._live_connections -= 1
+
+    async def _poll(self, environ):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fetch, environ)
+
+    async def _poll_channel(self, key, channel):
+        # 듣는 연결이 하나도 없으면 멈추고 채널을 지운다(다음 연결이 새로 만든다)
+        while True:
+            await asyncio.sleep(self.live_poll)
+            if not channel.listeners:
+                break
+            try:
+                status, body = await self._poll(channel.environ)
+            except Exception:
+                traceback.print_exc()
+                continue
+            if status != 200 or body == channel.body:
+                continue
+            channel.body = body
+            for listener in list(channel.listeners):
+                if listener.full():
+                    listener.get_nowait()   # 못 보낸 이전 버전은 버리고 최신 것만
+                listener.put_nowait(body)
+        if self._live.get(key) is channel:
+            del self._live[key]
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _send_simple(send, status, body, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_asgi_app(config=None):
+    from app import create_app
+
+    flask_app = create_app(config)
+    return AsgiBridge(
+        flask_app,
+        threads=flask_app.config["ASGI_THREADS"],
+        max_pending=flask_app.config["ASGI_MAX_PENDING"],
+        live_poll=flask_app.config["LIVE_POLL_SECONDS"],
+        live_max_connections=flask_app.config["LIVE_MAX_CONNECTIONS"],
+    )
+
+
+_APP_LOCK = threading.Lock()
+
+
+def __getattr__(name):
+    # uvicorn asgi:app 으로 띄울 때 처음 찾는 순간 만든다(app.py 와 같은 방식)
+    if name == "app":
+        global app
+        with _APP_LOCK:
+            if "app" not in globals():
+                app = create_asgi_app()
+        return app
+    raise AttributeError(name)
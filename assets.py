@@ -0,0 +1,238 @@
+# 정적 파일 파이프라인
+#
+# 앱이 뜰 때 static/ 의 CSS / JS 를 한 번 읽어 줄이고(minify), 내용 해시를 붙인 이름으로 메모리에 올린다.
+#   style.css → style.3f2a9c0d1b7e.css
+# 이름이 내용으로 정해지므로 브라우저는 한 번 받은 파일을 다시 묻지 않는다(Cache-Control: immutable, 1년).
+# 파일을 고치면 해시가 바뀌고, 페이지가 새 이름을 가리키게 된다.
+# gzip 은 항상, brotli 는 brotli 패키지가 있을 때만 미리 압축해 둔다.
+#
+# 줄이기는 보수적으로 한다. JS 는 줄 구조를 유지하고(세미콜론 자동 삽입이 바뀌지 않게)
+# 주석 / 들여쓰기 / 빈 줄만 지운다. CSS 는 주석을 지우고 공백을 접는다.
+# 두 쪽 다 문자열 안은 건드리지 않는다: JS 는 문자열 / 템플릿 리터럴 / 정규식,
+# CSS 는 문자열("...", '...')과 따옴표 없는 url(...)(content 값, data: URL).
+
+import hashlib
+import os
+import re
+
+from compression import brotli, compress
+
+ASSET_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+}
+HASH_LENGTH = 12
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# 주석 / 문자열 / url(...) 을 한 번에 찾아야 문자열 안의 "/*" 나 주석 안의 따옴표에 속지 않는다
+_CSS_TOKEN_RE = re.compile(
+    r"""(/\*.*?\*/|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\(\s*[^\s"')][^)]*\))""", re.S
+)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+
+
+def _minify_css_code(text):
+    text = _CSS_SPACE_RE.sub(" ", text)
+    text = _CSS_PUNCT_RE.sub(r"\1", text)
+    # 선택자의 " :hover" 는 의미가 다르므로 콜론 앞 공백은 두고 뒤만 지운다
+    return text.replace(": ", ":").replace(";}", "}")
+
+
+def minify_css(text):
+    out, code = [], []
+    for i, part in enumerate(_CSS_TOKEN_RE.split(text)):
+        if i % 2 == 0:
+            code.append(part)
+        elif not part.startswith("/*"):
+            # 문자열 / url(...) 은 그대로. 그 앞까지의 코드 부분만 줄인다
+            out += [_minify_css_code("".join(code)), part]
+            code = []
+    out.append(_minify_css_code("".join(code)))
+    return "".join(out).strip()
+
+
+# 정규식 리터럴은 이 문자나 키워드 뒤에서만 시작한다(그 밖의 "/" 는 나눗셈)
+_JS_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_JS_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+_JS_LINE_BREAK_RE = re.compile(r"[ \t]*\n\s*")
+
+
+def _skip_quoted(text, i, quote):
+    # 문자열 끝(닫는 따옴표 다음) 위치. 닫히지 않으면 줄 끝에서 멈춘다
+    n = len(text)
+    i += 1
+    while i < n:
+        c = text[i]
+        if c == "\\":
+            i += 2
+        elif c == quote:
+            return i + 1
+        elif c == "\n":
+            return i
+        else:
+            i += 1
+    return n
+
+
+def _skip_template(text, i):
+    # `...` 끝 위치. ${ } 안의 문자열 / 중첩 템플릿 / 중괄호도 따라간다
+    n = len(text)
+    i += 1
+    while i < n:
+        c = text[i]
+        if c == "\\":
+            i += 2
+        elif c == "`":
+            return i + 1
+        elif text.startswith("${", i):
+            i += 2
+            depth = 1
+            while i < n and depth:
+                c = text[i]
+                if c in "'\"":
+                    i = _skip_quoted(text, i, c)
+                    continue
+                if c == "`":
+                    i = _skip_template(text, i)
+                    continue
+                depth += (c == "{") - (c == "}")
+                i += 1
+        else:
+            i += 1
+    return n
+
+
+def _skip_regex(text, i):
+    # /.../flags 끝 위치. 같은 줄에서 닫히지 않으면 None(정규식이 아니었다)
+    n = len(text)
+    i += 1
+    in_class = False
+    while i < n:
+        c = text[i]
+        if c == "\n":
+            return None
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            while i < n and (text[i].isalnum() or text[i] == "_"):
+                i += 1
+            return i
+        i += 1
+    return None
+
+
+def _regex_allowed(before, after_literal):
+    # before: 바로 앞 리터럴(또는 파일 처음)부터의 코드. 마지막 의미 있는 글자로 정규식이 올 자리인지 본다
+    before = before.rstrip()
+    if not before:
+        return not after_literal   # "abc" / 2 는 나눗셈
+    if before[-1] in _JS_REGEX_AFTER:
+        return True
+    word = re.search(r"[A-Za-z_$][\w$]*$", before)
+    return word is not None and word.group() in _JS_REGEX_KEYWORDS
+
+
+def _js_parts(text):
+    """(리터럴인지, 조각). 주석은 빼고(여러 줄 블록 주석은 줄바꿈 하나로), 문자열 / 템플릿 / 정규식은 그대로."""
+    parts, code = [], []
+    n = len(text)
+    i = start = 0
+    while i < n:
+        c = text[i]
+        end = None
+        if c in "'\"":
+            end = _skip_quoted(text, i, c)
+        elif c == "`":
+            end = _skip_template(text, i)
+        elif text.startswith("//", i):
+            code.append(text[start:i])
+            i = start = text.find("\n", i)
+            if i < 0:
+                i = start = n
+            continue
+        elif text.startswith("/*", i):
+            code.append(text[start:i])
+            close = text.find("*/", i + 2)
+            close = n if close < 0 else close + 2
+            # 줄바꿈이 든 블록 주석은 세미콜론 자동 삽입에서 줄바꿈과 같다
+            code.append("\n" if "\n" in text[i:close] else " ")
+            i = start = close
+            continue
+        elif c == "/" and _regex_allowed("".join(code) + text[start:i], bool(parts)):
+            end = _skip_regex(text, i)
+        if end is None:
+            i += 1
+            continue
+        code.append(text[start:i])
+        parts.append((False, "".join(code)))
+        parts.append((True, text[i:end]))
+        code = []
+        i = start = end
+    code.append(text[start:])
+    parts.append((False, "".join(code)))
+    return parts
+
+
+def minify_js(text):
+    """
+    주석, 들여쓰기, 줄 끝 공백, 빈 줄을 지운다. 줄바꿈은 남긴다(세미콜론 자동 삽입이 바뀌지 않게).
+    문자열 / 템플릿 리터럴 / 정규식 안은 여러 줄이어도 한 글자도 건드리지 않는다.
+    """
+    out = []
+    for literal, part in _js_parts(text):
+        out.append(part if literal else _JS_LINE_BREAK_RE.sub("\n", part))
+    return "".join(out).strip() + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+class Asset:
+    __slots__ = ("name", "url_name", "mimetype", "etag", "body", "gzip", "brotli")
+
+    def __init__(self, name, body):
+        stem, ext = os.path.splitext(name)
+        self.name = name
+        self.etag = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+        self.url_name = f"{stem}.{self.etag}{ext}"
+        self.mimetype = ASSET_TYPES[ext]
+        self.body = body
+        self.gzip = compress(body, "gzip", GZIP_LEVEL)
+        self.brotli = compress(body, "br", BROTLI_QUALITY) if brotli else None
+
+    def variant(self, accepts):
+        """accepts(인코딩) → 받을 수 있으면 참. 가장 작은 것을 (본문, Content-Encoding) 으로."""
+        if self.brotli is not None and accepts("br"):
+            return self.brotli, "br"
+        if accepts("gzip"):
+            return self.gzip, "gzip"
+        return self.body, None
+
+
+class AssetManifest:
+    def __init__(self, static_dir, names=None, minify=True):
+        self.by_name = {}       # 원래 이름 → Asset
+        self.by_url = {}        # 해시 붙은 이름 → Asset
+        for name in names or sorted(os.listdir(static_dir)):
+            ext = os.path.splitext(name)[1]
+            if ext not in ASSET_TYPES:
+                continue
+            with open(os.path.join(static_dir, name), encoding="utf-8") as f:
+                text = f.read()
+            if minify:
+                text = MINIFIERS[ext](text)
+            asset = Asset(name, text.encode("utf-8"))
+            self.by_name[name] = asset
+            self.by_url[asset.url_name] = asset
+
+    def url_name(self, name):
+        asset = self.by_name.get(name)
+        return asset.url_name if asset else None
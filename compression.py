@@ -0,0 +1,67 @@
+# 응답 압축 (Accept-Encoding 협상)
+#
+# gzip 은 표준 라이브러리로, brotli 는 brotli 패키지가 있을 때만 쓴다.
+# 스트리밍 응답은 조각마다 압축해서 바로 내보낸다(조각마다 flush 하므로 받는 쪽도 조각 단위로 풀 수 있다).
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 서버가 고르는 순서(같은 품질값이면 앞의 것)
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+DEFAULT_LEVELS = {"gzip": 6, "br": 5}
+
+
+def choose_encoding(accept_encodings, encodings=ENCODINGS):
+    """werkzeug 의 request.accept_encodings 에서 쓸 인코딩. 받을 수 있는 게 없으면 None."""
+    best, best_q = None, 0
+    for encoding in encodings:
+        q = accept_encodings[encoding]
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _gzip_compressor(level):
+    return zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits=31 → gzip 헤더
+
+
+def compress(body, encoding, level=None):
+    if level is None:
+        level = DEFAULT_LEVELS[encoding]
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    c = _gzip_compressor(level)
+    return c.compress(body) + c.flush()
+
+
+def compress_stream(chunks, encoding, level=None):
+    """조각(bytes 또는 str) 이터레이터 → 압축된 조각 이터레이터."""
+    if level is None:
+        level = DEFAULT_LEVELS[encoding]
+    if encoding == "br":
+        c = brotli.Compressor(quality=level)
+        step = lambda data: c.process(data) + c.flush()
+        finish = c.finish
+    else:
+        c = _gzip_compressor(level)
+        step = lambda data: c.compress(data) + c.flush(zlib.Z_SYNC_FLUSH)
+        finish = c.flush
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                out = step(chunk)
+                if out:
+                    yield out
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,246 @@
+# 분석용 인메모리 컬럼 저장소
+#
+# 출처 하나(개인전 / 대회전 / 아카이브 하나)의 대국을 array 컬럼으로 들고 있는다. 행 객체나 dict 를 만들지 않는다.
+#   대국 단위   game_id   q   대국 id (추가 순서 = id 오름차순)
+#   좌석 단위   name      I   이름 사전 번호 (NameTable, 같은 DB 의 출처끼리 공유)
+#               rank      b   1~4 (app.game_results 로 넣을 때 한 번 계산)
+#   이름 단위   PlayerColumns: 그 사람이 앉은 좌석 번호 / 시각 / 점수 / 순위 / 토비·점수 누적
+# 좌석 k 의 대국 번호는 k // 4 이다. 시각은 created_at 을 1970-01-01 부터의 분으로(읽을 수 없으면 -1),
+# 변환은 넣는 쪽(app.game_minute)에서 한다.
+#
+# 순위는 점수 규칙과 무관하므로 넣을 때 한 번만 계산한다. pt 는 선형이라
+#   pt 합 = (점수 합 - 대국 수 × 반환점) / 1000 + Σ 우마[r] × r등 횟수
+# 로 집계값에서 바로 나온다. 그래서 어느 프로필의 순위표든 같은 집계 하나로 만든다.
+# 이름별 컬럼은 항상 시각 순(같은 시각이면 넣은 순)으로 둔다. 대부분은 끝에 붙고, created_at 이 앞선 대국만
+# 이분 탐색한 자리에 끼워 넣는다(누적 컬럼은 다음 기간 조회 때 다시 만든다).
+# 기간을 자를 때는 시각 컬럼에서 이분 탐색으로 구간을 찾고, 토비 / 점수 합은 누적 컬럼의 차로,
+# 순위 횟수와 최고 점수는 구간 슬라이스의 bytes.count / max(C 루프)로 센다. 1M 좌석 ≈ 40MB.
+
+import bisect
+import threading
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+_EPOCH = datetime(1970, 1, 1)
+
+# totals / 집계 리스트의 칸: [대국 수, 1등, 2등, 3등, 4등, 토비, 최고 점수, 점수 합]
+GAMES, TOBI, MAX_SCORE, SCORE_SUM = 0, 5, 6, 7
+
+
+def from_minute(minute):
+    """저장된 분 → "YYYY-MM-DDTHH:MM". -1 이면 빈 문자열."""
+    if minute < 0:
+        return ""
+    return (_EPOCH + timedelta(minutes=minute)).isoformat(timespec="minutes")
+
+
+class NameTable:
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, name):
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+
+class PlayerColumns:
+    __slots__ = ("seat", "minute", "score", "rank", "_tobi", "_score_cum", "totals")
+
+    def __init__(self, score):
+        self.seat = array("I")
+        self.minute = array("q")
+        self.score = array("i")
+        self.rank = array("b")
+        # 앞에서부터의 토비 횟수 / 점수 합 누적 (길이 = 대국 수 + 1). None 이면 다시 만들어야 함
+        self._tobi = array("I", [0])
+        self._score_cum = array("q", [0])
+        self.totals = [0, 0, 0, 0, 0, 0, score, 0]
+
+    def add(self, seat, minute, score, rank):
+        if not self.minute or minute >= self.minute[-1]:
+            self.seat.append(seat)
+            self.minute.append(minute)
+            self.score.append(score)
+            self.rank.append(rank)
+            if self._tobi is not None:
+                self._tobi.append(self._tobi[-1] + (score < 0))
+                self._score_cum.append(self._score_cum[-1] + score)
+        else:
+            i = bisect.bisect_right(self.minute, minute)
+            self.seat.insert(i, seat)
+            self.minute.insert(i, minute)
+            self.score.insert(i, score)
+            self.rank.insert(i, rank)
+            self._tobi = self._score_cum = None
+
+        t = self.totals
+        t[GAMES] += 1
+        t[rank] += 1
+        if score < 0:
+            t[TOBI] += 1
+        if score > t[MAX_SCORE]:
+            t[MAX_SCORE] = score
+        t[SCORE_SUM] += score
+
+    def cumulative(self):
+        """(토비 누적, 점수 누적). 끼워 넣은 대국이 있었으면 여기서 한 번 다시 만든다."""
+        if self._tobi is None:
+            self._tobi = array("I", accumulate((s < 0 for s in self.score), initial=0))
+            self._score_cum = array("q", accumulate(self.score, initial=0))
+        return self._tobi, self._score_cum
+
+    def span(self, start, end):
+        """[start, end) 분 범위의 (시작, 끝) 위치."""
+        lo = 0 if start is None else bisect.bisect_left(self.minute, start)
+        hi = len(self.minute) if end is None else bisect.bisect_left(self.minute, end)
+        return lo, hi
+
+    def aggregate(self, start, end):
+        if start is None and end is None:
+            return self.totals
+        i, j = self.span(start, end)
+        if i == j:
+            return None
+        tobi, score_cum = self.cumulative()
+        ranks = self.rank[i:j].tobytes()
+        return [
+            j - i, ranks.count(1), ranks.count(2), ranks.count(3), ranks.count(4),
+            tobi[j] - tobi[i], max(self.score[i:j]), score_cum[j] - score_cum[i],
+        ]
+
+    def positions(self, start, end):
+        return range(*self.span(start, end))
+
+
+class GameColumns:
+    def __init__(self, names):
+        self.names = names
+        self.game_id = array("q")
+        self.name = array("I")
+        self.rank = array("b")
+        self.players = {}      # 이름 번호 → PlayerColumns
+
+    def __len__(self):
+        return len(self.game_id)
+
+    def append(self, game_id, minute, names, scores, ranks):
+        """minute: 대국 시각(분, 없으면 -1), ranks: 자리별 순위."""
+        self.game_id.append(game_id)
+
+        base = len(self.name)
+        for seat, (name, score, rank) in enumerate(zip(names, scores, ranks)):
+            name = (name or "").strip()
+            nid = self.names.intern(name)
+            self.name.append(nid)
+            self.rank.append(rank)
+            if not name:
+                continue
+            p = self.players.get(nid)
+            if p is None:
+                p = self.players[nid] = PlayerColumns(score)
+            p.add(base + seat, minute, score, rank)
+
+    def aggregate(self, start=None, end=None):
+        """이름 번호 → 집계 리스트 [대국 수, 1~4등, 토비, 최고 점수, 점수 합]. 기간 안에 대국이 없는 사람은 빠진다."""
+        acc = {}
+        for nid, p in self.players.items():
+            t = p.aggregate(start, end)
+            if t is not None:
+                acc[nid] = t
+        return acc
+
+    def player(self, name):
+        return self.players.get(self.names.ids.get(name))
+
+
+class GameStore:
+    """
+    DB 파일 하나의 출처별 GameColumns. 처음 쓸 때 읽고, 그 뒤로는 scope 버전이 바뀔 때마다 새 대국만 덧붙인다.
+    version 은 (전체 버전, 출처 버전). 전체 버전이 바뀌면(DB 복원) 처음부터 다시 읽는다.
+    덧붙이는 중에 읽지 않도록 컬럼을 쓰는 동안에는 lock 을 잡고 있어야 한다.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.names = NameTable()
+        self._sources = {}     # scope → (GameColumns, version)
+
+    def columns(self, scope, version, read):
+        """
+        read(cols) 는 cols 의 마지막 대국 뒤에 새 대국을 덧붙이고 True,
+        그 사이 대국이 지워져서 덧붙일 수 없으면 False 를 돌려준다(그러면 빈 컬럼에 다시 읽는다).
+        """
+        with self.lock:
+            entry = self._sources.get(scope)
+            if entry is not None and entry[1] == version:
+                return entry[0]
+            cols = entry[0] if entry is not None and entry[1][0] == version[0] else None
+            if cols is None or not read(cols):
+                cols = GameColumns(self.names)
+                read(cols)
+            self._sources[scope] = (cols, version)
+            return cols
+
+    def drop(self, scope):
+        with self.lock:
+            self._sources.pop(scope, None)
+
+
+def pt_sum(t, profile):
+    uma = profile["uma"]
+    return (
+        (t[SCORE_SUM] - t[GAMES] * profile["return_score"]) / 1000.0
+        + uma[0] * t[1] + uma[1] * t[2] + uma[2] * t[3] + uma[3] * t[4]
+    )
+
+
+def standings(cols, profile, start=None, end=None):
+    """pt 합 내림차순 순위표 [(이름, 집계 리스트, pt 합)]."""
+    names = cols.names.names
+    rows = [(names[nid], t, pt_sum(t, profile)) for nid, t in cols.aggregate(start, end).items()]
+    rows.sort(key=lambda r: (-r[2], -r[1][GAMES], r[0]))
+    return rows
+
+
+def player_detail(cols, name, profile, start=None, end=None, recent=20):
+    """
+    한 사람의 누적 집계와 함께 친 상대별 요약.
+    recent: 최근 (대국 id, 순위) 목록, co_players: 이름 → [함께 친 대국 수, 내 순위 합, 상대 순위 합]
+    """
+    p = cols.player(name)
+    if p is None:
+        return None
+    t = p.aggregate(start, end)
+    if t is None:
+        return None
+
+    co = {}
+    name_col, rank_col, game_id = cols.name, cols.rank, cols.game_id
+    positions = p.positions(start, end)
+    for i in positions:
+        k = p.seat[i]
+        r = p.rank[i]
+        base = k - k % 4
+        for other in range(base, base + 4):
+            if other == k:
+                continue
+            c = co.get(name_col[other])
+            if c is None:
+                c = co[name_col[other]] = [0, 0, 0]
+            c[0] += 1
+            c[1] += r
+            c[2] += rank_col[other]
+
+    tail = positions[-recent:] if recent else positions
+    names = cols.names.names
+    return {
+        "totals": t,
+        "pt_sum": pt_sum(t, profile),
+        "recent": [(game_id[p.seat[i] // 4], p.rank[i]) for i in tail],
+        "co_players": {names[nid]: c for nid, c in co.items() if names[nid]},
+    }
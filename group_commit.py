@@ -0,0 +1,178 @@
+# 그룹 커밋 (쓰기 모아서 한 번에 커밋)
+#
+# 결과 입력처럼 작은 쓰기가 한꺼번에 몰리면(대회 라운드가 끝날 때) 요청마다 트랜잭션을 열고 커밋(fsync)하느라
+# SQLite 쓰기 락 앞에 줄이 서고, 오래 기다린 요청은 "database is locked" 로 실패한다.
+# WriteCoordinator 는 들어온 쓰기 함수를 큐에 모았다가 max_wait 초 안에(또는 max_batch 개가 차면)
+# 한 트랜잭션에서 차례로 실행하고 한 번만 커밋한다.
+#
+#  - 따로 스레드를 두지 않는다. 큐가 비어 있을 때 들어온 요청 스레드가 리더가 되어 배치 하나를 처리하고,
+#    남은 것이 있으면 기다리던 다른 요청이 다음 리더가 된다.
+#  - 쓰기마다 SAVEPOINT 를 두므로 하나가 예외를 내도 그 쓰기만 되돌리고 나머지는 커밋된다.
+#    예외는 그 쓰기를 보낸 요청에서 그대로 다시 올라온다.
+#  - 다른 워커 프로세스와는 BEGIN IMMEDIATE(+ busy timeout)로 순서를 정한다. 워커마다 배치가 따로 생기지만
+#    트랜잭션 수가 쓰기 수가 아니라 배치 수가 되므로 락을 기다리는 시간이 크게 준다.
+#  - 배치가 모이려면 한 프로세스 안에서 요청이 동시에 돌아야 한다(gunicorn --threads / gthread 워커, ASGI).
+#    sync 워커는 요청을 하나씩 처리하므로 배치는 항상 1개다. 그래서 큐에 다른 쓰기가 없으면 max_wait 만큼
+#    기다리지 않고 바로 커밋한다(리더가 커밋하는 동안 쌓인 쓰기는 다음 배치로 모인다).
+#  - on_commit 은 커밋 직후, 배치의 요청들을 놓아 주기 전에 부른다. 요청이 돌아가서 바로 읽어도
+#    갱신된 스냅샷을 본다.
+
+import sqlite3
+import threading
+import time
+
+BATCH_SIZE_BUCKETS = (1, 4, 16, 64)   # metrics 의 배치 크기 분포 구간(이하)
+
+
+class _PendingWrite:
+    __slots__ = ("fn", "result", "error", "finished")
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.result = None
+        self.error = None
+        self.finished = False
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class WriteCoordinator:
+    def __init__(self, connect, max_batch=64, max_wait=0.005, on_commit=None, begin_attempts=3):
+        """
+        connect: () → sqlite3 연결. 배치마다 하나 열고 닫는다(autocommit 모드로 바꿔서 트랜잭션을 직접 연다)
+        on_commit: 배치가 커밋된 뒤, 그 배치의 요청들을 놓아 주기 전에 리더 스레드에서 부른다(스냅샷 갱신 등)
+        """
+        self.connect = connect
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_commit = on_commit
+        self.begin_attempts = begin_attempts
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._leading = False
+
+        self.batches = 0
+        self.writes = 0
+        self.failed_writes = 0
+        self.failed_batches = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.max_queue_depth = 0
+        self.commit_seconds = 0.0
+        self.batch_sizes = {b: 0 for b in BATCH_SIZE_BUCKETS}
+
+    def submit(self, fn):
+        """fn(conn) 을 다음 배치에 넣고, 커밋이 끝나면 fn 의 반환값을 돌려준다(fn 이 던진 예외는 다시 던진다)."""
+        item = _PendingWrite(fn)
+        with self._cond:
+            self._queue.append(item)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            self._cond.notify_all()
+            while not item.finished and self._leading:
+                self._cond.wait()
+            if item.finished:
+                return item.outcome()
+            self._leading = True
+
+        try:
+            while not item.finished:   # 앞에 max_batch 개 넘게 밀려 있었으면 내 것이 들어갈 때까지
+                self._lead()
+        finally:
+            with self._cond:
+                self._leading = False
+                self._cond.notify_all()   # 아직 남은 쓰기가 있으면 기다리던 쪽이 다음 리더가 된다
+        return item.outcome()
+
+    def _lead(self):
+        with self._cond:
+            deadline = time.monotonic() + self.max_wait
+            # 같이 들어온 쓰기가 없으면(sync 워커, 한가한 때) 기다려도 모일 것이 없다
+            while 1 < len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+
+        started = time.perf_counter()
+        committed = self._run_batch(batch)
+        elapsed = time.perf_counter() - started
+        try:
+            if committed and self.on_commit is not None:
+                self.on_commit()
+        finally:
+            self._finish(batch, committed, elapsed)
+
+    def _finish(self, batch, committed, elapsed):
+        with self._cond:
+            self.batches += 1
+            self.failed_batches += 0 if committed else 1
+            self.writes += len(batch)
+            self.failed_writes += sum(1 for item in batch if item.error is not None)
+            self.last_batch_size = len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self.commit_seconds += elapsed
+            for bound in BATCH_SIZE_BUCKETS:
+                if len(batch) <= bound:
+                    self.batch_sizes[bound] += 1
+                    break
+            for item in batch:
+                item.finished = True
+
+    def _begin(self, conn):
+        for attempt in range(self.begin_attempts):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                # busy timeout 을 다 기다려도 다른 워커가 락을 쥐고 있음
+                if "locked" not in str(e) or attempt == self.begin_attempts - 1:
+                    raise
+
+    def _run_batch(self, batch):
+        conn = self.connect()
+        conn.isolation_level = None
+        try:
+            self._begin(conn)
+            for item in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    item.result = item.fn(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    item.error = e
+                conn.execute("RELEASE write")
+            conn.execute("COMMIT")
+            return True
+        except Exception as e:
+            # BEGIN / COMMIT 이 실패하면 이 배치는 하나도 저장되지 않았다
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for item in batch:
+                item.result, item.error = None, e
+            return False
+        finally:
+            conn.close()
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "batches": self.batches,
+                "writes": self.writes,
+                "failed_writes": self.failed_writes,
+                "failed_batches": self.failed_batches,
+                "last_batch_size": self.last_batch_size,
+                "max_batch_size": self.max_batch_size,
+                "avg_batch_size": self.writes / self.batches if self.batches else 0.0,
+                "avg_commit_ms": 1000.0 * self.commit_seconds / self.batches if self.batches else 0.0,
+                "batch_size_buckets": {f"<={b}": n for b, n in self.batch_sizes.items()},
+                "max_batch": self.max_batch,
+                "max_wait_ms": 1000.0 * self.max_wait,
+            }
@@ -0,0 +1,51 @@
+# 리그(클럽)별 요청 라우팅
+#
+# 한 서버에서 여러 클럽을 돌릴 때, 요청마다 어느 리그인지 정하고 리그마다 SQLite 파일 하나를 쓴다.
+#   경로:   /l/<리그>/api/games  → SCRIPT_NAME 에 "/l/<리그>" 를 붙이고 PATH_INFO 는 "/api/games"
+#   호스트: hosts={"seoul.example.com": "seoul"} 로 직접 지정하거나, domain="example.com" 이면 서브도메인이 리그
+# 앱 코드는 prefix 를 모른다. url_for / request.script_root 가 prefix 를 붙여 준다.
+# 리그를 못 정한 요청은 기본 DB(DB_PATH) 로 간다.
+
+import re
+
+LEAGUE_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+ENVIRON_KEY = "madang.league"
+
+
+def valid_league(name):
+    return bool(name) and LEAGUE_NAME_RE.match(name) is not None
+
+
+class LeagueRouter:
+    """WSGI 미들웨어. 리그를 찾으면 environ["madang.league"] 에 넣는다."""
+
+    def __init__(self, wsgi_app, prefix="/l", hosts=None, domain=None):
+        self.wsgi_app = wsgi_app
+        self.prefix = prefix.rstrip("/")
+        self.hosts = {h.lower(): name for h, name in (hosts or {}).items()}
+        self.domain = domain.lower().lstrip(".") if domain else None
+
+    def _from_host(self, environ):
+        host = (environ.get("HTTP_HOST") or "").lower().split(":", 1)[0]
+        if host in self.hosts:
+            return self.hosts[host]
+        if self.domain and host.endswith("." + self.domain):
+            sub = host[: -len(self.domain) - 1]
+            if valid_league(sub):
+                return sub
+        return None
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        league = None
+        if self.prefix and path.startswith(self.prefix + "/"):
+            name, _, rest = path[len(self.prefix) + 1:].partition("/")
+            if valid_league(name):
+                league = name
+                environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + f"{self.prefix}/{name}"
+                environ["PATH_INFO"] = "/" + rest
+        if league is None:
+            league = self._from_host(environ)
+        if league is not None:
+            environ[ENVIRON_KEY] = league
+        return self.wsgi_app(environ, start_response)
@@ -0,0 +1,279 @@
+# 대회 자리 배정 엔진
+#
+# 참가자 N명(4의 배수)을 4인 탁에 배정한다. 탁 안의 순서가 곧 자리(동/남/서/북)다.
+#
+#   balanced  R 라운드를 한꺼번에 짠다. 같은 상대를 다시 만나는 횟수(만남 횟수 제곱합)와
+#             자리 쏠림(플레이어별 동남서북 횟수 제곱합)을 최소화한다.
+#   swiss     다음 한 라운드만 짠다. 현재 순위대로 4명씩 묶되 이미 만난 상대는 가능한 한 피한다.
+#
+# 두 방식 모두 초기 배정에서 시작해, 같은 라운드의 다른 탁 두 사람을 맞바꾸는 국소 탐색(담금질)을
+# 시간 제한 안에서 돌린다. 맞바꾸기 한 번의 비용 변화는 두 탁만 보고 계산하므로 128명도 1초 안에 끝난다.
+# 자리(바람)는 탁 구성이 정해진 뒤 탁마다 24가지 순서 중 쏠림이 가장 적은 것을 고르고,
+# 탁 안 두 사람의 자리를 바꿔 보는 짧은 국소 탐색으로 마무리한다.
+
+import itertools
+import math
+import random
+import time
+
+SEAT_ORDERS = list(itertools.permutations(range(4)))
+
+# swiss: 이미 만난 두 사람을 한 탁에 앉히는 비용(순위 몇 칸 차이만큼 손해로 볼지)
+SWISS_REPEAT_PENALTY = 8
+
+_START_TEMP = 2.0
+_END_TEMP = 0.05
+
+
+class SeatingError(ValueError):
+    pass
+
+
+def check_players(players):
+    names = []
+    seen = set()
+    for p in players:
+        name = str(p or "").strip()
+        if not name:
+            raise SeatingError("player names must not be empty")
+        if name in seen:
+            raise SeatingError(f"duplicate player {name!r}")
+        seen.add(name)
+        names.append(name)
+    if len(names) < 4 or len(names) % 4:
+        raise SeatingError("player count must be a positive multiple of 4")
+    return names
+
+
+def _history_counts(index, history):
+    """history(지난 탁 목록, 자리 순서대로 이름 4개)에서 만남 횟수 행렬과 자리 횟수를 만든다."""
+    n = len(index)
+    meet = [[0] * n for _ in range(n)]
+    seats = [[0] * 4 for _ in range(n)]
+    for table in history:
+        ids = [index.get(name) for name in table]
+        for seat, i in enumerate(ids):
+            if i is None:
+                continue
+            seats[i][seat] += 1
+            for j in ids[seat + 1:]:
+                if j is not None:
+                    meet[i][j] += 1
+                    meet[j][i] += 1
+    return meet, seats
+
+
+def _anneal(plan, gain, apply, partner, rng, time_limit, cost):
+    """
+    plan: 라운드별 탁 목록(플레이어 번호 리스트). gain(r, t1, i, t2, j) 는 맞바꿨을 때 줄어드는 비용.
+    partner(r, t1) 은 t1 과 맞바꿀 상대 탁 번호, cost() 는 지금 plan 의 비용(0 이면 더 줄일 게 없으니 멈춘다).
+    손해 보는 맞바꾸기도 받아들이므로, 끝나면 plan 을 지나온 것 중 비용이 가장 낮았던 배정으로 되돌린다.
+    """
+    best, best_plan = cost(), [[t[:] for t in tables] for tables in plan]
+    deadline = time.perf_counter() + time_limit
+    start = time.perf_counter()
+    temp = _START_TEMP
+    step = 0
+    while best > 0:
+        step += 1
+        if step & 255 == 0:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            # 남은 시간에 맞춰 온도를 지수적으로 내린다
+            frac = (now - start) / time_limit
+            temp = _START_TEMP * (_END_TEMP / _START_TEMP) ** frac
+
+        r = rng.randrange(len(plan))
+        tables = plan[r]
+        t1 = rng.randrange(len(tables))
+        t2 = partner(r, t1)
+        if t2 == t1:
+            continue
+        i = rng.randrange(4)
+        j = rng.randrange(4)
+        g = gain(r, tables[t1], i, tables[t2], j)
+        if g >= 0 or rng.random() < math.exp(g / temp):
+            apply(r, tables[t1], i, tables[t2], j)
+            tables[t1][i], tables[t2][j] = tables[t2][j], tables[t1][i]
+            if g > 0 and cost() < best:
+                best, best_plan = cost(), [[t[:] for t in tables] for tables in plan]
+
+    for tables, kept in zip(plan, best_plan):
+        tables[:] = kept
+
+
+def _assign_seats(plan, seats, passes=3):
+    """탁 구성은 그대로 두고 탁마다 자리 순서를 골라 동남서북 횟수를 고르게 맞춘다."""
+    chosen = [[None] * len(tables) for tables in plan]
+    for _ in range(passes):
+        for r, tables in enumerate(plan):
+            for k, table in enumerate(tables):
+                prev = chosen[r][k]
+                if prev is not None:
+                    for seat, p in enumerate(prev):
+                        seats[p][seat] -= 1
+                # 제곱합의 증가분이 sum(2*S+1) 이므로 현재 횟수 합이 가장 작은 순서가 최선
+                order = min(SEAT_ORDERS, key=lambda o: sum(seats[table[o[s]]][s] for s in range(4)))
+                seated = [table[o] for o in order]
+                for seat, p in enumerate(seated):
+                    seats[p][seat] += 1
+                chosen[r][k] = seated
+    return chosen
+
+
+def _balance_seats(chosen, seats, rng, steps):
+    """탁 안에서 두 사람의 자리를 바꿔 보며 쏠림이 늘지 않으면 받아들인다(같으면 옆걸음)."""
+    tables = [table for tables in chosen for table in tables]
+    # 제곱합이 하한(각자 대국 수를 네 자리에 최대한 고르게 나눈 값)에 닿으면 멈춘다
+    total = 0
+    bound = 0
+    for s in seats:
+        q, extra = divmod(sum(s), 4)
+        total += sum(c * c for c in s)
+        bound += extra * (q + 1) ** 2 + (4 - extra) * q * q
+    for _ in range(steps):
+        if total == bound:
+            return
+        table = rng.choice(tables)
+        s, t = rng.sample(range(4), 2)
+        p, q = table[s], table[t]
+        sp, sq = seats[p], seats[q]
+        delta = 2 * (sp[t] - sp[s] + sq[s] - sq[t]) + 4
+        if delta <= 0:
+            sp[s] -= 1
+            sp[t] += 1
+            sq[t] -= 1
+            sq[s] += 1
+            table[s], table[t] = q, p
+            total += delta
+
+
+def schedule_balanced(players, rounds, history=(), seed=None, time_limit=0.5):
+    """
+    players 를 rounds 라운드에 배정한다. history 의 만남/자리 횟수를 이어서 고려하므로
+    이미 발표된 라운드를 넘기면 그다음 라운드들이 이어서 고르게 짜인다.
+    반환: 라운드별 [[동, 남, 서, 북], ...]
+    """
+    names = check_players(players)
+    if rounds < 1:
+        raise SeatingError("rounds must be at least 1")
+    n = len(names)
+    index = {name: i for i, name in enumerate(names)}
+    meet, seats = _history_counts(index, history)
+    rng = random.Random(seed)
+
+    plan = []
+    for _ in range(rounds):
+        order = list(range(n))
+        rng.shuffle(order)
+        tables = [order[k:k + 4] for k in range(0, n, 4)]
+        for t in tables:
+            for x, y in itertools.combinations(t, 2):
+                meet[x][y] += 1
+                meet[y][x] += 1
+        plan.append(tables)
+
+    # excess = sum(M*(M-1)) / 2: 두 번 이상 만난 만큼의 초과분. 0 이면 중복 만남이 없다
+    excess = [sum(m * (m - 1) for row in meet for m in row) // 2]
+
+    def gain(r, t1, i, t2, j):
+        a, b = t1[i], t2[j]
+        ma, mb = meet[a], meet[b]
+        g = 0
+        for x in t1:
+            if x != a:
+                g += ma[x] - 1 - mb[x]
+        for y in t2:
+            if y != b:
+                g += mb[y] - 1 - ma[y]
+        return g
+
+    def apply(r, t1, i, t2, j):
+        a, b = t1[i], t2[j]
+        excess[0] -= 2 * gain(r, t1, i, t2, j)
+        for x in t1:
+            if x != a:
+                meet[a][x] -= 1
+                meet[x][a] -= 1
+                meet[b][x] += 1
+                meet[x][b] += 1
+        for y in t2:
+            if y != b:
+                meet[b][y] -= 1
+                meet[y][b] -= 1
+                meet[a][y] += 1
+                meet[y][a] += 1
+
+    if n > 4:
+        per_round = n // 4
+        _anneal(
+            plan, gain, apply, lambda r, t1: rng.randrange(per_round), rng, time_limit,
+            lambda: excess[0],
+        )
+
+    seated = _assign_seats(plan, seats)
+    _balance_seats(seated, seats, rng, 200 * n * rounds)
+    return [[[names[p] for p in table] for table in tables] for tables in seated]
+
+
+def schedule_swiss(ranked, history=(), seed=None, time_limit=0.5, repeat_penalty=SWISS_REPEAT_PENALTY):
+    """
+    ranked(현재 순위 순서의 이름 목록)로 다음 한 라운드를 짠다.
+    기본은 위에서부터 4명씩이고, 이미 만난 상대가 겹치면 가까운 순위끼리 맞바꿔 피한다.
+    """
+    names = check_players(ranked)
+    n = len(names)
+    index = {name: i for i, name in enumerate(names)}
+    meet, seats = _history_counts(index, history)
+    rng = random.Random(seed)
+
+    # 플레이어 번호 = 순위. 탁 비용 = 순위 폭(연속이면 0) + 이미 만난 쌍 벌점
+    def cost(t):
+        c = max(t) - min(t) - 3
+        for x, y in itertools.combinations(t, 2):
+            c += repeat_penalty * meet[x][y]
+        return c
+
+    tables = [list(range(k, k + 4)) for k in range(0, n, 4)]
+    plan = [tables]
+    total = [sum(cost(t) for t in tables)]
+
+    def gain(r, t1, i, t2, j):
+        before = cost(t1) + cost(t2)
+        t1[i], t2[j] = t2[j], t1[i]
+        after = cost(t1) + cost(t2)
+        t1[i], t2[j] = t2[j], t1[i]
+        return before - after
+
+    def apply(r, t1, i, t2, j):
+        total[0] -= gain(r, t1, i, t2, j)
+
+    def partner(r, t1):
+        # 순위가 크게 벌어지는 맞바꾸기는 어차피 손해라 가까운 탁끼리만 본다
+        return min(len(tables) - 1, max(0, t1 + rng.choice((-2, -1, 1, 2))))
+
+    if n > 4:
+        _anneal(plan, gain, apply, partner, rng, time_limit, lambda: total[0])
+
+    # 순위가 높은 탁부터 번호를 매긴다
+    tables.sort(key=min)
+    seated = _assign_seats(plan, seats)
+    _balance_seats(seated, seats, rng, 200 * n)
+    return [[names[p] for p in table] for table in seated[0]]
+
+
+def plan_stats(rounds, history=()):
+    """중복 만남 쌍 수, 최대 만남 횟수, 자리 쏠림(플레이어별 가장 많은/적은 자리 횟수 차의 최댓값)."""
+    meet = {}
+    seats = {}
+    for table in itertools.chain(history, *rounds):
+        for seat, name in enumerate(table):
+            seats.setdefault(name, [0, 0, 0, 0])[seat] += 1
+        for x, y in itertools.combinations(sorted(table), 2):
+            meet[(x, y)] = meet.get((x, y), 0) + 1
+    return {
+        "repeat_pairs": sum(1 for m in meet.values() if m > 1),
+        "max_meetings": max(meet.values(), default=0),
+        "seat_spread": max((max(s) - min(s) for s in seats.values()), default=0),
+    }
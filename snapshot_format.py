@@ -0,0 +1,241 @@
+# 아카이브/시즌 묶음을 옮기기 위한 바이너리 스냅샷 포맷 (.mjsnap)
+#
+# 모든 정수는 little-endian, 모든 섹션은 8바이트 정렬이라 mmap 위에서 memoryview.cast 로 바로 읽을 수 있다.
+#
+#   [헤더 64B]
+#     magic        8s   b"MJSNAP\0\0"
+#     version      H
+#     flags        H    (예약)
+#     uma          4i   1등~4등 우마
+#     return_score i
+#     total_score  i    네 명 점수 합
+#     archives     I    아카이브 개수
+#     strings_off  Q    문자열 테이블 위치
+#     strings_len  Q
+#     strings_crc  I    문자열 테이블 crc32
+#     dir_crc      I    아카이브 디렉터리 crc32
+#   [아카이브 디렉터리] 아카이브마다 32B
+#     name         I    문자열 인덱스
+#     created_at   I    문자열 인덱스
+#     games        I    대국 수 n
+#     reserved     I
+#     data_off     Q    컬럼 데이터 위치
+#     data_crc     I    컬럼 데이터 crc32
+#     reserved     I
+#   [컬럼 데이터] 아카이브마다
+#     created_at   n × I   문자열 인덱스
+#     player1..4   4 × n × I   문자열 인덱스
+#     score1..4    4 × n × i   점수(고정폭 정수)
+#   [문자열 테이블]
+#     count        I
+#     offsets      (count + 1) × I   blob 안에서의 시작 위치
+#     blob         utf-8
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b"MJSNAP\0\0"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHH4iiiIQQII")
+_DIR_ENTRY = struct.Struct("<IIIIQII")
+_LITTLE = sys.byteorder == "little"
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _u32(values, signed=False):
+    arr = array("i" if signed else "I", values)
+    if not _LITTLE:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write_snapshot(fp, rules, archives):
+    """
+    rules: {"uma": [..4], "return_score": int, "total_score": int}
+    archives: [{"name", "created_at", "games": [(created_at, n1, n2, n3, n4, s1, s2, s3, s4), ...]}]
+    """
+    strings = {}
+
+    def sid(value):
+        return strings.setdefault(value or "", len(strings))
+
+    directory = []
+    blocks = []
+    offset = _align(_HEADER.size + _DIR_ENTRY.size * len(archives))
+
+    for a in archives:
+        games = list(a["games"])
+        cols = [[sid(g[0]) for g in games]]
+        for seat in range(4):
+            cols.append([sid(g[1 + seat]) for g in games])
+        data = b"".join(_u32(c) for c in cols)
+        data += b"".join(_u32([int(g[5 + seat]) for g in games], signed=True) for seat in range(4))
+
+        directory.append(_DIR_ENTRY.pack(
+            sid(a["name"]), sid(a["created_at"]), len(games), 0,
+            offset, zlib.crc32(data), 0,
+        ))
+        padded = data + b"\0" * (_align(len(data)) - len(data))
+        blocks.append(padded)
+        offset += len(padded)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+    string_table = _u32([len(encoded)]) + _u32(offsets) + b"".join(encoded)
+
+    dir_bytes = b"".join(directory)
+    header = _HEADER.pack(
+        MAGIC, VERSION, 0,
+        *[int(u) for u in rules["uma"]], int(rules["return_score"]), int(rules["total_score"]),
+        len(archives), offset, len(string_table),
+        zlib.crc32(string_table), zlib.crc32(dir_bytes),
+    )
+
+    head = header + dir_bytes
+    fp.write(head + b"\0" * (_align(len(head)) - len(head)))
+    for block in blocks:
+        fp.write(block)
+    fp.write(string_table)
+
+
+class SnapshotReader:
+    """
+    스냅샷 파일을 mmap 으로 열어 복사 없이 읽는다. 헤더/디렉터리/문자열 테이블 체크섬은 열 때,
+    아카이브 컬럼 체크섬은 games() 로 처음 읽을 때 확인한다.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError("empty snapshot file")
+        self._view = memoryview(self._map)
+        self._views = []   # 만든 부분 뷰들. 닫을 때 역순으로 풀어야 mmap 을 닫을 수 있다
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self):
+        if len(self._view) < _HEADER.size:
+            raise SnapshotError("truncated header")
+        (magic, version, _flags, u1, u2, u3, u4, ret, total, count,
+         s_off, s_len, s_crc, d_crc) = _HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            raise SnapshotError("not a madang snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+        self.rules = {"uma": [u1, u2, u3, u4], "return_score": ret, "total_score": total}
+
+        d_end = _HEADER.size + _DIR_ENTRY.size * count
+        if d_end > len(self._view) or s_off + s_len > len(self._view):
+            raise SnapshotError("truncated snapshot")
+        if zlib.crc32(self._slice(_HEADER.size, d_end)) != d_crc:
+            raise SnapshotError("directory checksum mismatch")
+        strings = self._slice(s_off, s_off + s_len)
+        if zlib.crc32(strings) != s_crc:
+            raise SnapshotError("string table checksum mismatch")
+
+        n = struct.unpack_from("<I", strings, 0)[0] if s_len >= 4 else 0
+        if s_len < 4 + 4 * (n + 1):
+            raise SnapshotError("truncated string table")
+        self._str_count = n
+        self._str_offsets = self._ints(s_off + 4, n + 1, "I")
+        self._str_blob = self._slice(s_off + 4 + 4 * (n + 1), s_off + s_len)
+        self._str_cache = {}
+
+        self.archives = []
+        for i in range(count):
+            name, created_at, games, _, off, crc, _ = _DIR_ENTRY.unpack_from(
+                self._view, _HEADER.size + i * _DIR_ENTRY.size
+            )
+            if off + games * 36 > s_off:
+                raise SnapshotError("archive data out of range")
+            self.archives.append({
+                "name": self.string(name),
+                "created_at": self.string(created_at),
+                "game_count": games,
+                "_off": off,
+                "_crc": crc,
+            })
+
+    def _slice(self, start, end):
+        view = self._view[start:end]
+        self._views.append(view)
+        return view
+
+    def _ints(self, start, count, fmt):
+        view = self._slice(start, start + 4 * count)
+        if _LITTLE:
+            view = view.cast(fmt)
+            self._views.append(view)
+            return view
+        arr = array(fmt, view.tobytes())
+        arr.byteswap()
+        return arr
+
+    def string(self, idx):
+        s = self._str_cache.get(idx)
+        if s is None:
+            # 번호와 오프셋은 파일에서 온 값이므로 체크섬이 맞아도 범위를 확인한다
+            if not 0 <= idx < self._str_count:
+                raise SnapshotError(f"string index {idx} out of range")
+            start, end = self._str_offsets[idx], self._str_offsets[idx + 1]
+            if not start <= end <= len(self._str_blob):
+                raise SnapshotError(f"string {idx} out of range")
+            try:
+                s = str(self._str_blob[start:end], "utf-8")
+            except UnicodeDecodeError:
+                raise SnapshotError(f"string {idx} is not valid UTF-8") from None
+            self._str_cache[idx] = s
+        return s
+
+    def columns(self, i):
+        """i 번째 아카이브의 (시간, 이름 4열, 점수 4열) 컬럼 뷰. 복사 없음."""
+        a = self.archives[i]
+        n = a["game_count"]
+        off = a["_off"]
+        if zlib.crc32(self._slice(off, off + n * 36)) != a["_crc"]:
+            raise SnapshotError(f"archive {a['name']!r} checksum mismatch")
+        return [self._ints(off + k * 4 * n, n, "I" if k < 5 else "i") for k in range(9)]
+
+    def games(self, i):
+        cols = self.columns(i)
+        s = self.string
+        for r in range(self.archives[i]["game_count"]):
+            yield (
+                s(cols[0][r]),
+                s(cols[1][r]), s(cols[2][r]), s(cols[3][r]), s(cols[4][r]),
+                cols[5][r], cols[6][r], cols[7][r], cols[8][r],
+            )
+
+    def close(self):
+        # memoryview 를 먼저 풀어야 mmap 을 닫을 수 있다
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,9 +1,15 @@
 // ===== 공통 상수 =====
+// 기본 점수 규칙(서버 1번 프로필과 같음). 실제 계산은 대상별로 배정된 프로필을 쓴다
 const UMA_VALUES = [50, 10, -10, -30];
 const RETURN_SCORE = 30000;
+const TOTAL_SCORE = 100000;
+
+// 대상("games" | "tournament" | "archive:<id>") → 점수 규칙 프로필 (/api/scoring_profiles/assigned)
+let SCORING_PROFILES = {};
 
 // 전체 게임 / 플레이어 요약 캐시 (통계 화면용)
-let ALL_GAMES = [];
+// 대국은 stats_worker.js 의 typed array 표 복사본({n, ids, names, scores, ranks, pts, strings ...}, 최신이 앞)
+let GAMES_TABLE = null;
 let PLAYER_SUMMARY = [];       // ✅ 개인 레이팅 표(4판 이상) 전용
 let PLAYER_SUMMARY_ALL = [];   // ✅ 게임 기준 전체 플레이어(필터 전)
 let STATS_PLAYER_LIST = [];    // ✅ 개인별 통계 셀렉트 전용(뱃지 포함)
@@ -11,7 +17,7 @@ let STATS_PLAYER_LIST = [];    // ✅ 개인별 통계 셀렉트 전용(뱃지 
 let ALL_BADGES = [];
 
 let RANKING_VIEW_MODE = "pt"; // "pt" | "season"
-let TOURNAMENT_STATS = {};    // { [name]: { games, sumPosPt } }
+let TOURNAMENT_STATS = {};    // { [name]: { games, sumPosPt } } (워커가 계산)
 let SEASON_SUMMARY = [];      // 시즌 점수용 표 데이터
 
 
@@ -20,23 +26,47 @@ let RANKING_SORT = { key: "total_pt", dir: "desc" }; // 기본: 총 pt 내림차
 
 // ===== 아카이브 캐시 / 정렬 상태 =====
 let ARCHIVES = [];
-let CURRENT_ARCHIVE_GAMES = [];
+let CURRENT_ARCHIVE_PROFILE = null;   // 선택한 아카이브에 배정된 점수 규칙
 let ARCHIVE_PLAYER_SUMMARY = [];
 let ARCHIVE_RANKING_SORT = { key: "total_pt", dir: "desc" }; // 아카이브 전체등수 정렬
 
 // ===== 대회 전용 =====
-let TOURNAMENT_GAMES = [];
+let TOURNAMENT_TABLE = null;   // GAMES_TABLE 과 같은 모양
+let SEATING_PREVIEW = null;   // 마지막 자리 배정 미리보기 (/api/tournament/schedule)
 
 let STATS_BADGE_ONLY_START = -1; // ✅ 셀렉트에서 "뱃지만 보유" 구역 시작 인덱스
 
-const SEASON_YEAR2 = 25;  // 2025든 25든 둘 다 25로 맞출거
-const SEASON_FROM = 1;
-const SEASON_TO = 6;
-let SEASON_TOURNAMENT_STATS = null; // { [name]: { joinCount, ptSum } }
+// 통계 워커 주소(해시 붙은 이름은 index.html 이 data-stats-worker 로 넘겨준다)
+const STATS_WORKER_URL = document.currentScript?.dataset.statsWorker || "/static/stats_worker.js";
+
+// 리그 경로(/l/<리그>) 아래에서 열렸으면 그 prefix. "/api/..." 같은 주소 앞에 붙인다
+const APP_ROOT = document.currentScript?.dataset.root || "";
 
+function appUrl(url) {
+  return url.startsWith("/") ? APP_ROOT + url : url;
+}
+
+
+// ===== 점수 규칙 프로필 =====
+function profileFor(target) {
+  return (
+    SCORING_PROFILES[target] ||
+    SCORING_PROFILES.default || { uma: UMA_VALUES, return_score: RETURN_SCORE, total_score: TOTAL_SCORE }
+  );
+}
+
+async function loadScoringProfiles(opts = {}) {
+  try {
+    await loadCached("/api/scoring_profiles/assigned", ["profiles"], (profiles) => {
+      SCORING_PROFILES = profiles || {};
+    }, opts);
+  } catch (e) {
+    console.warn("scoring profiles load failed:", e);
+  }
+}
 
 // ===== 포인트 계산 =====
-function calcPts(scores) {
+function calcPts(scores, profile = profileFor("games")) {
   const order = scores
     .map((s, i) => ({ s, i }))
     .sort((a, b) => b.s - a.s)
@@ -44,11 +74,11 @@ function calcPts(scores) {
 
   const uma = [0, 0, 0, 0];
   order.forEach((idx, rank) => {
-    uma[idx] = UMA_VALUES[rank];
+    uma[idx] = profile.uma[rank];
   });
 
   return scores.map((s, i) => {
-    const base = (s - RETURN_SCORE) / 1000.0;
+    const base = (s - profile.return_score) / 1000.0;
     return +(base + uma[i]).toFixed(1);
   });
 }
@@ -111,18 +141,13 @@ function createRankDistBar(rankCounts, games) {
 
 // ===== fetch 래퍼(JSON) =====
 async function fetchJSON(url, options = {}) {
-  const res = await fetch(url, {
+  const res = await fetch(appUrl(url), {
     headers: { "Content-Type": "application/json" },
     ...options,
   });
-  if (!res.ok) {
-    let msg = `HTTP ${res.status}`;
-    try {
-      const d = await res.json();
-      if (d && d.error) msg += ` - ${d.error}`;
-    } catch (_) {}
-    throw new Error(msg);
-  }
+  // 쓰기 뒤에는 서버 데이터 버전을 다시 물어봐야 로컬 저장소가 새 데이터를 받는다
+  if (options.method && options.method !== "GET") SERVER_VERSIONS = null;
+  if (!res.ok) throw new Error(await errorMessage(res));
   try {
     return await res.json();
   } catch (_) {
@@ -130,6 +155,555 @@ async function fetchJSON(url, options = {}) {
   }
 }
 
+async function errorMessage(res) {
+  let msg = `HTTP ${res.status}`;
+  try {
+    const d = await res.json();
+    if (d && d.error) msg += ` - ${d.error}`;
+  } catch (_) {}
+  return msg;
+}
+
+// ===== 컬럼 포맷(?format=columnar) 응답 → 행 객체 배열 =====
+function decodeTimeColumn(col) {
+  if (Array.isArray(col)) return col;
+
+  const out = new Array(col.delta.length + 1);
+  let minutes = col.t0;
+  for (let i = 0; i < out.length; i++) {
+    if (i > 0) minutes += col.delta[i - 1];
+    // 서버와 같은 "YYYY-MM-DDTHH:MM" (시간대 변환 없이)
+    out[i] = new Date(minutes * 60000).toISOString().slice(0, 16);
+  }
+  return out;
+}
+
+function decodeColumnar(payload) {
+  if (!payload || payload.format !== "columnar") return payload || [];
+
+  const strings = payload.strings || [];
+  const names = Object.keys(payload.columns);
+  const cols = names.map((name) => {
+    const col = payload.columns[name];
+    if (!Array.isArray(col)) return decodeTimeColumn(col);
+    if (name.endsWith("_name") || name === "name" || name === "grade" || name === "description") {
+      return col.map((i) => strings[i]);
+    }
+    return col;
+  });
+
+  const rows = new Array(payload.rows);
+  for (let r = 0; r < payload.rows; r++) {
+    const row = {};
+    for (let c = 0; c < names.length; c++) row[names[c]] = cols[c][r];
+    rows[r] = row;
+  }
+  return rows;
+}
+
+// 목록 API 를 컬럼 포맷으로 받아 기존 행 배열 모양으로 돌려준다
+async function fetchRows(url) {
+  const sep = url.includes("?") ? "&" : "?";
+  return decodeColumnar(await fetchJSON(`${url}${sep}format=columnar`));
+}
+
+// ===== 오프라인 로컬 저장소 (IndexedDB) =====
+// 받은 응답을 기기에 저장해 두고 다음에 열 때는 그것부터 그린다(첫 화면이 네트워크를 기다리지 않음).
+// 저장된 것이 최신인지는 /api/versions 의 scope 별 데이터 버전으로 확인하고, 바뀐 것만 다시 받는다.
+// 결과 입력은 보내지 못하면 outbox 에 쌓아 두었다가 연결되면 입력한 순서대로 다시 보낸다.
+// 요청마다 기기에서 만든 Idempotency-Key 를 붙이므로, 저장은 됐는데 응답만 못 받은 경우에도 서버가 중복을 걸러 준다.
+const LOCAL_DB_NAME = `madang${APP_ROOT}`;   // 리그마다 따로 (같은 호스트의 경로 prefix 여도 섞이지 않게)
+const LOCAL_DB_VERSION = 1;
+const VERSION_CHECK_INTERVAL_MS = 1000;   // 이 시간 안의 요청들은 /api/versions 응답 하나를 같이 쓴다
+const SYNC_INTERVAL_MS = 30000;
+
+let LOCAL_DB = null;
+let SERVER_VERSIONS = null;   // { at, promise }
+const SHOWN_STAMPS = new Map();   // url → 지금 화면에 그려진 데이터의 버전
+
+function openLocalDB() {
+  if (!LOCAL_DB) {
+    LOCAL_DB = new Promise((resolve) => {
+      if (!window.indexedDB) {
+        resolve(null);
+        return;
+      }
+      const req = indexedDB.open(LOCAL_DB_NAME, LOCAL_DB_VERSION);
+      req.onupgradeneeded = () => {
+        const db = req.result;
+        db.createObjectStore("responses", { keyPath: "url" });              // { url, stamp, body }
+        db.createObjectStore("outbox", { keyPath: "seq", autoIncrement: true }); // { seq, url, payload, key }
+      };
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => {
+        // 사생활 보호 모드 등: 저장소 없이 예전처럼 매번 서버에서 받는다
+        console.warn("IndexedDB unavailable:", req.error);
+        resolve(null);
+      };
+    });
+  }
+  return LOCAL_DB;
+}
+
+async function localTx(storeName, mode, fn) {
+  const db = await openLocalDB();
+  if (!db) throw new Error("local store unavailable");
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(storeName, mode);
+    const req = fn(tx.objectStore(storeName));
+    tx.oncomplete = () => resolve(req.result);
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error);
+  });
+}
+
+const localGet = (storeName, key) => localTx(storeName, "readonly", (st) => st.get(key));
+const localGetAll = (storeName) => localTx(storeName, "readonly", (st) => st.getAll());
+const localPut = (storeName, value) => localTx(storeName, "readwrite", (st) => st.put(value));
+const localDelete = (storeName, key) => localTx(storeName, "readwrite", (st) => st.delete(key));
+
+// 서버 scope 버전. 오프라인이면 null
+function serverVersions() {
+  const now = Date.now();
+  if (!SERVER_VERSIONS || now - SERVER_VERSIONS.at > VERSION_CHECK_INTERVAL_MS) {
+    SERVER_VERSIONS = { at: now, promise: fetchJSON("/api/versions").catch(() => null) };
+  }
+  return SERVER_VERSIONS.promise;
+}
+
+/*
+ * url 의 응답으로 render(body) 를 부른다.
+ *  1) 기기에 저장된 것이 있고 아직 그리지 않았으면 먼저 그린다. localFirst 면 여기서 끝(네트워크 안 기다림)
+ *  2) 서버 버전(scopes + "*")이 저장된 것과 다르면 새로 받아 저장하고 다시 그린다
+ * 같은 버전은 두 번 그리지 않으므로 주기적으로 불러도 바뀐 게 없으면 화면을 건드리지 않는다.
+ */
+async function loadCached(url, scopes, render, { localFirst = false } = {}) {
+  let hit = null;
+  try {
+    hit = await localGet("responses", url);
+  } catch (_) {}
+
+  if (hit && SHOWN_STAMPS.get(url) !== hit.stamp) {
+    SHOWN_STAMPS.set(url, hit.stamp);
+    await render(hit.body);
+  }
+  if (hit && localFirst) return;
+
+  const versions = await serverVersions();
+  const stamp = versions ? ["*", ...scopes].map((sc) => versions[sc] || 0).join(".") : null;
+  if (hit && (stamp === null || stamp === hit.stamp)) return;   // 오프라인이거나 최신
+
+  let body;
+  try {
+    body = await fetchJSON(url);
+  } catch (err) {
+    if (hit) {
+      console.warn("sync failed, showing local copy:", url, err);
+      return;
+    }
+    throw err;
+  }
+  if (stamp !== null) {
+    localPut("responses", { url, stamp, body }).catch((e) => console.warn("local store write failed:", e));
+  }
+  SHOWN_STAMPS.set(url, stamp);
+  await render(body);
+}
+
+// Idempotency-Key 용 id (crypto.randomUUID 는 https 에서만 있어서 직접 만든다)
+function newClientId() {
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+}
+
+// 서버 응답 JSON. 보내지 못했으면(네트워크 / 5xx) null, 서버가 거절했으면 throw
+async function postWithKey(url, payload, key) {
+  let res;
+  try {
+    res = await fetch(appUrl(url), {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "Idempotency-Key": key },
+      body: JSON.stringify(payload),
+    });
+  } catch (_) {
+    return null;
+  }
+  if (res.status >= 500) return null;
+  SERVER_VERSIONS = null;
+  if (!res.ok) throw new Error(await errorMessage(res));
+  return res.json();
+}
+
+async function outboxSize() {
+  try {
+    return (await localGetAll("outbox")).length;
+  } catch (_) {
+    return 0;
+  }
+}
+
+// 결과 입력. 바로 저장되면 서버 응답, 오프라인이면 기기에 쌓고 { queued: true }
+// 아직 못 보낸 입력이 있으면 앞지르지 않도록 뒤에 쌓고 차례로 보낸다
+async function submitGame(url, payload) {
+  const key = newClientId();
+  const waiting = OUTBOX_FLUSHING !== null || (await outboxSize()) > 0;
+  if (!waiting) {
+    const result = await postWithKey(url, payload, key);
+    if (result) return result;
+  }
+
+  // 나중에 보내도 입력한 시각으로 저장되게(서버 created_at 과 같은 UTC 분)
+  const entry = { url, payload: { ...payload, created_at: new Date().toISOString().slice(0, 16) }, key };
+  try {
+    await localPut("outbox", entry);
+  } catch (_) {
+    throw new Error("서버에 연결할 수 없고 기기에 보관할 수도 없습니다.");
+  }
+  updateSyncStatus();
+  if (waiting) flushOutbox();
+  return { queued: true };
+}
+
+let OUTBOX_FLUSHING = null;
+let OUTBOX_FLUSH_AGAIN = false;
+
+// 보내는 중에 새로 쌓인 것은 이번 목록에 없으므로 끝난 뒤 한 번 더 돈다
+function flushOutbox() {
+  if (OUTBOX_FLUSHING) {
+    OUTBOX_FLUSH_AGAIN = true;
+    return OUTBOX_FLUSHING;
+  }
+  OUTBOX_FLUSHING = (async () => {
+    do {
+      OUTBOX_FLUSH_AGAIN = false;
+      await sendOutbox();
+    } while (OUTBOX_FLUSH_AGAIN);
+  })().finally(() => {
+    OUTBOX_FLUSHING = null;
+  });
+  return OUTBOX_FLUSHING;
+}
+
+async function sendOutbox() {
+  let entries = [];
+  try {
+    entries = await localGetAll("outbox");   // seq 순 = 입력한 순서
+  } catch (_) {
+    return;
+  }
+
+  const sentTo = new Set();
+  for (const entry of entries) {
+    let result;
+    try {
+      result = await postWithKey(entry.url, entry.payload, entry.key);
+    } catch (err) {
+      // 서버가 거절한 입력(점수 합 / 자리 불일치 등)은 다시 보내도 같으니 알리고 버린다
+      await localDelete("outbox", entry.seq);
+      const p = entry.payload;
+      alert(
+        `오프라인 중 입력한 결과를 저장하지 못했습니다.\n` +
+        `${p.player1_name}, ${p.player2_name}, ${p.player3_name}, ${p.player4_name}\n${err.message}`
+      );
+      continue;
+    }
+    if (!result) break;   // 아직 오프라인: 순서를 지키려고 여기서 멈춘다
+    await localDelete("outbox", entry.seq);
+    sentTo.add(entry.url);
+  }
+
+  updateSyncStatus();
+  if (sentTo.has("/api/games")) loadGamesAndRanking();
+  if (sentTo.has("/api/tournament_games")) loadTournamentGamesAndRanking();
+}
+
+async function updateSyncStatus() {
+  const el = document.getElementById("sync-status");
+  if (!el) return;
+  const pending = await outboxSize();
+  el.hidden = pending === 0;
+  el.textContent = pending ? `저장 대기 ${pending}건 (연결되면 자동 저장)` : "";
+}
+
+// 바뀐 데이터만 다시 받고, 쌓인 입력을 보낸다
+async function syncWithServer() {
+  await flushOutbox();
+  await loadScoringProfiles();
+  await Promise.all([loadGamesAndRanking(), reloadBadgeList(), reloadArchiveList()]);
+}
+
+function setupBackgroundSync() {
+  window.addEventListener("online", syncWithServer);
+  document.addEventListener("visibilitychange", () => {
+    if (document.visibilityState === "visible") syncWithServer();
+  });
+  setInterval(() => {
+    if (document.visibilityState === "visible") syncWithServer();
+  }, SYNC_INTERVAL_MS);
+}
+
+// 서버를 ASGI 로 띄웠으면(asgi.py) /api/live 로 데이터가 바뀌는 즉시 알림을 받는다.
+// WSGI 서버면 404 라 바로 닫고 위의 주기적 확인만 쓴다
+function setupLiveUpdates() {
+  if (!window.EventSource) return;
+  const source = new EventSource(appUrl("/api/live"));
+  let opened = false;
+  let seen = null;
+  source.onopen = () => {
+    opened = true;
+  };
+  source.addEventListener("versions", (e) => {
+    // 받은 버전을 그대로 써서 /api/versions 를 다시 묻지 않는다
+    SERVER_VERSIONS = { at: Date.now(), promise: Promise.resolve(JSON.parse(e.data)) };
+    if (seen === null || e.data === seen) {
+      seen = e.data;   // 처음 연결(또는 다시 연결)했는데 그대로면 받을 것이 없다
+      return;
+    }
+    seen = e.data;
+    if (document.visibilityState === "visible") syncWithServer();
+  });
+  source.onerror = () => {
+    if (!opened) source.close();   // 끊긴 뒤에는 EventSource 가 알아서 다시 연결한다
+  };
+}
+
+// ===== 통계 워커 호출 =====
+// 집계는 모두 stats_worker.js 에서 돈다. 메인 스레드는 메시지를 주고받고 그리기만 한다
+let STATS_WORKER = null;
+let STATS_CALL_SEQ = 0;
+const STATS_PENDING = new Map();   // id → { resolve, reject }
+
+function statsCall(type, args = {}) {
+  if (!STATS_WORKER) {
+    STATS_WORKER = new Worker(`${STATS_WORKER_URL}?root=${encodeURIComponent(APP_ROOT)}`);
+    STATS_WORKER.onmessage = (e) => {
+      const { id, result, error } = e.data;
+      const pending = STATS_PENDING.get(id);
+      if (!pending) return;
+      STATS_PENDING.delete(id);
+      if (error) pending.reject(new Error(error));
+      else pending.resolve(result);
+    };
+    STATS_WORKER.onerror = (e) => {
+      console.error("stats worker error:", e.message);
+    };
+  }
+
+  const id = ++STATS_CALL_SEQ;
+  return new Promise((resolve, reject) => {
+    STATS_PENDING.set(id, { resolve, reject });
+    STATS_WORKER.postMessage({ id, type, ...args });
+  });
+}
+
+// 워커가 돌려준 표의 k 번째 판을 <tr> 로 (대국 기록 표 공용)
+function gameRowCells(t, k, tr, firstCell, markIndex = -1) {
+  for (let i = 0; i < 4; i++) {
+    const s = 4 * k + i;
+    const td = tr.children[firstCell + i];
+    td.innerHTML = `<strong>${t.strings[t.names[s]] || ""}</strong><br>${t.scores[s]} (${t.pts[s]})`;
+    if (t.ranks[s] === 1) td.classList.add("winner-cell");
+    if (i === markIndex) td.classList.add("my-player-cell");
+  }
+}
+
+function gameTimeAt(t, k) {
+  if (t.times) return t.times[k];
+  return new Date(t.minutes[k] * 60000).toISOString().slice(0, 16);
+}
+
+// ===== 가상 스크롤 표 =====
+// 수천 판이 쌓여도 보이는 줄(+앞뒤 여유분)만 <tr> 로 만든다. 스크롤하면 있던 <tr> 을 다른 판 내용으로
+// 다시 채우고, 위/아래는 빈 줄(spacer) 높이로 자리만 잡는다. 끝에 가까워지면 source.loadMore() 로 다음 페이지.
+//   source: { length, done, renderRow(tr, index), loadMore() }
+// tbody 는 .virtual-scroll 상자 안에 있어야 한다(그 상자가 스크롤된다).
+const GAME_PAGE_SIZE = 200;
+const VIRTUAL_ROW_HEIGHT = 40;   // 첫 줄을 그리기 전까지 쓰는 어림값
+
+class VirtualTable {
+  constructor(tbody, { cells, emptyText, overscan = 8 }) {
+    this.tbody = tbody;
+    this.scroller = tbody.closest(".virtual-scroll");
+    this.cells = cells;
+    this.emptyText = emptyText;
+    this.overscan = overscan;
+    this.rowHeight = 0;
+    this.source = null;
+    this.pool = [];
+    this.frame = 0;
+
+    this.top = this.spacer();
+    this.bottom = this.spacer();
+    this.scroller.addEventListener("scroll", () => this.schedule(), { passive: true });
+    window.addEventListener("resize", () => this.schedule());
+  }
+
+  spacer() {
+    const tr = document.createElement("tr");
+    tr.className = "vt-spacer";
+    tr.innerHTML = `<td colspan="${this.cells}"></td>`;
+    return tr;
+  }
+
+  // 새 데이터로 바꾼다. 삭제 후 다시 불러올 때처럼 보던 위치를 지키려면 resetScroll=false
+  setSource(source, resetScroll = false) {
+    this.source = source;
+    this.pool = [];
+    this.tbody.replaceChildren(this.top, this.bottom);
+    if (resetScroll) this.scroller.scrollTop = 0;
+    this.render();
+  }
+
+  showMessage(text) {
+    this.source = null;
+    this.pool = [];
+    this.tbody.innerHTML = `<tr><td colspan="${this.cells}" class="ranking-placeholder">${text}</td></tr>`;
+  }
+
+  schedule() {
+    if (this.frame) return;
+    this.frame = requestAnimationFrame(() => {
+      this.frame = 0;
+      this.render();
+    });
+  }
+
+  render() {
+    const src = this.source;
+    if (!src) return;
+    if (!src.length) {
+      if (src.done) this.showMessage(this.emptyText);
+      else this.more();
+      return;
+    }
+
+    const rh = this.rowHeight || VIRTUAL_ROW_HEIGHT;
+    const viewTop = this.scroller.scrollTop;
+    const viewHeight = this.scroller.clientHeight || 600;
+    const first = Math.max(0, Math.floor(viewTop / rh) - this.overscan);
+    const last = Math.min(src.length, Math.ceil((viewTop + viewHeight) / rh) + this.overscan);
+    const count = Math.max(0, last - first);
+
+    while (this.pool.length < count) {
+      const tr = document.createElement("tr");
+      for (let i = 0; i < this.cells; i++) tr.appendChild(document.createElement("td"));
+      this.tbody.insertBefore(tr, this.bottom);
+      this.pool.push(tr);
+    }
+    while (this.pool.length > count) this.pool.pop().remove();
+
+    for (let j = 0; j < count; j++) {
+      const tr = this.pool[j];
+      for (const td of tr.children) td.className = "";
+      src.renderRow(tr, first + j);
+    }
+    this.top.firstChild.style.height = `${first * rh}px`;
+    this.bottom.firstChild.style.height = `${(src.length - last) * rh}px`;
+
+    // 줄 높이는 실제로 그린 첫 줄에서 한 번 잰다(숨은 탭이면 0 이라 다음에 다시)
+    if (!this.rowHeight && count && this.pool[0].offsetHeight) {
+      this.rowHeight = this.pool[0].offsetHeight;
+      this.schedule();
+    }
+
+    if (!src.done && last >= src.length - this.overscan) this.more();
+  }
+
+  async more() {
+    const src = this.source;
+    // 페이지 요청은 source 마다 하나씩(받는 중에 다른 아카이브로 바꿔도 새 source 는 바로 받는다)
+    if (!src || src.done || src.loading) return;
+    src.loading = true;
+    try {
+      await src.loadMore();
+    } catch (err) {
+      console.error(err);
+      src.done = true;
+      if (!src.length && this.source === src) {
+        this.showMessage("데이터를 불러오지 못했습니다.");
+        return;
+      }
+    } finally {
+      src.loading = false;
+    }
+    if (this.source === src) this.render();
+  }
+}
+
+// 워커가 준 표(이미 메모리에 다 있음)를 보여주는 source
+function tableSource(t, renderRow) {
+  return { length: t.n, done: true, renderRow: (tr, k) => renderRow(t, k, tr), loadMore: async () => {} };
+}
+
+// 서버에서 GAME_PAGE_SIZE 판씩(최신부터, 마지막 id 다음부터) 받아 오는 source
+function pagedSource(url, renderRow) {
+  const rows = [];
+  const src = {
+    length: 0,
+    done: false,
+    renderRow: (tr, i) => renderRow(rows[i], tr),
+    async loadMore() {
+      const before = rows.length ? `&before=${rows[rows.length - 1].id}` : "";
+      const page = await fetchRows(`${url}?limit=${GAME_PAGE_SIZE}${before}`);
+      rows.push(...page);
+      src.length = rows.length;
+      if (page.length < GAME_PAGE_SIZE) src.done = true;
+    },
+  };
+  return src;
+}
+
+// 개인전 / 대회 대국 기록 한 줄: ID, 시간, P1~P4, 삭제 버튼
+function renderGameRow(t, k, tr) {
+  const cells = tr.children;
+  cells[0].textContent = t.ids[k];
+  cells[1].textContent = formatKoreanTime(gameTimeAt(t, k));
+  gameRowCells(t, k, tr, 2);
+  cells[6].innerHTML = `<button type="button" data-delete-id="${t.ids[k]}">삭제</button>`;
+}
+
+// 줄마다 리스너를 다는 대신 tbody 에 하나만 단다
+function setupDeleteButtons(tbody, baseUrl, reload) {
+  tbody.addEventListener("click", async (e) => {
+    const btn = e.target.closest("button[data-delete-id]");
+    if (!btn) return;
+    if (!confirm("이 판을 삭제할까요?")) return;
+    try {
+      await fetchJSON(`${baseUrl}/${btn.dataset.deleteId}`, { method: "DELETE" });
+      await reload();
+    } catch (err) {
+      console.error(err);
+      alert("삭제 실패");
+    }
+  });
+}
+
+let GAMES_VIEW = null;
+let TOURNAMENT_GAMES_VIEW = null;
+let ARCHIVE_GAMES_VIEW = null;
+
+function setupGameTables() {
+  const gamesTbody = document.getElementById("games-tbody");
+  if (gamesTbody) {
+    GAMES_VIEW = new VirtualTable(gamesTbody, { cells: 7, emptyText: "대국 기록이 없습니다." });
+    setupDeleteButtons(gamesTbody, "/api/games", loadGamesAndRanking);
+  }
+
+  const tournamentTbody = document.getElementById("tournament-games-tbody");
+  if (tournamentTbody) {
+    TOURNAMENT_GAMES_VIEW = new VirtualTable(tournamentTbody, { cells: 7, emptyText: "대국 기록이 없습니다." });
+    setupDeleteButtons(tournamentTbody, "/api/tournament_games", loadTournamentGamesAndRanking);
+  }
+
+  const archiveTbody = document.getElementById("archive-games-tbody");
+  if (archiveTbody) {
+    ARCHIVE_GAMES_VIEW = new VirtualTable(archiveTbody, {
+      cells: 5,
+      emptyText: "이 아카이브에는 기록이 없습니다.",
+    });
+  }
+}
+
 // ===== 정렬 화살표(공용) =====
 function updateSortIndicatorsForTable(tableId, sortState) {
   const table = document.getElementById(tableId);
@@ -153,6 +727,7 @@ function updateSortIndicatorsForTable(tableId, sortState) {
 // ===== 메인 엔트리 =====
 document.addEventListener("DOMContentLoaded", () => {
   setupViewSwitch();
+  setupGameTables();
 
   setupPersonalForm();
   setupRankingSort(); // 개인레이팅(전체등수) 정렬
@@ -164,12 +739,25 @@ document.addEventListener("DOMContentLoaded", () => {
   setupArchiveRankingSort(); // 아카이브 전체등수 정렬
 
   setupTournamentForm();
+  setupTournamentSeating();
+
+  setupNameSuggestions();
 
   setupAdminView();
 
-  loadGamesAndRanking(); // 개인전 데이터 로드
-  reloadBadgeList();
-  reloadArchiveList();
+  // pt 계산에 쓰는 점수 규칙을 먼저 받고 데이터 로드.
+  // 기기에 저장된 것이 있으면 그것으로 바로 그리고, 서버와의 동기화는 그 다음에
+  updateSyncStatus();
+  const local = { localFirst: true };
+  loadScoringProfiles(local)
+    .then(() => Promise.all([
+      loadGamesAndRanking(local), // 개인전 데이터 로드
+      reloadBadgeList(local),
+      reloadArchiveList(local),
+    ]))
+    .then(syncWithServer);
+  setupBackgroundSync();
+  setupLiveUpdates();
 });
 
 // ======================= 상단 탭 전환 =======================
@@ -300,18 +888,15 @@ async function rebuildStatsPlayerList() {
     });
   });
 
-  // 2) 뱃지만 가진 플레이어도 포함
+  // 2) 뱃지만 가진 플레이어도 포함 (부여 목록 전체 대신 뱃지 보유자 이름만 받는다)
   try {
-    const allPB = await fetchJSON("/api/player_badges"); // ✅ GET 전체 목록 필요
-    (allPB || []).forEach((pb) => {
-      const n = (pb.player_name || "").toString().trim();
-      if (!n) return;
-      if (!map.has(n)) {
-        map.set(n, { name: n, games: 0, total_pt: 0 });
-      }
+    const holders = await fetchJSON("/api/player_badges/players");
+    (holders || []).forEach((name) => {
+      if (map.has(name)) return;
+      map.set(name, { name, games: 0, total_pt: 0 });
     });
   } catch (e) {
-    console.warn("Failed to load all player badges:", e);
+    console.warn("Failed to load badge holders:", e);
   }
 
   const all = Array.from(map.values());
@@ -338,6 +923,128 @@ async function rebuildStatsPlayerList() {
 
 
 
+// ======================= 플레이어 이름 자동완성 =======================
+async function searchPlayers(q, limit = 8) {
+  return fetchJSON(`/api/players/search?q=${encodeURIComponent(q)}&limit=${limit}`);
+}
+
+// input 아래에 검색 결과 목록을 띄운다. 자모/초성 매칭은 서버가 하므로 "ㄱㅁ" 도 "김민수" 를 찾는다
+function attachNameSuggest(input, onPick = null) {
+  if (!input || input.dataset.nameSuggest) return;
+  input.dataset.nameSuggest = "1";
+  input.setAttribute("autocomplete", "off");
+  input.parentNode.classList.add("has-name-suggest");
+
+  const box = document.createElement("ul");
+  box.className = "name-suggest";
+  box.style.display = "none";
+  input.insertAdjacentElement("afterend", box);
+
+  let items = [];
+  let active = -1;
+  let seq = 0;
+  let timer = null;
+
+  const hide = () => {
+    box.style.display = "none";
+    active = -1;
+  };
+
+  const pick = (name) => {
+    input.value = name;
+    hide();
+    if (onPick) onPick(name);
+  };
+
+  const highlight = () => {
+    Array.from(box.children).forEach((li, i) => li.classList.toggle("active", i === active));
+  };
+
+  const render = () => {
+    box.innerHTML = "";
+    if (!items.length) return hide();
+    items.forEach((p) => {
+      const li = document.createElement("li");
+      li.textContent = p.name;
+      const meta = document.createElement("span");
+      meta.className = "suggest-meta";
+      meta.textContent = p.games ? `${p.games}판` : "뱃지";
+      li.appendChild(meta);
+      // blur 보다 먼저 처리되도록 mousedown
+      li.addEventListener("mousedown", (e) => {
+        e.preventDefault();
+        pick(p.name);
+      });
+      box.appendChild(li);
+    });
+    box.style.left = `${input.offsetLeft}px`;
+    box.style.top = `${input.offsetTop + input.offsetHeight}px`;
+    box.style.display = "block";
+    active = -1;
+  };
+
+  input.addEventListener("input", () => {
+    clearTimeout(timer);
+    const q = input.value.trim();
+    if (!q) {
+      items = [];
+      return hide();
+    }
+    timer = setTimeout(async () => {
+      const mine = ++seq;
+      try {
+        const res = await searchPlayers(q);
+        if (mine !== seq) return; // 늦게 도착한 이전 검색 결과는 버린다
+        items = res || [];
+        render();
+      } catch (err) {
+        console.warn("Player search failed:", err);
+      }
+    }, 150);
+  });
+
+  input.addEventListener("keydown", (e) => {
+    if (box.style.display === "none") return;
+    if (e.key === "ArrowDown" || e.key === "ArrowUp") {
+      e.preventDefault();
+      const step = e.key === "ArrowDown" ? 1 : -1;
+      active = (active + step + items.length) % items.length;
+      highlight();
+    } else if (e.key === "Enter" && active >= 0) {
+      e.preventDefault();
+      pick(items[active].name);
+    } else if (e.key === "Escape") {
+      hide();
+    }
+  });
+
+  input.addEventListener("blur", hide);
+}
+
+function setupNameSuggestions() {
+  ["game-form", "tournament-game-form"].forEach((id) => {
+    const form = document.getElementById(id);
+    if (!form) return;
+    form.querySelectorAll('input[name$="_name"]').forEach((input) => attachNameSuggest(input));
+  });
+  attachNameSuggest(document.getElementById("admin-player-name"));
+  attachNameSuggest(document.getElementById("badge-assign-player"));
+
+  // 개인별 통계: 검색해서 고르면 바로 그 플레이어 통계를 연다
+  const statsSelect = document.getElementById("stats-player-select");
+  attachNameSuggest(document.getElementById("stats-player-search"), (name) => {
+    if (!statsSelect) return;
+    if (!Array.from(statsSelect.options).some((o) => o.value === name)) {
+      const opt = document.createElement("option");
+      opt.value = name;
+      opt.textContent = name;
+      statsSelect.appendChild(opt);
+    }
+    statsSelect.value = name;
+    renderStatsForPlayer(name);
+  });
+}
+
 // ======================= 개인 레이팅 화면 =======================
 function setupPersonalForm() {
   const form = document.getElementById("game-form");
@@ -363,8 +1070,9 @@ function setupPersonalForm() {
     }
 
     const total = s1 + s2 + s3 + s4;
-    if (total !== 100000) {
-      alert(`네 사람 점수 합이 100000이 아닙니다.\n현재 합: ${total}`);
+    const expected = profileFor("games").total_score;
+    if (total !== expected) {
+      alert(`네 사람 점수 합이 ${expected}이 아닙니다.\n현재 합: ${total}`);
       return;
     }
 
@@ -380,12 +1088,10 @@ function setupPersonalForm() {
     };
 
     try {
-      await fetchJSON("/api/games", {
-        method: "POST",
-        body: JSON.stringify(payload),
-      });
+      // 네트워크가 끊겨 있으면 기기에 보관했다가 연결되면 자동으로 보낸다
+      const result = await submitGame("/api/games", payload);
       form.reset();
-      await loadGamesAndRanking();
+      if (!result.queued) await loadGamesAndRanking();
     } catch (err) {
       console.error(err);
       alert("게임 저장에 실패했습니다.\n" + err.message);
@@ -393,136 +1099,100 @@ function setupPersonalForm() {
   });
 }
 
-async function loadGamesAndRanking() {
-  const tbody = document.getElementById("games-tbody");
-  const rankingBody = document.getElementById("ranking-tbody");
-  if (!tbody || !rankingBody) return;
-
-  let games = [];
-  try {
-    games = await fetchJSON("/api/games");
-  } catch (err) {
-    console.error(err);
-    return;
-  }
-
-  // ✅ 무조건 최신이 위로
-  games = (games || []).slice().sort((a, b) => (b.id || 0) - (a.id || 0));
+// ===== 순위표(서버 /api/standings) =====
+// 개인 레이팅 / 대회 순위표는 서버가 배정된 프로필로 미리 계산해 둔 것을 그린다.
+// 서버가 아직 계산 중(202)이거나 오프라인이면 워커 집계로 먼저 그려 두고, 받는 대로 바꿔 그린다.
+// 클라이언트 점수 계산(calcPts / 워커)은 대국 목록의 pt, 개인별 통계, 시즌 점수 같은 즉석 화면에만 쓴다.
+const STANDINGS_RETRY_MS = 1000;
+const STANDINGS_MAX_TRIES = 10;
+const STANDINGS_SEQ = {};   // target → 마지막 요청 번호(늦게 온 옛 응답은 버린다)
 
-  ALL_GAMES = games;
-
-  tbody.innerHTML = "";
-  const playerStats = {};
-
-  games.forEach((g) => {
-    const scores = [
-      Number(g.player1_score),
-      Number(g.player2_score),
-      Number(g.player3_score),
-      Number(g.player4_score),
-    ];
-    const names = [
-      g.player1_name,
-      g.player2_name,
-      g.player3_name,
-      g.player4_name,
-    ].map((n) => (n || "").trim());
-
-    const pts = calcPts(scores);
-
-    const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-    const ranks = [0, 0, 0, 0];
-    order.forEach((o, idx) => (ranks[o.i] = idx + 1));
-
-    const tr = document.createElement("tr");
-
-    tr.innerHTML = `
-      <td>${g.id}</td>
-      <td>${formatKoreanTime(g.created_at)}</td>
-      <td></td><td></td><td></td><td></td>
-      <td></td>
-    `;
+function standingsRow(s) {
+  const [c1, c2] = s.rank_counts;
+  return {
+    name: s.player_name,
+    games: s.games,
+    total_pt: s.pt_sum,
+    avg_pt: +(s.pt_sum / s.games).toFixed(1),
+    yonde_rate: +(((c1 + c2) * 100) / s.games).toFixed(1),
+    rankCounts: s.rank_counts,
+  };
+}
 
-    for (let i = 0; i < 4; i++) {
-      const td = tr.children[2 + i];
-      const name = names[i] || "";
-      const score = scores[i];
-      const pt = pts[i];
+async function loadStandings(target, render) {
+  const seq = (STANDINGS_SEQ[target] || 0) + 1;
+  STANDINGS_SEQ[target] = seq;
+  const url = `/api/standings?target=${encodeURIComponent(target)}`;
+  for (let i = 0; i < STANDINGS_MAX_TRIES; i++) {
+    let body;
+    try {
+      body = await fetchJSON(url);
+    } catch (err) {
+      console.warn("standings load failed:", target, err);
+      return;
+    }
+    if (STANDINGS_SEQ[target] !== seq) return;
+    if (body.standings) {
+      render(body.standings.map(standingsRow));
+      return;
+    }
+    await new Promise((resolve) => setTimeout(resolve, STANDINGS_RETRY_MS));
+  }
+}
 
-      td.innerHTML = `<strong>${name}</strong><br>${score} (${pt})`;
-      if (ranks[i] === 1) td.classList.add("winner-cell");
+const GAMES_URL = "/api/games?format=columnar";
+const TOURNAMENT_GAMES_URL = "/api/tournament_games?format=columnar";
 
-      if (!name) continue;
-      if (!playerStats[name]) {
-        playerStats[name] = { games: 0, total_pt: 0, rankCounts: [0, 0, 0, 0] };
-      }
-      playerStats[name].games += 1;
-      playerStats[name].total_pt += pt;
-      playerStats[name].rankCounts[ranks[i] - 1] += 1;
-    }
+async function loadGamesAndRanking(opts = {}) {
+  if (!GAMES_VIEW || !document.getElementById("ranking-tbody")) return;
 
-    const tdDel = tr.children[6];
-    const btn = document.createElement("button");
-    btn.textContent = "삭제";
-    btn.addEventListener("click", async () => {
-      if (!confirm("이 판을 삭제할까요?")) return;
-      try {
-        await fetchJSON(`/api/games/${g.id}`, { method: "DELETE" });
-        await loadGamesAndRanking();
-      } catch (err) {
-        console.error(err);
-        alert("삭제 실패");
-      }
-    });
-    tdDel.appendChild(btn);
+  try {
+    // pt 는 점수 규칙에 따라 달라지므로 profiles 가 바뀌어도 다시 그린다
+    await loadCached(GAMES_URL, ["games", "profiles"], showGamesAndRanking, opts);
+  } catch (err) {
+    console.error(err);
+  }
 
-    tbody.appendChild(tr);
-  });
+  // ✅ 대회 데이터 가져와서 시즌점수 계산 준비
+  try {
+    await loadCached(TOURNAMENT_GAMES_URL, ["tournament", "profiles"], showTournamentGames, opts);
+  } catch (e) {
+    console.warn("Failed to load tournament games:", e);
+  }
+}
 
-  // ===== PLAYER_SUMMARY 만들기 =====
-  const players = Object.entries(playerStats).map(([name, st]) => {
-    const games = st.games;
-    const total_pt_raw = st.total_pt;
-    const total_pt = +total_pt_raw.toFixed(1);
-    const avg_pt = games > 0 ? total_pt_raw / games : 0;
+async function showGamesAndRanking(payload) {
+  // 디코딩 / 순위·pt·플레이어별 집계는 워커에서
+  let loaded;
+  try {
+    loaded = await statsCall("load", { source: "games", payload, profile: profileFor("games") });
+  } catch (err) {
+    console.error(err);
+    return;
+  }
 
-    const c1 = st.rankCounts[0];
-    const c2 = st.rankCounts[1];
-    const yonde = games > 0 ? ((c1 + c2) * 100) / games : 0;
+  const t = loaded.table;
+  GAMES_TABLE = t;
 
-    return {
-      name,
-      games,
-      total_pt,
-      avg_pt: +avg_pt.toFixed(1),
-      yonde_rate: +yonde.toFixed(1),
-      rankCounts: st.rankCounts,
-    };
-  });
+  // ✅ 무조건 최신이 위로 (워커가 id 내림차순으로 정렬해 둠). 보이는 줄만 그린다
+  GAMES_VIEW.setSource(tableSource(t, renderGameRow));
 
   // ✅ 게임 기준 전체 플레이어(필터 전)
-  PLAYER_SUMMARY_ALL = players;
+  PLAYER_SUMMARY_ALL = loaded.summary;
 
-  // ✅ 개인 레이팅 표는 4판 이상만
-  PLAYER_SUMMARY = players.filter((p) => (p.games || 0) >= 4);
+  // ✅ 개인 레이팅 표는 4판 이상만. 서버 순위표가 오기 전까지는 워커 집계로
+  PLAYER_SUMMARY = PLAYER_SUMMARY_ALL.filter((p) => (p.games || 0) >= 4);
 
-   // ✅ 대회 데이터 가져와서 시즌점수 계산 준비
-  let tg = [];
-  try {
-    tg = await fetchJSON("/api/tournament_games");
-  } catch (e) {
-    console.warn("Failed to load tournament games:", e);
-    tg = [];
-  }
-  TOURNAMENT_GAMES = tg || [];
-  TOURNAMENT_STATS = buildTournamentStats(TOURNAMENT_GAMES);
+  // ✅ 현재 모드에 맞는 표를 렌더 (시즌 점수는 아카이브를 받아야 해서 전체 등수부터 먼저 그린다)
+  if (RANKING_VIEW_MODE !== "season") renderRankingTable();
+  loadStandings("games", (rows) => {
+    PLAYER_SUMMARY = rows.filter((p) => p.games >= 4);
+    if (RANKING_VIEW_MODE !== "season") renderRankingTable();
+  });
 
   // ✅ 시즌 점수 표 데이터 생성
-  SEASON_SUMMARY = await buildSeasonSummary(PLAYER_SUMMARY_ALL);
-
-  // ✅ 현재 모드에 맞는 표를 렌더
+  SEASON_SUMMARY = await statsCall("season", { playersAll: PLAYER_SUMMARY_ALL });
   if (RANKING_VIEW_MODE === "season") renderSeasonRankingTable();
-  else renderRankingTable();
 
   // (기존) 개인별 통계 셀렉트 갱신 등
   updateStatsPlayerSelect();
@@ -576,104 +1246,7 @@ function updateStatsPlayerSelect() {
 }
 
 
-function computePlayerDetailStats(playerName, games) {
-  let totalGames = 0;
-  let totalPt = 0;
-  const rankCounts = [0, 0, 0, 0];
-  const recent = [];
-  const coMap = {};
-
-  let tobiCount = 0;
-  let maxScore = null;
-
-  const gameRecords = [];
-
-  games.forEach((g) => {
-    const scores = [
-      Number(g.player1_score),
-      Number(g.player2_score),
-      Number(g.player3_score),
-      Number(g.player4_score),
-    ];
-    const names = [
-      g.player1_name,
-      g.player2_name,
-      g.player3_name,
-      g.player4_name,
-    ].map((n) => (n || "").trim());
-
-    const pts = calcPts(scores);
-    const idx = names.findIndex((n) => n === playerName);
-    if (idx === -1) return;
-
-    const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-    const ranks = [0, 0, 0, 0];
-    order.forEach((o, pos) => (ranks[o.i] = pos + 1));
-    const myRank = ranks[idx];
-
-    totalGames += 1;
-    totalPt += pts[idx];
-    rankCounts[myRank - 1] += 1;
-
-    if (scores[idx] < 0) tobiCount += 1;
-    if (maxScore === null || scores[idx] > maxScore) maxScore = scores[idx];
-
-    recent.push({ created_at: g.created_at, rank: myRank });
-
-    for (let j = 0; j < 4; j++) {
-      if (j === idx) continue;
-      const cname = (names[j] || "").trim();
-      if (!cname) continue;
-      if (!coMap[cname]) coMap[cname] = { games: 0, my_rank_sum: 0, co_rank_sum: 0 };
-      coMap[cname].games += 1;
-      coMap[cname].my_rank_sum += myRank;
-      coMap[cname].co_rank_sum += ranks[j];
-    }
-
-    gameRecords.push({
-      id: g.id,
-      created_at: g.created_at,
-      names,
-      scores,
-      pts,
-      ranks,
-      myIndex: idx,
-    });
-  });
-
-  const yonde = totalGames > 0 ? ((rankCounts[0] + rankCounts[1]) * 100.0) / totalGames : 0;
-  const tobiRate = totalGames > 0 ? (tobiCount * 100.0) / totalGames : 0;
-
-  const coPlayers = Object.entries(coMap)
-    .map(([name, st]) => ({
-      name,
-      games: st.games,
-      my_avg_rank: st.my_rank_sum / st.games,
-      co_avg_rank: st.co_rank_sum / st.games,
-    }))
-    .sort((a, b) => b.games - a.games || String(a.name).localeCompare(String(b.name), "ko"));
-
-  // ✅ 최근 그래프는 “오래된 → 최신”이 보기 좋게
-  recent.reverse();
-
-  // ✅ 개인 대국기록은 최신이 위로 보고싶다면 reverse 하지 말고(이미 최신이 위), 그대로 둔다
-  // gameRecords는 games 순서(최신이 위)로 들어오니 그대로면 최신이 위.
-
-  return {
-    games: totalGames,
-    total_pt: totalPt,
-    rankCounts,
-    yonde_rate: yonde,
-    recent,
-    coPlayers,
-    tobi_count: tobiCount,
-    tobi_rate: tobiRate,
-    max_score: maxScore ?? 0,
-    gameRecords,
-  };
-}
-
-function renderStatsForPlayer(name) {
+async function renderStatsForPlayer(name) {
   const summaryDiv = document.getElementById("stats-summary");
   const distDiv = document.getElementById("stats-rank-dist");
   const recentDiv = document.getElementById("stats-recent-ranks");
@@ -691,11 +1264,21 @@ function renderStatsForPlayer(name) {
       playerGamesTbody.innerHTML =
         '<tr><td colspan="5" class="ranking-placeholder">플레이어를 선택하면 기록이 표시됩니다.</td></tr>';
     }
-    loadPlayerBadgesForStats("");
+    loadPlayerProfileForStats("");
     return;
   }
 
-  const detail = computePlayerDetailStats(name, ALL_GAMES);
+  let detail;
+  try {
+    detail = await statsCall("player", { source: "games", name });
+  } catch (err) {
+    console.error(err);
+    summaryDiv.innerHTML = '<p class="hint-text">플레이어 통계를 계산하지 못했습니다.</p>';
+    return;
+  }
+  // 계산하는 사이 다른 플레이어를 골랐으면 버린다
+  if (document.getElementById("stats-player-select")?.value !== name) return;
+  const t = GAMES_TABLE;
 
   summaryDiv.innerHTML = `
     <div class="stats-summary-main">
@@ -764,53 +1347,62 @@ function renderStatsForPlayer(name) {
   // --- 개인 대국 기록 (해당 플레이어 참가판만) ---
   if (playerGamesTbody) {
     playerGamesTbody.innerHTML = "";
-    if (!detail.gameRecords.length) {
+    if (!detail.gameRows.length) {
       playerGamesTbody.innerHTML =
         '<tr><td colspan="5" class="ranking-placeholder">대국 기록이 없습니다.</td></tr>';
     } else {
-      detail.gameRecords.forEach((rec) => {
+      const frag = document.createDocumentFragment();
+      detail.gameRows.forEach((k, j) => {
         const tr = document.createElement("tr");
         const tdTime = document.createElement("td");
-        tdTime.textContent = formatKoreanTime(rec.created_at);
+        tdTime.textContent = formatKoreanTime(gameTimeAt(t, k));
         tr.appendChild(tdTime);
 
         for (let i = 0; i < 4; i++) {
+          const s = 4 * k + i;
           const td = document.createElement("td");
-          const n = rec.names[i] || "";
-          const score = rec.scores[i];
-          const pt = rec.pts[i];
-          const r = rec.ranks[i];
-
-          td.innerHTML = `<strong>${n}</strong><br>${score} (${pt.toFixed(1)} / ${r}등)`;
-          if (i === rec.myIndex) td.classList.add("my-player-cell");
+          td.innerHTML = `<strong>${t.strings[t.names[s]] || ""}</strong><br>${t.scores[s]} (${t.pts[s].toFixed(1)} / ${t.ranks[s]}등)`;
+          if (i === detail.myIndex[j]) td.classList.add("my-player-cell");
           tr.appendChild(td);
         }
-        playerGamesTbody.appendChild(tr);
+        frag.appendChild(tr);
       });
+      playerGamesTbody.appendChild(frag);
     }
   }
 
-  loadPlayerBadgesForStats(name);
+  loadPlayerProfileForStats(name);
 }
 
-async function loadPlayerBadgesForStats(name) {
+// 통산 기록 + 보유 뱃지를 /api/players/<이름>/profile 한 번으로 받는다
+async function loadPlayerProfileForStats(name) {
   const container = document.getElementById("stats-badges");
+  const careerDiv = document.getElementById("stats-career");
   if (!container) return;
 
   container.innerHTML = "";
   if (!name) {
     container.innerHTML = '<p class="hint-text">플레이어를 선택하면 보유 뱃지가 표시됩니다.</p>';
+    if (careerDiv) {
+      careerDiv.innerHTML = '<p class="hint-text">플레이어를 선택하면 지난 시즌까지 합친 기록이 표시됩니다.</p>';
+    }
     return;
   }
 
-  let badges = [];
+  let profile;
   try {
-    badges = await fetchJSON(`/api/player_badges/by_player/${encodeURIComponent(name)}`);
+    profile = await fetchJSON(`/api/players/${encodeURIComponent(name)}/profile`);
   } catch (err) {
     console.error(err);
     container.innerHTML = '<p class="hint-text">뱃지 정보를 불러오지 못했습니다.</p>';
+    if (careerDiv) careerDiv.innerHTML = '<p class="hint-text">통산 기록을 불러오지 못했습니다.</p>';
     return;
   }
+  // 받는 사이 다른 플레이어를 골랐으면 버린다
+  if (document.getElementById("stats-player-select")?.value !== name) return;
+
+  if (careerDiv) renderCareerSummary(careerDiv, profile.career);
+  const badges = profile.badges;
 
   if (!badges || !badges.length) {
     container.innerHTML = '<p class="hint-text">보유한 뱃지가 없습니다.</p>';
@@ -843,6 +1435,25 @@ async function loadPlayerBadgesForStats(name) {
   container.appendChild(list);
 }
 
+function renderCareerSummary(div, career) {
+  if (!career || !career.games) {
+    div.innerHTML = '<p class="hint-text">대국 기록이 없습니다.</p>';
+    return;
+  }
+  const topRate = ((career.rank_counts[0] + career.rank_counts[1]) * 100) / career.games;
+  div.innerHTML = `
+    <div class="stats-summary-main">
+      <div><span class="stats-label">시즌</span> <span class="stats-value">${career.seasons.length}</span></div>
+      <div><span class="stats-label">게임 수</span> <span class="stats-value">${career.games}</span></div>
+      <div><span class="stats-label">총 pt</span> <span class="stats-value">${career.pt_sum.toFixed(1)}</span></div>
+      <div><span class="stats-label">평균 등수</span> <span class="stats-value">${career.avg_rank.toFixed(2)}</span></div>
+      <div><span class="stats-label">연대율</span> <span class="stats-value">${topRate.toFixed(1)}%</span></div>
+      <div><span class="stats-label">토비</span> <span class="stats-value">${career.tobi}회</span></div>
+      <div><span class="stats-label">최다 점수</span> <span class="stats-value">${career.max_score}</span></div>
+    </div>
+  `;
+}
+
 // ======================= 아카이브 화면 =======================
 function setupArchiveView() {
   const archiveSelect = document.getElementById("archive-select");
@@ -940,17 +1551,19 @@ function updateArchivePlayerSelect() {
   }
 }
 
-async function reloadArchiveList() {
-  const tbody = document.getElementById("archive-list-tbody");
-  const archiveSelect = document.getElementById("archive-select");
-
-  let archives = [];
+async function reloadArchiveList(opts = {}) {
   try {
-    archives = await fetchJSON("/api/archives");
+    await loadCached("/api/archives", ["archives"], showArchiveList, opts);
   } catch (err) {
     console.error(err);
-    archives = [];
+    await showArchiveList([]);
   }
+}
+
+async function showArchiveList(archives) {
+  const tbody = document.getElementById("archive-list-tbody");
+  const archiveSelect = document.getElementById("archive-select");
+
   ARCHIVES = archives || [];
 
   // 관리자 화면: 아카이브 목록
@@ -1012,132 +1625,75 @@ async function reloadArchiveList() {
   }
 }
 
+// 아카이브 대국 기록 한 줄: 시간, P1~P4
+function renderArchiveGameRow(g, tr) {
+  const scores = [
+    Number(g.player1_score),
+    Number(g.player2_score),
+    Number(g.player3_score),
+    Number(g.player4_score),
+  ];
+  const names = [
+    g.player1_name,
+    g.player2_name,
+    g.player3_name,
+    g.player4_name,
+  ].map((n) => (n || "").trim());
+  const pts = calcPts(scores, CURRENT_ARCHIVE_PROFILE);
+
+  const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
+  const ranks = [0, 0, 0, 0];
+  order.forEach((o, idx) => (ranks[o.i] = idx + 1));
+
+  tr.children[0].textContent = formatKoreanTime(g.created_at);
+  for (let i = 0; i < 4; i++) {
+    const td = tr.children[1 + i];
+    td.innerHTML = `<strong>${names[i] || ""}</strong><br>${scores[i]} (${pts[i]})`;
+    if (ranks[i] === 1) td.classList.add("winner-cell");
+  }
+}
+
 async function loadArchiveGames(archiveId) {
-  const gamesTbody = document.getElementById("archive-games-tbody");
   const rankingTbody = document.getElementById("archive-ranking-tbody");
 
-  CURRENT_ARCHIVE_GAMES = [];
+  CURRENT_ARCHIVE_PROFILE = profileFor(`archive:${archiveId}`);
   ARCHIVE_PLAYER_SUMMARY = [];
 
-  if (!gamesTbody || !rankingTbody) return;
+  if (!ARCHIVE_GAMES_VIEW || !rankingTbody) return;
 
   if (!archiveId) {
-    gamesTbody.innerHTML =
-      '<tr><td colspan="5" class="ranking-placeholder">아카이브를 선택하세요.</td></tr>';
+    ARCHIVE_GAMES_VIEW.showMessage("아카이브를 선택하세요.");
     rankingTbody.innerHTML =
       '<tr><td colspan="7" class="ranking-placeholder">아카이브를 선택하세요.</td></tr>';
     updateArchivePlayerSelect();
     return;
   }
 
-  let games = [];
+  // ---- (왼쪽) 아카이브 대국 기록: 최신부터 스크롤에 맞춰 페이지 단위로 받아 온다 ----
+  ARCHIVE_GAMES_VIEW.setSource(pagedSource(`/api/archives/${archiveId}/games`, renderArchiveGameRow), true);
+
+  let standings = [];
   try {
-    games = await fetchJSON(`/api/archives/${archiveId}/games`);
+    // 순위표는 가져올 때 서버에서 계산해 둔 것(/standings)을 그대로 쓴다
+    standings = (await fetchJSON(`/api/archives/${archiveId}/standings`)).standings || [];
   } catch (err) {
     console.error(err);
-    gamesTbody.innerHTML =
-      '<tr><td colspan="5" class="ranking-placeholder">아카이브 데이터를 불러오지 못했습니다.</td></tr>';
     rankingTbody.innerHTML =
       '<tr><td colspan="7" class="ranking-placeholder">아카이브 데이터를 불러오지 못했습니다.</td></tr>';
     updateArchivePlayerSelect();
     return;
   }
 
-  // 최신이 위로
-  games = (games || []).slice().sort((a, b) => (b.id || 0) - (a.id || 0));
-  CURRENT_ARCHIVE_GAMES = games;
-
-  // ---- (왼쪽) 아카이브 대국 기록 ----
-  gamesTbody.innerHTML = "";
-  if (!CURRENT_ARCHIVE_GAMES.length) {
-    gamesTbody.innerHTML =
-      '<tr><td colspan="5" class="ranking-placeholder">이 아카이브에는 기록이 없습니다.</td></tr>';
-  } else {
-    CURRENT_ARCHIVE_GAMES.forEach((g) => {
-      const scores = [
-        Number(g.player1_score),
-        Number(g.player2_score),
-        Number(g.player3_score),
-        Number(g.player4_score),
-      ];
-      const names = [
-        g.player1_name,
-        g.player2_name,
-        g.player3_name,
-        g.player4_name,
-      ].map((n) => (n || "").trim());
-      const pts = calcPts(scores);
-
-      const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-      const ranks = [0, 0, 0, 0];
-      order.forEach((o, idx) => (ranks[o.i] = idx + 1));
-
-      const tr = document.createElement("tr");
-      tr.innerHTML = `<td>${formatKoreanTime(g.created_at)}</td><td></td><td></td><td></td><td></td>`;
-
-      for (let i = 0; i < 4; i++) {
-        const td = tr.children[1 + i];
-        const name = names[i] || "";
-        const score = scores[i];
-        const pt = pts[i];
-        td.innerHTML = `<strong>${name}</strong><br>${score} (${pt})`;
-        if (ranks[i] === 1) td.classList.add("winner-cell");
-      }
-
-      gamesTbody.appendChild(tr);
-    });
-  }
-
   // ---- (오른쪽) 전체 등수 ----
-  const playerStats = {};
-  CURRENT_ARCHIVE_GAMES.forEach((g) => {
-    const scores = [
-      Number(g.player1_score),
-      Number(g.player2_score),
-      Number(g.player3_score),
-      Number(g.player4_score),
-    ];
-    const names = [
-      g.player1_name,
-      g.player2_name,
-      g.player3_name,
-      g.player4_name,
-    ].map((n) => (n || "").trim());
-    const pts = calcPts(scores);
-
-    const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-    const ranks = [0, 0, 0, 0];
-    order.forEach((o, idx) => (ranks[o.i] = idx + 1));
-
-    for (let i = 0; i < 4; i++) {
-      const name = names[i];
-      if (!name) continue;
-      if (!playerStats[name]) {
-        playerStats[name] = { games: 0, total_pt: 0, rankCounts: [0, 0, 0, 0] };
-      }
-      playerStats[name].games += 1;
-      playerStats[name].total_pt += pts[i];
-      playerStats[name].rankCounts[ranks[i] - 1] += 1;
-    }
-  });
-
-  const players = Object.entries(playerStats).map(([name, st]) => {
-    const games = st.games;
-    const total_pt_raw = st.total_pt;
-    const total_pt = +total_pt_raw.toFixed(1);
-    const avg_pt = games > 0 ? total_pt_raw / games : 0;
-
-    const c1 = st.rankCounts[0];
-    const c2 = st.rankCounts[1];
-    const yonde = games > 0 ? ((c1 + c2) * 100) / games : 0;
-
+  const players = standings.map((p) => {
+    const [c1, c2] = p.rank_counts;
     return {
-      name,
-      games,
-      total_pt,
-      avg_pt: +avg_pt.toFixed(1),
-      yonde_rate: +yonde.toFixed(1),
-      rankCounts: st.rankCounts,
+      name: p.player_name,
+      games: p.games,
+      total_pt: p.pt_sum,
+      avg_pt: +(p.pt_sum / p.games).toFixed(1),
+      yonde_rate: +(((c1 + c2) * 100) / p.games).toFixed(1),
+      rankCounts: p.rank_counts,
     };
   });
 
@@ -1150,7 +1706,7 @@ async function loadArchiveGames(archiveId) {
   updateArchivePlayerSelect();
 }
 
-function renderArchiveStatsForPlayer(name) {
+async function renderArchiveStatsForPlayer(name) {
   const summaryDiv = document.getElementById("archive-stats-summary");
   const distDiv = document.getElementById("archive-stats-rank-dist");
   const recentDiv = document.getElementById("archive-stats-recent-ranks");
@@ -1165,7 +1721,34 @@ function renderArchiveStatsForPlayer(name) {
     return;
   }
 
-  const detail = computePlayerDetailStats(name, CURRENT_ARCHIVE_GAMES);
+  const archiveId = document.getElementById("archive-select")?.value;
+  let p;
+  try {
+    p = await fetchJSON(`/api/archives/${archiveId}/players/${encodeURIComponent(name)}`);
+  } catch (err) {
+    console.error(err);
+    summaryDiv.innerHTML = '<p class="hint-text">플레이어 통계를 불러오지 못했습니다.</p>';
+    return;
+  }
+  // 그 사이 다른 플레이어를 골랐으면 버린다
+  if (document.getElementById("archive-player-select")?.value !== name) return;
+
+  const detail = {
+    games: p.games,
+    total_pt: p.pt_sum,
+    rankCounts: p.rank_counts,
+    yonde_rate: ((p.rank_counts[0] + p.rank_counts[1]) * 100) / p.games,
+    tobi_count: p.tobi,
+    tobi_rate: (p.tobi * 100) / p.games,
+    max_score: p.max_score,
+    recent: p.recent,
+    coPlayers: p.co_players.map((c) => ({
+      name: c.player_name,
+      games: c.games,
+      my_avg_rank: c.avg_rank,
+      co_avg_rank: c.their_avg_rank,
+    })),
+  };
 
   summaryDiv.innerHTML = `
     <div class="stats-summary-main">
@@ -1257,8 +1840,9 @@ function setupTournamentForm() {
     }
 
     const total = s1 + s2 + s3 + s4;
-    if (total !== 100000) {
-      alert(`네 사람 점수 합이 100000이 아닙니다.\n현재 합: ${total}`);
+    const expected = profileFor("tournament").total_score;
+    if (total !== expected) {
+      alert(`네 사람 점수 합이 ${expected}이 아닙니다.\n현재 합: ${total}`);
       return;
     }
 
@@ -1274,12 +1858,10 @@ function setupTournamentForm() {
     };
 
     try {
-      await fetchJSON("/api/tournament_games", {
-        method: "POST",
-        body: JSON.stringify(payload),
-      });
+      // 네트워크가 끊겨 있으면 기기에 보관했다가 연결되면 자동으로 보낸다
+      const result = await submitGame("/api/tournament_games", payload);
       form.reset();
-      await loadTournamentGamesAndRanking();
+      if (!result.queued) await loadTournamentGamesAndRanking();
     } catch (err) {
       console.error(err);
       alert("대회 기록 저장에 실패했습니다.\n" + err.message);
@@ -1287,102 +1869,43 @@ function setupTournamentForm() {
   });
 }
 
-async function loadTournamentGamesAndRanking() {
-  const tbody = document.getElementById("tournament-games-tbody");
+async function loadTournamentGamesAndRanking(opts = {}) {
+  try {
+    await loadCached(TOURNAMENT_GAMES_URL, ["tournament", "profiles"], showTournamentGames, opts);
+  } catch (err) {
+    console.error(err);
+  }
+  loadTournamentRounds(); // 결과가 들어온 탁 표시 갱신
+}
+
+async function showTournamentGames(payload) {
   const rankingBody = document.getElementById("tournament-ranking-tbody");
-  if (!tbody || !rankingBody) return;
+  if (!TOURNAMENT_GAMES_VIEW || !rankingBody) return;
 
-  let games = [];
+  let loaded;
   try {
-    games = await fetchJSON("/api/tournament_games");
+    loaded = await statsCall("load", { source: "tournament", payload, profile: profileFor("tournament") });
   } catch (err) {
     console.error(err);
     return;
   }
 
-  games = (games || []).slice().sort((a, b) => (b.id || 0) - (a.id || 0));
-  TOURNAMENT_GAMES = games;
-
-  tbody.innerHTML = "";
-  const playerStats = {};
-
-  games.forEach((g) => {
-    const scores = [
-      Number(g.player1_score),
-      Number(g.player2_score),
-      Number(g.player3_score),
-      Number(g.player4_score),
-    ];
-    const names = [
-      g.player1_name,
-      g.player2_name,
-      g.player3_name,
-      g.player4_name,
-    ].map((n) => (n || "").trim());
-
-    const pts = calcPts(scores);
-
-    const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-    const ranks = [0, 0, 0, 0];
-    order.forEach((o, idx) => (ranks[o.i] = idx + 1));
-
-    const tr = document.createElement("tr");
-    tr.innerHTML = `
-      <td>${g.id}</td>
-      <td>${formatKoreanTime(g.created_at)}</td>
-      <td></td><td></td><td></td><td></td>
-      <td></td>
-    `;
+  const t = loaded.table;
+  TOURNAMENT_TABLE = t;
+  TOURNAMENT_STATS = loaded.stats;
 
-    for (let i = 0; i < 4; i++) {
-      const td = tr.children[2 + i];
-      const name = names[i] || "";
-      const score = scores[i];
-      const pt = pts[i];
-      td.innerHTML = `<strong>${name}</strong><br>${score} (${pt})`;
-      if (ranks[i] === 1) td.classList.add("winner-cell");
-
-      if (!name) continue;
-      if (!playerStats[name]) playerStats[name] = { games: 0, total_pt: 0, rankCounts: [0, 0, 0, 0] };
-      playerStats[name].games += 1;
-      playerStats[name].total_pt += pt;
-      playerStats[name].rankCounts[ranks[i] - 1] += 1;
-    }
+  TOURNAMENT_GAMES_VIEW.setSource(tableSource(t, renderGameRow));
 
-    const tdDel = tr.children[6];
-    const btn = document.createElement("button");
-    btn.textContent = "삭제";
-    btn.addEventListener("click", async () => {
-      if (!confirm("이 판을 삭제할까요?")) return;
-      try {
-        await fetchJSON(`/api/tournament_games/${g.id}`, { method: "DELETE" });
-        await loadTournamentGamesAndRanking();
-      } catch (err) {
-        console.error(err);
-        alert("삭제 실패");
-      }
-    });
-    tdDel.appendChild(btn);
+  // 서버 순위표가 오기 전까지는 워커 집계로
+  renderTournamentRanking([...loaded.summary].sort((a, b) => b.total_pt - a.total_pt));
+  loadStandings("tournament", renderTournamentRanking);
+}
 
-    tbody.appendChild(tr);
-  });
+function renderTournamentRanking(players) {
+  const rankingBody = document.getElementById("tournament-ranking-tbody");
+  if (!rankingBody) return;
 
   rankingBody.innerHTML = "";
-  const players = Object.entries(playerStats).map(([name, st]) => {
-    const games = st.games;
-    const total_pt_raw = st.total_pt;
-    const total_pt = +total_pt_raw.toFixed(1);
-    const avg_pt = games > 0 ? +(total_pt_raw / games).toFixed(1) : 0.0;
-
-    const c1 = st.rankCounts[0];
-    const c2 = st.rankCounts[1];
-    const yonde = games > 0 ? +(((c1 + c2) * 100) / games).toFixed(1) : 0.0;
-
-    return { name, games, total_pt, avg_pt, yonde_rate: yonde, rankCounts: st.rankCounts };
-  });
-
-  players.sort((a, b) => b.total_pt - a.total_pt);
-
   if (!players.length) {
     rankingBody.innerHTML = `<tr><td colspan="7" class="ranking-placeholder">통계 없음</td></tr>`;
     return;
@@ -1404,6 +1927,136 @@ async function loadTournamentGamesAndRanking() {
   });
 }
 
+// ======================= 대회 라운드 자리 배정 =======================
+const SEAT_WINDS = ["동", "남", "서", "북"];
+
+function seatingRequestBody() {
+  const body = {
+    mode: document.getElementById("seating-mode").value,
+    rounds: Number(document.getElementById("seating-rounds").value) || 1,
+  };
+  const players = document.getElementById("seating-players").value
+    .split("\n")
+    .map((n) => n.trim())
+    .filter(Boolean);
+  if (players.length) body.players = players; // 비우면 서버가 지난 라운드 참가자 사용
+  return body;
+}
+
+// rounds: [{ round, tables: [[동,남,서,북]] | [{ table, players, game_id }] }]
+function renderSeatingRounds(container, rounds, onFill) {
+  container.innerHTML = "";
+  rounds.forEach((r) => {
+    const box = document.createElement("div");
+    box.className = "seating-round";
+    const title = document.createElement("h3");
+    title.textContent = `${r.round} 라운드`;
+    box.appendChild(title);
+
+    const table = document.createElement("table");
+    table.className = "games-table";
+    table.innerHTML = `<thead><tr><th>탁</th>${SEAT_WINDS.map((w) => `<th>${w}</th>`).join("")}<th></th></tr></thead>`;
+    const tbody = document.createElement("tbody");
+
+    r.tables.forEach((t, idx) => {
+      const players = Array.isArray(t) ? t : t.players;
+      const tr = document.createElement("tr");
+      [String(Array.isArray(t) ? idx + 1 : t.table), ...players].forEach((text) => {
+        const td = document.createElement("td");
+        td.textContent = text;
+        tr.appendChild(td);
+      });
+
+      const tdAct = document.createElement("td");
+      if (!Array.isArray(t) && t.game_id) {
+        tr.classList.add("seating-done");
+        tdAct.textContent = `#${t.game_id}`;
+      } else if (onFill) {
+        const btn = document.createElement("button");
+        btn.type = "button";
+        btn.textContent = "입력";
+        btn.addEventListener("click", () => onFill(players));
+        tdAct.appendChild(btn);
+      }
+      tr.appendChild(tdAct);
+      tbody.appendChild(tr);
+    });
+
+    table.appendChild(tbody);
+    box.appendChild(table);
+    container.appendChild(box);
+  });
+}
+
+// 발표된 탁을 대회 기록 입력 폼에 자리 순서대로 채운다
+function fillTournamentForm(players) {
+  const form = document.getElementById("tournament-game-form");
+  if (!form) return;
+  players.forEach((name, i) => {
+    form.elements[`player${i + 1}_name`].value = name;
+  });
+  form.elements.player1_score.focus();
+}
+
+async function loadTournamentRounds() {
+  const current = document.getElementById("seating-current");
+  if (!current) return;
+
+  let rounds = [];
+  try {
+    rounds = await fetchJSON("/api/tournament/rounds");
+  } catch (err) {
+    console.warn("Failed to load tournament rounds:", err);
+    return;
+  }
+  // 마지막으로 발표된 라운드만 보여준다
+  renderSeatingRounds(current, (rounds || []).slice(-1), fillTournamentForm);
+}
+
+function setupTournamentSeating() {
+  const previewBtn = document.getElementById("seating-preview-btn");
+  const publishBtn = document.getElementById("seating-publish-btn");
+  const preview = document.getElementById("seating-preview");
+  if (!previewBtn || !publishBtn || !preview) return;
+
+  previewBtn.addEventListener("click", async () => {
+    try {
+      SEATING_PREVIEW = await fetchJSON("/api/tournament/schedule", {
+        method: "POST",
+        body: JSON.stringify(seatingRequestBody()),
+      });
+    } catch (err) {
+      console.error(err);
+      alert("자리 배정에 실패했습니다.\n" + err.message);
+      return;
+    }
+    renderSeatingRounds(preview, SEATING_PREVIEW.rounds, null);
+    const st = SEATING_PREVIEW.stats;
+    const info = document.createElement("div");
+    info.className = "seating-stats";
+    info.textContent = `중복 만남 ${st.repeat_pairs}쌍 · 최대 만남 ${st.max_meetings}회 · 자리 편차 ${st.seat_spread}`;
+    preview.appendChild(info);
+  });
+
+  publishBtn.addEventListener("click", async () => {
+    // 미리보기가 있으면 그 첫 라운드를 그대로 발표, 없으면 서버에서 바로 한 라운드를 짠다
+    const body = SEATING_PREVIEW
+      ? { tables: SEATING_PREVIEW.rounds[0].tables, mode: SEATING_PREVIEW.mode }
+      : { ...seatingRequestBody(), rounds: 1 };
+    if (!confirm("다음 라운드를 발표할까요?")) return;
+    try {
+      await fetchJSON("/api/tournament/rounds", { method: "POST", body: JSON.stringify(body) });
+    } catch (err) {
+      console.error(err);
+      alert("라운드 발표에 실패했습니다.\n" + err.message);
+      return;
+    }
+    SEATING_PREVIEW = null;
+    preview.innerHTML = "";
+    await loadTournamentRounds();
+  });
+}
+
 // ======================= 관리자 화면 (뱃지 / 아카이브 / 초기화) =======================
 function setupAdminView() {
   // 뱃지 생성
@@ -1464,7 +2117,7 @@ function setupAdminView() {
 
         const statsSelect = document.getElementById("stats-player-select");
         if (statsSelect && statsSelect.value === player) {
-          await loadPlayerBadgesForStats(player);
+          await loadPlayerProfileForStats(player);
         }
         await rebuildStatsPlayerList();
         
@@ -1475,6 +2128,27 @@ function setupAdminView() {
     });
   }
 
+  // 전체 복원
+  const restoreForm = document.getElementById("restore-form");
+  if (restoreForm) {
+    restoreForm.addEventListener("submit", async (e) => {
+      e.preventDefault();
+      const ok = confirm("현재 데이터를 모두 백업 파일 내용으로 바꿀까요?\n이 작업은 되돌릴 수 없습니다.");
+      if (!ok) return;
+
+      try {
+        const res = await fetch(appUrl("/api/admin/restore"), { method: "POST", body: new FormData(restoreForm) });
+        const d = await res.json().catch(() => null);
+        if (!res.ok) throw new Error(`HTTP ${res.status}${d && d.error ? ` - ${d.error}` : ""}`);
+        alert("복원했습니다.");
+        location.reload();
+      } catch (err) {
+        console.error(err);
+        alert("복원 실패: " + err.message);
+      }
+    });
+  }
+
   // 개인전 기록 초기화
   const resetBtn = document.getElementById("reset-games-btn");
   if (resetBtn) {
@@ -1495,19 +2169,19 @@ function setupAdminView() {
   }
 }
 
-async function reloadBadgeList() {
-  const tbody = document.getElementById("badge-list-tbody");
-  const select = document.getElementById("badge-assign-code");
-  if (!tbody && !select) return;
-
-  let badges = [];
+async function reloadBadgeList(opts = {}) {
   try {
-    badges = await fetchJSON("/api/badges");
+    await loadCached("/api/badges", ["badges"], showBadgeList, opts);
   } catch (err) {
     console.error(err);
-    return;
   }
+}
+
+function showBadgeList(badges) {
+  const tbody = document.getElementById("badge-list-tbody");
+  const select = document.getElementById("badge-assign-code");
   ALL_BADGES = badges || [];
+  if (!tbody && !select) return;
 
   if (tbody) {
     tbody.innerHTML = "";
@@ -1609,7 +2283,7 @@ async function loadAdminPlayerBadges(name) {
 
         const statsSelect = document.getElementById("stats-player-select");
         if (statsSelect && statsSelect.value === name) {
-          await loadPlayerBadgesForStats(name);
+          await loadPlayerProfileForStats(name);
         }
         await rebuildStatsPlayerList();
 
@@ -1674,117 +2348,12 @@ async function setRankingViewMode(mode) {
     renderRankingTable();
   } else {
     // 시즌 점수는(아카이브 fetch가 필요하니) 확실히 최신으로
-    SEASON_SUMMARY = await buildSeasonSummary(PLAYER_SUMMARY_ALL || []);
+    SEASON_SUMMARY = await statsCall("season", { playersAll: PLAYER_SUMMARY_ALL || [] });
     renderSeasonRankingTable();
   }
 }
 
 
-// ===== 시즌 점수 구성요소 계산 =====
-function calcSeasonComponents({ totalPt = 0, games = 0, tourGames = 0, tourSumPosPt = 0 }) {
-  const PI_APPROX = 3.14;
-
-  // [ 500 * (2/3.14) * atan(totalPt/250) ]
-  const totalPtScore = 500 * (2 / PI_APPROX) * Math.atan((Number(totalPt) || 0) / 250);
-
-  // [ 200 * (1 - 0.95^games) ]
-  const gamesScore = 200 * (1 - Math.pow(0.95, Number(games) || 0));
-
-  // [ min(tourGames,3)*50 + 150*(1 - 0.995^(sum max(tourPt,0))) ]
-  const tCnt = Math.min(Number(tourGames) || 0, 3);
-  const tSum = Math.max(Number(tourSumPosPt) || 0, 0);
-  const tournamentScore = (tCnt * 50) + 150 * (1 - Math.pow(0.995, tSum));
-
-  const seasonScore = totalPtScore + gamesScore + tournamentScore;
-
-  return {
-    totalPtScore,
-    gamesScore,
-    tournamentScore,
-    seasonScore,
-  };
-}
-
-// ===== 대회 데이터로 플레이어별 (참가 횟수, 양수 pt 합) 만들기 =====
-function buildTournamentStats(tournamentGames) {
-  const stats = {};
-  (tournamentGames || []).forEach((g) => {
-    const scores = [
-      Number(g.player1_score),
-      Number(g.player2_score),
-      Number(g.player3_score),
-      Number(g.player4_score),
-    ];
-    const names = [
-      g.player1_name,
-      g.player2_name,
-      g.player3_name,
-      g.player4_name,
-    ].map((n) => (n || "").trim());
-
-    const pts = calcPts(scores);
-
-    for (let i = 0; i < 4; i++) {
-      const name = names[i];
-      if (!name) continue;
-      if (!stats[name]) stats[name] = { games: 0, sumPosPt: 0 };
-      stats[name].games += 1;
-      if (pts[i] > 0) stats[name].sumPosPt += pts[i];
-    }
-  });
-  return stats;
-}
-
-// ===== 시즌 점수 표 데이터 만들기 (아카이브 기반) =====
-async function buildSeasonSummary(playersAll) {
-  // ✅ 시즌(1~6월) 먼슬리 대회 아카이브 기준 참가/ptSum 로드
-  const seasonT = await loadSeasonTournamentStatsFromArchives(); // { [name]: { joinCount, ptSum } }
-
-  const list = (playersAll || []).map((p) => {
-    const totalPt = Number(p.total_pt || 0);
-    const games = Number(p.games || 0);
-
-    // ✅ 대회: "참가 아카이브 개수" + "그 아카이브들에서의 총pt 합"
-    const t = seasonT?.[p.name] || { joinCount: 0, ptSum: 0 };
-
-    // 개인전 변환점수
-    const totalPtScore = 500 * (2 / 3.14) * Math.atan(totalPt / 250);
-    const gamesScore = 200 * (1 - Math.pow(0.95, games));
-
-    // ✅ 대회 변환점수 (네가 만든 함수 사용)
-    const tournamentScore = calcTournamentConvertedScore(t.joinCount, t.ptSum);
-
-    const seasonScore = totalPtScore + gamesScore + tournamentScore;
-
-    return {
-      name: p.name,
-      games,
-
-      total_pt_score: totalPtScore,
-      games_score: gamesScore,
-      tournament_score: tournamentScore,
-      season_score: seasonScore,
-
-      // (디버그용) 필요하면 나중에 표시할 때 쓸 수 있음
-      _t_joinCount: t.joinCount,
-      _t_ptSum: t.ptSum,
-    };
-  });
-
-  // 개인 레이팅 표 조건(4판 이상) 그대로
-  const filtered = list.filter((x) => (x.games || 0) >= 4);
-
-  // 시즌 점수 내림차순
-  filtered.sort(
-    (a, b) =>
-      (b.season_score - a.season_score) ||
-      String(a.name).localeCompare(String(b.name), "ko")
-  );
-
-  return filtered;
-}
-
-
 function renderSeasonRankingTable() {
   const tbody = document.getElementById("season-ranking-tbody");
   if (!tbody) return;
@@ -1811,122 +2380,3 @@ function renderSeasonRankingTable() {
   });
 }
 
-
-
-function parseMonthlyTournamentArchive(name) {
-  const s = (name || "").toString().trim();
-
-  // "대회"는 필수. "먼슬리"는 있으면 좋고 없어도 통과시키고 싶으면 주석 처리
-  if (!s.includes("대회")) return null;
-
-  // 2025 3월 / 25 3월 / 25년 3월 / 2025년3월 / 25-3월 같은 변형도 잡기
-  const m = s.match(/(?:20)?(\d{2})\s*[-년]?\s*(\d{1,2})\s*월/);
-  if (!m) return null;
-
-  const yy2 = Number(m[1]);     // 25
-  const mm = Number(m[2]);      // 1~12
-  if (Number.isNaN(yy2) || Number.isNaN(mm)) return null;
-
-  return { yy2, mm };
-}
-
-function isSeasonMonthlyTournamentArchive(name) {
-  const p = parseMonthlyTournamentArchive(name);
-  if (!p) return false;
-  if (p.yy2 !== SEASON_YEAR2) return false;
-  return p.mm >= SEASON_FROM && p.mm <= SEASON_TO;
-}
-
-
-
-
-async function loadSeasonTournamentStatsFromArchives() {
-  // 캐시 있으면 재사용
-  if (SEASON_TOURNAMENT_STATS) return SEASON_TOURNAMENT_STATS;
-
-  let archives = [];
-  try {
-    archives = await fetchJSON("/api/archives");
-  } catch (e) {
-    console.warn("archives load failed:", e);
-    SEASON_TOURNAMENT_STATS = {};
-    return SEASON_TOURNAMENT_STATS;
-  }
-
-  const target = (archives || []).filter(a =>
-    isSeasonMonthlyTournamentArchive(a?.name)
-  );
-
-  // name -> { ptSum, joinedArchives:Set }
-  const map = new Map();
-
-  for (const a of target) {
-    let games = [];
-    try {
-      games = await fetchJSON(`/api/archives/${a.id}/games`);
-    } catch (e) {
-      console.warn("archive games load failed:", a?.id, e);
-      continue;
-    }
-
-    const appeared = new Set(); // 이 아카이브에 등장한 플레이어들
-
-    (games || []).forEach((g) => {
-      const scores = [
-        Number(g.player1_score),
-        Number(g.player2_score),
-        Number(g.player3_score),
-        Number(g.player4_score),
-      ];
-
-      const names = [
-        g.player1_name,
-        g.player2_name,
-        g.player3_name,
-        g.player4_name,
-      ].map(n => (n || "").trim());
-
-      const pts = calcPts(scores);
-
-      for (let i = 0; i < 4; i++) {
-        const n = names[i];
-        if (!n) continue;
-
-        appeared.add(n);
-
-        if (!map.has(n)) map.set(n, { ptSum: 0, joined: new Set() });
-        const st = map.get(n);
-
-        // ✅ “대회들의 총pt를 더한다 음수는 제외
-        st.ptSum += Math.max(pts[i],0);
-      }
-    });
-
-    // ✅ 참가횟수: "등장한 아카이브 개수"
-    appeared.forEach((n) => {
-      if (!map.has(n)) map.set(n, { ptSum: 0, joined: new Set() });
-      map.get(n).joined.add(a.id);
-    });
-  }
-
-  const out = {};
-  map.forEach((st, name) => {
-    out[name] = {
-      joinCount: st.joined.size,
-      ptSum: st.ptSum,
-    };
-  });
-
-  SEASON_TOURNAMENT_STATS = out;
-  return out;
-}
-
-function calcTournamentConvertedScore(joinCount, tourPtSum) {
-  const joinPart = Math.min(joinCount || 0, 3) * 50;
-
-  // ✅ "총pt 합" 기반 + 음수는 0으로 컷(보상만 주는 구조)
-  const base = Math.max(Number(tourPtSum || 0), 0);
-
-  const ptPart = 150 * (1 - Math.pow(0.995, base));
-  return joinPart + ptPart;
-}
@@ -0,0 +1,425 @@
+// ===== 통계 계산 전용 Web Worker =====
+// script.js 의 statsCall(type, args) 로만 부른다. 요청 {id, type, ...} → 응답 {id, result} 또는 {id, error}
+//
+// 출처("games" | "tournament")별 대국을 typed array 로 들고 있다. 대국 순서는 최신이 앞(id 내림차순).
+//   ids     Int32Array(n)
+//   minutes Float64Array(n)   "YYYY-MM-DDTHH:MM" 를 1970 부터의 분으로. 서버가 문자열로 보냈으면 times 에 원문
+//   names   Int32Array(4n)    strings 인덱스 (판 k 의 i 번째 자리 = 4k + i)
+//   scores  Int32Array(4n)
+//   ranks   Int8Array(4n)     1~4 (동점이면 앞 자리가 높은 순위)
+//   pts     Float64Array(4n)  배정된 점수 규칙의 pt (소수 첫째 자리 반올림, 화면 표시값과 같음)
+// "load" 는 같은 배열의 복사본을 transfer 로 돌려주므로 화면은 복사 없이 그대로 그린다.
+
+const TABLES = {};
+
+const SEASON_YEAR2 = 25;  // 2025든 25든 둘 다 25로 맞출거
+const SEASON_FROM = 1;
+const SEASON_TO = 6;
+let SEASON_TOURNAMENT_STATS = null; // { [name]: { joinCount, ptSum } }
+
+// 리그 경로 prefix (메인 스레드가 워커 주소의 ?root= 로 넘겨준다)
+const APP_ROOT = new URL(self.location.href).searchParams.get("root") || "";
+
+async function fetchJSON(url) {
+  const res = await fetch(url.startsWith("/") ? APP_ROOT + url : url, {
+    headers: { "Content-Type": "application/json" },
+  });
+  if (!res.ok) throw new Error(`HTTP ${res.status}`);
+  return res.json();
+}
+
+// ===== 컬럼 포맷 → typed array =====
+function decodeTable(payload, profile) {
+  const n = payload.rows;
+  const cols = payload.columns;
+
+  const ids = Int32Array.from(cols.id);
+  let minutes = new Float64Array(n);
+  let times = null;
+  if (Array.isArray(cols.created_at)) {
+    times = cols.created_at;
+    minutes.fill(NaN);
+  } else if (n) {
+    let m = cols.created_at.t0;
+    for (let k = 0; k < n; k++) {
+      if (k > 0) m += cols.created_at.delta[k - 1];
+      minutes[k] = m;
+    }
+  }
+
+  const names = new Int32Array(4 * n);
+  const scores = new Int32Array(4 * n);
+  for (let i = 0; i < 4; i++) {
+    const nc = cols[`player${i + 1}_name`];
+    const sc = cols[`player${i + 1}_score`];
+    for (let k = 0; k < n; k++) {
+      names[4 * k + i] = nc[k];
+      scores[4 * k + i] = sc[k];
+    }
+  }
+
+  // 최신이 앞으로(서버가 이미 그 순서면 그대로)
+  let sorted = true;
+  for (let k = 1; k < n; k++) {
+    if (ids[k] > ids[k - 1]) {
+      sorted = false;
+      break;
+    }
+  }
+  const t = { n, ids, minutes, times, names, scores, strings: payload.strings.map((s) => (s || "").trim()) };
+  if (!sorted) reorder(t);
+
+  const { ranks, pts } = scoreTable(t, profile);
+  t.ranks = ranks;
+  t.pts = pts;
+  t.profile = profile;
+  return t;
+}
+
+function reorder(t) {
+  const order = Array.from({ length: t.n }, (_, k) => k).sort((a, b) => t.ids[b] - t.ids[a]);
+  const pick = (arr, width) => {
+    const out = new arr.constructor(arr.length);
+    order.forEach((from, to) => {
+      for (let i = 0; i < width; i++) out[width * to + i] = arr[width * from + i];
+    });
+    return out;
+  };
+  t.ids = pick(t.ids, 1);
+  t.minutes = pick(t.minutes, 1);
+  t.names = pick(t.names, 4);
+  t.scores = pick(t.scores, 4);
+  if (t.times) t.times = order.map((k) => t.times[k]);
+}
+
+function scoreTable(t, profile) {
+  const ranks = new Int8Array(4 * t.n);
+  const pts = new Float64Array(4 * t.n);
+  const order = [0, 1, 2, 3];
+  for (let k = 0; k < t.n; k++) {
+    const base = 4 * k;
+    order.sort((a, b) => t.scores[base + b] - t.scores[base + a] || a - b);
+    for (let r = 0; r < 4; r++) {
+      const i = base + order[r];
+      ranks[i] = r + 1;
+      pts[i] = +((t.scores[i] - profile.return_score) / 1000.0 + profile.uma[r]).toFixed(1);
+    }
+  }
+  return { ranks, pts };
+}
+
+function timeAt(t, k) {
+  if (t.times) return t.times[k];
+  // 서버와 같은 "YYYY-MM-DDTHH:MM" (시간대 변환 없이)
+  return new Date(t.minutes[k] * 60000).toISOString().slice(0, 16);
+}
+
+// ===== 플레이어별 요약(전체 등수 표) =====
+function summarize(t) {
+  const stats = new Map();
+  for (let s = 0; s < 4 * t.n; s++) {
+    const name = t.strings[t.names[s]];
+    if (!name) continue;
+    let st = stats.get(name);
+    if (!st) {
+      st = { games: 0, total_pt: 0, rankCounts: [0, 0, 0, 0] };
+      stats.set(name, st);
+    }
+    st.games += 1;
+    st.total_pt += t.pts[s];
+    st.rankCounts[t.ranks[s] - 1] += 1;
+  }
+
+  return Array.from(stats, ([name, st]) => {
+    const games = st.games;
+    const [c1, c2] = st.rankCounts;
+    return {
+      name,
+      games,
+      total_pt: +st.total_pt.toFixed(1),
+      avg_pt: games > 0 ? +(st.total_pt / games).toFixed(1) : 0,
+      yonde_rate: games > 0 ? +(((c1 + c2) * 100) / games).toFixed(1) : 0,
+      rankCounts: st.rankCounts,
+    };
+  });
+}
+
+// ===== 대회 데이터로 플레이어별 (참가 횟수, 양수 pt 합) 만들기 =====
+function buildTournamentStats(t) {
+  const stats = {};
+  for (let s = 0; s < 4 * t.n; s++) {
+    const name = t.strings[t.names[s]];
+    if (!name) continue;
+    if (!stats[name]) stats[name] = { games: 0, sumPosPt: 0 };
+    stats[name].games += 1;
+    if (t.pts[s] > 0) stats[name].sumPosPt += t.pts[s];
+  }
+  return stats;
+}
+
+// ===== 개인별 통계 =====
+// gameRows: 이 사람이 친 판 번호(최신이 앞), myIndex: 그 판에서의 자리. 화면은 자기 표 복사본에서 그린다
+function computePlayerDetailStats(t, playerName) {
+  const id = t.strings.indexOf(playerName);
+  const rankCounts = [0, 0, 0, 0];
+  const recent = [];
+  const coMap = new Map();
+  const gameRows = [];
+  const myIndex = [];
+  let totalPt = 0;
+  let tobiCount = 0;
+  let maxScore = null;
+
+  for (let k = 0; id >= 0 && k < t.n; k++) {
+    const base = 4 * k;
+    let idx = -1;
+    for (let i = 0; i < 4; i++) {
+      if (t.names[base + i] === id) {
+        idx = i;
+        break;
+      }
+    }
+    if (idx === -1) continue;
+
+    const me = base + idx;
+    const myRank = t.ranks[me];
+    totalPt += t.pts[me];
+    rankCounts[myRank - 1] += 1;
+    if (t.scores[me] < 0) tobiCount += 1;
+    if (maxScore === null || t.scores[me] > maxScore) maxScore = t.scores[me];
+    recent.push({ created_at: timeAt(t, k), rank: myRank });
+
+    for (let j = 0; j < 4; j++) {
+      if (j === idx) continue;
+      const cname = t.strings[t.names[base + j]];
+      if (!cname) continue;
+      let c = coMap.get(cname);
+      if (!c) {
+        c = { games: 0, my_rank_sum: 0, co_rank_sum: 0 };
+        coMap.set(cname, c);
+      }
+      c.games += 1;
+      c.my_rank_sum += myRank;
+      c.co_rank_sum += t.ranks[base + j];
+    }
+
+    gameRows.push(k);
+    myIndex.push(idx);
+  }
+
+  const totalGames = gameRows.length;
+  const coPlayers = Array.from(coMap, ([name, st]) => ({
+    name,
+    games: st.games,
+    my_avg_rank: st.my_rank_sum / st.games,
+    co_avg_rank: st.co_rank_sum / st.games,
+  })).sort((a, b) => b.games - a.games || String(a.name).localeCompare(String(b.name), "ko"));
+
+  // ✅ 최근 그래프는 “오래된 → 최신”이 보기 좋게
+  recent.reverse();
+
+  return {
+    games: totalGames,
+    total_pt: totalPt,
+    rankCounts,
+    yonde_rate: totalGames > 0 ? ((rankCounts[0] + rankCounts[1]) * 100.0) / totalGames : 0,
+    recent,
+    coPlayers,
+    tobi_count: tobiCount,
+    tobi_rate: totalGames > 0 ? (tobiCount * 100.0) / totalGames : 0,
+    max_score: maxScore ?? 0,
+    gameRows: Int32Array.from(gameRows),
+    myIndex: Int8Array.from(myIndex),
+  };
+}
+
+// ===== 시즌 점수 =====
+function parseMonthlyTournamentArchive(name) {
+  const s = (name || "").toString().trim();
+
+  // "대회"는 필수. "먼슬리"는 있으면 좋고 없어도 통과시키고 싶으면 주석 처리
+  if (!s.includes("대회")) return null;
+
+  // 2025 3월 / 25 3월 / 25년 3월 / 2025년3월 / 25-3월 같은 변형도 잡기
+  const m = s.match(/(?:20)?(\d{2})\s*[-년]?\s*(\d{1,2})\s*월/);
+  if (!m) return null;
+
+  const yy2 = Number(m[1]);     // 25
+  const mm = Number(m[2]);      // 1~12
+  if (Number.isNaN(yy2) || Number.isNaN(mm)) return null;
+
+  return { yy2, mm };
+}
+
+function isSeasonMonthlyTournamentArchive(name) {
+  const p = parseMonthlyTournamentArchive(name);
+  if (!p) return false;
+  if (p.yy2 !== SEASON_YEAR2) return false;
+  return p.mm >= SEASON_FROM && p.mm <= SEASON_TO;
+}
+
+async function loadSeasonTournamentStatsFromArchives() {
+  // 캐시 있으면 재사용
+  if (SEASON_TOURNAMENT_STATS) return SEASON_TOURNAMENT_STATS;
+
+  let archives = [];
+  try {
+    archives = await fetchJSON("/api/archives");
+  } catch (e) {
+    // 오프라인이면 이번만 빈 값(캐시하지 않아야 연결된 뒤 다시 받는다)
+    console.warn("archives load failed:", e);
+    return {};
+  }
+
+  const target = (archives || []).filter(a =>
+    isSeasonMonthlyTournamentArchive(a?.name)
+  );
+
+  // name -> { ptSum, joinedArchives:Set }
+  const map = new Map();
+
+  for (const a of target) {
+    let standings = [];
+    try {
+      standings = (await fetchJSON(`/api/archives/${a.id}/standings`)).standings || [];
+    } catch (e) {
+      console.warn("archive standings load failed:", a?.id, e);
+      continue;
+    }
+
+    // ✅ 대회들의 총pt 합(판마다 음수는 제외, 서버가 pos_pt_sum 으로 계산해 둠)
+    // ✅ 참가횟수: "등장한 아카이브 개수"
+    standings.forEach((p) => {
+      if (!map.has(p.player_name)) map.set(p.player_name, { ptSum: 0, joined: new Set() });
+      const st = map.get(p.player_name);
+      st.ptSum += p.pos_pt_sum;
+      st.joined.add(a.id);
+    });
+  }
+
+  const out = {};
+  map.forEach((st, name) => {
+    out[name] = {
+      joinCount: st.joined.size,
+      ptSum: st.ptSum,
+    };
+  });
+
+  SEASON_TOURNAMENT_STATS = out;
+  return out;
+}
+
+function calcTournamentConvertedScore(joinCount, tourPtSum) {
+  const joinPart = Math.min(joinCount || 0, 3) * 50;
+
+  // ✅ "총pt 합" 기반 + 음수는 0으로 컷(보상만 주는 구조)
+  const base = Math.max(Number(tourPtSum || 0), 0);
+
+  const ptPart = 150 * (1 - Math.pow(0.995, base));
+  return joinPart + ptPart;
+}
+
+// ===== 시즌 점수 표 데이터 만들기 (아카이브 기반) =====
+async function buildSeasonSummary(playersAll) {
+  // ✅ 시즌(1~6월) 먼슬리 대회 아카이브 기준 참가/ptSum 로드
+  const seasonT = await loadSeasonTournamentStatsFromArchives(); // { [name]: { joinCount, ptSum } }
+
+  const list = (playersAll || []).map((p) => {
+    const totalPt = Number(p.total_pt || 0);
+    const games = Number(p.games || 0);
+
+    // ✅ 대회: "참가 아카이브 개수" + "그 아카이브들에서의 총pt 합"
+    const t = seasonT?.[p.name] || { joinCount: 0, ptSum: 0 };
+
+    // 개인전 변환점수
+    const totalPtScore = 500 * (2 / 3.14) * Math.atan(totalPt / 250);
+    const gamesScore = 200 * (1 - Math.pow(0.95, games));
+
+    // ✅ 대회 변환점수 (네가 만든 함수 사용)
+    const tournamentScore = calcTournamentConvertedScore(t.joinCount, t.ptSum);
+
+    const seasonScore = totalPtScore + gamesScore + tournamentScore;
+
+    return {
+      name: p.name,
+      games,
+
+      total_pt_score: totalPtScore,
+      games_score: gamesScore,
+      tournament_score: tournamentScore,
+      season_score: seasonScore,
+
+      // (디버그용) 필요하면 나중에 표시할 때 쓸 수 있음
+      _t_joinCount: t.joinCount,
+      _t_ptSum: t.ptSum,
+    };
+  });
+
+  // 개인 레이팅 표 조건(4판 이상) 그대로
+  const filtered = list.filter((x) => (x.games || 0) >= 4);
+
+  // 시즌 점수 내림차순
+  filtered.sort(
+    (a, b) =>
+      (b.season_score - a.season_score) ||
+      String(a.name).localeCompare(String(b.name), "ko")
+  );
+
+  return filtered;
+}
+
+// ===== 메시지 처리 =====
+// 응답에 실을 typed array 는 transfer 목록에 넣는다(복사 없이 넘어감)
+function copyTable(t) {
+  const out = {
+    n: t.n,
+    ids: t.ids.slice(),
+    minutes: t.minutes.slice(),
+    times: t.times,
+    names: t.names.slice(),
+    scores: t.scores.slice(),
+    ranks: t.ranks.slice(),
+    pts: t.pts.slice(),
+    strings: t.strings,
+  };
+  const transfer = [out.ids, out.minutes, out.names, out.scores, out.ranks, out.pts].map((a) => a.buffer);
+  return [out, transfer];
+}
+
+const HANDLERS = {
+  // {source, url | payload, profile} → 컬럼 포맷(서버에서 받거나, 메인 스레드가 로컬 저장소에서 꺼내 준 것)으로
+  // 표를 새로 만들고 {table, summary, stats}
+  async load({ source, url, payload, profile }) {
+    const t = decodeTable(payload || await fetchJSON(url), profile);
+    TABLES[source] = t;
+    const [table, transfer] = copyTable(t);
+    const result = { table, summary: summarize(t) };
+    if (source === "tournament") result.stats = buildTournamentStats(t);
+    return [result, transfer];
+  },
+
+  // {source, name} → 개인별 통계
+  async player({ source, name }) {
+    const t = TABLES[source];
+    if (!t) throw new Error(`${source} not loaded`);
+    const detail = computePlayerDetailStats(t, name);
+    return [detail, [detail.gameRows.buffer, detail.myIndex.buffer]];
+  },
+
+  // {playersAll} → 시즌 점수 표
+  async season({ playersAll }) {
+    return [await buildSeasonSummary(playersAll), []];
+  },
+};
+
+self.onmessage = async (e) => {
+  const { id, type, ...args } = e.data;
+  try {
+    const handler = HANDLERS[type];
+    if (!handler) throw new Error(`unknown request: ${type}`);
+    const [result, transfer] = await handler(args);
+    self.postMessage({ id, result }, transfer);
+  } catch (err) {
+    self.postMessage({ id, error: String(err && err.message ? err.message : err) });
+  }
+};
@@ -0,0 +1,60 @@
+import io
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as madang  # noqa: E402
+
+DEFAULT_SCORES = [40000, 30000, 20000, 10000]
+
+
+@pytest.fixture
+def app(tmp_path):
+    return madang.create_app({
+        "TESTING": True,
+        "DB_PATH": str(tmp_path / "madang.db"),
+        "UPLOAD_DIR": str(tmp_path / "uploads"),
+        "ASSET_PIPELINE": False,
+    })
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def game_payload(names, scores=DEFAULT_SCORES, **extra):
+    payload = {f"player{i + 1}_name": n for i, n in enumerate(names)}
+    payload.update({f"player{i + 1}_score": s for i, s in enumerate(scores)})
+    payload.update(extra)
+    return payload
+
+
+def post_game(client, names, scores=DEFAULT_SCORES, url="/api/games", key=None, headers=None, **extra):
+    headers = dict(headers or {})
+    if key:
+        headers["Idempotency-Key"] = key
+    return client.post(url, json=game_payload(names, scores, **extra), headers=headers)
+
+
+def upload(client, url, data, name="upload.csv", **form):
+    """CSV 업로드 → 작업 id (fetch 로 부른 것처럼 JSON 을 받는다)."""
+    resp = client.post(
+        url, data={"file": (io.BytesIO(data), name), **form}, headers={"Accept": "application/json"},
+    )
+    assert resp.status_code == 202, resp.get_data(as_text=True)
+    return resp.get_json()["job_id"]
+
+
+def wait_job(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").get_json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
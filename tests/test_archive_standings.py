@@ -0,0 +1,171 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import upload, wait_job
+
+import app as madang
+
+NAMES = ["김철수", "이영희", "박민수", "최지우", "Alice", "bob"]
+HEADER = "created_at,player1_name,player2_name,player3_name,player4_name," \
+         "player1_score,player2_score,player3_score,player4_score\n"
+DEFAULT = {"uma": [50, 10, -10, -30], "return_score": 30000}
+
+
+def random_games(seed, n=60):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(n):
+        # 시각은 뒤섞여 들어온다(같은 분도 있다)
+        created_at = (datetime(2024, 3, 1, 19) + timedelta(minutes=10 * rng.randint(0, 500))).isoformat(
+            timespec="minutes")
+        cut = sorted(rng.randint(-10, 210) * 500 for _ in range(3))
+        scores = [p - 1250 for p in (cut[0], cut[1] - cut[0], cut[2] - cut[1], 105000 - cut[2])]
+        games.append((created_at, rng.sample(NAMES, 4), scores))
+    return games
+
+
+def import_archive(client, games, name="2024 봄"):
+    lines = [HEADER] + [f"{t},{','.join(names)},{','.join(map(str, scores))}\n" for t, names, scores in games]
+    job_id = upload(client, "/admin/archive_import", "".join(lines).encode("utf-8"), archive_name=name)
+    assert wait_job(client, job_id)["status"] == "done"
+    return [a["id"] for a in client.get("/api/archives").get_json() if a["name"] == name][0]
+
+
+def brute_force(games, profile):
+    uma, return_score = profile["uma"], profile["return_score"]
+    out = {}
+    for _, names, scores in games:
+        for name, score, rank in zip(names, scores, madang.game_ranks(scores)):
+            pt = (score - return_score) / 1000.0 + uma[rank - 1]
+            t = out.setdefault(name, {"games": 0, "rank_counts": [0, 0, 0, 0], "tobi": 0, "max_score": score,
+                                      "score_sum": 0, "pt_sum": 0.0, "pos_pt_sum": 0.0})
+            t["games"] += 1
+            t["rank_counts"][rank - 1] += 1
+            t["tobi"] += score < 0
+            t["max_score"] = max(t["max_score"], score)
+            t["score_sum"] += score
+            t["pt_sum"] += pt
+            t["pos_pt_sum"] += max(pt, 0.0)
+    return out
+
+
+def check_standings(standings, games, profile):
+    expected = brute_force(games, profile)
+    assert sorted(s["player_name"] for s in standings) == sorted(expected)
+    assert [s["position"] for s in standings] == list(range(1, len(expected) + 1))
+    pts = [s["pt_sum"] for s in standings]
+    assert pts == sorted(pts, reverse=True)
+    for s in standings:
+        t = expected[s["player_name"]]
+        assert s["games"] == t["games"]
+        assert s["rank_counts"] == t["rank_counts"]
+        assert s["tobi"] == t["tobi"]
+        assert s["max_score"] == t["max_score"]
+        assert s["avg_score"] == pytest.approx(t["score_sum"] / t["games"])
+        assert s["pt_sum"] == pytest.approx(t["pt_sum"], abs=0.06)
+        assert s["pos_pt_sum"] == pytest.approx(t["pos_pt_sum"], abs=0.06)
+
+
+def test_headline_and_standings(client):
+    games = random_games(1)
+    archive_id = import_archive(client, games)
+    standings = client.get(f"/api/archives/{archive_id}/standings").get_json()["standings"]
+    check_standings(standings, games, DEFAULT)
+
+    [archive] = client.get("/api/archives").get_json()
+    assert archive["game_count"] == len(games)
+    assert archive["player_count"] == len(NAMES)
+    assert archive["winner"] == standings[0]["player_name"]
+    assert archive["winner_pt"] == standings[0]["pt_sum"]
+
+
+def test_player_summary(client):
+    games = random_games(2)
+    archive_id = import_archive(client, games)
+    name = "Alice"
+    mine = sorted((g for g in games if name in g[1]), key=lambda g: g[0])   # 시각 순(정렬은 안정적)
+    body = client.get(f"/api/archives/{archive_id}/players/{name}").get_json()
+    assert body["games"] == len(mine)
+    assert body["recent"] == [
+        {"created_at": t, "rank": madang.game_ranks(scores)[names.index(name)]}
+        for t, names, scores in mine[-madang.ARCHIVE_RECENT_GAMES:]
+    ]
+
+    co = {}
+    for _, names, scores in mine:
+        ranks = madang.game_ranks(scores)
+        me = ranks[names.index(name)]
+        for other, r in zip(names, ranks):
+            if other != name:
+                c = co.setdefault(other, [0, 0, 0])
+                c[0] += 1
+                c[1] += me
+                c[2] += r
+    assert [c["player_name"] for c in body["co_players"]] == sorted(co, key=lambda o: (-co[o][0], o))
+    for c in body["co_players"]:
+        n, me, them = co[c["player_name"]]
+        assert c["games"] == n
+        assert c["avg_rank"] == pytest.approx(me / n)
+        assert c["their_avg_rank"] == pytest.approx(them / n)
+
+
+def test_store_matches_migration_backfill(app, client):
+    archive_id = import_archive(client, random_games(3))
+    conn = sqlite3.connect(app.config["DB_PATH"])
+
+    def stored():
+        return (
+            conn.execute("SELECT * FROM archive_standings ORDER BY position").fetchall(),
+            conn.execute("SELECT * FROM archive_player_stats ORDER BY position").fetchall(),
+            conn.execute("SELECT game_count, player_count FROM archives").fetchall(),
+        )
+
+    imported = stored()
+    madang._mig_archive_standings(conn, archive_id)
+    standings, stats, counts = stored()
+    conn.close()
+    assert counts == imported[2]
+    assert stats == imported[1]
+    assert [r[:-2] for r in standings] == [r[:-2] for r in imported[0]]
+    for a, b in zip(standings, imported[0]):
+        assert a[-2:] == pytest.approx(b[-2:])
+
+
+def test_reassigning_profile_recomputes(client):
+    games = random_games(4)
+    archive_id = import_archive(client, games)
+    before = client.get("/api/archives").get_json()[0]
+    rules = {"name": "M리그", "uma": [30, 10, -10, -30], "return_score": 25000, "total_score": 100000}
+    profile_id = client.post("/api/scoring_profiles", json=rules).get_json()["id"]
+    client.post(f"/api/scoring_profiles/{profile_id}/assign", json={"target": f"archive:{archive_id}"})
+
+    body = client.get(f"/api/archives/{archive_id}/standings").get_json()
+    assert body["profile"]["id"] == profile_id
+    check_standings(body["standings"], games, rules)
+    after = client.get("/api/archives").get_json()[0]
+    assert after["winner"] == body["standings"][0]["player_name"]
+    assert after["winner_pt"] == body["standings"][0]["pt_sum"]
+    assert after["winner_pt"] != before["winner_pt"]
+
+
+def test_delete_drops_stored_rows(app, client):
+    archive_id = import_archive(client, random_games(5))
+    keep_id = import_archive(client, random_games(6), name="2024 여름")
+    assert client.delete(f"/api/archives/{archive_id}").status_code == 200
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    for table in ("archive_standings", "archive_player_stats"):
+        ids = {r[0] for r in conn.execute(f"SELECT archive_id FROM {table}")}
+        assert ids == {keep_id}
+    conn.close()
+    assert client.get(f"/api/archives/{archive_id}/standings").status_code == 404
+    assert [a["id"] for a in client.get("/api/archives").get_json()] == [keep_id]
+
+
+def test_not_found(client):
+    archive_id = import_archive(client, random_games(7, n=3))
+    assert client.get("/api/archives/999/standings").status_code == 404
+    assert client.get("/api/archives/999/players/Alice").status_code == 404
+    assert client.get(f"/api/archives/{archive_id}/players/없는사람").status_code == 404
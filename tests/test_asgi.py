@@ -0,0 +1,215 @@
+import asyncio
+import json
+import threading
+
+from conftest import game_payload
+
+from asgi import AsgiBridge
+
+NAMES = ["가", "나", "다", "라"]
+
+
+class Client:
+    """ASGI 앱 하나에 요청 하나. 받은 메시지를 모으고, 원하면 중간에 끊는다."""
+
+    def __init__(self, bridge, method, path, body=b"", headers=(), query=b""):
+        self.bridge = bridge
+        self.scope = {
+            "type": "http", "method": method, "path": path, "root_path": "", "query_string": query,
+            "headers": [(b"host", b"testserver"), *headers], "http_version": "1.1",
+            "server": ("testserver", 80), "client": ("127.0.0.1", 5000), "scheme": "http",
+        }
+        self.body = body
+        self.sent = asyncio.Queue()
+        self.incoming = asyncio.Queue()
+        self.incoming.put_nowait({"type": "http.request", "body": body, "more_body": False})
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        await self.sent.put(message)
+
+    def start(self):
+        return asyncio.ensure_future(self.bridge(self.scope, self.receive, self.send))
+
+    def disconnect(self):
+        self.incoming.put_nowait({"type": "http.disconnect"})
+
+    async def next(self, timeout=5):
+        return await asyncio.wait_for(self.sent.get(), timeout)
+
+    async def response(self):
+        task = self.start()
+        await asyncio.wait_for(task, 5)
+        messages = []
+        while not self.sent.empty():
+            messages.append(self.sent.get_nowait())
+        start = messages[0]
+        return start["status"], dict(start["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+
+def request(bridge, method, path, **kwargs):
+    return asyncio.run(Client(bridge, method, path, **kwargs).response())
+
+
+def post_game_body(**extra):
+    return json.dumps(game_payload(NAMES, **extra)).encode("utf-8")
+
+
+JSON = [(b"content-type", b"application/json")]
+
+
+def test_routes_run_through_the_bridge(app):
+    bridge = AsgiBridge(app, threads=2)
+    status, _, _ = request(bridge, "POST", "/api/games", body=post_game_body(), headers=JSON)
+    assert status == 201
+    status, headers, body = request(bridge, "GET", "/api/games")
+    assert status == 200
+    assert headers[b"content-type"] == b"application/json"
+    assert [g["player1_name"] for g in json.loads(body)] == ["가"]
+
+    # 한글 경로, 헤더(멱등 키)도 그대로 전달된다
+    status, _, body = request(bridge, "GET", "/api/analytics/players/가")
+    assert status == 200 and json.loads(body)["games"] == 1
+    key = [(b"idempotency-key", b"k-1")]
+    first = request(bridge, "POST", "/api/games", body=post_game_body(), headers=JSON + key)
+    again = request(bridge, "POST", "/api/games", body=post_game_body(), headers=JSON + key)
+    assert (first[0], again[0]) == (201, 200)
+    assert json.loads(again[2]) == {"id": json.loads(first[2])["id"], "replayed": True}
+
+
+def test_large_body_is_spooled(app):
+    bridge = AsgiBridge(app, threads=1)
+    body = post_game_body(memo="x" * (2 * 1024 * 1024))
+    status, _, _ = request(bridge, "POST", "/api/games", body=body, headers=JSON)
+    assert status == 201
+
+
+def blocking_app(release, started):
+    def wsgi(environ, start_response):
+        started.set()
+        release.wait(5)
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"done"]
+    return wsgi
+
+
+def test_full_pool_answers_503():
+    release, started = threading.Event(), threading.Event()
+    bridge = AsgiBridge(blocking_app(release, started), threads=1, max_pending=1)
+
+    async def scenario():
+        busy = [Client(bridge, "GET", "/slow") for _ in range(2)]
+        tasks = [c.start() for c in busy]
+        await asyncio.sleep(0.05)
+        # 실행 중 1 + 기다리는 1 이 꽉 찼다
+        status, headers, body = await Client(bridge, "GET", "/more").response()
+        assert status == 503
+        assert headers[b"retry-after"] == b"1"
+        assert b"busy" in body
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        assert (await busy[0].next())["status"] == 200
+        # 자리가 나면 다시 받는다
+        assert (await Client(bridge, "GET", "/again").response())[0] == 200
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_stops_the_producer():
+    produced, closed = [], threading.Event()
+
+    class Body:
+        def __iter__(self):
+            for i in range(1000):
+                produced.append(i)
+                yield b"x" * 1024
+
+        def close(self):
+            closed.set()
+
+    def wsgi(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/csv")])
+        return Body()
+
+    bridge = AsgiBridge(wsgi, threads=1)
+
+    async def scenario():
+        client = Client(bridge, "GET", "/export")
+        # 본문을 다 보낸 뒤 receive 는 끊김을 기다린다
+        client.incoming = asyncio.Queue()
+        client.incoming.put_nowait({"type": "http.request", "body": b"", "more_body": False})
+        task = client.start()
+        assert (await client.next())["status"] == 200
+        await client.next()
+        client.disconnect()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+    assert closed.wait(5)
+    assert len(produced) < 1000
+
+
+def test_exception_before_headers_is_500():
+    def wsgi(environ, start_response):
+        raise RuntimeError("boom")
+
+    status, _, body = request(AsgiBridge(wsgi, threads=1), "GET", "/")
+    assert status == 500
+    assert json.loads(body) == {"error": "internal server error"}
+
+
+def test_live_stream_pushes_new_versions(app):
+    bridge = AsgiBridge(app, threads=2, live_poll=0.02)
+
+    async def scenario():
+        live = Client(bridge, "GET", "/api/live", query=b"scope=games")
+        live.incoming = asyncio.Queue()   # 끊을 때까지 열어 둔다
+        task = live.start()
+        start = await live.next()
+        assert start["status"] == 200
+        assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+        first = (await live.next())["body"]
+        assert first.startswith(b"event: versions\ndata: ")
+
+        status, _, _ = await Client(bridge, "POST", "/api/games", body=post_game_body(), headers=JSON).response()
+        assert status == 201
+        second = (await live.next())["body"]
+        before = json.loads(first.split(b"data: ", 1)[1])
+        after = json.loads(second.split(b"data: ", 1)[1])
+        assert after["games"] > before["games"]
+
+        live.disconnect()
+        await asyncio.wait_for(task, 5)
+        assert bridge._live_connections == 0
+        await asyncio.sleep(0.1)
+        assert bridge._live == {}   # 듣는 연결이 없으면 폴러도 멈춘다
+
+    asyncio.run(scenario())
+
+
+def test_live_connection_limit(app):
+    bridge = AsgiBridge(app, threads=1, live_max_connections=0)
+    status, headers, _ = request(bridge, "GET", "/api/live")
+    assert status == 503
+    assert headers[b"retry-after"] == b"5"
+
+
+def test_lifespan(app):
+    bridge = AsgiBridge(app, threads=1)
+
+    async def scenario():
+        incoming = asyncio.Queue()
+        sent = []
+        for message in ({"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}):
+            incoming.put_nowait(message)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await asyncio.wait_for(bridge({"type": "lifespan"}, incoming.get, send), 5)
+        return sent
+
+    assert asyncio.run(scenario()) == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
@@ -0,0 +1,131 @@
+import gzip
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+import app as madang
+from assets import minify_css, minify_js
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+
+def test_js_comments_and_indentation_go():
+    src = (
+        "// 머리 주석\n"
+        "function f(a, b) {\n"
+        "    /* 블록\n       주석 */\n"
+        "    return a + b;   // 끝 주석\n"
+        "}\n"
+        "\n\n"
+        "let x = 1\n"
+        "let y = 2\n"
+    )
+    assert minify_js(src) == "function f(a, b) {\nreturn a + b;\n}\nlet x = 1\nlet y = 2\n"
+
+
+def test_js_template_literals_are_kept_verbatim():
+    # 여러 줄 템플릿의 들여쓰기와 그 안의 "//" 는 내용이다
+    template = (
+        "`\n"
+        "  <td>${p.name}</td>\n"
+        "      <a href=\"//example.com/${id}\">${a ? `<b>${x /* 그대로 */}</b>` : \"\"}</a>\n"
+        "`"
+    )
+    src = f"    el.innerHTML = {template};   // 표 한 줄\n"
+    assert minify_js(src) == f"el.innerHTML = {template};\n"
+
+
+@pytest.mark.parametrize("literal", [
+    "'// 주석 아님'",
+    "\"/* 이것도 */\"",
+    "'it\\'s // fine'",
+    "/https?:\\/\\/[^/]+/g",
+    "/[/*]+/",
+])
+def test_js_strings_and_regexes_are_kept(literal):
+    src = f"const v = {literal};  // 뒤 주석\n"
+    assert minify_js(src) == f"const v = {literal};\n"
+
+
+def test_js_division_is_not_a_regex():
+    src = "const r = total / count / 2;  // 평균\nconst s = \"a\" / 1 // 나눗셈\n"
+    assert minify_js(src) == "const r = total / count / 2;\nconst s = \"a\" / 1\n"
+
+
+def test_js_regex_after_keyword():
+    src = "function f(s) {\n  return /^\\/\\//.test(s)  // url\n}\n"
+    assert minify_js(src) == "function f(s) {\nreturn /^\\/\\//.test(s)\n}\n"
+
+
+@pytest.mark.parametrize("name", ["script.js", "stats_worker.js"])
+def test_shipped_scripts_minify_once(name):
+    with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as f:
+        src = f.read()
+    out = minify_js(src)
+    assert len(out) < len(src)
+    # 한 번 줄인 결과를 다시 줄여도 그대로(리터럴 경계를 잘못 잡으면 두 번째에 또 바뀐다)
+    assert minify_js(out) == out
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+@pytest.mark.parametrize("name", ["script.js", "stats_worker.js"])
+def test_shipped_scripts_still_parse(tmp_path, name):
+    with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as f:
+        out = minify_js(f.read())
+    path = tmp_path / name
+    path.write_text(out, encoding="utf-8")
+    subprocess.run(["node", "--check", str(path)], check=True)
+
+
+def test_css_strings_and_urls_are_kept():
+    src = (
+        "/* 머리 */\n"
+        ".a  >  .b , .c :hover {\n"
+        "  content: \"/* 그대로 */  x\";\n"
+        "  background: url(data:image/svg+xml;utf8,<svg a='1'>  </svg>);\n"
+        "  color : red;\n"
+        "}\n"
+    )
+    assert minify_css(src) == (
+        ".a>.b,.c :hover{content:\"/* 그대로 */  x\";"
+        "background:url(data:image/svg+xml;utf8,<svg a='1'>  </svg>);color :red}"
+    )
+
+
+@pytest.fixture
+def piped_client(tmp_path):
+    app = madang.create_app({
+        "TESTING": True,
+        "DB_PATH": str(tmp_path / "madang.db"),
+        "UPLOAD_DIR": str(tmp_path / "uploads"),
+        "ASSET_PIPELINE": True,
+    })
+    return app.test_client()
+
+
+def test_page_links_fingerprinted_assets(piped_client):
+    page = piped_client.get("/").get_data(as_text=True)
+    urls = re.findall(r"/assets/(?:style|script)\.[0-9a-f]{12}\.(?:css|js)", page)
+    assert len(set(urls)) == 2
+
+    for url in set(urls):
+        resp = piped_client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert resp.status_code == 200
+        assert resp.headers["Cache-Control"] == madang.ASSET_CACHE_CONTROL
+        assert resp.headers["Content-Encoding"] == "gzip"
+        body = gzip.decompress(resp.data)
+        assert resp.headers["ETag"].strip('"') in url
+
+        plain = piped_client.get(url, headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in plain.headers
+        assert plain.data == body
+
+        again = piped_client.get(url, headers={"If-None-Match": resp.headers["ETag"]})
+        assert again.status_code == 304
+
+
+def test_unknown_fingerprint_is_404(piped_client):
+    assert piped_client.get("/assets/style.000000000000.css").status_code == 404
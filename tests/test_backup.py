@@ -0,0 +1,124 @@
+import gzip
+import io
+import sqlite3
+import tempfile
+
+import pytest
+
+from conftest import post_game
+
+import app as madang
+
+NAMES = ["가", "나", "다", "라"]
+
+
+def restore(client, data, name="backup.db.gz"):
+    return client.post("/api/admin/restore", data={"file": (io.BytesIO(data), name)})
+
+
+def game_ids(client):
+    return sorted(g["id"] for g in client.get("/api/games").get_json())
+
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    # 백업 / 복원 임시 파일이 여기 생긴다
+    path = tmp_path / "scratch"
+    path.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(path))
+    return path
+
+
+def test_backup_and_restore_round_trip(client, scratch):
+    for _ in range(3):
+        post_game(client, NAMES)
+    backup = client.get("/api/admin/backup")
+    assert backup.status_code == 200
+    assert backup.mimetype == "application/gzip"
+    data = backup.get_data()
+    assert gzip.decompress(data)[:16] == b"SQLite format 3\0"
+
+    post_game(client, NAMES)
+    assert game_ids(client) == [1, 2, 3, 4]   # 캐시에 올라간 목록
+
+    assert restore(client, data).status_code == 200
+    assert game_ids(client) == [1, 2, 3]
+    assert list(scratch.iterdir()) == []
+
+
+def test_plain_db_file_is_accepted(client):
+    post_game(client, NAMES)
+    data = gzip.decompress(client.get("/api/admin/backup").get_data())
+    client.delete("/api/games/1")
+    assert restore(client, data, "backup.db").status_code == 200
+    assert game_ids(client) == [1]
+
+
+def test_unread_backup_leaves_no_temp_file(client, scratch):
+    resp = client.get("/api/admin/backup")
+    assert len(list(scratch.iterdir())) == 1
+    resp.close()
+    assert list(scratch.iterdir()) == []
+
+
+def test_old_schema_is_migrated_on_restore(client, tmp_path, monkeypatch):
+    path = str(tmp_path / "v1.db")
+    monkeypatch.setattr(madang, "MIGRATIONS", madang.MIGRATIONS[:1])
+    monkeypatch.setattr(madang, "SCHEMA_VERSION", 1)
+    madang.migrate_db(path)
+    monkeypatch.undo()
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        INSERT INTO games (created_at, player1_name, player2_name, player3_name, player4_name,
+                           player1_score, player2_score, player3_score, player4_score)
+        VALUES ('2024-01-01T19:00', '가', '나', '다', '라', 40000, 30000, 20000, 10000)
+    """)
+    conn.commit()
+    conn.close()
+
+    with open(path, "rb") as f:
+        assert restore(client, f.read(), "v1.db").status_code == 200
+    assert game_ids(client) == [1]
+    # 마이그레이션 뒤에도 새 대국을 받는다
+    assert post_game(client, NAMES).status_code == 201
+
+
+def make_db(path, version=None, tables=("games",)):
+    conn = sqlite3.connect(path)
+    for t in tables:
+        conn.execute(f"CREATE TABLE {t} (id INTEGER PRIMARY KEY)")
+    if version is not None:
+        conn.execute(f"PRAGMA user_version = {version}")
+    conn.commit()
+    conn.close()
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def corrupt_db(client):
+    data = bytearray(gzip.decompress(client.get("/api/admin/backup").get_data()))
+    page_size = int.from_bytes(data[16:18], "big")
+    # 두 번째 페이지(첫 테이블의 b-tree)를 망가뜨린다
+    data[page_size:2 * page_size] = b"\xff" * page_size
+    return bytes(data)
+
+
+@pytest.mark.parametrize("make, message", [
+    (lambda client, tmp: b"definitely not sqlite" * 100, "not a sqlite database"),
+    (lambda client, tmp: gzip.compress(b"x" * 1000)[:-20], "broken gzip"),
+    (lambda client, tmp: make_db(tmp / "few.db"), "missing tables"),
+    (lambda client, tmp: make_db(tmp / "new.db", madang.SCHEMA_VERSION + 1, madang.REQUIRED_TABLES),
+     "newer than this server"),
+    (lambda client, tmp: corrupt_db(client), ""),
+])
+def test_bad_backups_leave_live_db_alone(client, tmp_path, scratch, make, message):
+    post_game(client, NAMES)
+    resp = restore(client, make(client, tmp_path))
+    assert resp.status_code == 400
+    assert message in resp.get_json()["error"]
+    assert game_ids(client) == [1]
+    assert list(scratch.iterdir()) == []
+
+
+def test_restore_requires_file(client):
+    assert client.post("/api/admin/restore").status_code == 400
@@ -0,0 +1,134 @@
+import sqlite3
+
+import pytest
+
+from conftest import post_game, upload, wait_job
+
+import app as madang
+
+NAMES = ["김철수", "이영희", "박민수", "최지우"]
+
+
+def add_badge(client, code, name):
+    resp = client.post("/api/badges", json={"code": code, "name": name, "grade": "골드", "description": f"{name} 설명"})
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+
+def grant(client, player, code):
+    assert client.post("/api/player_badges", json={"player_name": player, "badge_code": code}).status_code == 201
+
+
+def raw(app, sql, params=()):
+    # 다른 워커가 쓴 것처럼 앱을 거치지 않고 쓴다
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    conn.execute(sql, params)
+    madang.bump_data_versions(conn, "badges")
+    conn.commit()
+    conn.close()
+
+
+def test_by_player_lists_in_grant_order(client):
+    add_badge(client, 1, "첫 승")
+    add_badge(client, 2, "토비")
+    grant(client, "김철수", 2)
+    grant(client, "이영희", 1)
+    grant(client, "김철수", 1)
+    badges = client.get("/api/player_badges/by_player/김철수").get_json()
+    assert [(b["code"], b["name"], b["grade"], b["description"]) for b in badges] == [
+        (2, "토비", "골드", "토비 설명"), (1, "첫 승", "골드", "첫 승 설명"),
+    ]
+    assert client.get("/api/player_badges/by_player/없는사람").get_json() == []
+
+
+def test_catalog_follows_badge_changes(app, client):
+    add_badge(client, 1, "첫 승")
+    grant(client, "김철수", 1)
+    assert client.get("/api/player_badges/by_player/김철수").get_json()[0]["name"] == "첫 승"
+
+    # 다른 워커가 이름을 바꿨다: "badges" 버전이 올라가면 카탈로그를 다시 읽는다
+    raw(app, "UPDATE badges SET name = '첫 승리' WHERE code = 1")
+    assert client.get("/api/player_badges/by_player/김철수").get_json()[0]["name"] == "첫 승리"
+    assert client.get("/api/player_badges").get_json()[0]["name"] == "첫 승리"
+
+    # 뱃지가 없어진 부여 기록은 빈 이름으로
+    raw(app, "DELETE FROM badges WHERE code = 1")
+    assert client.get("/api/player_badges/by_player/김철수").get_json()[0]["name"] == ""
+
+
+def test_catalog_is_read_once_per_version(app, client):
+    add_badge(client, 1, "첫 승")
+    grant(client, "김철수", 1)
+    client.get("/api/player_badges/by_player/김철수")
+    with app.app_context():
+        state = madang.db_state(app.config["DB_PATH"])
+        cached = state.badge_catalog
+    assert cached[1] == {1: {"name": "첫 승", "grade": "골드", "description": "첫 승 설명"}}
+    grant(client, "이영희", 1)   # 부여만 바뀌면 카탈로그는 그대로
+    client.get("/api/player_badges/by_player/이영희")
+    assert state.badge_catalog is cached
+
+    badge_id = add_badge(client, 2, "토비")
+    client.get("/api/player_badges/by_player/이영희")
+    assert set(state.badge_catalog[1]) == {1, 2}
+    client.delete(f"/api/badges/{badge_id}")
+    client.get("/api/player_badges/by_player/이영희")
+    assert set(state.badge_catalog[1]) == {1}
+
+
+def test_import_badges_refreshes_catalog(client):
+    add_badge(client, 1, "첫 승")
+    grant(client, "김철수", 1)
+    client.get("/api/player_badges/by_player/김철수")
+    data = "code,name,grade,description\n1,첫 승(개정),실버,새 설명\n".encode("utf-8")
+    assert wait_job(client, upload(client, "/import_badges", data))["status"] == "done"
+    [badge] = client.get("/api/player_badges/by_player/김철수").get_json()
+    assert (badge["name"], badge["grade"]) == ("첫 승(개정)", "실버")
+
+
+def test_holders_lists_every_name_once(client):
+    add_badge(client, 1, "첫 승")
+    add_badge(client, 2, "토비")
+    for player, code in [("이영희", 1), ("김철수", 1), ("이영희", 2), ("bob", 2)]:
+        grant(client, player, code)
+    assert client.get("/api/player_badges/players").get_json() == ["bob", "김철수", "이영희"]
+
+
+@pytest.mark.parametrize("sql, index", [
+    ("SELECT * FROM player_badges WHERE player_name = '김철수'", "idx_player_badges_player"),
+    ("SELECT * FROM player_badges WHERE badge_code = 3", "idx_player_badges_code"),
+])
+def test_lookups_use_indexes(app, client, sql, index):
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    plan = " ".join(r[-1] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+    conn.close()
+    assert index in plan
+
+
+def test_profile_bundles_career_and_badges(client):
+    add_badge(client, 1, "첫 승")
+    post_game(client, NAMES)
+    grant(client, "김철수", 1)
+    profile = client.get("/api/players/김철수/profile").get_json()
+    assert profile["player_name"] == "김철수"
+    assert profile["career"] == client.get("/api/players/김철수/career").get_json()
+    assert profile["badges"] == client.get("/api/player_badges/by_player/김철수").get_json()
+
+    # 뱃지를 새로 받으면 캐시된 프로필도 바뀐다
+    add_badge(client, 2, "토비")
+    grant(client, "김철수", 2)
+    assert len(client.get("/api/players/김철수/profile").get_json()["badges"]) == 2
+
+
+def test_badge_only_player(client):
+    add_badge(client, 1, "첫 승")
+    grant(client, "뱃지만", 1)
+    assert client.get("/api/players/뱃지만/career").status_code == 404
+    profile = client.get("/api/players/뱃지만/profile")
+    assert profile.status_code == 200
+    assert profile.get_json()["career"]["games"] == 0
+    assert [b["code"] for b in profile.get_json()["badges"]] == [1]
+
+
+def test_unknown_profile(client):
+    assert client.get("/api/players/없는사람/profile").status_code == 404
@@ -0,0 +1,142 @@
+import sqlite3
+
+import pytest
+
+from conftest import post_game, upload, wait_job
+
+import app as madang
+
+NAMES = ["가", "나", "다", "라"]
+
+
+def add_badge(client, code, conditions):
+    client.post("/api/badges", json={"code": code, "name": f"뱃지{code}", "grade": "브론즈", "description": ""})
+    resp = client.post("/api/badge_rules", json={"badge_code": code, "conditions": conditions})
+    assert resp.status_code == 201, resp.get_json()
+
+
+def holders(client, code):
+    return sorted(r["player_name"] for r in client.get("/api/player_badges").get_json() if r["badge_code"] == code)
+
+
+def test_first_places_awarded_on_write(client):
+    add_badge(client, 1, [{"metric": "rank1", "min": 2}])
+    post_game(client, NAMES)
+    assert holders(client, 1) == []
+    post_game(client, NAMES)
+    assert holders(client, 1) == ["가"]
+    # 이미 가진 뱃지는 다시 주지 않는다
+    post_game(client, NAMES)
+    assert holders(client, 1) == ["가"]
+
+
+def test_tobi_and_max_score(client):
+    add_badge(client, 1, [{"metric": "tobi", "min": 1}])
+    add_badge(client, 2, [{"metric": "max_score", "min": 60000}])
+    post_game(client, NAMES, [55000, 30000, 20000, -5000])
+    assert holders(client, 1) == ["라"]
+    assert holders(client, 2) == []
+    post_game(client, NAMES, [20000, 60000, 20000, 0])
+    assert holders(client, 2) == ["나"]
+
+
+def test_conditions_are_combined_and_sources_filtered(client):
+    add_badge(client, 1, [{"metric": "games", "min": 2}, {"metric": "rank1", "min": 1, "source": "tournament"}])
+    post_game(client, NAMES)
+    post_game(client, NAMES)
+    assert holders(client, 1) == []   # 개인전 1등은 대회 1등이 아니다
+    post_game(client, ["다", "가", "나", "라"], url="/api/tournament_games")
+    assert holders(client, 1) == ["다"]
+
+
+def test_only_the_four_players_are_checked(app, client):
+    post_game(client, NAMES)
+    add_badge(client, 1, [{"metric": "games", "min": 1}])
+    # 규칙을 만든 뒤의 대국은 그 네 명만 본다. 예전 기록은 백필로
+    post_game(client, ["마", "바", "사", "아"])
+    assert holders(client, 1) == ["마", "바", "사", "아"]
+    assert client.post("/api/admin/badge_rules/backfill").get_json() == {"granted": 4}
+    assert holders(client, 1) == sorted(NAMES + ["마", "바", "사", "아"])
+    assert client.post("/api/admin/badge_rules/backfill").get_json() == {"granted": 0}
+
+
+def test_backfill_single_code_and_rebuild(app, client):
+    for _ in range(3):
+        post_game(client, NAMES)
+    # 집계를 거치지 않고 들어간 대국(예전 DB)도 rebuild 로 반영된다
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    conn.execute("""
+        INSERT INTO games (created_at, player1_name, player2_name, player3_name, player4_name,
+                           player1_score, player2_score, player3_score, player4_score)
+        VALUES ('2024-01-01T19:00', '라', '가', '나', '다', 40000, 30000, 20000, 10000)
+    """)
+    conn.commit()
+    conn.close()
+    add_badge(client, 1, [{"metric": "games", "min": 4}])
+    add_badge(client, 2, [{"metric": "rank1", "min": 1}])
+
+    assert client.post("/api/admin/badge_rules/backfill?code=1").get_json() == {"granted": 0}
+    assert client.post("/api/admin/badge_rules/backfill?code=1&rebuild=1").get_json() == {"granted": 4}
+    assert holders(client, 2) == []
+    assert client.post("/api/admin/badge_rules/backfill?code=2").get_json() == {"granted": 2}
+    assert holders(client, 2) == ["가", "라"]
+
+
+def test_archive_import_awards_after_commit(client):
+    add_badge(client, 1, [{"metric": "archives", "min": 1, "source": "monthly"}])
+    header = "created_at,player1_name,player2_name,player3_name,player4_name," \
+             "player1_score,player2_score,player3_score,player4_score\n"
+    data = (header + "2024-03-01T19:00,가,나,다,라,40000,30000,20000,10000\n").encode("utf-8")
+    assert wait_job(client, upload(client, "/admin/archive_import", data, archive_name="일반 리그"))["status"] == "done"
+    assert holders(client, 1) == []
+    job_id = upload(client, "/admin/archive_import", data, archive_name="24년 3월 대회")
+    assert wait_job(client, job_id)["status"] == "done"
+    assert holders(client, 1) == NAMES
+
+
+def test_deleted_game_is_removed_from_aggregates(client):
+    first = post_game(client, NAMES, [70000, 20000, 10000, 0]).get_json()["id"]
+    post_game(client, NAMES)
+    assert client.delete(f"/api/games/{first}").status_code == 200
+    add_badge(client, 1, [{"metric": "max_score", "min": 60000}])
+    add_badge(client, 2, [{"metric": "games", "min": 1}])
+    client.post("/api/admin/badge_rules/backfill")
+    # 지운 대국의 최고 점수는 남지 않는다
+    assert holders(client, 1) == []
+    assert holders(client, 2) == NAMES
+
+
+@pytest.mark.parametrize("conditions", [
+    [],
+    None,
+    [{"metric": "height", "min": 1}],
+    [{"metric": "games", "min": 1, "source": "friends"}],
+    [{"metric": "games", "min": "10"}],
+    [{"metric": "games", "min": True}],
+    ["games"],
+])
+def test_invalid_rules(client, conditions):
+    client.post("/api/badges", json={"code": 1, "name": "x", "grade": "", "description": ""})
+    assert client.post("/api/badge_rules", json={"badge_code": 1, "conditions": conditions}).status_code == 400
+
+
+def test_rule_needs_existing_badge_and_delete(client):
+    rule = {"badge_code": 9, "conditions": [{"metric": "games", "min": 1}]}
+    assert client.post("/api/badge_rules", json=rule).status_code == 400
+    add_badge(client, 9, rule["conditions"])
+    assert [r["badge_code"] for r in client.get("/api/badge_rules").get_json()] == [9]
+    assert client.delete("/api/badge_rules/9").status_code == 200
+    assert client.delete("/api/badge_rules/9").status_code == 404
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("25년 3월 대회", 1),
+    ("2025-03월 대회", 1),
+    ("대회 24년 12월", 1),
+    ("25년 3월 리그", 0),
+    ("봄 대회", 0),
+    ("", 0),
+    (None, 0),
+])
+def test_is_monthly_tournament(name, expected):
+    assert madang.is_monthly_tournament(name) == expected
@@ -0,0 +1,105 @@
+import io
+import random
+import sqlite3
+
+import pytest
+
+from conftest import post_game
+
+import app as madang
+import gamestore
+from snapshot_format import write_snapshot
+
+NAMES = ["김철수", "이영희", "박민수", "최지우", "Alice", "bob"]
+ARCHIVE_RULES = {"uma": [20, 10, -10, -20], "return_score": 30000, "total_score": 100000}
+
+
+def random_scores(rng):
+    cut = sorted(rng.randint(-10, 210) * 500 for _ in range(3))
+    parts = [cut[0], cut[1] - cut[0], cut[2] - cut[1], 105000 - cut[2]]
+    return [p - 1250 for p in parts]   # 합 100000, 음수(토비)도 나오게
+
+
+def brute_force(games):
+    """games: [(names, scores, uma, return_score)] → 이름별 [대국 수, 1~4등, 토비, 최고 점수, 점수 합], pt 합"""
+    totals, pts = {}, {}
+    for names, scores, uma, return_score in games:
+        order = sorted(range(4), key=lambda i: scores[i], reverse=True)
+        for rank, i in enumerate(order, start=1):
+            t = totals.setdefault(names[i], [0, 0, 0, 0, 0, 0, scores[i], 0])
+            t[0] += 1
+            t[rank] += 1
+            t[5] += scores[i] < 0
+            t[6] = max(t[6], scores[i])
+            t[7] += scores[i]
+            pts[names[i]] = pts.get(names[i], 0.0) + (scores[i] - return_score) / 1000.0 + uma[rank - 1]
+    return totals, pts
+
+
+@pytest.fixture
+def played(app, client):
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    default = madang.load_profile(conn, madang.DEFAULT_PROFILE_ID)
+    conn.close()
+    rng = random.Random(7)
+    games = []
+    for url in ("/api/games", "/api/tournament_games"):
+        for _ in range(25):
+            names, scores = rng.sample(NAMES, 4), random_scores(rng)
+            assert post_game(client, names, scores, url=url).status_code == 201
+            games.append((names, scores, default["uma"], default["return_score"]))
+
+    archives = []
+    for season in range(2):
+        rows = []
+        for day in range(20):
+            names, scores = rng.sample(NAMES, 4), random_scores(rng)
+            rows.append((f"2023-0{season + 1}-{day + 1:02d}T19:00", *names, *scores))
+            games.append((names, scores, ARCHIVE_RULES["uma"], ARCHIVE_RULES["return_score"]))
+        archives.append({"name": f"2023 시즌 {season + 1}", "created_at": "2023-12-31T00:00", "games": rows})
+    buf = io.BytesIO()
+    write_snapshot(buf, ARCHIVE_RULES, archives)
+    resp = client.post("/api/admin/snapshot_import", data={"file": (io.BytesIO(buf.getvalue()), "s.mjsnap")})
+    assert resp.status_code == 201
+    return games
+
+
+def test_career_matches_brute_force(client, played):
+    totals, pts = brute_force(played)
+    for name in NAMES:
+        career = client.get(f"/api/players/{name}/career").get_json()
+        t = totals[name]
+        assert career["games"] == t[0]
+        assert career["rank_counts"] == t[1:5]
+        assert career["tobi"] == t[5]
+        assert career["max_score"] == t[6]
+        assert career["avg_score"] == pytest.approx(t[7] / t[0])
+        assert career["pt_sum"] == pytest.approx(pts[name], abs=0.1)
+        assert career["archives"] == 2
+        assert sum(s["games"] for s in career["seasons"]) == t[0]
+        assert {s["target"] for s in career["seasons"]} <= {"games", "tournament", "archive:1", "archive:2"}
+
+
+def test_career_follows_new_games(client, played):
+    before = client.get("/api/players/bob/career").get_json()
+    post_game(client, ["bob", "김철수", "이영희", "박민수"], [70000, 20000, 10000, 0])
+    after = client.get("/api/players/bob/career").get_json()
+    assert after["games"] == before["games"] + 1
+    assert after["rank_counts"][0] == before["rank_counts"][0] + 1
+    assert after["max_score"] == max(before["max_score"], 70000)
+
+
+def test_unknown_player(client, played):
+    assert client.get("/api/players/없는사람/career").status_code == 404
+
+
+def test_merge_totals():
+    a = [3, 1, 1, 1, 0, 1, 40000, 90000]
+    b = [2, 0, 1, 0, 1, 0, 52000, 60000]
+    merged = madang.merge_totals(None, a)
+    assert merged == a and merged is not a
+
+    madang.merge_totals(merged, b)
+    assert merged == [5, 1, 2, 1, 1, 1, 52000, 150000]
+    assert merged[gamestore.MAX_SCORE] == 52000
+    assert a == [3, 1, 1, 1, 0, 1, 40000, 90000]
@@ -0,0 +1,99 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import post_game
+
+import app as madang
+
+NAMES = ["김철수", "이영희", 'quote"s', "back\\slash"]
+
+
+def decode(payload, strings):
+    """script.js 의 decodeColumnar 와 같은 방식으로 행 dict 목록을 만든다."""
+    assert payload["format"] == "columnar"
+    table = payload["strings"]
+    cols = {}
+    for name, col in payload["columns"].items():
+        if isinstance(col, dict):
+            minutes, out = col["t0"], []
+            for i in range(len(col["delta"]) + 1):
+                if i:
+                    minutes += col["delta"][i - 1]
+                out.append((datetime(1970, 1, 1) + timedelta(minutes=minutes)).isoformat(timespec="minutes"))
+            col = out
+        elif name in strings:
+            col = [table[i] for i in col]
+        cols[name] = col
+    return [{name: cols[name][r] for name in cols} for r in range(payload["rows"])]
+
+
+def insert_games(path, table, times):
+    conn = sqlite3.connect(path)
+    for i, created_at in enumerate(times):
+        conn.execute(f"""
+            INSERT INTO {table} (created_at, player1_name, player2_name, player3_name, player4_name,
+                                 player1_score, player2_score, player3_score, player4_score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (created_at, *NAMES[i % 4:], *NAMES[:i % 4], 40000, 30000, 20000, 10000))
+    madang.bump_data_versions(conn, "games", "tournament")
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize("times", [
+    ["2024-03-01T19:00", "2024-03-01T21:30", "2024-02-28T10:05", "2024-03-01T19:00"],
+    ["2024-03-01T19:00", "2024-03-01 21:30:00", "", "2024-03-02T10:00"],   # 시간 열은 그대로
+    [],
+])
+@pytest.mark.parametrize("url, table", [("/api/games", "games"), ("/api/tournament_games", "tournament_games")])
+def test_columnar_matches_rows(app, client, url, table, times):
+    insert_games(app.config["DB_PATH"], table, times)
+    rows = client.get(url).get_json()
+    payload = client.get(url + "?format=columnar").get_json()
+    assert decode(payload, madang.GAME_STRING_COLUMNS) == rows
+    assert len(rows) == len(times)
+
+
+def test_columnar_is_smaller(app, client):
+    insert_games(app.config["DB_PATH"], "games", [f"2024-03-01T{h:02d}:{m:02d}" for h in range(24) for m in (0, 30)])
+    rows = client.get("/api/games").get_data()
+    columnar = client.get("/api/games?format=columnar").get_data()
+    assert len(columnar) < len(rows) / 2
+    # 이름은 사전에 한 번씩만
+    assert sorted(json.loads(columnar)["strings"]) == sorted(NAMES)
+
+
+def test_player_badges_columnar(client):
+    client.post("/api/badges", json={"code": 7, "name": "첫 승", "grade": "브론즈", "description": "1등 1회"})
+    for name in ("김철수", "이영희", "김철수"):
+        assert client.post("/api/player_badges", json={"player_name": name, "badge_code": 7}).status_code == 201
+    rows = client.get("/api/player_badges").get_json()
+    payload = client.get("/api/player_badges?format=columnar").get_json()
+    decoded = decode(payload, ("player_name", "name", "grade", "description"))
+    # 컬럼 포맷은 code 를 따로 보내지 않는다
+    assert decoded == [{k: v for k, v in r.items() if k != "code"} for r in rows]
+
+
+def test_archive_games_columnar(app, client):
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    conn.execute("INSERT INTO archives (id, name, created_at) VALUES (1, '시즌', '2024-01-01T00:00')")
+    for d in range(1, 4):
+        conn.execute("""
+            INSERT INTO archive_games (archive_id, created_at, player1_name, player2_name, player3_name,
+                                       player4_name, player1_score, player2_score, player3_score, player4_score)
+            VALUES (1, ?, '가', '나', '다', '라', 40000, 30000, 20000, 10000)
+        """, (f"2023-05-0{d}T19:00",))
+    conn.commit()
+    conn.close()
+    rows = client.get("/api/archives/1/games").get_json()
+    payload = client.get("/api/archives/1/games?format=columnar").get_json()
+    assert decode(payload, madang.GAME_STRING_COLUMNS) == rows
+
+
+def test_post_still_returns_plain_json(client):
+    resp = post_game(client, ["가", "나", "다", "라"], url="/api/games?format=columnar")
+    assert resp.status_code == 201
+    assert "id" in resp.get_json()
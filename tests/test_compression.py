@@ -0,0 +1,143 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Response
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from conftest import post_game
+
+import app as madang
+import compression
+
+NAMES = ["김철수", "이영희", "박민수", "최지우"]
+
+
+def accept(value):
+    return parse_accept_header(value, Accept)
+
+
+@pytest.mark.parametrize("header, encodings, expected", [
+    ("gzip", ("br", "gzip"), "gzip"),
+    ("gzip, br", ("br", "gzip"), "br"),
+    ("br;q=0.5, gzip", ("br", "gzip"), "gzip"),
+    ("*", ("br", "gzip"), "br"),
+    ("br", ("gzip",), None),
+    ("identity", ("br", "gzip"), None),
+    ("gzip;q=0", ("gzip",), None),
+    ("", ("gzip",), None),
+])
+def test_choose_encoding(header, encodings, expected):
+    assert compression.choose_encoding(accept(header), encodings) == expected
+
+
+def test_compress_stream_chunks_decode_incrementally():
+    chunks = ["첫 줄\n", b"", "둘째 줄\n" * 100, b"bytes\n"]
+    out = list(compression.compress_stream(iter(chunks), "gzip", 6))
+    # 조각마다 flush 하므로 끝나기 전에도 앞부분을 풀 수 있다
+    d = zlib.decompressobj(31)
+    assert d.decompress(out[0]) == "첫 줄\n".encode("utf-8")
+    assert gzip.decompress(b"".join(out)) == "".join(c if isinstance(c, str) else c.decode() for c in chunks).encode()
+
+
+def test_compress_stream_closes_source():
+    closed = []
+
+    def source():
+        try:
+            yield "a" * 10
+        finally:
+            closed.append(True)
+
+    list(compression.compress_stream(source(), "gzip"))
+    assert closed == [True]
+
+
+def many_games(client, n=30):
+    for _ in range(n):
+        post_game(client, NAMES)
+
+
+def test_list_is_gzipped_when_accepted(client):
+    many_games(client)
+    plain = client.get("/api/games")
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    resp = client.get("/api/games", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert json.loads(gzip.decompress(resp.get_data())) == plain.get_json()
+    assert len(resp.get_data()) < len(plain.get_data()) / 4
+
+
+def test_cached_compressed_body_is_reused(app, client):
+    many_games(client)
+    first = client.get("/api/games", headers={"Accept-Encoding": "gzip"}).get_data()
+    with app.app_context():
+        entries = madang.db_state(app.config["DB_PATH"]).response_cache._entries
+    # 압축한 바이트를 Content-Encoding 과 함께 보관한다
+    [(_, _, body, encoding)] = [e for k, e in entries.items() if k == ("/api/games", b"", "gzip")]
+    assert (body, encoding) == (first, "gzip")
+    assert client.get("/api/games", headers={"Accept-Encoding": "gzip"}).get_data() == first
+    # 압축을 받지 않는 클라이언트에게는 따로 만든 평문
+    plain = client.get("/api/games")
+    assert "Content-Encoding" not in plain.headers
+    assert len(plain.get_json()) == 30
+
+
+def test_small_bodies_stay_plain(client):
+    post_game(client, NAMES)
+    resp = client.get("/api/games", headers={"Accept-Encoding": "gzip"})
+    assert len(resp.get_data()) < 1024
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_threshold_and_level_are_configurable(app, client):
+    app.config["COMPRESS_MIN_BYTES"] = 0
+    app.config["COMPRESS_LEVELS"] = {**app.config["COMPRESS_LEVELS"], "gzip": 1}
+    resp = client.get("/api/badges", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(resp.get_data())) == []
+
+
+def test_csv_export_is_compressed(client):
+    many_games(client)
+    plain = client.get("/export")
+    resp = client.get("/export", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.mimetype == "text/csv"
+    assert gzip.decompress(resp.get_data()) == plain.get_data()
+    assert "madang_majhong_rating.csv" in resp.headers["Content-Disposition"]
+
+
+def test_streamed_response_is_compressed_chunk_by_chunk(app):
+    with app.test_request_context("/", headers={"Accept-Encoding": "gzip"}):
+        resp = Response((f"{i},김철수\n" for i in range(500)), mimetype="text/csv")
+        resp = madang.compress_response(resp)
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in resp.headers
+        body = b"".join(resp.response)
+    assert gzip.decompress(body).decode("utf-8") == "".join(f"{i},김철수\n" for i in range(500))
+
+
+@pytest.mark.parametrize("make", [
+    lambda: Response(b"x" * 5000, mimetype="image/png"),                         # 압축 대상 형식이 아님
+    lambda: Response(b"x" * 5000, status=304, mimetype="application/json"),
+    lambda: Response(b"x" * 5000, mimetype="application/json", headers={"Content-Encoding": "br"}),
+])
+def test_responses_left_alone(app, make):
+    with app.test_request_context("/", headers={"Accept-Encoding": "gzip"}):
+        resp = madang.compress_response(make())
+        assert resp.headers.get("Content-Encoding") in (None, "br")
+        assert resp.get_data() == b"x" * 5000
+
+
+def test_brotli(client):
+    brotli = pytest.importorskip("brotli")
+    many_games(client)
+    resp = client.get("/api/games", headers={"Accept-Encoding": "gzip, br"})
+    assert resp.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(resp.get_data())) == client.get("/api/games").get_json()
@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+from conftest import upload, wait_job
+
+import app as madang
+
+KOREAN_HEADER = "시간,P1 이름,P1 점수,P2 이름,P2 점수,P3 이름,P3 점수,P4 이름,P4 점수\r\n"
+
+
+def korean_csv(n, sep=","):
+    rows = [KOREAN_HEADER.replace(",", sep)]
+    for i in range(n):
+        rows.append(sep.join([f"2024-03-0{i % 9 + 1}T19:00", "김철수", "40000", "이영희", "30000",
+                              "박민수", "20000", "최지우", "10000"]) + "\r\n")
+    return "".join(rows)
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("이름".encode("utf-8"), "utf-8-sig"),
+    ("﻿이름".encode("utf-8"), "utf-8-sig"),
+    ("이름".encode("cp949"), "cp949"),
+    (b"plain ascii", "utf-8-sig"),
+    (b"", "utf-8-sig"),
+    (b"\xff\xff\xff", None),
+])
+def test_detect_encoding(data, expected):
+    assert madang.detect_csv_encoding(io.BytesIO(data)) == expected
+
+
+def test_detect_encoding_reads_only_a_prefix(monkeypatch):
+    monkeypatch.setattr(madang, "ENCODING_SAMPLE_BYTES", 7)
+    # 앞 7바이트에서 "철"(3바이트)이 잘려도 utf-8 로 본다. 뒤쪽의 cp949 바이트는 읽지 않는다
+    f = io.BytesIO("김철수".encode("utf-8") + "박".encode("cp949"))
+    assert madang.detect_csv_encoding(f) == "utf-8-sig"
+    assert f.tell() == 7
+
+
+@pytest.mark.parametrize("encoding, sep", [("utf-8", ","), ("utf-8-sig", ","), ("cp949", ","), ("cp949", ";")])
+def test_import_korean_csv(client, encoding, sep):
+    job_id = upload(client, "/import", korean_csv(30, sep).encode(encoding))
+    job = wait_job(client, job_id)
+    assert job["status"] == "done", job
+    assert job["rows_inserted"] == 30
+    games = client.get("/api/games").get_json()
+    assert {g["player1_name"] for g in games} == {"김철수"}
+    assert {g["player4_score"] for g in games} == {10000}
+
+
+def test_bad_bytes_after_the_sample_fail_the_job(app, client, monkeypatch):
+    monkeypatch.setattr(madang, "ENCODING_SAMPLE_BYTES", 256)
+    data = korean_csv(600).encode("utf-8") + "2024-03-01T19:00,박민수,40000,a,30000,b,20000,c,10000\r\n".encode("cp949")
+    job = wait_job(client, upload(client, "/import", data))
+    assert job["status"] == "failed"
+    # 텍스트는 덩어리로 디코딩되므로 줄 번호는 "근처"
+    assert "번째 줄 근처" in job["message"]
+    assert "utf-8-sig" in job["message"]
+    # 실패한 배치는 되돌리고, 그 앞 배치까지만 남는다
+    assert job["rows_parsed"] == 500
+    assert len(client.get("/api/games").get_json()) == 500
+
+
+def test_unknown_encoding_fails_the_job(client):
+    job = wait_job(client, upload(client, "/import", b"\xff\xfe\xfa\xfb" * 10))
+    assert job["status"] == "failed"
+    assert "인코딩" in job["message"]
@@ -0,0 +1,69 @@
+import random
+
+import gamestore
+from app import game_ranks
+
+NAMES = ["가", "나", "다", "라", "마", "바"]
+
+
+def build(games):
+    cols = gamestore.GameColumns(gamestore.NameTable())
+    for game_id, (minute, names, scores) in enumerate(games, start=1):
+        cols.append(game_id, minute, names, scores, game_ranks(scores))
+    return cols
+
+
+def brute_force(games, start, end):
+    acc = {}
+    for minute, names, scores in games:
+        if (start is not None and minute < start) or (end is not None and minute >= end):
+            continue
+        for name, score, rank in zip(names, scores, game_ranks(scores)):
+            t = acc.setdefault(name, [0, 0, 0, 0, 0, 0, score, 0])
+            t[0] += 1
+            t[rank] += 1
+            t[5] += score < 0
+            t[6] = max(t[6], score)
+            t[7] += score
+    return acc
+
+
+def random_games(rng, n):
+    # 시각이 뒤섞여 들어온다(오프라인 입력, 시각을 고친 CSV)
+    return [
+        (rng.choice([-1, rng.randint(0, 500)]), rng.sample(NAMES, 4),
+         [rng.randint(-20, 80) * 500 for _ in range(4)])
+        for _ in range(n)
+    ]
+
+
+def test_out_of_order_games_keep_player_columns_sorted():
+    rng = random.Random(3)
+    games = random_games(rng, 300)
+    cols = build(games)
+    for name in NAMES:
+        p = cols.player(name)
+        assert list(p.minute) == sorted(p.minute)
+        # 같은 분이면 들어온 순서
+        mine = [(m, s) for m, names, scores in games for n, s in zip(names, scores) if n == name]
+        assert list(zip(p.minute, p.score)) == sorted(mine, key=lambda g: g[0])
+
+
+def test_aggregate_matches_brute_force():
+    rng = random.Random(5)
+    games = random_games(rng, 300)
+    cols = build(games)
+    for start, end in [(None, None), (0, None), (None, 250), (100, 400), (300, 300), (-1, 0)]:
+        got = {cols.names.names[nid]: t for nid, t in cols.aggregate(start, end).items()}
+        assert got == brute_force(games, start, end), (start, end)
+
+
+def test_aggregate_after_more_games():
+    rng = random.Random(9)
+    games = random_games(rng, 100)
+    cols = build(games[:50])
+    cols.aggregate(100, 400)   # 누적 컬럼을 한 번 만든 뒤에
+    for game_id, (minute, names, scores) in enumerate(games[50:], start=51):
+        cols.append(game_id, minute, names, scores, game_ranks(scores))
+    got = {cols.names.names[nid]: t for nid, t in cols.aggregate(100, 400).items()}
+    assert got == brute_force(games, 100, 400)
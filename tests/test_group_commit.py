@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from group_commit import WriteCoordinator
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "writes.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v INTEGER NOT NULL)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def coordinator(db_path, **kwargs):
+    return WriteCoordinator(lambda: sqlite3.connect(db_path, timeout=10), **kwargs)
+
+
+def insert(v):
+    def write(conn):
+        conn.execute("INSERT INTO t (v) VALUES (?)", (v,))
+        return v
+    return write
+
+
+def values(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = sorted(r[0] for r in conn.execute("SELECT v FROM t"))
+    conn.close()
+    return rows
+
+
+def run_threads(n, target):
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def run(i):
+        barrier.wait()
+        results[i] = target(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_writes_share_batches(db_path):
+    writer = coordinator(db_path, max_wait=0.05)
+    results = run_threads(32, lambda i: writer.submit(insert(i)))
+
+    assert results == list(range(32))
+    assert values(db_path) == list(range(32))
+    assert writer.writes == 32
+    assert writer.batches < 32
+    assert writer.max_batch_size > 1
+
+
+def test_batch_respects_max_batch(db_path):
+    writer = coordinator(db_path, max_wait=0.05, max_batch=4)
+    run_threads(16, lambda i: writer.submit(insert(i)))
+
+    assert values(db_path) == list(range(16))
+    assert writer.max_batch_size <= 4
+
+
+def test_failed_write_is_rolled_back_alone(db_path):
+    writer = coordinator(db_path, max_wait=0.05)
+
+    def submit(i):
+        if i == 3:
+            def fail(conn):
+                conn.execute("INSERT INTO t (v) VALUES (?)", (-1,))
+                raise ValueError("rejected")
+            try:
+                writer.submit(fail)
+            except ValueError as e:
+                return e
+            return None
+        return writer.submit(insert(i))
+
+    results = run_threads(8, submit)
+
+    assert isinstance(results[3], ValueError)
+    assert values(db_path) == [0, 1, 2, 4, 5, 6, 7]
+    assert writer.failed_writes == 1
+    assert writer.failed_batches == 0
+
+
+def test_lone_write_does_not_wait(db_path):
+    writer = coordinator(db_path, max_wait=1.0)
+    started = time.monotonic()
+    assert writer.submit(insert(1)) == 1
+    assert time.monotonic() - started < 0.5
+
+
+def test_on_commit_runs_before_writers_return(db_path):
+    committed = []
+
+    def on_commit():
+        time.sleep(0.02)
+        committed.append(set(values(db_path)))
+
+    writer = coordinator(db_path, max_wait=0.02, on_commit=on_commit)
+
+    def submit(i):
+        writer.submit(insert(i))
+        # 돌아온 시점에는 자기 쓰기가 들어간 배치의 on_commit 이 이미 끝나 있어야 한다
+        return any(i in snapshot for snapshot in list(committed))
+
+    assert all(run_threads(8, submit))
+    assert committed[-1] == set(range(8))
@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from conftest import post_game
+
+import app as madang
+
+NAMES = ["가", "나", "다", "라"]
+
+
+def game_rows(app):
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    rows = conn.execute("SELECT id, created_at FROM games ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def minute(dt):
+    return dt.isoformat(timespec="minutes")
+
+
+def test_same_key_replays_first_game(app, client):
+    first = post_game(client, NAMES, key="k1")
+    again = post_game(client, NAMES, key="k1")
+    other = post_game(client, NAMES, key="k2")
+
+    assert first.status_code == 201
+    assert again.status_code == 200
+    assert again.get_json() == {"id": first.get_json()["id"], "replayed": True}
+    assert other.status_code == 201
+    assert len(game_rows(app)) == 2
+
+
+def test_without_key_every_post_is_a_new_game(app, client):
+    post_game(client, NAMES)
+    post_game(client, NAMES)
+    assert len(game_rows(app)) == 2
+
+
+def test_concurrent_posts_with_same_key_create_one_game(app):
+    barrier = threading.Barrier(8)
+    codes = []
+
+    def run():
+        with app.test_client() as c:
+            barrier.wait()
+            codes.append(post_game(c, NAMES, key="same").status_code)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(codes) == [200] * 7 + [201]
+    assert len(game_rows(app)) == 1
+
+
+def test_key_too_long(client):
+    resp = post_game(client, NAMES, key="x" * (madang.IDEMPOTENCY_KEY_MAX_LENGTH + 1))
+    assert resp.status_code == 400
+
+
+def test_rejected_write_does_not_remember_key(app, client):
+    assert post_game(client, NAMES, [40000, 30000, 20000, 0], key="k").status_code == 400
+    assert post_game(client, NAMES, key="k").status_code == 201
+    assert len(game_rows(app)) == 1
+
+
+def test_keyed_created_at_is_kept(app, client):
+    at = minute(datetime.now() - timedelta(days=2))
+    assert post_game(client, NAMES, key="k", created_at=at).status_code == 201
+    assert game_rows(app)[0][1] == at
+
+
+def test_unkeyed_created_at_is_ignored(app, client):
+    at = minute(datetime.now() - timedelta(days=2))
+    assert post_game(client, NAMES, created_at=at).status_code == 201
+    assert game_rows(app)[0][1] != at
+
+
+def test_malformed_created_at(client):
+    assert post_game(client, NAMES, key="k", created_at="yesterday").status_code == 400
+
+
+def test_out_of_range_created_at_uses_server_time(app, client):
+    too_old = minute(datetime.now() - madang.CLIENT_CREATED_AT_MAX_AGE - timedelta(days=1))
+    too_far = minute(datetime.now() + timedelta(hours=1))
+    assert post_game(client, NAMES, key="old", created_at=too_old).status_code == 201
+    assert post_game(client, NAMES, key="future", created_at=too_far).status_code == 201
+
+    now = datetime.now()
+    for _, created_at in game_rows(app):
+        assert abs(datetime.fromisoformat(created_at) - now) < timedelta(minutes=2)
@@ -0,0 +1,162 @@
+import io
+import os
+import sqlite3
+import time
+
+import pytest
+
+from conftest import upload, wait_job
+
+import app as madang
+
+HEADER = "created_at,player1_name,player2_name,player3_name,player4_name," \
+         "player1_score,player2_score,player3_score,player4_score\n"
+
+
+def csv_bytes(n, skip_every=0):
+    lines = [HEADER]
+    for i in range(n):
+        if skip_every and i % skip_every == skip_every - 1:
+            lines.append(",,,,,0,0,0,0\n")   # 이름이 없는 행은 건너뛴다
+        else:
+            lines.append(f"2024-03-01T19:{i % 60:02d},가{i % 7},나,다,라,40000,30000,20000,10000\n")
+    return "".join(lines).encode("utf-8")
+
+
+def fail_once_at(monkeypatch, kind, row):
+    """kind 작업의 row 번째 행에서 한 번만 JobFailed(프로세스가 죽은 것처럼 배치가 롤백된다)."""
+    handle, *rest = madang.JOB_KINDS[kind]
+    calls = [0]
+
+    def flaky(conn, csv_row, params):
+        calls[0] += 1
+        if calls[0] == row:
+            raise madang.JobFailed("일부러 실패")
+        return handle(conn, csv_row, params)
+
+    monkeypatch.setitem(madang.JOB_KINDS, kind, (flaky, *rest))
+
+
+def count(app, sql):
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    n = conn.execute(sql).fetchone()[0]
+    conn.close()
+    return n
+
+
+def test_games_import_runs_in_background(app, client):
+    job_id = upload(client, "/import", csv_bytes(1200, skip_every=100))
+    job = wait_job(client, job_id)
+    assert job["status"] == "done"
+    assert job["rows_parsed"] == 1200
+    assert job["rows_skipped"] == 12
+    assert job["rows_inserted"] == 1188
+    assert len(client.get("/api/games").get_json()) == 1188
+    # 끝난 작업의 업로드 파일은 지운다
+    assert os.listdir(app.config["UPLOAD_DIR"]) == []
+
+
+def test_form_upload_redirects_to_job_page(client):
+    resp = client.post("/import", data={"file": (io.BytesIO(csv_bytes(3)), "a.csv")})
+    assert resp.status_code == 302
+    page = client.get(resp.headers["Location"])
+    assert page.status_code == 200
+    assert "업로드 처리" in page.get_data(as_text=True)
+
+
+def test_failed_job_resumes_after_last_batch(app, client, monkeypatch):
+    fail_once_at(monkeypatch, "games", 700)
+    job_id = upload(client, "/import", csv_bytes(1200))
+    job = wait_job(client, job_id)
+    assert job["status"] == "failed"
+    assert job["message"] == "일부러 실패"
+    # 500행 배치 하나만 커밋되어 있다
+    assert job["rows_parsed"] == 500
+    assert count(app, "SELECT COUNT(*) FROM games") == 500
+
+    assert client.post(f"/api/jobs/{job_id}/resume").status_code == 202
+    job = wait_job(client, job_id)
+    assert job["status"] == "done"
+    assert job["rows_inserted"] == 1200
+    assert count(app, "SELECT COUNT(*) FROM games") == 1200
+    assert client.post(f"/api/jobs/{job_id}/resume").status_code == 400   # 실패한 작업만
+
+
+def test_archive_stays_hidden_until_done(app, client, monkeypatch):
+    fail_once_at(monkeypatch, "archive", 700)
+    job_id = upload(client, "/admin/archive_import", csv_bytes(1200), archive_name="2024 봄")
+    assert wait_job(client, job_id)["status"] == "failed"
+    # 반쯤 들어간 아카이브는 목록에도, 순위표에도 보이지 않는다
+    assert count(app, "SELECT COUNT(*) FROM archive_games") == 500
+    assert client.get("/api/archives").get_json() == []
+    archive_id = count(app, "SELECT id FROM archives")
+    assert client.get(f"/api/archives/{archive_id}/standings").status_code == 404
+
+    client.post(f"/api/jobs/{job_id}/resume")
+    assert wait_job(client, job_id)["status"] == "done"
+    archives = client.get("/api/archives").get_json()
+    assert [(a["name"], a["game_count"]) for a in archives] == [("2024 봄", 1200)]
+
+
+def test_cancel_running_archive_drops_partial_data(app, client, monkeypatch):
+    handle, *rest = madang.JOB_KINDS["archive"]
+
+    def cancel_midway(conn, csv_row, params):
+        # 처리 중에 취소 버튼을 누른 것과 같다(다음 배치 커밋 뒤에 확인)
+        conn.execute("UPDATE jobs SET cancel_requested = 1")
+        return handle(conn, csv_row, params)
+
+    monkeypatch.setitem(madang.JOB_KINDS, "archive", (cancel_midway, *rest))
+    job_id = upload(client, "/admin/archive_import", csv_bytes(1200), archive_name="취소할 것")
+    job = wait_job(client, job_id)
+    assert job["status"] == "cancelled"
+    assert count(app, "SELECT COUNT(*) FROM archives") == 0
+    assert count(app, "SELECT COUNT(*) FROM archive_games") == 0
+    assert os.listdir(app.config["UPLOAD_DIR"]) == []
+
+
+def insert_job(app, status, heartbeat_at=None):
+    os.makedirs(app.config["UPLOAD_DIR"], exist_ok=True)
+    path = os.path.join(app.config["UPLOAD_DIR"], f"{status}.csv")
+    with open(path, "wb") as f:
+        f.write(csv_bytes(10))
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    cur = conn.execute("""
+        INSERT INTO jobs (kind, status, params, upload_path, heartbeat_at, created_at, updated_at)
+        VALUES ('games', ?, '{}', ?, ?, '2024-01-01T00:00', '2024-01-01T00:00')
+    """, (status, path, heartbeat_at))
+    conn.commit()
+    conn.close()
+    return cur.lastrowid, path
+
+
+def test_cancel_queued_job(app, client):
+    client.get("/api/games")   # 첫 요청에서 밀린 작업을 다시 맡기는 것을 먼저 끝낸다
+    job_id, path = insert_job(app, "queued")
+    resp = client.post(f"/api/jobs/{job_id}/cancel")
+    assert resp.get_json() == {"ok": True, "status": "cancelled"}
+    assert not os.path.exists(path)
+    assert client.post("/api/jobs/999/cancel").status_code == 404
+
+
+def test_stale_running_job_is_picked_up(app, client):
+    client.get("/api/games")
+    job_id, _ = insert_job(app, "running", heartbeat_at=time.time() - madang.JOB_STALE_SECONDS - 1)
+    # 맡았던 워커가 죽은 작업: 상태를 묻는 워커가 이어서 한다
+    assert client.get(f"/api/jobs/{job_id}").get_json()["stale"] is True
+    assert wait_job(client, job_id)["status"] == "done"
+    assert len(client.get("/api/games").get_json()) == 10
+
+
+def test_queued_jobs_resume_on_first_request(app, client):
+    job_id, _ = insert_job(app, "queued")
+    assert wait_job(client, job_id)["status"] == "done"
+
+
+def test_unknown_job(client):
+    assert client.get("/api/jobs/12345").status_code == 404
+
+
+@pytest.mark.parametrize("url", ["/import", "/admin/archive_import"])
+def test_upload_requires_file(client, url):
+    assert client.post(url, data={"archive_name": "x"}).status_code == 400
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+
+import pytest
+
+from conftest import post_game
+
+import app as madang
+from leagues import valid_league
+
+NAMES = ["가", "나", "다", "라"]
+
+
+@pytest.fixture
+def leagues_dir(tmp_path):
+    path = tmp_path / "leagues"
+    path.mkdir()
+    for name in ("seoul", "busan"):
+        madang.migrate_db(str(path / f"{name}.db"))
+    return path
+
+
+@pytest.fixture
+def app(tmp_path, leagues_dir):
+    return madang.create_app({
+        "TESTING": True,
+        "DB_PATH": str(tmp_path / "madang.db"),
+        "UPLOAD_DIR": str(tmp_path / "uploads"),
+        "ASSET_PIPELINE": False,
+        "LEAGUES_DIR": str(leagues_dir),
+        "LEAGUE_HOSTS": {"busan.example.org": "busan"},
+        "LEAGUE_DOMAIN": "example.com",
+    })
+
+
+def game_count(path):
+    conn = sqlite3.connect(str(path))
+    n = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+    conn.close()
+    return n
+
+
+@pytest.mark.parametrize("name, ok", [
+    ("seoul", True),
+    ("club-7_a", True),
+    ("0", True),
+    ("", False),
+    ("Seoul", False),
+    ("-seoul", False),
+    ("../main", False),
+    ("a" * 41, False),
+])
+def test_valid_league(name, ok):
+    assert valid_league(name) is ok
+
+
+def test_prefixed_writes_go_to_league_db(app, client, leagues_dir):
+    assert post_game(client, NAMES, url="/l/seoul/api/games").status_code == 201
+
+    assert game_count(leagues_dir / "seoul.db") == 1
+    assert game_count(leagues_dir / "busan.db") == 0
+    assert game_count(app.config["DB_PATH"]) == 0
+    assert len(client.get("/l/seoul/api/games").get_json()) == 1
+    assert client.get("/api/games").get_json() == []
+
+
+def test_unknown_league(client, leagues_dir):
+    resp = client.get("/l/nowhere/api/games")
+    assert resp.status_code == 404
+    assert not os.path.exists(leagues_dir / "nowhere.db")
+
+
+def test_league_from_host(app, client, leagues_dir):
+    post_game(client, NAMES, headers={"Host": "busan.example.org"})
+    post_game(client, NAMES, headers={"Host": "seoul.example.com"})
+
+    assert game_count(leagues_dir / "busan.db") == 1
+    assert game_count(leagues_dir / "seoul.db") == 1
+    assert game_count(app.config["DB_PATH"]) == 0
+
+
+def test_leagues_disabled(tmp_path):
+    app = madang.create_app({
+        "TESTING": True,
+        "DB_PATH": str(tmp_path / "plain.db"),
+        "UPLOAD_DIR": str(tmp_path / "uploads"),
+        "ASSET_PIPELINE": False,
+    })
+    # 라우터가 없으면 /l/... 는 그냥 없는 경로다
+    assert app.test_client().get("/l/seoul/api/games").status_code == 404
+
+
+def test_idle_league_is_checked_again_after_eviction(app, client, leagues_dir, monkeypatch):
+    path = str(leagues_dir / "seoul.db")
+    assert client.get("/l/seoul/api/games").status_code == 200
+    assert madang._DB_STATES[path].schema_checked
+
+    # 쉬는 리그를 내리면 확인 표시도 같이 사라진다
+    app.config["LEAGUE_IDLE_SECONDS"] = -1
+    monkeypatch.setattr(madang, "_db_states_swept_at", float("-inf"))
+    assert client.get("/api/games").status_code == 200
+    assert path not in madang._DB_STATES
+
+    # 그 사이 파일이 지워졌으면 다시 확인해서 404
+    os.remove(path)
+    assert client.get("/l/seoul/api/games").status_code == 404
+    assert path not in madang._DB_STATES
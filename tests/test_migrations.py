@@ -0,0 +1,127 @@
+import random
+import sqlite3
+
+import pytest
+
+import app as madang
+
+GAME_COLUMNS = (
+    "created_at, player1_name, player2_name, player3_name, player4_name, "
+    "player1_score, player2_score, player3_score, player4_score"
+)
+NAMES = ["김철수", "이영희", " 박민수 ", "최지우", "강감찬", "Alice", "bob", "홍길동", "ㄱ나다", "뷁쉛"]
+# 마이그레이션 결과를 지금의 갱신 코드로 다시 계산한 것과 비교할 표
+DERIVED_TABLES = (
+    "player_aggregates", "player_period_stats", "profile_standings", "player_names",
+    "archive_standings", "archive_player_stats",
+)
+
+
+def migrate_to(monkeypatch, path, step):
+    monkeypatch.setattr(madang, "MIGRATIONS", [m for m in madang.MIGRATIONS if m[0] <= step])
+    monkeypatch.setattr(madang, "SCHEMA_VERSION", step)
+    assert madang.migrate_db(path) == step
+    monkeypatch.undo()
+
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    return version
+
+
+def random_game(rng):
+    names = rng.sample(NAMES, 4)
+    scores = [rng.choice([25000, 30000, -1000, 45000, rng.randint(-20, 80) * 500]) for _ in range(4)]
+    created_at = rng.choice([
+        "2024-%02d-%02dT1%d:3%d" % (rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 9), rng.randint(0, 9)),
+        "2023-12-31 23:59:00",
+        "2025-01-01",
+        "bad",
+    ])
+    return (created_at, *names, *scores)
+
+
+def fill_v4(conn, rng):
+    for table in ("games", "tournament_games"):
+        for _ in range(60):
+            conn.execute(f"INSERT INTO {table} ({GAME_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", random_game(rng))
+    for archive_id in (3, 7):
+        conn.execute(
+            "INSERT INTO archives (id, name, created_at) VALUES (?, ?, ?)",
+            (archive_id, f"시즌 {archive_id}", "2024-01-01T00:00"),
+        )
+        for _ in range(40):
+            conn.execute(
+                f"INSERT INTO archive_games (archive_id, {GAME_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (archive_id, *random_game(rng)),
+            )
+    conn.execute(
+        "INSERT INTO player_badges (player_name, badge_code, granted_at) VALUES (?, ?, ?)",
+        ("뱃지만", 1, "2024-01-01T00:00"),
+    )
+    conn.commit()
+
+
+def dump(conn, tables):
+    return {t: sorted(repr(tuple(r)) for r in conn.execute(f"SELECT * FROM {t}").fetchall()) for t in tables}
+
+
+def test_fresh_db_reaches_latest_version(tmp_path):
+    path = str(tmp_path / "fresh.db")
+    assert madang.migrate_db(path) == madang.SCHEMA_VERSION
+    assert user_version(path) == madang.SCHEMA_VERSION
+    # 두 번째는 아무것도 하지 않는다
+    assert madang.migrate_db(path) == madang.SCHEMA_VERSION
+
+
+def test_migration_steps_are_numbered_in_order():
+    steps = [m[0] for m in madang.MIGRATIONS]
+    assert steps == list(range(1, len(steps) + 1))
+
+
+def test_existing_db_without_version_keeps_its_rows(tmp_path):
+    # 마이그레이션 도입 전 init_db 로 만들어진 DB(user_version 0)
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    madang._m001_base_tables(conn)
+    conn.execute("INSERT INTO archives (name, created_at) VALUES ('시즌 1', '2024-01-01T00:00')")
+    conn.commit()
+    conn.close()
+    assert user_version(path) == 0
+
+    assert madang.migrate_db(path) == madang.SCHEMA_VERSION
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT name FROM archives").fetchall() == [("시즌 1",)]
+    conn.close()
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_upgrade_from_v4_matches_live_rollups(tmp_path, monkeypatch, seed):
+    path = str(tmp_path / "old.db")
+    migrate_to(monkeypatch, path, 4)
+    conn = sqlite3.connect(path)
+    fill_v4(conn, random.Random(seed))
+    conn.close()
+
+    assert madang.migrate_db(path) == madang.SCHEMA_VERSION
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    migrated = dump(conn, DERIVED_TABLES + ("archives",))
+    assert migrated["player_aggregates"] and migrated["archive_standings"]
+
+    conn.execute("BEGIN")
+    for table in DERIVED_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    madang.rebuild_player_rollups(conn)
+    for (archive_id,) in conn.execute("SELECT id FROM archives").fetchall():
+        madang.store_archive_standings(conn, archive_id)
+    conn.execute("COMMIT")
+    live = dump(conn, DERIVED_TABLES + ("archives",))
+    conn.close()
+
+    for table in live:
+        assert migrated[table] == live[table], table
+
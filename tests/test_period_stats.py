@@ -0,0 +1,138 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import upload, wait_job
+
+import app as madang
+
+NAMES = ["김철수", "이영희", "박민수", "최지우", "Alice"]
+HEADER = "created_at,player1_name,player2_name,player3_name,player4_name," \
+         "player1_score,player2_score,player3_score,player4_score\n"
+
+
+def random_games(seed, n=80):
+    rng = random.Random(seed)
+    start = datetime(2024, 12, 20, 19, 0)
+    games = []
+    for _ in range(n):
+        created_at = (start + timedelta(hours=rng.randint(0, 24 * 90))).isoformat(timespec="minutes")
+        cut = sorted(rng.randint(0, 200) * 500 for _ in range(3))
+        scores = [cut[0], cut[1] - cut[0], cut[2] - cut[1], 100000 - cut[2]]
+        games.append((created_at, rng.sample(NAMES, 4), scores))
+    return games
+
+
+def import_games(client, games, url="/import"):
+    lines = [HEADER] + [f"{t},{','.join(names)},{','.join(map(str, scores))}\n" for t, names, scores in games]
+    assert wait_job(client, upload(client, url, "".join(lines).encode("utf-8")))["status"] == "done"
+
+
+def brute_force(games, bucket):
+    """(기간, 이름) → [대국 수, pt 합, 1~4등]"""
+    out = {}
+    for created_at, names, scores in games:
+        period = madang.period_keys(created_at)[bucket]
+        ranks = madang.game_ranks(scores)
+        for name, score, rank in zip(names, scores, ranks):
+            t = out.setdefault((period, name), [0, 0.0, 0, 0, 0, 0])
+            t[0] += 1
+            t[1] += (score - 30000) / 1000.0 + (50, 10, -10, -30)[rank - 1]
+            t[1 + rank] += 1
+    return out
+
+
+@pytest.mark.parametrize("created_at, expected", [
+    ("2025-03-15T19:00", {"month": "2025-03", "week": "2025-W11"}),
+    ("2024-12-30 10:00:00", {"month": "2024-12", "week": "2025-W01"}),   # ISO 주는 해를 넘긴다
+    ("2025-01-01", {"month": "2025-01", "week": "2025-W01"}),
+    ("", None),
+    ("어제", None),
+])
+def test_period_keys(created_at, expected):
+    assert madang.period_keys(created_at) == expected
+
+
+@pytest.mark.parametrize("bucket", madang.PERIOD_BUCKETS)
+def test_timeline_matches_brute_force(client, bucket):
+    games = random_games(1)
+    import_games(client, games)
+    expected = brute_force(games, bucket)
+    for name in NAMES:
+        timeline = client.get(f"/api/players/{name}/timeline?bucket={bucket}").get_json()
+        periods = sorted(p for p, n in expected if n == name)
+        assert [p["period"] for p in timeline["periods"]] == periods
+        for p in timeline["periods"]:
+            t = expected[(p["period"], name)]
+            assert p["games"] == t[0]
+            assert p["pt_sum"] == pytest.approx(t[1], abs=0.05)
+            assert p["rank_counts"] == t[2:]
+
+
+def test_timeline_range_and_source(client):
+    games = random_games(2)
+    import_games(client, games[:40])
+    import_games(client, games[40:], url="/import_tournament")
+    expected = brute_force(games, "month")
+
+    resp = client.get("/api/players/Alice/timeline?from=2025-01&to=2025-02-10").get_json()
+    assert [p["period"] for p in resp["periods"]] == \
+        sorted(p for p, n in expected if n == "Alice" and "2025-01" <= p <= "2025-02")
+
+    only_live = brute_force(games[:40], "month")
+    resp = client.get("/api/players/Alice/timeline?source=games").get_json()
+    assert sum(p["games"] for p in resp["periods"]) == sum(t[0] for (p, n), t in only_live.items() if n == "Alice")
+
+    assert client.get("/api/players/Alice/timeline?bucket=year").status_code == 400
+
+
+def test_activity_and_player_of_the_month(client):
+    games = random_games(3)
+    import_games(client, games)
+    expected = brute_force(games, "month")
+    activity = client.get("/api/activity?min_games=3").get_json()
+    for p in activity["periods"]:
+        rows = {n: t for (period, n), t in expected.items() if period == p["period"]}
+        assert p["player_games"] == sum(t[0] for t in rows.values())
+        assert p["games"] == p["player_games"] // 4
+        assert p["players"] == len(rows)
+        eligible = {n: t for n, t in rows.items() if t[0] >= 3}
+        if not eligible:
+            assert p["top"] is None
+            continue
+        best = max(t[1] for t in eligible.values())
+        assert p["top"]["pt_sum"] == pytest.approx(best, abs=0.05)
+        assert eligible[p["top"]["player_name"]][1] == pytest.approx(best)
+
+
+def test_delete_rebuilds_only_that_game(app, client):
+    games = [("2025-01-06T19:00", NAMES[:4], [40000, 30000, 20000, 10000]),
+             ("2025-01-07T19:00", NAMES[:4], [10000, 20000, 30000, 40000])]
+    import_games(client, games)
+    first = min(g["id"] for g in client.get("/api/games").get_json())
+    client.delete(f"/api/games/{first}")
+    timeline = client.get(f"/api/players/{NAMES[0]}/timeline?bucket=week").get_json()
+    assert timeline["periods"] == [{
+        "period": "2025-W02", "games": 1, "pt_sum": -50.0, "rank_counts": [0, 0, 0, 1], "avg_rank": 4.0,
+    }]
+
+
+def test_unreadable_dates_are_not_bucketed(app, client):
+    import_games(client, [("2025-01-06T19:00", NAMES[:4], [40000, 30000, 20000, 10000])])
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    conn.execute("UPDATE games SET created_at = 'unknown'")
+    madang.rebuild_period_stats(conn)
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM player_period_stats").fetchone()[0] == 0
+    conn.close()
+
+
+def test_uses_created_at_index(app, client):
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    plan = " ".join(r[-1] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM games WHERE created_at >= '2025-01'"
+    ))
+    conn.close()
+    assert "idx_games_created_at" in plan
@@ -0,0 +1,101 @@
+import io
+import sqlite3
+
+import pytest
+
+from conftest import post_game
+
+import app as madang
+from snapshot_format import write_snapshot
+
+
+@pytest.mark.parametrize("name, norm, cho", [
+    ("김민수", "ㄱㅣㅁㅁㅣㄴㅅㅜ", "ㄱㅁㅅ"),
+    ("닭", "ㄷㅏㄹㄱ", "ㄷ"),
+    ("의왕", "ㅇㅡㅣㅇㅗㅏㅇ", "ㅇㅇ"),
+    ("  Alice ", "alice", "alice"),
+    ("ㄱㅁ", "ㄱㅁ", "ㄱㅁ"),
+    ("ㄺ", "ㄹㄱ", "ㄹㄱ"),
+    ("", "", ""),
+])
+def test_name_keys(name, norm, cho):
+    assert madang.name_keys(name) == (norm, cho)
+
+
+def test_migration_keys_match_live_keys():
+    # 9단계 백필은 name_keys 를 얼려 둔 사본으로 키를 만든다
+    names = ["김민수", "닭도리", "뷁쉛", "의왕", "Alice", "ㄳ", "ㅘ", "홍길동 2", ""]
+    names += [chr(c) for c in range(0xAC00, 0xD7A4, 97)]
+    for name in names:
+        assert madang._mig_name_keys(name) == madang.name_keys(name), name
+
+
+def search(client, q, **args):
+    resp = client.get("/api/players/search", query_string={"q": q, **args})
+    assert resp.status_code == 200
+    return [p["name"] for p in resp.get_json()]
+
+
+@pytest.fixture
+def players(client):
+    post_game(client, ["김민수", "김미나", "강민호", "Alice"])
+    post_game(client, ["김미나", "닭도리", "박지성", "alpha"])
+    return client
+
+
+def test_jamo_prefix_matches_syllable_being_typed(players):
+    # "김미" 는 "김민"을 치는 도중이기도 하다
+    assert search(players, "김미") == ["김미나", "김민수"]
+    # "김민"은 "김미나"를 치는 도중("ㄱㅣㅁㅁㅣㄴ")과도 같다
+    assert search(players, "김민") == ["김미나", "김민수"]
+    assert search(players, "김민ㅅ") == ["김민수"]
+    assert search(players, "달ㄱ") == ["닭도리"]
+    assert search(players, "다") == ["닭도리"]
+
+
+def test_choseong_prefix(players):
+    assert search(players, "ㄱㅁ") == ["김미나", "강민호", "김민수"]
+    assert search(players, "ㄱㅁㅅ") == ["김민수"]
+    # 완성된 글자가 섞이면 초성으로는 찾지 않는다
+    assert search(players, "김") == ["김미나", "김민수"]
+
+
+def test_latin_names_ignore_case(players):
+    assert search(players, "AL") == ["Alice", "alpha"]
+    assert search(players, "alI") == ["Alice"]
+
+
+def test_limit(players):
+    assert search(players, "ㄱ", limit=1) == ["김미나"]
+    assert len(search(players, "")) == 7
+    assert players.get("/api/players/search?q=a&limit=0").status_code == 400
+
+
+def test_recent_players_first(app, client):
+    rows = [("2023-03-0%dT19:00" % d, "김옛날", "b", "c", "d", 40000, 30000, 20000, 10000) for d in range(1, 6)]
+    buf = io.BytesIO()
+    write_snapshot(buf, {"uma": [20, 10, -10, -20], "return_score": 30000, "total_score": 100000},
+                   [{"name": "2023", "created_at": "2023-12-31T00:00", "games": rows}])
+    resp = client.post("/api/admin/snapshot_import", data={"file": (io.BytesIO(buf.getvalue()), "s.mjsnap")})
+    assert resp.status_code == 201
+    post_game(client, ["김요즘", "x", "y", "z"])
+    # 대국 수는 적어도 최근에 친 사람이 위로
+    assert search(client, "ㄱ") == ["김요즘", "김옛날"]
+
+
+def test_names_without_games_or_badges_are_hidden(app, client):
+    game_id = post_game(client, ["김민수", "b", "c", "d"]).get_json()["id"]
+    assert search(client, "김") == ["김민수"]
+    assert client.delete(f"/api/games/{game_id}").status_code == 200
+    assert search(client, "김") == []
+
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    conn.execute(
+        "INSERT INTO player_badges (player_name, badge_code, granted_at) VALUES (?, ?, ?)",
+        ("김뱃지", 1, "2024-01-01T00:00"),
+    )
+    madang.sync_player_names(conn)
+    conn.execute("UPDATE data_versions SET version = version + 1")
+    conn.commit()
+    conn.close()
+    assert search(client, "김") == ["김뱃지"]
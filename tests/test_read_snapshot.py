@@ -0,0 +1,115 @@
+import sqlite3
+import time
+
+import pytest
+
+from conftest import post_game
+
+import app as madang
+
+
+def wait_for(fn, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = fn()
+        if value:
+            return value
+        time.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+@pytest.fixture
+def disk(tmp_path):
+    path = str(tmp_path / "disk.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def write(path, value):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.commit()
+    conn.close()
+
+
+def values(conn):
+    return [r[0] for r in conn.execute("SELECT v FROM t ORDER BY v")]
+
+
+def test_connect_waits_for_matching_copy(disk):
+    snap = madang.ReadSnapshot(disk)
+    try:
+        # 아직 복사본이 없으면 None(그동안 디스크에서 읽는다)
+        assert snap.connect(1) is None
+        conn = wait_for(lambda: snap.connect(1))
+        assert values(conn) == [1]
+        conn.close()
+
+        write(disk, 2)
+        assert snap.connect(2) is None   # 버전이 바뀌면 새 복사가 끝날 때까지 None
+        conn = wait_for(lambda: snap.connect(2))
+        assert values(conn) == [1, 2]
+        conn.close()
+    finally:
+        snap.close()
+
+
+def test_open_connection_keeps_its_generation(disk):
+    snap = madang.ReadSnapshot(disk)
+    try:
+        old = wait_for(lambda: snap.connect(1))
+        write(disk, 2)
+        new = wait_for(lambda: snap.connect(2))
+        assert values(old) == [1]
+        assert values(new) == [1, 2]
+        old.close()
+        new.close()
+    finally:
+        snap.close()
+
+
+def test_closed_snapshot_stays_on_disk(disk):
+    snap = madang.ReadSnapshot(disk)
+    wait_for(lambda: snap.connect(1)).close()
+    snap.close()
+    assert snap.connect(1) is None
+    time.sleep(0.05)
+    assert snap.connect(1) is None
+
+
+@pytest.fixture
+def snapshot_client(tmp_path):
+    app = madang.create_app({
+        "TESTING": True,
+        "DB_PATH": str(tmp_path / "madang.db"),
+        "ASSET_PIPELINE": False,
+        "READ_SNAPSHOT": True,
+    })
+    return app, app.test_client()
+
+
+def test_reads_see_own_writes(snapshot_client):
+    app, client = snapshot_client
+    for n in range(1, 6):
+        assert post_game(client, ["가", "나", "다", "라"]).status_code == 201
+        # 복사가 끝나기 전이면 디스크에서 읽으므로 방금 쓴 것이 항상 보인다
+        assert len(client.get("/api/games").get_json()) == n
+
+
+def test_reads_move_to_memory(snapshot_client):
+    app, client = snapshot_client
+    post_game(client, ["가", "나", "다", "라"])
+
+    def memory_conn():
+        with app.test_request_context("/"):
+            conn = madang.get_read_db()
+            files = [r[2] for r in conn.execute("PRAGMA database_list")]
+            rows = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+            conn.close()
+            return files == [""] and rows
+
+    assert wait_for(memory_conn) == 1
@@ -0,0 +1,98 @@
+import sqlite3
+
+from conftest import post_game
+
+import app as madang
+
+NAMES = ["가", "나", "다", "라"]
+
+
+def test_lru_drops_oldest_over_budget():
+    cache = madang.ResponseCache(10)
+    cache.put("a", frozenset({"games"}), (1,), b"aaaa")
+    cache.put("b", frozenset({"games"}), (1,), b"bbbb")
+    assert cache.get("a", (1,)) == (b"aaaa", None)   # a 가 최근 것으로
+    cache.put("c", frozenset({"badges"}), (1,), b"cccc")
+    assert cache.get("b", (1,)) is None
+    assert cache.get("a", (1,)) is not None
+    assert cache.size == 8
+
+    cache.put("huge", frozenset(), (1,), b"x" * 11)   # 한도보다 큰 응답은 넣지 않는다
+    assert cache.get("huge", (1,)) is None
+    assert cache.size == 8
+
+
+def test_version_mismatch_and_scope_drop():
+    cache = madang.ResponseCache(100)
+    cache.put("games", frozenset({"games", "*"}), (1, 1), b"g", "gzip")
+    cache.put("badges", frozenset({"badges", "*"}), (1, 1), b"b")
+    assert cache.get("games", (1, 1)) == (b"g", "gzip")
+    assert cache.get("games", (2, 1)) is None
+
+    cache.drop_scopes({"games"})
+    assert cache.get("games", (1, 1)) is None
+    assert cache.get("badges", (1, 1)) == (b"b", None)
+    cache.drop_scopes({"*"})
+    assert cache.size == 0
+
+
+def cache_keys(app):
+    with app.app_context():
+        state = madang.db_state(app.config["DB_PATH"])
+        return {(path, query) for path, query, _ in state.response_cache._entries}
+
+
+def test_list_is_cached_until_a_write(app, client):
+    post_game(client, NAMES)
+    assert len(client.get("/api/games").get_json()) == 1
+    assert ("/api/games", b"") in cache_keys(app)
+    client.get("/api/badges")
+
+    post_game(client, NAMES)
+    client.get("/api/badges")   # 버전 확인은 다음 요청 때
+    # 대국 목록만 버려지고 뱃지 목록은 남는다
+    assert ("/api/games", b"") not in cache_keys(app)
+    assert ("/api/badges", b"") in cache_keys(app)
+    assert len(client.get("/api/games").get_json()) == 2
+
+
+def test_write_from_another_worker_invalidates(app, client):
+    assert client.get("/api/games").get_json() == []
+    # 다른 워커(다른 연결)가 쓰고 커밋했다
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    conn.execute("""
+        INSERT INTO games (created_at, player1_name, player2_name, player3_name, player4_name,
+                           player1_score, player2_score, player3_score, player4_score)
+        VALUES ('2024-01-01T19:00', '가', '나', '다', '라', 40000, 30000, 20000, 10000)
+    """)
+    madang.bump_data_versions(conn, "games")
+    conn.commit()
+    conn.close()
+    assert len(client.get("/api/games").get_json()) == 1
+
+
+def test_query_string_is_part_of_the_key(client):
+    for _ in range(3):
+        post_game(client, NAMES)
+    assert len(client.get("/api/games?limit=1").get_json()) == 1
+    assert len(client.get("/api/games").get_json()) == 3
+
+
+def test_archive_scopes_are_separate(app, client):
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    for archive_id in (1, 2):
+        conn.execute("INSERT INTO archives (id, name, created_at) VALUES (?, ?, '2024-01-01T00:00')",
+                     (archive_id, f"a{archive_id}"))
+    conn.commit()
+    conn.close()
+    client.get("/api/archives/1/games")
+    client.get("/api/archives/2/games")
+
+    conn = sqlite3.connect(app.config["DB_PATH"])
+    madang.bump_data_versions(conn, "archive:1")
+    conn.commit()
+    conn.close()
+    client.get("/api/games")   # 버전 확인은 다음 요청 때
+    keys = cache_keys(app)
+    assert ("/api/archives/1/games", b"") not in keys
+    assert ("/api/archives/2/games", b"") in keys
@@ -0,0 +1,180 @@
+import random
+
+import pytest
+
+from conftest import post_game, wait_job
+
+import app as madang
+
+NAMES = ["김철수", "이영희", "박민수", "최지우", "Alice"]
+M_LEAGUE = {"name": "M리그", "uma": [45, 5, -15, -35], "return_score": 25000, "total_score": 100000}
+
+
+def play(client, n=30, seed=5, url="/api/games"):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(n):
+        cut = sorted(rng.randint(0, 200) * 500 for _ in range(3))
+        scores = [cut[0], cut[1] - cut[0], cut[2] - cut[1], 100000 - cut[2]]
+        names = rng.sample(NAMES, 4)
+        assert post_game(client, names, scores, url=url).status_code == 201
+        games.append((names, scores))
+    return games
+
+
+def brute_force(games, profile):
+    pts, counts = {}, {}
+    for names, scores in games:
+        for name, score, rank in zip(names, scores, madang.game_ranks(scores)):
+            pts[name] = pts.get(name, 0.0) + (score - profile["return_score"]) / 1000.0 + profile["uma"][rank - 1]
+            counts.setdefault(name, [0, 0, 0, 0])[rank - 1] += 1
+    return pts, counts
+
+
+def check_standings(body, games, profile):
+    pts, counts = brute_force(games, profile)
+    assert sorted(s["player_name"] for s in body["standings"]) == sorted(pts)
+    order = [pts[s["player_name"]] for s in body["standings"]]
+    assert order == sorted(order, reverse=True)
+    for s in body["standings"]:
+        assert s["pt_sum"] == pytest.approx(pts[s["player_name"]], abs=0.05)
+        assert s["rank_counts"] == counts[s["player_name"]]
+
+
+def create_profile(client, **override):
+    resp = client.post("/api/scoring_profiles", json={**M_LEAGUE, **override})
+    assert resp.status_code == 201, resp.get_json()
+    return resp.get_json()["id"]
+
+
+def test_default_profile(client):
+    profiles = client.get("/api/scoring_profiles").get_json()
+    assert profiles == [{
+        "id": madang.DEFAULT_PROFILE_ID, "name": profiles[0]["name"],
+        "uma": [50, 10, -10, -30], "return_score": 30000, "total_score": 100000, "targets": [],
+    }]
+    assigned = client.get("/api/scoring_profiles/assigned").get_json()
+    assert assigned["games"] == assigned["tournament"] == assigned["default"]
+
+
+def test_default_standings_are_ready(client):
+    games = play(client)
+    resp = client.get("/api/standings?target=games")
+    assert resp.status_code == 200
+    check_standings(resp.get_json(), games, {"uma": [50, 10, -10, -30], "return_score": 30000})
+
+
+def test_get_never_computes(client):
+    play(client, 5)
+    profile_id = create_profile(client)
+    for _ in range(2):
+        resp = client.get(f"/api/standings?target=games&profile={profile_id}")
+        assert resp.status_code == 202
+        assert resp.get_json() == {"status": "pending", "job_id": None}
+
+
+def test_post_computes_other_profile(client):
+    games = play(client)
+    profile_id = create_profile(client)
+    resp = client.post("/api/standings", json={"target": "games", "profile": profile_id})
+    assert resp.status_code == 202
+    job_id = resp.get_json()["job_id"]
+    assert wait_job(client, job_id)["status"] == "done"
+
+    resp = client.get(f"/api/standings?target=games&profile={profile_id}")
+    assert resp.status_code == 200
+    check_standings(resp.get_json(), games, M_LEAGUE)
+    assert client.post("/api/standings", json={"target": "games", "profile": profile_id}).get_json() == \
+        {"status": "ready"}
+
+
+def test_assign_recomputes_then_switches_back_from_cache(client):
+    games = play(client)
+    profile_id = create_profile(client)
+    resp = client.post(f"/api/scoring_profiles/{profile_id}/assign", json={"target": "games"})
+    assert resp.status_code == 202
+    assert wait_job(client, resp.get_json()["job_id"])["status"] == "done"
+    check_standings(client.get("/api/standings?target=games").get_json(), games, M_LEAGUE)
+
+    # 새 대국은 배정된 프로필 순위표에 바로 더해진다
+    games += play(client, 3, seed=9)
+    check_standings(client.get("/api/standings?target=games").get_json(), games, M_LEAGUE)
+
+    # 기본 프로필 순위표는 캐시로 남지 않았다(배정이 풀린 뒤 대국이 바뀜) → 다시 계산
+    resp = client.post(f"/api/scoring_profiles/{madang.DEFAULT_PROFILE_ID}/assign", json={"target": "games"})
+    assert resp.status_code == 202
+    wait_job(client, resp.get_json()["job_id"])
+    # 방금까지 배정돼 있던 M리그 순위표는 캐시로 남아 있어 바로 돌아간다
+    resp = client.post(f"/api/scoring_profiles/{profile_id}/assign", json={"target": "games"})
+    assert resp.status_code == 200
+    assert resp.get_json() == {"status": "ready"}
+    check_standings(client.get("/api/standings?target=games").get_json(), games, M_LEAGUE)
+
+
+def test_cache_of_unassigned_profile_is_dropped_on_write(client):
+    play(client, 5)
+    profile_id = create_profile(client)
+    job_id = client.post("/api/standings", json={"target": "games", "profile": profile_id}).get_json()["job_id"]
+    wait_job(client, job_id)
+    assert client.get(f"/api/standings?target=games&profile={profile_id}").status_code == 200
+    play(client, 1, seed=11)
+    assert client.get(f"/api/standings?target=games&profile={profile_id}").status_code == 202
+    # 다른 대상의 캐시는 그대로
+    assert client.get("/api/standings?target=tournament").status_code == 200
+
+
+def test_total_score_follows_assigned_profile(client):
+    profile_id = create_profile(client, name="4만점", return_score=40000, total_score=120000)
+    client.post(f"/api/scoring_profiles/{profile_id}/assign", json={"target": "tournament"})
+    resp = post_game(client, NAMES[:4], url="/api/tournament_games")
+    assert resp.status_code == 400
+    assert "120000" in resp.get_json()["error"]
+    assert post_game(client, NAMES[:4], [50000, 40000, 20000, 10000], url="/api/tournament_games").status_code == 201
+    assert post_game(client, NAMES[:4]).status_code == 201
+
+
+def test_compute_standings_with_process_pool(monkeypatch):
+    rng = random.Random(3)
+    games = []
+    for _ in range(200):
+        cut = sorted(rng.randint(0, 200) * 500 for _ in range(3))
+        games.append((*rng.sample(NAMES, 4), cut[0], cut[1] - cut[0], cut[2] - cut[1], 100000 - cut[2]))
+    profile = {"uma": M_LEAGUE["uma"], "return_score": M_LEAGUE["return_score"]}
+    expected = madang.compute_standings(games, profile)
+    monkeypatch.setattr(madang, "STANDINGS_POOL_MIN_GAMES", 10)
+    monkeypatch.setattr(madang, "STANDINGS_CHUNK_GAMES", 64)
+    pooled = madang.compute_standings(games, profile)
+    assert pooled.keys() == expected.keys()
+    for name, a in expected.items():
+        assert pooled[name][:7] == a[:7]
+        assert pooled[name][7] == pytest.approx(a[7])
+
+
+@pytest.mark.parametrize("payload", [
+    {},
+    {**M_LEAGUE, "name": " "},
+    {**M_LEAGUE, "uma": [50, 10, -10]},
+    {**M_LEAGUE, "uma": "50,10,-10,-30"},
+    {**M_LEAGUE, "return_score": "삼만"},
+    {**M_LEAGUE, "total_score": 0},
+])
+def test_invalid_profiles(client, payload):
+    assert client.post("/api/scoring_profiles", json=payload).status_code == 400
+
+
+def test_profile_errors(client):
+    profile_id = create_profile(client)
+    assert client.post("/api/scoring_profiles", json=M_LEAGUE).status_code == 400   # 이름 중복
+    assert client.post(f"/api/scoring_profiles/{profile_id}/assign", json={"target": "archive:9"}).status_code == 404
+    assert client.post(f"/api/scoring_profiles/{profile_id}/assign", json={"target": "league"}).status_code == 400
+    assert client.post("/api/scoring_profiles/999/assign", json={"target": "games"}).status_code == 404
+    assert client.get("/api/standings?target=games&profile=999").status_code == 404
+    assert client.get("/api/standings?target=archive:x").status_code == 400
+    assert client.post("/api/standings", json={"target": "games", "profile": "1"}).status_code == 400
+
+    assert client.delete(f"/api/scoring_profiles/{madang.DEFAULT_PROFILE_ID}").status_code == 400
+    client.post(f"/api/scoring_profiles/{profile_id}/assign", json={"target": "games"})
+    assert client.delete(f"/api/scoring_profiles/{profile_id}").status_code == 400   # 배정돼 있음
+    client.post(f"/api/scoring_profiles/{madang.DEFAULT_PROFILE_ID}/assign", json={"target": "games"})
+    assert client.delete(f"/api/scoring_profiles/{profile_id}").status_code == 200
+    assert client.delete(f"/api/scoring_profiles/{profile_id}").status_code == 404
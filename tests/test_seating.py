@@ -0,0 +1,137 @@
+import pytest
+
+from conftest import post_game
+
+import seating
+from seating import SeatingError, plan_stats, schedule_balanced, schedule_swiss
+
+PLAYERS = [f"p{i:02d}" for i in range(16)]
+
+
+def assert_partition(tables, players):
+    assert all(len(t) == 4 for t in tables)
+    assert sorted(name for t in tables for name in t) == sorted(players)
+
+
+@pytest.mark.parametrize("players, message", [
+    (["a", "b", "c"], "multiple of 4"),
+    (["a", "b", "c", "d", "e"], "multiple of 4"),
+    (["a", "b", "c", " "], "empty"),
+    (["a", "b", "c", "a"], "duplicate"),
+])
+def test_check_players(players, message):
+    with pytest.raises(SeatingError, match=message):
+        seating.check_players(players)
+
+
+def test_balanced_rounds_never_repeat_a_pairing():
+    # 16명 5라운드는 겹치는 만남 없이 짤 수 있는 최대치(아핀 평면)
+    plan = schedule_balanced(PLAYERS, 5, seed=1, time_limit=0.5)
+    assert len(plan) == 5
+    for tables in plan:
+        assert_partition(tables, PLAYERS)
+    stats = plan_stats(plan)
+    assert stats["repeat_pairs"] == 0
+    assert stats["max_meetings"] == 1
+
+
+def test_balanced_spreads_seats():
+    # 4라운드면 누구나 동/남/서/북을 한 번씩
+    plan = schedule_balanced(PLAYERS, 4, seed=2, time_limit=0.3)
+    assert plan_stats(plan)["seat_spread"] == 0
+
+
+def test_balanced_continues_from_history():
+    first = schedule_balanced(PLAYERS, 2, seed=3, time_limit=0.2)
+    history = [t for tables in first for t in tables]
+    more = schedule_balanced(PLAYERS, 2, history, seed=4, time_limit=0.3)
+    assert plan_stats(more, history)["repeat_pairs"] == 0
+
+
+def test_same_seed_same_plan():
+    a = schedule_balanced(PLAYERS, 1, seed=5, time_limit=0.05)
+    b = schedule_balanced(PLAYERS, 1, seed=5, time_limit=0.05)
+    assert_partition(a[0], PLAYERS)
+    assert sorted(map(sorted, a[0])) == sorted(map(sorted, b[0]))
+
+
+def test_swiss_groups_by_rank():
+    tables = schedule_swiss(PLAYERS, seed=1, time_limit=0.1)
+    assert [sorted(t) for t in tables] == [PLAYERS[k:k + 4] for k in range(0, 16, 4)]
+
+
+def test_swiss_avoids_rematches():
+    history = [PLAYERS[k:k + 4] for k in range(0, 16, 4)]
+    tables = schedule_swiss(PLAYERS, history, seed=1, time_limit=0.3)
+    assert_partition(tables, PLAYERS)
+    assert plan_stats([tables], history)["repeat_pairs"] == 0
+    # 순위가 높은 탁부터
+    assert "p00" in tables[0]
+
+
+def test_schedule_preview_does_not_publish(client):
+    resp = client.post("/api/tournament/schedule", json={"players": PLAYERS, "rounds": 3, "seed": 1})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [r["round"] for r in body["rounds"]] == [1, 2, 3]
+    assert body["stats"]["repeat_pairs"] == 0
+    assert client.get("/api/tournament/rounds").get_json() == []
+
+
+@pytest.mark.parametrize("body", [
+    {"players": PLAYERS[:6]},
+    {"players": PLAYERS, "mode": "random"},
+    {"players": PLAYERS, "rounds": 0},
+    {"players": PLAYERS, "mode": "swiss", "rounds": 2},
+    {},   # 발표된 라운드가 없으면 참가자를 알 수 없다
+])
+def test_schedule_rejects_bad_input(client, body):
+    assert client.post("/api/tournament/schedule", json=body).status_code == 400
+
+
+def test_published_round_checks_results(client):
+    tables = [PLAYERS[k:k + 4] for k in range(0, 16, 4)]
+    resp = client.post("/api/tournament/rounds", json={"tables": tables})
+    assert resp.status_code == 201
+    assert resp.get_json()["mode"] == "manual"
+
+    url = "/api/tournament_games"
+    # 자리 순서가 다르거나 발표된 탁에 없는 조합이면 거절
+    assert post_game(client, tables[0][::-1], url=url).status_code == 400
+    assert post_game(client, [tables[0][0], *tables[1][:3]], url=url).status_code == 400
+    resp = post_game(client, tables[0], url=url)
+    assert resp.status_code == 201
+
+    rounds = client.get("/api/tournament/rounds").get_json()
+    assert rounds[0]["tables"][0]["game_id"] == resp.get_json()["id"]
+    assert rounds[0]["tables"][1]["game_id"] is None
+    # 같은 탁 결과를 또 넣을 수는 없다
+    assert post_game(client, tables[0], url=url).status_code == 400
+
+    # 결과가 있는 라운드는 취소 불가
+    assert client.delete("/api/tournament/rounds/1").status_code == 409
+
+
+def test_next_round_uses_published_history(client):
+    first = client.post("/api/tournament/rounds", json={"players": PLAYERS, "seed": 1}).get_json()
+    assert first["round"] == 1 and first["mode"] == "balanced"
+    # players 를 생략하면 지난 라운드 참가자로
+    second = client.post("/api/tournament/rounds", json={"seed": 2}).get_json()
+    assert second["round"] == 2
+    history = [t["players"] for t in first["tables"]]
+    assert plan_stats([[t["players"] for t in second["tables"]]], history)["repeat_pairs"] == 0
+
+    assert client.delete("/api/tournament/rounds/1").status_code == 409   # 마지막 라운드만
+    assert client.delete("/api/tournament/rounds/2").status_code == 200
+    assert client.delete("/api/tournament/rounds/5").status_code == 404
+    assert [r["round"] for r in client.get("/api/tournament/rounds").get_json()] == [1]
+
+
+def test_meeting_counts_from_history():
+    index = {name: i for i, name in enumerate(PLAYERS[:8])}
+    meet, seats = seating._history_counts(index, [PLAYERS[:4], PLAYERS[:4], ["p00", "zz", "p05", "p06"]])
+    assert meet[0][1] == 2 and meet[1][0] == 2
+    assert meet[0][5] == 1 and meet[0][4] == 0
+    assert seats[0] == [3, 0, 0, 0]
+    assert seats[5] == [0, 0, 1, 0]
+    assert all(meet[i][i] == 0 for i in range(8))
@@ -0,0 +1,168 @@
+import io
+import struct
+import zlib
+
+import pytest
+
+import snapshot_format as sf
+from snapshot_format import SnapshotError, SnapshotReader, write_snapshot
+
+RULES = {"uma": [20, 10, -10, -20], "return_score": 30000, "total_score": 100000}
+ARCHIVES = [
+    {
+        "name": "2024 봄 시즌",
+        "created_at": "2024-06-01T12:00",
+        "games": [
+            ("2024-03-01T19:00", "김철수", "이영희", "박민수", "최지우", 45000, 30000, 20000, 5000),
+            ("2024-03-02T19:30", "이영희", "김철수", "Alice", "박민수", 52000, 31000, 18000, -1000),
+            ("", "뷁쉛", "김철수", "", "최지우", 25000, 25000, 25000, 25000),
+        ],
+    },
+    {"name": "빈 아카이브", "created_at": "2024-07-01T00:00", "games": []},
+    {
+        "name": "2024 여름",
+        "created_at": "2024-09-01T00:00",
+        "games": [("2024-08-01T20:00", "a", "b", "c", "d", 40000, 30000, 20000, 10000)],
+    },
+]
+
+
+def snapshot_bytes(archives=ARCHIVES, rules=RULES):
+    buf = io.BytesIO()
+    write_snapshot(buf, rules, archives)
+    return bytearray(buf.getvalue())
+
+
+def save(tmp_path, data):
+    path = tmp_path / "x.mjsnap"
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+def header(data):
+    return list(sf._HEADER.unpack_from(data, 0))
+
+
+def fix_dir_crc(data):
+    # 디렉터리를 고친 뒤 헤더의 디렉터리 crc(마지막 필드)를 맞춘다
+    h = header(data)
+    d_end = sf._HEADER.size + sf._DIR_ENTRY.size * h[9]
+    h[-1] = zlib.crc32(bytes(data[sf._HEADER.size:d_end]))
+    sf._HEADER.pack_into(data, 0, *h)
+
+
+def test_round_trip(tmp_path):
+    path = save(tmp_path, snapshot_bytes())
+    with SnapshotReader(path) as snap:
+        assert snap.rules == RULES
+        assert [(a["name"], a["created_at"], a["game_count"]) for a in snap.archives] == [
+            (a["name"], a["created_at"], len(a["games"])) for a in ARCHIVES
+        ]
+        for i, a in enumerate(ARCHIVES):
+            assert list(snap.games(i)) == a["games"]
+
+
+def test_sections_are_aligned():
+    data = snapshot_bytes()
+    h = header(data)
+    assert h[10] % 8 == 0   # 문자열 테이블
+    for i in range(len(ARCHIVES)):
+        entry = sf._DIR_ENTRY.unpack_from(data, sf._HEADER.size + i * sf._DIR_ENTRY.size)
+        assert entry[4] % 8 == 0
+
+
+def test_bad_magic(tmp_path):
+    data = snapshot_bytes()
+    data[:8] = b"NOTSNAP\0"
+    with pytest.raises(SnapshotError, match="not a madang snapshot"):
+        SnapshotReader(save(tmp_path, data))
+
+
+def test_empty_file(tmp_path):
+    with pytest.raises(SnapshotError):
+        SnapshotReader(save(tmp_path, b""))
+
+
+@pytest.mark.parametrize("keep", [10, sf._HEADER.size + 8, -1])
+def test_truncated_file(tmp_path, keep):
+    data = snapshot_bytes()
+    with pytest.raises(SnapshotError):
+        SnapshotReader(save(tmp_path, data[:keep]))
+
+
+def test_directory_checksum(tmp_path):
+    data = snapshot_bytes()
+    data[sf._HEADER.size + 8] ^= 1   # 첫 아카이브의 대국 수
+    with pytest.raises(SnapshotError, match="directory checksum"):
+        SnapshotReader(save(tmp_path, data))
+
+
+def test_string_table_checksum(tmp_path):
+    data = snapshot_bytes()
+    data[-1] ^= 1
+    with pytest.raises(SnapshotError, match="string table checksum"):
+        SnapshotReader(save(tmp_path, data))
+
+
+def test_column_checksum_is_checked_on_read(tmp_path):
+    data = snapshot_bytes()
+    off = sf._DIR_ENTRY.unpack_from(data, sf._HEADER.size)[4]
+    data[off + 4 * 3 * 5] ^= 1   # 첫 아카이브 점수 1열
+    with SnapshotReader(save(tmp_path, data)) as snap:
+        assert list(snap.games(2)) == ARCHIVES[2]["games"]
+        with pytest.raises(SnapshotError, match="checksum mismatch"):
+            list(snap.games(0))
+
+
+def test_string_index_out_of_range(tmp_path):
+    # 체크섬까지 맞춘 파일이라도 이름 번호가 문자열 테이블 밖이면 거부한다
+    data = snapshot_bytes()
+    entry_at = sf._HEADER.size
+    entry = list(sf._DIR_ENTRY.unpack_from(data, entry_at))
+    off, n = entry[4], entry[2]
+    struct.pack_into("<I", data, off + 4 * n, 100000)   # 첫 대국의 player1
+    entry[5] = zlib.crc32(bytes(data[off:off + 36 * n]))
+    sf._DIR_ENTRY.pack_into(data, entry_at, *entry)
+    fix_dir_crc(data)
+
+    with SnapshotReader(save(tmp_path, data)) as snap:
+        with pytest.raises(SnapshotError, match="out of range"):
+            list(snap.games(0))
+        with pytest.raises(SnapshotError):
+            snap.string(-1)
+
+
+def test_archive_data_out_of_range(tmp_path):
+    data = snapshot_bytes()
+    entry = list(sf._DIR_ENTRY.unpack_from(data, sf._HEADER.size))
+    entry[2] = 10 ** 6
+    sf._DIR_ENTRY.pack_into(data, sf._HEADER.size, *entry)
+    fix_dir_crc(data)
+    with pytest.raises(SnapshotError, match="archive data out of range"):
+        SnapshotReader(save(tmp_path, data))
+
+
+def test_import_route_rejects_corrupt_snapshot(app, client):
+    data = snapshot_bytes()
+    data[-1] ^= 1
+    resp = client.post(
+        "/api/admin/snapshot_import", data={"file": (io.BytesIO(bytes(data)), "x.mjsnap")},
+    )
+    assert resp.status_code == 400
+    assert client.get("/api/archives").get_json() == []
+
+
+def test_export_import_round_trip(client):
+    resp = client.post(
+        "/api/admin/snapshot_import", data={"file": (io.BytesIO(bytes(snapshot_bytes())), "x.mjsnap")},
+    )
+    assert resp.status_code == 201
+    ids = [a["id"] for a in resp.get_json()["archives"]]
+    assert len(ids) == len(ARCHIVES)
+
+    exported = client.get("/api/admin/snapshot")
+    assert exported.status_code == 200
+    resp = client.post(
+        "/api/admin/snapshot_import", data={"file": (io.BytesIO(exported.data), "y.mjsnap")},
+    )
+    assert [a["game_count"] for a in resp.get_json()["archives"]] == [len(a["games"]) for a in ARCHIVES]